@@ -0,0 +1,48 @@
+"""Add provider_telemetry_aggregates table
+
+Revision ID: 3e7a9c15d2b8
+Revises: 8d3f1a6b2c94
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "3e7a9c15d2b8"
+down_revision: Union[str, Sequence[str], None] = "8d3f1a6b2c94"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "provider_telemetry_aggregates",
+        sa.Column(
+            "provider_id",
+            sa.Integer(),
+            sa.ForeignKey("providers.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("series_key", sa.String(length=128), nullable=False),
+        sa.Column("bucket_start", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("bucket_seconds", sa.Integer(), nullable=False),
+        sa.Column("sample_count", sa.Integer(), nullable=False),
+        sa.Column("min_value", sa.Float(), nullable=False),
+        sa.Column("max_value", sa.Float(), nullable=False),
+        sa.Column("avg_value", sa.Float(), nullable=False),
+        sa.Column("last_value", sa.Float(), nullable=False),
+        sa.Column("last_sample_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("unit", sa.String(length=32), nullable=True),
+        sa.Column("energy", sa.Float(), nullable=True),
+        sa.PrimaryKeyConstraint("provider_id", "series_key", "bucket_start"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("provider_telemetry_aggregates")
@@ -0,0 +1,53 @@
+"""Add provider_energy_hourly_rollups table
+
+Revision ID: 5c2e81d4a7f3
+Revises: 0b4f98b61c21
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "5c2e81d4a7f3"
+down_revision: Union[str, Sequence[str], None] = "0b4f98b61c21"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "provider_energy_hourly_rollups",
+        sa.Column(
+            "provider_id",
+            sa.Integer(),
+            sa.ForeignKey("providers.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("hour_start", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("sample_hold_seconds", sa.Float(), nullable=True),
+        sa.Column("energy", sa.Float(), nullable=True),
+        sa.Column("import_energy", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("export_energy", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("sample_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("first_sample_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("first_sample_value", sa.Float(), nullable=True),
+        sa.Column("last_sample_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("last_sample_value", sa.Float(), nullable=True),
+        sa.Column(
+            "computed_at",
+            sa.DateTime(timezone=True),
+            nullable=False,
+            server_default=sa.func.now(),
+        ),
+        sa.PrimaryKeyConstraint("provider_id", "hour_start"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("provider_energy_hourly_rollups")
@@ -0,0 +1,318 @@
+"""Partition provider_measurements and provider_metric_samples by month
+
+Revision ID: 8d3f1a6b2c94
+Revises: 5c2e81d4a7f3
+Create Date: 2026-10-17 00:00:00.000000
+
+Both tables are rebuilt as ``PARTITION BY RANGE (measured_at)`` parents
+with one partition per UTC month (``<table>_yYYYYmMM``) plus a default
+partition for rows outside every month partition. Existing rows are copied
+month by month, so the upgrade runs as long as one pass over the data;
+schedule it in a maintenance window on large installations.
+
+``measured_at`` is added to the primary key because a partitioned table
+can only enforce uniqueness on keys that include the partition column.
+Outgoing foreign keys of the original tables are recreated on the parents.
+Every secondary index is recreated as a partitioned index; unique ones get
+``measured_at`` appended for the same reason as the primary key. A
+``(provider_id, ..., measured_at)`` index is added for the repository
+queries, so a day query touches one small index regardless of history.
+
+Foreign keys pointing *at* these tables cannot survive: with the primary
+key on ``(id, measured_at)`` nothing can reference ``id`` alone. They are
+dropped, which removes ``provider_metric_samples.provider_measurement_id``
+-> ``provider_measurements.id`` (the column and its values stay; the link
+is kept by the writers). The downgrade restores that constraint as
+``NOT VALID`` because compaction may have removed referenced rows.
+
+"""
+
+from datetime import date, datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "8d3f1a6b2c94"
+down_revision: Union[str, Sequence[str], None] = "5c2e81d4a7f3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Months created ahead of the current one; later months are created by
+# the partition maintenance task.
+MONTHS_AHEAD = 3
+
+PARTITIONED_TABLES = {
+    "provider_measurements": ("provider_id", "measured_at"),
+    "provider_metric_samples": ("provider_id", "metric_key", "measured_at"),
+}
+
+# Incoming foreign keys restored by the downgrade:
+# (table, constraint, column, referenced table).
+DROPPED_FOREIGN_KEYS = (
+    (
+        "provider_metric_samples",
+        "provider_metric_samples_provider_measurement_id_fkey",
+        "provider_measurement_id",
+        "provider_measurements",
+    ),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    for table in PARTITIONED_TABLES:
+        for referencing_table, name in _incoming_foreign_keys(bind, table):
+            op.execute(f"ALTER TABLE {referencing_table} DROP CONSTRAINT {name}")
+    for table, index_columns in PARTITIONED_TABLES.items():
+        _partition_table(table, index_columns)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table, index_columns in PARTITIONED_TABLES.items():
+        _unpartition_table(table, index_columns)
+    for table, name, column, referenced_table in DROPPED_FOREIGN_KEYS:
+        op.execute(
+            f"ALTER TABLE {table} ADD CONSTRAINT {name} "
+            f"FOREIGN KEY ({column}) REFERENCES {referenced_table} (id) NOT VALID"
+        )
+
+
+def _partition_table(table: str, index_columns: tuple[str, ...]) -> None:
+    bind = op.get_bind()
+    staging = f"{table}_unpartitioned"
+    primary_key = _primary_key_columns(bind, table)
+    foreign_keys = _foreign_key_definitions(bind, table)
+    indexes = _index_definitions(bind, table)
+
+    op.execute(f"ALTER TABLE {table} RENAME TO {staging}")
+    op.execute(
+        f"CREATE TABLE {table} "
+        f"(LIKE {staging} INCLUDING ALL EXCLUDING INDEXES) "
+        "PARTITION BY RANGE (measured_at)"
+    )
+    _adopt_sequences(bind, table=table, source=staging)
+
+    row_count, null_count, first_measured_at = bind.execute(
+        sa.text(
+            "SELECT count(*), count(*) FILTER (WHERE measured_at IS NULL), "
+            f"min(measured_at) FROM {staging}"
+        )
+    ).one()
+    # measured_at joins the primary key, so such rows could not be kept.
+    if null_count:
+        raise RuntimeError(
+            f"{staging} has {null_count} rows without measured_at; "
+            "fix or delete them before partitioning"
+        )
+    current_month = _month_start(datetime.now(timezone.utc).date())
+    month = (
+        _month_start(_to_utc_aware(first_measured_at).date())
+        if first_measured_at
+        else current_month
+    )
+    last_month = _add_months(current_month, MONTHS_AHEAD)
+    while month <= last_month:
+        next_month = _add_months(month, 1)
+        partition = f"{table}_y{month.year:04d}m{month.month:02d}"
+        op.execute(
+            f"CREATE TABLE {partition} PARTITION OF {table} "
+            f"FOR VALUES FROM ({_bound(month)}) TO ({_bound(next_month)})"
+        )
+        op.execute(
+            f"INSERT INTO {partition} SELECT * FROM {staging} "
+            f"WHERE measured_at >= {_bound(month)} "
+            f"AND measured_at < {_bound(next_month)}"
+        )
+        month = next_month
+
+    op.execute(f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT")
+    op.execute(
+        f"INSERT INTO {table}_default SELECT * FROM {staging} "
+        f"WHERE measured_at >= {_bound(month)}"
+    )
+
+    copied_count = bind.execute(sa.text(f"SELECT count(*) FROM {table}")).scalar()
+    if copied_count != row_count:
+        raise RuntimeError(
+            f"Copied {copied_count} of {row_count} rows of {staging}; "
+            "keeping it and aborting"
+        )
+
+    _reset_sequences(bind, table)
+    op.execute(f"DROP TABLE {staging}")
+
+    if "measured_at" not in primary_key:
+        primary_key.append("measured_at")
+    op.execute(f"ALTER TABLE {table} ADD PRIMARY KEY ({', '.join(primary_key)})")
+    # The staging table and its indexes are gone, so the original index
+    # names are free again.
+    for definition, is_unique in indexes:
+        op.execute(_with_partition_key(definition) if is_unique else definition)
+    _create_lookup_index(table, index_columns)
+    for name, definition in foreign_keys:
+        op.execute(f"ALTER TABLE {table} ADD CONSTRAINT {name} {definition}")
+
+
+def _unpartition_table(table: str, index_columns: tuple[str, ...]) -> None:
+    bind = op.get_bind()
+    partitioned = f"{table}_partitioned"
+    primary_key = [
+        column
+        for column in _primary_key_columns(bind, table)
+        if column != "measured_at"
+    ]
+    foreign_keys = _foreign_key_definitions(bind, table)
+    indexes = _index_definitions(bind, table)
+
+    op.execute(f"ALTER TABLE {table} RENAME TO {partitioned}")
+    op.execute(f"ALTER TABLE {partitioned} DROP CONSTRAINT {table}_pkey")
+    op.execute(
+        f"CREATE TABLE {table} (LIKE {partitioned} INCLUDING ALL EXCLUDING INDEXES)"
+    )
+    _adopt_sequences(bind, table=table, source=partitioned)
+    op.execute(f"INSERT INTO {table} SELECT * FROM {partitioned}")
+    _reset_sequences(bind, table)
+    op.execute(f"DROP TABLE {partitioned} CASCADE")
+
+    if primary_key:
+        op.execute(f"ALTER TABLE {table} ADD PRIMARY KEY ({', '.join(primary_key)})")
+    for definition, _ in indexes:
+        op.execute(definition.replace(" ON ONLY ", " ON ", 1))
+    _create_lookup_index(table, index_columns)
+    for name, definition in foreign_keys:
+        op.execute(f"ALTER TABLE {table} ADD CONSTRAINT {name} {definition}")
+
+
+def _primary_key_columns(bind, table: str) -> list[str]:
+    rows = bind.execute(
+        sa.text(
+            "SELECT a.attname FROM pg_index i "
+            "JOIN pg_attribute a ON a.attrelid = i.indrelid "
+            "AND a.attnum = ANY(i.indkey) "
+            "WHERE i.indrelid = CAST(:table AS regclass) AND i.indisprimary "
+            "ORDER BY array_position(i.indkey, a.attnum)"
+        ),
+        {"table": table},
+    )
+    return [name for (name,) in rows]
+
+
+def _foreign_key_definitions(bind, table: str) -> list[tuple[str, str]]:
+    rows = bind.execute(
+        sa.text(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = CAST(:table AS regclass) AND contype = 'f' "
+            "AND conparentid = 0"
+        ),
+        {"table": table},
+    )
+    return [(name, definition) for name, definition in rows]
+
+
+def _incoming_foreign_keys(bind, table: str) -> list[tuple[str, str]]:
+    """``(referencing table, constraint)`` of foreign keys targeting ``table``."""
+    rows = bind.execute(
+        sa.text(
+            "SELECT CAST(conrelid AS regclass)::text, conname FROM pg_constraint "
+            "WHERE confrelid = CAST(:table AS regclass) AND contype = 'f' "
+            "AND conrelid <> confrelid AND conparentid = 0"
+        ),
+        {"table": table},
+    )
+    return [(referencing_table, name) for referencing_table, name in rows]
+
+
+def _index_definitions(bind, table: str) -> list[tuple[str, bool]]:
+    """``CREATE INDEX`` statements of the secondary indexes of ``table``."""
+    rows = bind.execute(
+        sa.text(
+            "SELECT pg_get_indexdef(indexrelid), indisunique FROM pg_index "
+            "WHERE indrelid = CAST(:table AS regclass) AND NOT indisprimary"
+        ),
+        {"table": table},
+    )
+    return [(definition, is_unique) for definition, is_unique in rows]
+
+
+def _with_partition_key(definition: str) -> str:
+    # "CREATE UNIQUE INDEX name ON table USING btree (a, b) [INCLUDE ...]":
+    # the first parenthesized list holds the key columns.
+    columns_start = definition.index("(")
+    columns_end = definition.index(")", columns_start)
+    columns = definition[columns_start + 1 : columns_end]
+    if "measured_at" in [column.strip() for column in columns.split(",")]:
+        return definition
+    return f"{definition[:columns_end]}, measured_at{definition[columns_end:]}"
+
+
+def _create_lookup_index(table: str, index_columns: tuple[str, ...]) -> None:
+    op.execute(
+        f"CREATE INDEX IF NOT EXISTS ix_{table}_{'_'.join(index_columns)} "
+        f"ON {table} ({', '.join(index_columns)})"
+    )
+
+
+def _sequence_columns(bind, table: str) -> list[tuple[str, bool]]:
+    """Columns backed by a sequence, with whether they are identity columns."""
+    rows = bind.execute(
+        sa.text(
+            "SELECT column_name, is_identity = 'YES' "
+            "FROM information_schema.columns "
+            "WHERE table_schema = current_schema() AND table_name = :table "
+            "AND (is_identity = 'YES' OR column_default LIKE 'nextval(%')"
+        ),
+        {"table": table},
+    )
+    return [(name, is_identity) for name, is_identity in rows]
+
+
+def _adopt_sequences(bind, *, table: str, source: str) -> None:
+    # A serial default still points at the sequence owned by the source
+    # table; hand it over so dropping the source keeps the sequence. Identity
+    # columns get their own sequence from LIKE ... INCLUDING ALL instead.
+    for column, is_identity in _sequence_columns(bind, table):
+        if is_identity:
+            continue
+        sequence = bind.execute(
+            sa.text("SELECT pg_get_serial_sequence(:table, :column)"),
+            {"table": source, "column": column},
+        ).scalar()
+        if sequence:
+            op.execute(f"ALTER SEQUENCE {sequence} OWNED BY {table}.{column}")
+
+
+def _reset_sequences(bind, table: str) -> None:
+    for column, _ in _sequence_columns(bind, table):
+        sequence = bind.execute(
+            sa.text("SELECT pg_get_serial_sequence(:table, :column)"),
+            {"table": table, "column": column},
+        ).scalar()
+        if sequence:
+            op.execute(
+                f"SELECT setval('{sequence}', "
+                f"coalesce((SELECT max({column}) FROM {table}), 0) + 1, false)"
+            )
+
+
+def _to_utc_aware(ts: datetime) -> datetime:
+    # A naive value comes from "timestamp without time zone" and is UTC.
+    if ts.tzinfo is None:
+        return ts.replace(tzinfo=timezone.utc)
+    return ts.astimezone(timezone.utc)
+
+
+def _bound(month: date) -> str:
+    return f"'{month.isoformat()} 00:00:00+00'"
+
+
+def _month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def _add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
@@ -0,0 +1,64 @@
+"""Add provider_revenue_hourly_ledger table
+
+Revision ID: b7e4d2a91f06
+Revises: 3e7a9c15d2b8
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "b7e4d2a91f06"
+down_revision: Union[str, Sequence[str], None] = "3e7a9c15d2b8"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "provider_revenue_hourly_ledger",
+        sa.Column(
+            "provider_id",
+            sa.Integer(),
+            sa.ForeignKey("providers.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("market", sa.String(length=32), nullable=False),
+        sa.Column("hour_start", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("sample_hold_seconds", sa.Float(), nullable=True),
+        sa.Column("export_energy", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("revenue", sa.Float(), nullable=False, server_default="0"),
+        sa.Column(
+            "matched_intervals", sa.Integer(), nullable=False, server_default="0"
+        ),
+        sa.Column("currency", sa.String(length=8), nullable=True),
+        sa.Column("energy_unit", sa.String(length=8), nullable=True),
+        sa.Column(
+            "computed_at",
+            sa.DateTime(timezone=True),
+            nullable=False,
+            server_default=sa.func.now(),
+        ),
+        sa.PrimaryKeyConstraint("provider_id", "market", "hour_start"),
+    )
+    # Price writes invalidate the hours of one market interval for every
+    # provider, which the primary key cannot serve.
+    op.create_index(
+        "ix_provider_revenue_hourly_ledger_market_hour",
+        "provider_revenue_hourly_ledger",
+        ["market", "hour_start"],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        "ix_provider_revenue_hourly_ledger_market_hour",
+        table_name="provider_revenue_hourly_ledger",
+    )
+    op.drop_table("provider_revenue_hourly_ledger")
@@ -0,0 +1,75 @@
+"""Invalidate energy rollups on measurement writes
+
+Revision ID: e2c7a94b1d53
+Revises: b7e4d2a91f06
+Create Date: 2026-10-17 00:00:00.000000
+
+Measurements are written by collectors running in other processes, so
+rollups are invalidated by the database instead of by API session hooks.
+Statement-level triggers read the written rows from a transition table,
+so a batch insert costs one DELETE. Deletes are not tracked: compaction
+keeps the energy of the rows it removes, and retention drops whole
+partitions without firing triggers.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e2c7a94b1d53"
+down_revision: Union[str, Sequence[str], None] = "b7e4d2a91f06"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (trigger, event, transition table): an update invalidates the hours the
+# rows left as well as the hours they moved to.
+ROLLUP_TRIGGERS = (
+    ("provider_measurements_rollups_insert", "INSERT", "NEW"),
+    ("provider_measurements_rollups_update_new", "UPDATE", "NEW"),
+    ("provider_measurements_rollups_update_old", "UPDATE", "OLD"),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # A sample changes its own hour and, through sample-hold carry, every
+    # later hour of the same UTC day.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION invalidate_energy_rollups() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            DELETE FROM provider_energy_hourly_rollups AS rollup
+            USING (
+                SELECT
+                    provider_id,
+                    date_trunc('day', measured_at AT TIME ZONE 'UTC') AS day,
+                    min(
+                        date_trunc('hour', measured_at AT TIME ZONE 'UTC')
+                    ) AS first_hour
+                FROM touched_measurements
+                GROUP BY
+                    provider_id,
+                    date_trunc('day', measured_at AT TIME ZONE 'UTC')
+            ) AS touched
+            WHERE rollup.provider_id = touched.provider_id
+              AND rollup.hour_start >= touched.first_hour AT TIME ZONE 'UTC'
+              AND rollup.hour_start
+                  < (touched.day + interval '1 day') AT TIME ZONE 'UTC';
+            RETURN NULL;
+        END;
+        $$
+        """)
+    for name, event, transition in ROLLUP_TRIGGERS:
+        op.execute(
+            f"CREATE TRIGGER {name} AFTER {event} ON provider_measurements "
+            f"REFERENCING {transition} TABLE AS touched_measurements "
+            "FOR EACH STATEMENT EXECUTE FUNCTION invalidate_energy_rollups()"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, _, _ in ROLLUP_TRIGGERS:
+        op.execute(f"DROP TRIGGER IF EXISTS {name} ON provider_measurements")
+    op.execute("DROP FUNCTION IF EXISTS invalidate_energy_rollups()")
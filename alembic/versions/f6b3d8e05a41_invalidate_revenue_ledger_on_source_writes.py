@@ -0,0 +1,134 @@
+"""Invalidate the revenue ledger on measurement and market price writes
+
+Revision ID: f6b3d8e05a41
+Revises: e2c7a94b1d53
+Create Date: 2026-10-17 00:00:00.000000
+
+Like the energy rollup triggers, these replace API session hooks so that
+collectors and price importers in other processes keep the ledger
+current. A measurement drops its hour and the rest of its UTC day for the
+provider; a price drops the ledger hours overlapping its interval for
+every provider of the market.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "f6b3d8e05a41"
+down_revision: Union[str, Sequence[str], None] = "e2c7a94b1d53"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (table, trigger, event, transition table, function)
+LEDGER_TRIGGERS = (
+    (
+        "provider_measurements",
+        "provider_measurements_ledger_insert",
+        "INSERT",
+        "NEW",
+        "invalidate_revenue_ledger",
+    ),
+    (
+        "provider_measurements",
+        "provider_measurements_ledger_update_new",
+        "UPDATE",
+        "NEW",
+        "invalidate_revenue_ledger",
+    ),
+    (
+        "provider_measurements",
+        "provider_measurements_ledger_update_old",
+        "UPDATE",
+        "OLD",
+        "invalidate_revenue_ledger",
+    ),
+    (
+        "market_energy_prices",
+        "market_energy_prices_ledger_insert",
+        "INSERT",
+        "NEW",
+        "invalidate_market_revenue_ledger",
+    ),
+    (
+        "market_energy_prices",
+        "market_energy_prices_ledger_update_new",
+        "UPDATE",
+        "NEW",
+        "invalidate_market_revenue_ledger",
+    ),
+    (
+        "market_energy_prices",
+        "market_energy_prices_ledger_update_old",
+        "UPDATE",
+        "OLD",
+        "invalidate_market_revenue_ledger",
+    ),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("""
+        CREATE OR REPLACE FUNCTION invalidate_revenue_ledger() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            DELETE FROM provider_revenue_hourly_ledger AS ledger
+            USING (
+                SELECT
+                    provider_id,
+                    date_trunc('day', measured_at AT TIME ZONE 'UTC') AS day,
+                    min(
+                        date_trunc('hour', measured_at AT TIME ZONE 'UTC')
+                    ) AS first_hour
+                FROM touched_rows
+                GROUP BY
+                    provider_id,
+                    date_trunc('day', measured_at AT TIME ZONE 'UTC')
+            ) AS touched
+            WHERE ledger.provider_id = touched.provider_id
+              AND ledger.hour_start >= touched.first_hour AT TIME ZONE 'UTC'
+              AND ledger.hour_start
+                  < (touched.day + interval '1 day') AT TIME ZONE 'UTC';
+            RETURN NULL;
+        END;
+        $$
+        """)
+    # A price without a usable end covers the rest of its starting hour.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION invalidate_market_revenue_ledger() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            DELETE FROM provider_revenue_hourly_ledger AS ledger
+            USING touched_rows AS price
+            WHERE ledger.market = price.market::text
+              AND ledger.hour_start >= date_trunc(
+                  'hour', price.interval_start AT TIME ZONE 'UTC'
+              ) AT TIME ZONE 'UTC'
+              AND ledger.hour_start < CASE
+                  WHEN price.interval_end > price.interval_start
+                      THEN price.interval_end
+                  ELSE (
+                      date_trunc('hour', price.interval_start AT TIME ZONE 'UTC')
+                      + interval '1 hour'
+                  ) AT TIME ZONE 'UTC'
+              END;
+            RETURN NULL;
+        END;
+        $$
+        """)
+    for table, name, event, transition, function in LEDGER_TRIGGERS:
+        op.execute(
+            f"CREATE TRIGGER {name} AFTER {event} ON {table} "
+            f"REFERENCING {transition} TABLE AS touched_rows "
+            f"FOR EACH STATEMENT EXECUTE FUNCTION {function}()"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table, name, _, _, _ in LEDGER_TRIGGERS:
+        op.execute(f"DROP TRIGGER IF EXISTS {name} ON {table}")
+    op.execute("DROP FUNCTION IF EXISTS invalidate_market_revenue_ledger()")
+    op.execute("DROP FUNCTION IF EXISTS invalidate_revenue_ledger()")
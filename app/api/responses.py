@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import dataclasses
+import functools
+import inspect
+from types import UnionType
+from typing import Any, Callable, Union, get_args, get_origin
+
+import orjson
+from fastapi.responses import JSONResponse, Response
+from fastapi.routing import APIRoute, APIRouter
+from pydantic import BaseModel
+
+
+class ModelJSONResponse(JSONResponse):
+    """JSON response that serializes a pydantic model in one pass.
+
+    A pydantic model is serialized by pydantic's own JSON serializer; other
+    content is rendered with orjson, with nested models dumped in JSON mode
+    by alias. Either way the body matches what FastAPI would produce for the
+    same models. ``exclude`` drops fields of a model while it is serialized,
+    in pydantic's format.
+    """
+
+    def __init__(self, content: Any, *args, exclude: Any = None, **kwargs):
+        self.exclude = exclude
+        super().__init__(content, *args, **kwargs)
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, BaseModel):
+            return content.__pydantic_serializer__.to_json(
+                content,
+                by_alias=True,
+                exclude=self.exclude,
+            )
+        return orjson.dumps(content, default=_encode_model)
+
+
+class SerializeOnceRoute(APIRoute):
+    """Route that serializes an already-built response model exactly once.
+
+    FastAPI validates a returned model against ``response_model`` again
+    before encoding it. When an endpoint returns an instance of exactly the
+    declared model (or a list of them), that second pass adds nothing, so
+    the result is sent as an ``ModelJSONResponse`` directly. Anything else,
+    including ORM objects or subclasses that rely on the response model for
+    filtering, goes through the regular FastAPI path. The OpenAPI schema is
+    built from ``response_model`` and stays unchanged.
+    """
+
+    def get_route_handler(self):
+        model_types, many = _declared_model_types(self.response_model)
+        if not model_types or self._uses_response_model_filters():
+            return super().get_route_handler()
+
+        dependant = self.dependant
+        self.dependant = dataclasses.replace(
+            dependant,
+            call=_serialize_once(
+                dependant.call,
+                model_types,
+                many,
+                dependant.response_param_name,
+                self.status_code,
+            ),
+        )
+        try:
+            return super().get_route_handler()
+        finally:
+            self.dependant = dependant
+
+    def _uses_response_model_filters(self) -> bool:
+        return bool(
+            self.response_model_include
+            or self.response_model_exclude
+            or not self.response_model_by_alias
+            or self.response_model_exclude_unset
+            or self.response_model_exclude_defaults
+            or self.response_model_exclude_none
+        )
+
+
+def _serialize_once(
+    call: Callable[..., Any],
+    model_types: tuple[type, ...],
+    many: bool,
+    response_param_name: str | None = None,
+    status_code: int | None = None,
+):
+    # Headers and a status code set on an injected ``Response`` parameter
+    # are copied over, as FastAPI does for results it serializes itself;
+    # without one the route's declared status code applies.
+    if inspect.iscoroutinefunction(call):
+
+        @functools.wraps(call)
+        async def async_endpoint(*args, **kwargs):
+            return _as_response(
+                await call(*args, **kwargs),
+                model_types,
+                many,
+                kwargs.get(response_param_name) if response_param_name else None,
+                status_code,
+            )
+
+        return async_endpoint
+
+    @functools.wraps(call)
+    def endpoint(*args, **kwargs):
+        return _as_response(
+            call(*args, **kwargs),
+            model_types,
+            many,
+            kwargs.get(response_param_name) if response_param_name else None,
+            status_code,
+        )
+
+    return endpoint
+
+
+def _as_response(
+    result: Any,
+    model_types: tuple[type, ...],
+    many: bool,
+    sub_response: Response | None = None,
+    status_code: int | None = None,
+) -> Any:
+    if many:
+        if isinstance(result, list) and all(
+            type(item) in model_types for item in result
+        ):
+            return _merge_sub_response(
+                ModelJSONResponse(result), sub_response, status_code
+            )
+    elif type(result) in model_types:
+        return _merge_sub_response(
+            ModelJSONResponse(result), sub_response, status_code
+        )
+    return result
+
+
+def _merge_sub_response(
+    response: ModelJSONResponse,
+    sub_response: Response | None,
+    status_code: int | None = None,
+) -> ModelJSONResponse:
+    if sub_response is not None:
+        response.headers.raw.extend(sub_response.headers.raw)
+        if sub_response.status_code:
+            status_code = sub_response.status_code
+    if status_code:
+        response.status_code = status_code
+    return response
+
+
+def serialize_once_get(router: APIRouter, path: str, **kwargs):
+    """``router.get`` registering a single route as a ``SerializeOnceRoute``.
+
+    For routers whose other routes should keep the regular route class.
+    """
+
+    def decorator(endpoint: Callable[..., Any]) -> Callable[..., Any]:
+        router.add_api_route(
+            path,
+            endpoint,
+            methods=["GET"],
+            route_class_override=SerializeOnceRoute,
+            **kwargs,
+        )
+        return endpoint
+
+    return decorator
+
+
+def _declared_model_types(response_model: Any) -> tuple[tuple[type, ...], bool]:
+    """Return the exact model classes a result may have to skip validation.
+
+    ``Model`` and ``A | B`` yield their classes, ``list[Model]`` yields the
+    item classes with ``many`` set. Any other shape yields no classes and
+    keeps the regular path.
+    """
+    if isinstance(response_model, type) and issubclass(response_model, BaseModel):
+        return (response_model,), False
+
+    origin = get_origin(response_model)
+    args = get_args(response_model)
+    if origin is list and len(args) == 1:
+        item_types, item_many = _declared_model_types(args[0])
+        if item_types and not item_many:
+            return item_types, True
+    elif origin in (Union, UnionType):
+        members = [_declared_model_types(arg) for arg in args]
+        if all(types and not many for types, many in members):
+            return tuple(cls for types, _ in members for cls in types), False
+    return (), False
+
+
+def _encode_model(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json", by_alias=True)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
@@ -4,6 +4,7 @@ from uuid import UUID
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 
+from app.api.responses import serialize_once_get
 from smart_common.core.db import get_db
 from smart_common.core.dependencies import get_current_user
 from smart_common.models.user import User
@@ -31,7 +32,7 @@ device_router = APIRouter(
 # =====================================================
 
 
-@device_router.get("", response_model=list[DeviceResponse])
+@serialize_once_get(device_router, "", response_model=list[DeviceResponse])
 def list_devices(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
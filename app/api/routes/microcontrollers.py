@@ -6,6 +6,7 @@ from uuid import UUID
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 
+from app.api.responses import serialize_once_get
 from smart_common.core.db import get_db
 from smart_common.core.dependencies import get_current_user
 from smart_common.models.user import User
@@ -31,7 +32,8 @@ microcontroller_router = APIRouter(
 # =====================================================
 
 
-@microcontroller_router.get(
+@serialize_once_get(
+    microcontroller_router,
     "/get_for_user",
     response_model=list[MicrocontrollerResponse],
 )
@@ -1,14 +1,91 @@
 from __future__ import annotations
 
-from collections import defaultdict
+from contextlib import contextmanager
 import logging
 from datetime import date as date_type
 from datetime import datetime, timedelta, timezone
+from enum import Enum
+from typing import Annotated
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, Query, HTTPException
+from fastapi import APIRouter, Depends, Header, Query, HTTPException
+from fastapi.responses import Response, StreamingResponse
 from sqlalchemy.orm import Session
 
+from app.api.responses import ModelJSONResponse, SerializeOnceRoute
+from app.models.provider_energy_rollup import ProviderEnergyHourlyRollup
+from app.models.provider_revenue_ledger import ProviderRevenueHourlyLedger
+from app.repositories.device_event import DeviceEventRepository
+from app.repositories.energy_rollup import EnergyRollupRepository
+from app.repositories.market_energy_price import MarketEnergyPriceRepository
+from app.repositories.measurement_repository import (
+    MeasurementRepository,
+    SeriesVersion,
+)
+from app.repositories.provider import ProviderRepository
+from app.repositories.revenue_ledger import RevenueLedgerRepository
+from app.schemas.columnar_series import (
+    ColumnarEnergySeriesOut,
+    ColumnarMetricSeriesOut,
+    ColumnarPowerSeriesOut,
+    SeriesFormat,
+)
+from app.schemas.measurement_export import ExportFormat
+from app.schemas.provider_energy_range import (
+    EnergyRangeGranularity,
+    ProviderEnergyRangeOut,
+)
+from app.schemas.provider_revenue_range import ProviderRevenueRangeOut, RevenuePeriodOut
+from app.schemas.provider_telemetry_batch import ProviderTelemetryBatchOut
+from app.schemas.response_sections import (
+    ENERGY_SECTIONS,
+    TELEMETRY_SECTIONS,
+    ResponseSection,
+)
+from app.services.conditional_get import (
+    build_etag,
+    etag_matches,
+    not_modified,
+    tag_response,
+)
+from app.services.current_hour_pool import CurrentHourPool, get_current_hour_pool_store
+from app.services.downsampling import MIN_DOWNSAMPLE_POINTS, downsample_lttb
+from app.services.energy_engine import RevenueMatch
+from app.services.energy_integration import (
+    build_day_power_samples,
+    build_window_samples,
+    energy_unit_from_power,
+    integrate_hourly,
+    is_sample_fresh_for_boundary,
+    resolve_closed_until,
+    resolve_day_window,
+)
+from app.services.energy_rollup_service import (
+    compute_day_rollups,
+    compute_hourly_rollups,
+    list_missing_rollup_days,
+    max_cold_rollup_days,
+)
+from app.services.market_price_index import MarketPriceIndex
+from app.services.market_price_store import get_market_price_store, load_market_prices
+from app.services.measurement_export import EXPORT_MEDIA_TYPES, iter_export_chunks
+from app.services.power_sample_loader import PowerSampleLoader
+from app.services.power_series import PowerSeries
+from app.services.revenue_ledger_service import (
+    REVENUE_LEDGER_MARKET,
+    compute_ledger_day,
+    list_missing_ledger_days,
+    list_revenue_ledger_day,
+    revenue_match_from_ledger,
+)
+from app.services.revenue_matching import (
+    convert_market_price_to_energy_unit,
+    match_market_revenue,
+)
+from app.services.request_coalescing import get_request_coalescer
+from app.services.sample_hold import resolve_sample_hold_seconds
+from app.services.telemetry_cache import get_telemetry_cache
+from app.services.telemetry_stream import get_telemetry_stream_hub, stream_events
 from smart_common.core.db import get_db
 from smart_common.core.dependencies import get_current_user
 from smart_common.enums.provider_telemetry import (
@@ -21,10 +98,6 @@ from smart_common.models.device import Device
 from smart_common.models.microcontroller import Microcontroller
 from smart_common.models.user import User
 from smart_common.providers.enums import ProviderKind, ProviderType
-from smart_common.repositories.device_event import DeviceEventRepository
-from smart_common.repositories.market_energy_price import MarketEnergyPriceRepository
-from smart_common.repositories.provider import ProviderRepository
-from smart_common.repositories.measurement_repository import MeasurementRepository
 from smart_common.schemas.provider_measurement_schemas import (
     DayPowerOut,
     DayEnergyOut,
@@ -44,32 +117,49 @@ from smart_common.schemas.provider_measurement_schemas import (
     ProviderPowerSeriesOut,
 )
 from smart_common.schemas.provider_schema import ProviderTelemetryResponse
-from smart_common.services.energy_calculation_service import (
-    EnergyCalculationService,
-    PowerSample,
-)
+from smart_common.services.energy_calculation_service import PowerSample
 
 logger = logging.getLogger(__name__)
 
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
 provider_measurements_router = APIRouter(
     prefix="/provider-measurements",
     tags=["Provider Telemetry"],
+    route_class=SerializeOnceRoute,
 )
 
 BATTERY_SOC_METRIC_KEY = "battery_soc"
 GRID_POWER_METRIC_KEY = "grid_power"
+MAX_ENERGY_RANGE_DAYS = {
+    EnergyRangeGranularity.HOUR: 31,
+    EnergyRangeGranularity.DAY: 366,
+    EnergyRangeGranularity.MONTH: 3660,
+}
+MAX_BATCH_PROVIDERS = 20
 
 
 @provider_measurements_router.get(
     "/provider/{provider_uuid}/energy",
-    response_model=ProviderEnergySeriesOut,
+    response_model=ProviderEnergySeriesOut | ColumnarEnergySeriesOut,
 )
 def list_provider_energy(
     provider_uuid: UUID,
+    response: Response,
     selected_date: date_type | None = Query(None, alias="date"),
+    series_format: Annotated[
+        SeriesFormat, Query(alias="format")
+    ] = SeriesFormat.OBJECTS,
+    since: Annotated[datetime | None, Query()] = None,
+    include: Annotated[
+        list[str] | None,
+        Query(description="Sections to return: hours, totals, entries (default all)"),
+    ] = None,
+    if_none_match: Annotated[str | None, Header()] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
-) -> ProviderEnergySeriesOut:
+) -> ProviderEnergySeriesOut | ModelJSONResponse | Response:
+    sections = _resolve_sections(include, allowed=ENERGY_SECTIONS)
     provider = _get_provider_or_404(
         db=db,
         provider_uuid=provider_uuid,
@@ -77,30 +167,218 @@ def list_provider_energy(
     )
 
     now = datetime.now(timezone.utc)
-    start, end = _resolve_day_window(selected_date=selected_date, now=now)
+    start, end = resolve_day_window(selected_date=selected_date, now=now)
+    since = _resolve_since(since, start=start)
     repo = MeasurementRepository(db)
-    max_interval_seconds = _resolve_sample_hold_seconds(
+    max_interval_seconds = resolve_sample_hold_seconds(
+        provider.default_expected_interval_sec
+    )
+    etag = build_etag(
+        "energy",
+        *_energy_validator(
+            provider=provider,
+            repo=repo,
+            start=start,
+            end=end,
+            max_interval_seconds=max_interval_seconds,
+        ),
+        series_format,
+        since,
+        sorted(section.value for section in sections),
+    )
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+
+    coalesce_key = (
+        "energy",
+        provider.id,
+        start.date(),
+        max_interval_seconds,
+        series_format.value,
+        since,
+        tuple(sorted(section.value for section in sections)),
+    )
+    if series_format == SeriesFormat.COLUMNAR:
+        return tag_response(
+            ModelJSONResponse(
+                _coalesce(
+                    coalesce_key,
+                    lambda: _build_columnar_energy_series(
+                        provider=provider,
+                        repo=repo,
+                        rollup_repo=EnergyRollupRepository(db),
+                        start=start,
+                        end=end,
+                        max_interval_seconds=max_interval_seconds,
+                        since=since,
+                        sections=sections,
+                    ),
+                )
+            ),
+            response,
+            etag,
+        )
+    energy_series = _coalesce(
+        coalesce_key,
+        lambda: _build_provider_energy_series(
+            provider=provider,
+            repo=repo,
+            rollup_repo=EnergyRollupRepository(db),
+            start=start,
+            end=end,
+            max_interval_seconds=max_interval_seconds,
+            since=since,
+            sections=sections,
+        ),
+    )
+    if sections != ENERGY_SECTIONS:
+        return tag_response(
+            ModelJSONResponse(
+                energy_series,
+                exclude={"days": {"__all__": _day_exclude(sections)}},
+            ),
+            response,
+            etag,
+        )
+    return tag_response(energy_series, response, etag)
+
+
+@provider_measurements_router.get(
+    "/provider/{provider_uuid}/energy/range",
+    response_model=ProviderEnergyRangeOut,
+)
+def list_provider_energy_range(
+    provider_uuid: UUID,
+    response: Response,
+    date_from: date_type = Query(..., alias="start"),
+    date_to: date_type = Query(..., alias="end"),
+    granularity: EnergyRangeGranularity = Query(EnergyRangeGranularity.DAY),
+    if_none_match: Annotated[str | None, Header()] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+) -> ProviderEnergyRangeOut | Response:
+    provider = _get_provider_or_404(
+        db=db,
+        provider_uuid=provider_uuid,
+        user_id=current_user.id,
+    )
+
+    if date_to < date_from:
+        raise HTTPException(
+            status_code=422,
+            detail="Range end must not be before range start",
+        )
+    if (date_to - date_from).days + 1 > MAX_ENERGY_RANGE_DAYS[granularity]:
+        raise HTTPException(
+            status_code=422,
+            detail=(
+                f"Range for {granularity.value} granularity is limited to "
+                f"{MAX_ENERGY_RANGE_DAYS[granularity]} days"
+            ),
+        )
+
+    now = datetime.now(timezone.utc)
+    max_interval_seconds = resolve_sample_hold_seconds(
         provider.default_expected_interval_sec
     )
-    return _build_provider_energy_series(
+    repo = MeasurementRepository(db)
+    range_start, _ = resolve_day_window(selected_date=date_from, now=now)
+    _, range_end = resolve_day_window(selected_date=date_to, now=now)
+    etag = build_etag(
+        "energy-range",
+        *_energy_validator(
+            provider=provider,
+            repo=repo,
+            start=range_start,
+            end=min(range_end, now),
+            max_interval_seconds=max_interval_seconds,
+        ),
+        granularity,
+    )
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+
+    result = _build_provider_energy_range(
         provider=provider,
         repo=repo,
-        start=start,
-        end=end,
+        rollup_repo=EnergyRollupRepository(db),
+        date_from=date_from,
+        date_to=date_to,
+        granularity=granularity,
+        now=now,
         max_interval_seconds=max_interval_seconds,
+        max_cold_days=max_cold_rollup_days(),
+    )
+    # The validator does not see rollups, so an incomplete range is not
+    # tagged and the client reloads it once the backfill has run.
+    return tag_response(result, response, None if result.pending_days else etag)
+
+
+@provider_measurements_router.get(
+    "/provider/{provider_uuid}/revenue/range",
+    response_model=ProviderRevenueRangeOut,
+)
+def list_provider_revenue_range(
+    provider_uuid: UUID,
+    date_from: date_type = Query(..., alias="start"),
+    date_to: date_type = Query(..., alias="end"),
+    granularity: EnergyRangeGranularity = Query(EnergyRangeGranularity.MONTH),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+) -> ProviderRevenueRangeOut:
+    provider = _get_provider_or_404(
+        db=db,
+        provider_uuid=provider_uuid,
+        user_id=current_user.id,
+    )
+
+    if date_to < date_from:
+        raise HTTPException(
+            status_code=422,
+            detail="Range end must not be before range start",
+        )
+    if (date_to - date_from).days + 1 > MAX_ENERGY_RANGE_DAYS[granularity]:
+        raise HTTPException(
+            status_code=422,
+            detail=(
+                f"Range for {granularity.value} granularity is limited to "
+                f"{MAX_ENERGY_RANGE_DAYS[granularity]} days"
+            ),
+        )
+
+    return _build_provider_revenue_range(
+        provider=provider,
+        repo=MeasurementRepository(db),
+        market_repo=MarketEnergyPriceRepository(db),
+        ledger_repo=RevenueLedgerRepository(db),
+        date_from=date_from,
+        date_to=date_to,
+        granularity=granularity,
+        now=datetime.now(timezone.utc),
+        max_interval_seconds=resolve_sample_hold_seconds(
+            provider.default_expected_interval_sec
+        ),
+        max_cold_days=max_cold_rollup_days(),
     )
 
 
 @provider_measurements_router.get(
     "/provider/{provider_uuid}/power",
-    response_model=ProviderPowerSeriesOut,
+    response_model=ProviderPowerSeriesOut | ColumnarPowerSeriesOut,
 )
 def list_provider_power(
     provider_uuid: UUID,
+    response: Response,
     selected_date: date_type | None = Query(None, alias="date"),
+    max_points: Annotated[int | None, Query(ge=MIN_DOWNSAMPLE_POINTS)] = None,
+    series_format: Annotated[
+        SeriesFormat, Query(alias="format")
+    ] = SeriesFormat.OBJECTS,
+    since: Annotated[datetime | None, Query()] = None,
+    if_none_match: Annotated[str | None, Header()] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
-) -> ProviderPowerSeriesOut:
+) -> ProviderPowerSeriesOut | ModelJSONResponse | Response:
     provider = _get_provider_or_404(
         db=db,
         provider_uuid=provider_uuid,
@@ -114,34 +392,72 @@ def list_provider_power(
         )
 
     now = datetime.now(timezone.utc)
-    start, end = _resolve_day_window(selected_date=selected_date, now=now)
+    start, end = resolve_day_window(selected_date=selected_date, now=now)
+    since = _resolve_since(since, start=start)
+    repo = MeasurementRepository(db)
+    etag = build_etag(
+        "power",
+        provider.id,
+        provider.updated_at,
+        start,
+        *repo.get_power_version(
+            provider_id=provider.id, date_start=start, date_end=end
+        ),
+        max_points,
+        series_format,
+        since,
+    )
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
 
-    raw_samples = MeasurementRepository(db).list_power_samples(
-        provider_id=provider.id,
-        date_start=start,
-        date_end=end,
+    raw_samples = sorted(
+        (_to_utc_aware(ts), float(value))
+        for ts, value in repo.list_power_samples(
+            provider_id=provider.id,
+            date_start=since or start,
+            date_end=end,
+        )
     )
+    if since is not None:
+        raw_samples = [sample for sample in raw_samples if sample[0] > since]
 
+    raw_samples = downsample_lttb(raw_samples, max_points)
     day_key = start.date().isoformat()
+    unit = provider.unit.value if provider.unit else None
+
+    if series_format == SeriesFormat.COLUMNAR:
+        columns: dict[str, dict[str, list]] = {day_key: _empty_columns()}
+        for ts_utc, value in raw_samples:
+            day_columns = columns.setdefault(
+                ts_utc.date().isoformat(), _empty_columns()
+            )
+            day_columns["timestamps"].append(_epoch_ms(ts_utc))
+            day_columns["values"].append(round(value, 5))
+        return tag_response(
+            ModelJSONResponse({"unit": unit, "days": columns}),
+            response,
+            etag,
+        )
+
     days: dict[str, DayPowerOut] = {day_key: _empty_power_day(day_key)}
 
-    for ts, value in raw_samples:
-        ts_utc = _to_utc_aware(ts)
+    for ts_utc, value in raw_samples:
         point_day_key = ts_utc.date().isoformat()
         day = days.setdefault(point_day_key, _empty_power_day(point_day_key))
         day.entries.append(
             PowerEntryPoint(
                 timestamp=ts_utc,
-                power=round(float(value), 5),
+                power=round(value, 5),
             )
         )
 
-    for day in days.values():
-        day.entries.sort(key=lambda point: point.timestamp)
-
-    return ProviderPowerSeriesOut(
-        unit=provider.unit.value if provider.unit else None,
-        days=days,
+    return tag_response(
+        ProviderPowerSeriesOut(
+            unit=unit,
+            days=days,
+        ),
+        response,
+        etag,
     )
 
 
@@ -151,10 +467,22 @@ def list_provider_power(
 )
 def get_provider_telemetry(
     provider_uuid: UUID,
+    response: Response,
     selected_date: date_type | None = Query(None, alias="date"),
+    include: Annotated[
+        list[str] | None,
+        Query(
+            description=(
+                "Sections to return: hours, totals, entries, metrics, prices, "
+                "revenue (default all)"
+            )
+        ),
+    ] = None,
+    if_none_match: Annotated[str | None, Header()] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
-) -> ProviderTelemetryResponse:
+) -> ProviderTelemetryResponse | ModelJSONResponse | Response:
+    sections = _resolve_sections(include, allowed=TELEMETRY_SECTIONS)
     provider = _get_provider_or_404(
         db=db,
         provider_uuid=provider_uuid,
@@ -162,100 +490,266 @@ def get_provider_telemetry(
     )
 
     now = datetime.now(timezone.utc)
-    start, end = _resolve_day_window(selected_date=selected_date, now=now)
-    history_end = start + timedelta(days=1) - timedelta(microseconds=1)
-    repo = MeasurementRepository(db)
-    market_repo = MarketEnergyPriceRepository(db)
-    max_interval_seconds = _resolve_sample_hold_seconds(
+    start, end = resolve_day_window(selected_date=selected_date, now=now)
+    max_interval_seconds = resolve_sample_hold_seconds(
         provider.default_expected_interval_sec
     )
-    energy_series = _build_provider_energy_series(
-        provider=provider,
-        repo=repo,
-        start=start,
-        end=end,
-        max_interval_seconds=max_interval_seconds,
-    )
-    day_key = start.date().isoformat()
-    day = energy_series.days[day_key]
-    day_samples = _build_day_power_samples(
-        repo=repo,
-        provider_id=provider.id,
-        start=start,
-        end=end,
-        carry_forward_seconds=max_interval_seconds,
-    )
-    revenue_market_entries = market_repo.list_between(
-        market="RCE",
-        date_start=start,
-        date_end=end + timedelta(microseconds=1),
-    )
-    definitions = _list_metric_definitions_for_provider(
-        provider=provider,
-        repo=repo,
+    # The validator queries run up front only when a 304 is possible. A
+    # cached full response reuses its source version as the ETag and a
+    # built one computes it; a partial cache hit goes without.
+    etag = None
+    if if_none_match:
+        etag = _telemetry_etag(
+            db=db,
+            provider=provider,
+            start=start,
+            end=end,
+            max_interval_seconds=max_interval_seconds,
+            sections=sections,
+        )
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+
+    # Past days are fully determined by stored data, so they are cached and
+    # served for as long as the versions of that data stay the same.
+    cache = (
+        get_telemetry_cache()
+        if start.date() < now.date()
+        and _is_settled(end=end, now=now, max_interval_seconds=max_interval_seconds)
+        else None
     )
-
-    metrics = [
-        _build_metric_series(
-            repo=repo,
+    cache_lookup = None
+    source_version = None
+    if cache is not None:
+        source_version = (
+            etag
+            if etag is not None and sections == TELEMETRY_SECTIONS
+            else _telemetry_etag(
+                db=db,
+                provider=provider,
+                start=start,
+                end=end,
+                max_interval_seconds=max_interval_seconds,
+                sections=TELEMETRY_SECTIONS,
+            )
+        )
+        if sections == TELEMETRY_SECTIONS:
+            etag = source_version
+        cache_lookup = cache.get(
             provider_id=provider.id,
-            definition=definition,
+            day=start.date(),
+            sample_hold_seconds=max_interval_seconds,
+            provider_updated_at=provider.updated_at,
+            source_version=source_version,
+        )
+        if cache_lookup.payload is not None:
+            # The stored payload is the JSON of the full response, sent as is.
+            cached = (
+                Response(content=cache_lookup.payload, media_type="application/json")
+                if sections == TELEMETRY_SECTIONS
+                else _telemetry_sections_response(
+                    ProviderTelemetryResponse.model_validate_json(cache_lookup.payload),
+                    sections,
+                )
+            )
+            return tag_response(cached, response, etag)
+
+    if etag is None:
+        etag = _telemetry_etag(
+            db=db,
+            provider=provider,
             start=start,
             end=end,
+            max_interval_seconds=max_interval_seconds,
+            sections=sections,
         )
-        for definition in definitions
-    ]
 
-    reference_ts = end
-    settlement_price = _build_market_price_context(
-        repo=market_repo,
-        market="RCE",
-        label="RCE",
-        start=start,
-        end=history_end,
-        reference_ts=reference_ts,
-        energy_unit=energy_series.unit,
+    def build_telemetry() -> ProviderTelemetryResponse:
+        telemetry = _build_provider_telemetry(
+            db=db,
+            provider=provider,
+            start=start,
+            end=end,
+            max_interval_seconds=max_interval_seconds,
+            sections=sections,
+        )
+
+        # Only complete responses are cached; a partial one is not reusable.
+        if cache is not None and sections == TELEMETRY_SECTIONS:
+            cache.set(
+                lookup=cache_lookup,
+                provider_id=provider.id,
+                day=start.date(),
+                sample_hold_seconds=max_interval_seconds,
+                provider_updated_at=provider.updated_at,
+                payload=telemetry.model_dump_json(),
+                source_version=source_version,
+            )
+        return telemetry
+
+    telemetry = _coalesce(
+        (
+            "telemetry",
+            provider.id,
+            start.date(),
+            max_interval_seconds,
+            tuple(sorted(section.value for section in sections)),
+        ),
+        build_telemetry,
     )
-    forecast_price = _build_market_price_context(
-        repo=market_repo,
-        market="RCE_FCST",
-        label="Prognoza PSE",
-        start=start,
-        end=history_end,
-        reference_ts=reference_ts,
-        energy_unit=energy_series.unit,
+    return tag_response(
+        _telemetry_sections_response(telemetry, sections),
+        response,
+        etag,
     )
 
-    return ProviderTelemetryResponse(
-        provider=provider,
-        date=day_key,
-        measured_unit=_resolve_measured_unit_from_day(day),
-        energy_unit=energy_series.unit,
-        day=day,
-        metrics=metrics,
-        settlement_price=settlement_price,
-        forecast_price=forecast_price,
-        matched_revenue=_build_matched_revenue_summary(
-            samples=day_samples,
-            market_entries=revenue_market_entries,
-            energy_unit=energy_series.unit,
-            hourly_points=day.hours,
+
+@provider_measurements_router.get(
+    "/telemetry",
+    response_model=ProviderTelemetryBatchOut,
+)
+def get_providers_telemetry(
+    provider_uuids: Annotated[
+        list[UUID],
+        Query(alias="provider_uuid", min_length=1, max_length=MAX_BATCH_PROVIDERS),
+    ],
+    selected_date: date_type | None = Query(None, alias="date"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+) -> ProviderTelemetryBatchOut:
+    provider_uuids = list(dict.fromkeys(provider_uuids))
+    providers = ProviderRepository(db).list_for_user_by_uuids(
+        provider_uuids=provider_uuids,
+        user_id=current_user.id,
+    )
+    if len(providers) != len(provider_uuids):
+        raise HTTPException(status_code=404, detail="Provider not found")
+    providers_by_uuid = {provider.uuid: provider for provider in providers}
+
+    now = datetime.now(timezone.utc)
+    start, end = resolve_day_window(selected_date=selected_date, now=now)
+    cache = get_telemetry_cache() if start.date() < now.date() else None
+
+    responses: dict[UUID, ProviderTelemetryResponse] = {}
+    pending = []
+    for provider_uuid in provider_uuids:
+        provider = providers_by_uuid[provider_uuid]
+        max_interval_seconds = resolve_sample_hold_seconds(
+            provider.default_expected_interval_sec
+        )
+        cache_lookup = None
+        source_version = None
+        if cache is not None and _is_settled(
+            end=end,
+            now=now,
             max_interval_seconds=max_interval_seconds,
-        ),
+        ):
+            source_version = _telemetry_etag(
+                db=db,
+                provider=provider,
+                start=start,
+                end=end,
+                max_interval_seconds=max_interval_seconds,
+                sections=TELEMETRY_SECTIONS,
+            )
+            cache_lookup = cache.get(
+                provider_id=provider.id,
+                day=start.date(),
+                sample_hold_seconds=max_interval_seconds,
+                provider_updated_at=provider.updated_at,
+                source_version=source_version,
+            )
+            if cache_lookup.payload is not None:
+                responses[provider_uuid] = (
+                    ProviderTelemetryResponse.model_validate_json(cache_lookup.payload)
+                )
+                continue
+        pending.append((provider, max_interval_seconds, cache_lookup, source_version))
+
+    if pending:
+        repo = MeasurementRepository(db)
+        market_data = _TelemetryMarketData.load(
+            MarketEnergyPriceRepository(db),
+            day=start.date(),
+        )
+        provider_ids = [provider.id for provider, *_ in pending]
+        power_by_provider = repo.list_power_samples_for_providers(
+            provider_ids=provider_ids,
+            date_start=start,
+            date_end=end,
+        )
+        definitions_by_provider = {
+            provider.id: _list_metric_definitions_for_provider(
+                provider=provider, repo=repo
+            )
+            for provider, *_ in pending
+        }
+        metrics_by_provider = repo.list_metric_samples_for_providers(
+            metric_keys_by_provider={
+                provider_id: [definition.metric_key for definition in definitions]
+                for provider_id, definitions in definitions_by_provider.items()
+            },
+            date_start=start,
+            date_end=end,
+        )
+
+        for provider, max_interval_seconds, cache_lookup, source_version in pending:
+            power_samples = PowerSampleLoader(repo, provider_id=provider.id)
+            power_samples.preload(
+                start=start,
+                end=end,
+                samples=power_by_provider.get(provider.id, []),
+            )
+            response = _build_provider_telemetry(
+                db=db,
+                provider=provider,
+                start=start,
+                end=end,
+                max_interval_seconds=max_interval_seconds,
+                power_samples=power_samples,
+                definitions=definitions_by_provider[provider.id],
+                metric_samples_by_key=metrics_by_provider.get(provider.id, {}),
+                market_data=market_data,
+            )
+            if cache_lookup is not None:
+                cache.set(
+                    lookup=cache_lookup,
+                    provider_id=provider.id,
+                    day=start.date(),
+                    sample_hold_seconds=max_interval_seconds,
+                    provider_updated_at=provider.updated_at,
+                    payload=response.model_dump_json(),
+                    source_version=source_version,
+                )
+            responses[provider.uuid] = response
+
+    return ProviderTelemetryBatchOut(
+        date=start.date().isoformat(),
+        providers={
+            str(provider_uuid): responses[provider_uuid]
+            for provider_uuid in provider_uuids
+        },
     )
 
 
 @provider_measurements_router.get(
     "/provider/{provider_uuid}/metrics/{metric_key}",
-    response_model=ProviderMetricSeriesOut,
+    response_model=ProviderMetricSeriesOut | ColumnarMetricSeriesOut,
 )
 def get_provider_metric_series(
     provider_uuid: UUID,
     metric_key: str,
+    response: Response,
     selected_date: date_type | None = Query(None, alias="date"),
+    max_points: Annotated[int | None, Query(ge=MIN_DOWNSAMPLE_POINTS)] = None,
+    series_format: Annotated[
+        SeriesFormat, Query(alias="format")
+    ] = SeriesFormat.OBJECTS,
+    since: Annotated[datetime | None, Query()] = None,
+    if_none_match: Annotated[str | None, Header()] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
-) -> ProviderMetricSeriesOut:
+) -> ProviderMetricSeriesOut | ModelJSONResponse | Response:
     provider = _get_provider_or_404(
         db=db,
         provider_uuid=provider_uuid,
@@ -263,7 +757,7 @@ def get_provider_metric_series(
     )
 
     now = datetime.now(timezone.utc)
-    start, end = _resolve_day_window(selected_date=selected_date, now=now)
+    start, end = resolve_day_window(selected_date=selected_date, now=now)
     repo = MeasurementRepository(db)
     definition = _get_metric_definition_for_provider(
         provider=provider,
@@ -272,106 +766,261 @@ def get_provider_metric_series(
     )
     if definition is None:
         raise HTTPException(status_code=404, detail="Metric not found")
-    return _build_metric_series(
-        repo=repo,
-        provider_id=provider.id,
-        definition=definition,
-        start=start,
-        end=end,
+    since = _resolve_since(since, start=start)
+    etag = build_etag(
+        "metric",
+        provider.id,
+        provider.updated_at,
+        metric_key,
+        start,
+        *repo.get_metric_version(
+            provider_id=provider.id,
+            date_start=start,
+            date_end=end,
+            metric_keys=[metric_key],
+        ),
+        max_points,
+        series_format,
+        since,
+    )
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+
+    if series_format == SeriesFormat.COLUMNAR:
+        return tag_response(
+            ModelJSONResponse(
+                _build_columnar_metric_series(
+                    definition=definition,
+                    raw_samples=_list_metric_samples(
+                        repo=repo,
+                        provider_id=provider.id,
+                        definition=definition,
+                        start=start,
+                        end=end,
+                        since=since,
+                    ),
+                    start=start,
+                    max_points=max_points,
+                    since=since,
+                )
+            ),
+            response,
+            etag,
+        )
+    return tag_response(
+        _build_metric_series(
+            repo=repo,
+            provider_id=provider.id,
+            definition=definition,
+            start=start,
+            end=end,
+            max_points=max_points,
+            since=since,
+        ),
+        response,
+        etag,
     )
 
 
 @provider_measurements_router.get(
-    "/provider/{provider_uuid}/energy/current-hour-pool",
-    response_model=ProviderCurrentHourPoolOut,
+    "/provider/{provider_uuid}/stream",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"text/event-stream": {}}}},
 )
-def get_provider_current_hour_pool(
+def stream_provider_telemetry(
+    provider_uuid: UUID,
+    current_user: User = Depends(get_current_user),
+) -> StreamingResponse:
+    """Server-Sent Events with new measurements, metric samples and STATE events.
+
+    Events are ``measurement``, ``metric`` and ``device_state``; ``resync``
+    asks the client to reload its series once after falling behind or after
+    a late write. Measurements of every writer are polled from the database;
+    metric samples and STATE events arrive over NATS. The provider and its
+    devices are resolved in a session closed before the stream starts, so an
+    open stream holds no database connection.
+    """
+    with _short_lived_db() as db:
+        provider = _get_provider_or_404(
+            db=db,
+            provider_uuid=provider_uuid,
+            user_id=current_user.id,
+        )
+        devices = _list_devices_for_power_provider(
+            db=db,
+            user_id=current_user.id,
+            provider_id=provider.id,
+        )
+        keys = [
+            ("provider", provider.id),
+            *(("device", device.id) for device in devices),
+        ]
+
+    hub = get_telemetry_stream_hub()
+    if not hub.running:
+        raise HTTPException(
+            status_code=503,
+            detail="Live telemetry stream is unavailable",
+        )
+
+    return StreamingResponse(
+        stream_events(hub, keys),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@provider_measurements_router.get(
+    "/provider/{provider_uuid}/measurements/export",
+    response_class=StreamingResponse,
+    responses={
+        200: {"content": {media_type: {} for media_type in EXPORT_MEDIA_TYPES.values()}}
+    },
+)
+def export_provider_measurements(
     provider_uuid: UUID,
+    date_from: date_type = Query(..., alias="start"),
+    date_to: date_type = Query(..., alias="end"),
+    export_format: Annotated[ExportFormat, Query(alias="format")] = ExportFormat.NDJSON,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
-) -> ProviderCurrentHourPoolOut:
+) -> StreamingResponse:
+    """Raw measurements of ``start``..``end`` (UTC days, inclusive) as NDJSON or CSV.
+
+    Rows are streamed from a server-side cursor while they are written, so
+    the range is not limited by memory.
+    """
     provider = _get_provider_or_404(
         db=db,
         provider_uuid=provider_uuid,
         user_id=current_user.id,
     )
 
-    if provider.kind != ProviderKind.POWER:
-        raise HTTPException(
-            status_code=422,
-            detail="Current-hour pool is available only for POWER providers",
-        )
-
-    energy_unit = _energy_unit_from_power(provider.unit)
-    if energy_unit is None:
+    if date_to < date_from:
         raise HTTPException(
             status_code=422,
-            detail="Provider unit must be W or kW",
+            detail="Range end must not be before range start",
         )
 
-    now = datetime.now(timezone.utc)
-    start, end = _resolve_hour_window(now=now)
-    max_interval_seconds = _resolve_sample_hold_seconds(
-        provider.default_expected_interval_sec
-    )
-
-    measurement_repo = MeasurementRepository(db)
-    previous_sample = measurement_repo.get_last_power_sample_before(
+    rows = MeasurementRepository(db).iter_measurements(
         provider_id=provider.id,
-        before=start,
+        date_start=datetime.combine(
+            date_from, datetime.min.time(), tzinfo=timezone.utc
+        ),
+        date_end=datetime.combine(
+            date_to + timedelta(days=1),
+            datetime.min.time(),
+            tzinfo=timezone.utc,
+        ),
     )
-    raw_samples = measurement_repo.list_power_samples(
-        provider_id=provider.id,
-        date_start=start,
-        date_end=end,
+    filename = (
+        f"provider-{provider_uuid}-{date_from.isoformat()}-{date_to.isoformat()}"
+        f".{export_format.value}"
+    )
+    return StreamingResponse(
+        iter_export_chunks(rows, export_format),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
     )
 
-    hour_samples = _build_window_samples(
-        raw_samples=raw_samples,
-        previous_sample=previous_sample,
-        start=start,
-        end=end,
-        carry_forward_seconds=max_interval_seconds,
+
+@provider_measurements_router.get(
+    "/provider/{provider_uuid}/energy/current-hour-pool",
+    response_model=ProviderCurrentHourPoolOut,
+)
+def get_provider_current_hour_pool(
+    provider_uuid: UUID,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+) -> ProviderCurrentHourPoolOut:
+    provider = _get_provider_or_404(
+        db=db,
+        provider_uuid=provider_uuid,
+        user_id=current_user.id,
     )
 
-    production_energy = _integrate_window_energy(
-        hour_samples,
-        max_interval_seconds=max_interval_seconds,
+    if provider.kind != ProviderKind.POWER:
+        raise HTTPException(
+            status_code=422,
+            detail="Current-hour pool is available only for POWER providers",
+        )
+
+    energy_unit = energy_unit_from_power(provider.unit)
+    if energy_unit is None:
+        raise HTTPException(
+            status_code=422,
+            detail="Provider unit must be W or kW",
+        )
+
+    now = datetime.now(timezone.utc)
+    start, end = _resolve_hour_window(now=now)
+    max_interval_seconds = resolve_sample_hold_seconds(
+        provider.default_expected_interval_sec
     )
-    current_power = hour_samples[-1].value if hour_samples else None
+
+    store = get_current_hour_pool_store()
+    if store is not None:
+        pool = store.get(
+            provider_id=provider.id,
+            hour_start=start,
+            sample_hold_seconds=max_interval_seconds,
+        )
+    else:
+        pool = CurrentHourPool(
+            hour_start=start, sample_hold_seconds=max_interval_seconds
+        )
 
     provider_includes_device_consumption = provider.provider_type != ProviderType.API
     device_consumption_energy = 0.0
     devices_considered = 0
-
+    rated_devices: list[Device] = []
+    on_seconds_by_device: dict[int, float] = {}
     if not provider_includes_device_consumption:
         devices = _list_devices_for_power_provider(
             db=db,
             user_id=current_user.id,
             provider_id=provider.id,
         )
-        event_repo = DeviceEventRepository(db)
-        device_consumption_kwh = 0.0
-
-        for device in devices:
-            if device.rated_power is None:
-                continue
-
-            rated_power_kw = float(device.rated_power)
-            if rated_power_kw <= 0:
-                continue
+        rated_devices = [
+            device
+            for device in devices
+            if device.rated_power is not None and float(device.rated_power) > 0
+        ]
+        devices_considered = len(rated_devices)
 
-            devices_considered += 1
-            on_seconds = _calculate_device_on_seconds(
-                device=device,
-                event_repo=event_repo,
+    with pool.lock:
+        _advance_current_hour_samples(
+            pool=pool,
+            repo=MeasurementRepository(db),
+            provider_id=provider.id,
+            end=end,
+        )
+        production_energy = pool.energy_until(end)
+        current_power = pool.current_power
+        if rated_devices:
+            _advance_current_hour_state_events(
+                pool=pool,
+                event_repo=DeviceEventRepository(db),
+                device_ids=[device.id for device in rated_devices],
+                end=end,
+            )
+            on_seconds_by_device = _calculate_devices_on_seconds(
+                devices=rated_devices,
+                previous_state_events=pool.previous_state_events,
+                hour_state_events=pool.state_events,
                 start=start,
                 end=end,
             )
+
+    if not provider_includes_device_consumption:
+        device_consumption_kwh = 0.0
+
+        for device in rated_devices:
+            on_seconds = on_seconds_by_device[device.id]
             if on_seconds <= 0:
                 continue
 
-            device_consumption_kwh += rated_power_kw * (on_seconds / 3600.0)
+            device_consumption_kwh += float(device.rated_power) * (on_seconds / 3600.0)
 
         device_consumption_energy = _convert_kwh_to_energy_unit(
             value_kwh=device_consumption_kwh,
@@ -397,6 +1046,29 @@ def get_provider_current_hour_pool(
     )
 
 
+def _coalesce(key: tuple, compute):
+    """Share one computation among identical concurrent requests of this process.
+
+    Callers check access before joining, so ``key`` only has to identify
+    the result: the route, provider, day and every parameter shaping it.
+    """
+    coalescer = get_request_coalescer()
+    if coalescer is None:
+        return compute()
+    return coalescer.run(key, compute)
+
+
+@contextmanager
+def _short_lived_db():
+    """A session of its own, for handlers whose response outlives the request."""
+    sessions = get_db()
+    db = next(sessions)
+    try:
+        yield db
+    finally:
+        sessions.close()
+
+
 def _get_provider_or_404(
     *,
     db: Session,
@@ -412,36 +1084,207 @@ def _get_provider_or_404(
     return provider
 
 
-def _build_provider_energy_series(
+def _build_provider_telemetry(
     *,
+    db: Session,
     provider,
-    repo: MeasurementRepository,
     start: datetime,
     end: datetime,
     max_interval_seconds: float | None = None,
-) -> ProviderEnergySeriesOut:
-    samples = _build_day_power_samples(
+    power_samples: PowerSampleLoader | None = None,
+    definitions: list[ProviderTelemetryMetricDefinition] | None = None,
+    metric_samples_by_key: dict[str, list] | None = None,
+    market_data: _TelemetryMarketData | None = None,
+    sections: frozenset[ResponseSection] = TELEMETRY_SECTIONS,
+) -> ProviderTelemetryResponse:
+    """Telemetry of one provider day; sections left out are not queried."""
+    repo = MeasurementRepository(db)
+    market_repo = MarketEnergyPriceRepository(db)
+    # Revenue of a closed day is read from the ledger once a task stored it.
+    ledger_rows = None
+    if (
+        ResponseSection.REVENUE in sections
+        and resolve_closed_until(start=start, end=end) > end
+    ):
+        ledger_rows = list_revenue_ledger_day(
+            RevenueLedgerRepository(db),
+            provider_id=provider.id,
+            day_start=start,
+            energy_unit=energy_unit_from_power(provider.unit),
+            max_interval_seconds=max_interval_seconds,
+        )
+    needs_revenue_match = ResponseSection.REVENUE in sections and ledger_rows is None
+    needs_power = bool(sections & {ResponseSection.HOURS, ResponseSection.TOTALS}) or (
+        needs_revenue_match
+    )
+    # Revenue needs the whole day anyway, so every builder below reads its
+    # power samples from this one query.
+    if power_samples is None:
+        power_samples = PowerSampleLoader(repo, provider_id=provider.id)
+        if needs_power:
+            power_samples.preload(start=start, end=end)
+    energy_series = _build_provider_energy_series(
+        provider=provider,
         repo=repo,
-        provider_id=provider.id,
+        rollup_repo=EnergyRollupRepository(db),
         start=start,
         end=end,
-        carry_forward_seconds=max_interval_seconds,
-    )
-    raw_measurements = repo.list_measurements(
-        provider_id=provider.id,
-        date_start=start,
-        date_end=end,
-    )
-    hourly_energy = EnergyCalculationService.integrate_hourly(
-        samples,
         max_interval_seconds=max_interval_seconds,
+        power_samples=power_samples,
+        sections=sections & ENERGY_SECTIONS,
+    )
+    day_key = start.date().isoformat()
+    day = energy_series.days[day_key]
+
+    metrics: list[ProviderMetricSeriesOut] = []
+    if ResponseSection.METRICS in sections:
+        if definitions is None:
+            definitions = _list_metric_definitions_for_provider(
+                provider=provider,
+                repo=repo,
+            )
+        metrics = _build_metric_series_batch(
+            repo=repo,
+            provider_id=provider.id,
+            definitions=definitions,
+            start=start,
+            end=end,
+            samples_by_key=metric_samples_by_key,
+        )
+
+    settlement_price = None
+    forecast_price = None
+    matched_revenue = None
+    if ResponseSection.PRICES in sections or needs_revenue_match:
+        # The settlement history of the whole day also covers every interval
+        # revenue can be matched against, so one index serves both.
+        if market_data is None:
+            market_data = _TelemetryMarketData.load(market_repo, day=start.date())
+
+        if ResponseSection.PRICES in sections:
+            settlement_price = market_data.price_context(
+                market_repo,
+                market="RCE",
+                reference_ts=end,
+                energy_unit=energy_series.unit,
+            )
+            forecast_price = market_data.price_context(
+                market_repo,
+                market="RCE_FCST",
+                reference_ts=end,
+                energy_unit=energy_series.unit,
+            )
+
+    if ResponseSection.REVENUE in sections:
+        matched_revenue = _build_day_revenue(
+            ledger_rows=ledger_rows,
+            power_samples=power_samples,
+            market_index=(
+                market_data.indexes["RCE"] if market_data is not None else None
+            ),
+            start=start,
+            end=end,
+            energy_unit=energy_series.unit,
+            hourly_points=day.hours,
+            max_interval_seconds=max_interval_seconds,
+        )
+
+    return ProviderTelemetryResponse(
+        provider=provider,
+        date=day_key,
+        measured_unit=_resolve_measured_unit_from_day(day),
+        energy_unit=energy_series.unit,
+        day=day,
+        metrics=metrics,
+        settlement_price=settlement_price,
+        forecast_price=forecast_price,
+        matched_revenue=matched_revenue,
     )
 
+
+class _TelemetryMarketData:
+    """Market price indexes of one day, shared by the telemetry of many providers.
+
+    Price contexts depend only on the market, the reference time and the
+    energy unit, so providers reporting in the same unit share one.
+    """
+
+    LABELS = {"RCE": "RCE", "RCE_FCST": "Prognoza PSE"}
+
+    def __init__(self, indexes: dict[str, MarketPriceIndex]):
+        self.indexes = indexes
+        self._contexts: dict[tuple, ProviderMarketPriceOut | None] = {}
+
+    @classmethod
+    def load(
+        cls, repo: MarketEnergyPriceRepository, *, day: date_type
+    ) -> _TelemetryMarketData:
+        return cls(
+            {
+                market: _load_market_prices(repo, market=market, day=day)
+                for market in cls.LABELS
+            }
+        )
+
+    def price_context(
+        self,
+        repo: MarketEnergyPriceRepository,
+        *,
+        market: str,
+        reference_ts: datetime,
+        energy_unit: str | None,
+    ) -> ProviderMarketPriceOut | None:
+        key = (market, reference_ts, energy_unit)
+        if key not in self._contexts:
+            self._contexts[key] = _build_market_price_context(
+                repo=repo,
+                market=market,
+                label=self.LABELS[market],
+                history=self.indexes[market],
+                reference_ts=reference_ts,
+                energy_unit=energy_unit,
+            )
+        return self._contexts[key]
+
+
+def _build_provider_energy_series(
+    *,
+    provider,
+    repo: MeasurementRepository,
+    rollup_repo: EnergyRollupRepository,
+    start: datetime,
+    end: datetime,
+    max_interval_seconds: float | None = None,
+    power_samples: PowerSampleLoader | None = None,
+    since: datetime | None = None,
+    sections: frozenset[ResponseSection] = ENERGY_SECTIONS,
+) -> ProviderEnergySeriesOut:
+    if power_samples is None:
+        power_samples = PowerSampleLoader(repo, provider_id=provider.id)
+    hourly_energy: dict[datetime, float] = {}
+    if sections & {ResponseSection.HOURS, ResponseSection.TOTALS}:
+        hourly_energy = _load_hourly_energy(
+            power_samples=power_samples,
+            rollup_repo=rollup_repo,
+            start=start,
+            end=end,
+            max_interval_seconds=max_interval_seconds,
+        )
+    raw_measurements = []
+    if ResponseSection.ENTRIES in sections:
+        raw_measurements = repo.list_measurements(
+            provider_id=provider.id,
+            date_start=since or start,
+            date_end=end,
+        )
+
     day_key = start.date().isoformat()
     days: dict[str, DayEnergyOut] = {day_key: _empty_day(day_key)}
 
     for measurement in raw_measurements:
         measured_at = _to_utc_aware(measurement.measured_at)
+        if since is not None and measured_at <= since:
+            continue
         measurement_day_key = measured_at.date().isoformat()
         day = days.setdefault(measurement_day_key, _empty_day(measurement_day_key))
         day.entries.append(
@@ -459,15 +1302,17 @@ def _build_provider_energy_series(
             )
         )
 
+    changed_hours = _hours_from(hourly_energy, since) if since else hourly_energy
     for hour_dt, energy in hourly_energy.items():
         hour_day_key = hour_dt.date().isoformat()
         day = days.setdefault(hour_day_key, _empty_day(hour_day_key))
-        day.hours.append(
-            HourlyEnergyPoint(
-                hour=hour_dt,
-                energy=round(energy, 5),
+        if hour_dt in changed_hours:
+            day.hours.append(
+                HourlyEnergyPoint(
+                    hour=hour_dt,
+                    energy=round(energy, 5),
+                )
             )
-        )
         day.total_energy += energy
         day.export_energy += max(0.0, energy)
         day.import_energy += max(0.0, -energy)
@@ -480,40 +1325,621 @@ def _build_provider_energy_series(
         day.export_energy = round(day.export_energy, 5)
 
     return ProviderEnergySeriesOut(
-        unit=_energy_unit_from_power(provider.unit),
+        unit=energy_unit_from_power(provider.unit),
+        days=days,
+    )
+
+
+def _build_columnar_energy_series(
+    *,
+    provider,
+    repo: MeasurementRepository,
+    rollup_repo: EnergyRollupRepository,
+    start: datetime,
+    end: datetime,
+    max_interval_seconds: float | None = None,
+    since: datetime | None = None,
+    sections: frozenset[ResponseSection] = ENERGY_SECTIONS,
+) -> dict:
+    hourly_energy: dict[datetime, float] = {}
+    if sections & {ResponseSection.HOURS, ResponseSection.TOTALS}:
+        hourly_energy = _load_hourly_energy(
+            power_samples=PowerSampleLoader(repo, provider_id=provider.id),
+            rollup_repo=rollup_repo,
+            start=start,
+            end=end,
+            max_interval_seconds=max_interval_seconds,
+        )
+    raw_measurements = []
+    if ResponseSection.ENTRIES in sections:
+        raw_measurements = sorted(
+            (
+                (
+                    _to_utc_aware(measurement.measured_at),
+                    measurement.measured_value,
+                    measurement.measured_unit,
+                )
+                for measurement in repo.list_measurements(
+                    provider_id=provider.id,
+                    date_start=since or start,
+                    date_end=end,
+                )
+            ),
+            key=lambda measurement: measurement[0],
+        )
+    if since is not None:
+        raw_measurements = [
+            measurement for measurement in raw_measurements if measurement[0] > since
+        ]
+
+    day_key = start.date().isoformat()
+    days: dict[str, dict] = {day_key: _empty_columnar_day(day_key)}
+
+    for measured_at, measured_value, measured_unit in raw_measurements:
+        day = days.setdefault(
+            measured_at.date().isoformat(),
+            _empty_columnar_day(measured_at.date().isoformat()),
+        )
+        day["entries"]["timestamps"].append(_epoch_ms(measured_at))
+        day["entries"]["values"].append(
+            float(measured_value) if measured_value is not None else None
+        )
+        if day["measured_unit"] is None and measured_unit:
+            day["measured_unit"] = measured_unit
+
+    changed_hours = _hours_from(hourly_energy, since) if since else hourly_energy
+    for hour_dt, energy in sorted(hourly_energy.items()):
+        hour_day_key = hour_dt.date().isoformat()
+        day = days.setdefault(hour_day_key, _empty_columnar_day(hour_day_key))
+        if hour_dt in changed_hours:
+            day["hours"]["timestamps"].append(_epoch_ms(hour_dt))
+            day["hours"]["values"].append(round(energy, 5))
+        day["total_energy"] += energy
+        day["export_energy"] += max(0.0, energy)
+        day["import_energy"] += max(0.0, -energy)
+
+    excluded = _day_exclude(sections)
+    for day in days.values():
+        day["total_energy"] = round(day["total_energy"], 5)
+        day["import_energy"] = round(day["import_energy"], 5)
+        day["export_energy"] = round(day["export_energy"], 5)
+        for key in excluded:
+            del day[key]
+
+    return {
+        "unit": energy_unit_from_power(provider.unit),
+        "days": days,
+    }
+
+
+def _load_hourly_energy(
+    *,
+    power_samples: PowerSampleLoader,
+    rollup_repo: EnergyRollupRepository,
+    start: datetime,
+    end: datetime,
+    max_interval_seconds: float | None = None,
+) -> dict[datetime, float]:
+    closed_until = resolve_closed_until(start=start, end=end)
+    hourly_energy: dict[datetime, float] = {}
+    if closed_until > start:
+        rollups = _get_or_compute_hourly_rollups(
+            power_samples=power_samples,
+            rollup_repo=rollup_repo,
+            start=start,
+            end=min(end, closed_until),
+            closed_until=closed_until,
+            max_interval_seconds=max_interval_seconds,
+        )
+        hourly_energy.update(
+            {
+                _to_utc_aware(rollup.hour_start): rollup.energy
+                for rollup in rollups
+                if rollup.energy is not None
+            }
+        )
+
+    if closed_until <= end:
+        hourly_energy.update(
+            _integrate_open_hour(
+                power_samples=power_samples,
+                day_start=start,
+                hour_start=closed_until,
+                end=end,
+                max_interval_seconds=max_interval_seconds,
+            )
+        )
+
+    return hourly_energy
+
+
+def _build_provider_energy_range(
+    *,
+    provider,
+    repo: MeasurementRepository,
+    rollup_repo: EnergyRollupRepository,
+    date_from: date_type,
+    date_to: date_type,
+    granularity: EnergyRangeGranularity,
+    now: datetime,
+    max_interval_seconds: float | None = None,
+    max_cold_days: int | None = None,
+) -> ProviderEnergyRangeOut:
+    range_start = datetime.combine(date_from, datetime.min.time(), tzinfo=timezone.utc)
+    last_day = min(date_to, now.date())
+    # Hours not summed from stored rollups: the open hour of today and the
+    # closed hours of missing days, computed in memory.
+    computed_energy: dict[datetime, float] = {}
+    range_closed_until = range_start
+    missing_days: list[date_type] = []
+    pending_days: list[date_type] = []
+
+    if last_day >= date_from:
+        power_samples = PowerSampleLoader(repo, provider_id=provider.id)
+        missing_days = list_missing_rollup_days(
+            rollup_repo=rollup_repo,
+            provider_id=provider.id,
+            first_day=date_from,
+            last_day=last_day,
+            now=now,
+            max_interval_seconds=max_interval_seconds,
+        )
+        cold_days = missing_days
+        if max_cold_days is not None:
+            cold_days = missing_days[:max_cold_days]
+        pending_days = missing_days[len(cold_days) :]
+        for day in cold_days:
+            for rollup in compute_day_rollups(
+                power_samples=power_samples,
+                day=day,
+                now=now,
+                max_interval_seconds=max_interval_seconds,
+            ):
+                if rollup.energy is not None:
+                    computed_energy[rollup.hour_start] = rollup.energy
+        # Today's closed hours are stored by the hourly materialize task.
+        closed_missing_days = [day for day in missing_days if day < now.date()]
+        if closed_missing_days:
+            _enqueue_rollup_backfill(
+                provider_id=provider.id,
+                days=closed_missing_days,
+            )
+        last_start, last_end = resolve_day_window(selected_date=last_day, now=now)
+        range_closed_until = resolve_closed_until(start=last_start, end=last_end)
+        if range_closed_until <= last_end:
+            computed_energy.update(
+                _integrate_open_hour(
+                    power_samples=power_samples,
+                    day_start=last_start,
+                    hour_start=range_closed_until,
+                    end=last_end,
+                    max_interval_seconds=max_interval_seconds,
+                )
+            )
+
+    periods: dict[datetime, list[float]] = {}
+    if range_closed_until > range_start:
+        for row in rollup_repo.aggregate_energy(
+            provider_id=provider.id,
+            date_start=range_start,
+            date_end=range_closed_until,
+            granularity=granularity.value,
+            exclude_days=missing_days,
+        ):
+            periods[_to_utc_aware(row.period_start)] = [
+                float(row.energy),
+                float(row.import_energy),
+                float(row.export_energy),
+            ]
+
+    for hour_dt, energy in computed_energy.items():
+        period = periods.setdefault(
+            _truncate_to_granularity(hour_dt, granularity),
+            [0.0, 0.0, 0.0],
+        )
+        period[0] += energy
+        period[1] += max(0.0, -energy)
+        period[2] += max(0.0, energy)
+
+    days: dict[str, DayEnergyOut] = {}
+    for period_start, (energy, import_energy, export_energy) in sorted(periods.items()):
+        if granularity == EnergyRangeGranularity.MONTH:
+            day_key = period_start.strftime("%Y-%m")
+        else:
+            day_key = period_start.date().isoformat()
+        day = days.setdefault(day_key, _empty_day(day_key))
+        if granularity == EnergyRangeGranularity.HOUR:
+            day.hours.append(
+                HourlyEnergyPoint(
+                    hour=period_start,
+                    energy=round(energy, 5),
+                )
+            )
+        day.total_energy += energy
+        day.import_energy += import_energy
+        day.export_energy += export_energy
+
+    for day in days.values():
+        day.total_energy = round(day.total_energy, 5)
+        day.import_energy = round(day.import_energy, 5)
+        day.export_energy = round(day.export_energy, 5)
+
+    return ProviderEnergyRangeOut(
+        unit=energy_unit_from_power(provider.unit),
         days=days,
+        granularity=granularity,
+        date_start=date_from,
+        date_end=date_to,
+        total_energy=round(sum(period[0] for period in periods.values()), 5),
+        import_energy=round(sum(period[1] for period in periods.values()), 5),
+        export_energy=round(sum(period[2] for period in periods.values()), 5),
+        pending_days=len(pending_days),
+    )
+
+
+def _build_provider_revenue_range(
+    *,
+    provider,
+    repo: MeasurementRepository,
+    market_repo: MarketEnergyPriceRepository,
+    ledger_repo: RevenueLedgerRepository,
+    date_from: date_type,
+    date_to: date_type,
+    granularity: EnergyRangeGranularity,
+    now: datetime,
+    max_interval_seconds: float | None = None,
+    max_cold_days: int | None = None,
+) -> ProviderRevenueRangeOut:
+    """Stored closed days are summed from the ledger in one query.
+
+    At most ``max_cold_days`` closed days missing from the ledger are matched
+    here, without storing them, and queued for the backfill task; today is
+    matched live.
+    """
+    range_start = datetime.combine(date_from, datetime.min.time(), tzinfo=timezone.utc)
+    energy_unit = energy_unit_from_power(provider.unit)
+    power_samples = PowerSampleLoader(repo, provider_id=provider.id)
+    last_closed_day = min(date_to, now.date() - timedelta(days=1))
+    periods: dict[datetime, list] = {}
+    currency = None
+    pending_days: list[date_type] = []
+
+    if last_closed_day >= date_from:
+        closed_end = datetime.combine(
+            last_closed_day,
+            datetime.min.time(),
+            tzinfo=timezone.utc,
+        ) + timedelta(days=1)
+        missing_days = list_missing_ledger_days(
+            ledger_repo=ledger_repo,
+            provider_id=provider.id,
+            first_day=date_from,
+            last_day=last_closed_day,
+            energy_unit=energy_unit,
+            max_interval_seconds=max_interval_seconds,
+        )
+        cold_days = missing_days
+        if max_cold_days is not None:
+            cold_days = missing_days[:max_cold_days]
+        pending_days = missing_days[len(cold_days) :]
+        if missing_days:
+            _enqueue_ledger_backfill(provider_id=provider.id, days=missing_days)
+
+        for row in ledger_repo.aggregate_revenue(
+            provider_id=provider.id,
+            market=REVENUE_LEDGER_MARKET,
+            date_start=range_start,
+            date_end=closed_end,
+            granularity=granularity.value,
+            exclude_days=missing_days,
+        ):
+            periods[_to_utc_aware(row.period_start)] = [
+                float(row.export_energy),
+                float(row.revenue),
+                int(row.matched_intervals),
+            ]
+            currency = currency or row.currency
+
+        for day in cold_days:
+            for row in compute_ledger_day(
+                power_samples=power_samples,
+                market_index=_load_market_prices(
+                    market_repo,
+                    market=REVENUE_LEDGER_MARKET,
+                    day=day,
+                ),
+                day=day,
+                energy_unit=energy_unit,
+                max_interval_seconds=max_interval_seconds,
+            ):
+                if not row.matched_intervals:
+                    continue
+                period = periods.setdefault(
+                    _truncate_to_granularity(row.hour_start, granularity),
+                    [0.0, 0.0, 0],
+                )
+                period[0] += row.export_energy
+                period[1] += row.revenue
+                period[2] += row.matched_intervals
+                currency = currency or row.currency
+
+    if date_from <= now.date() <= date_to:
+        start, end = resolve_day_window(selected_date=now.date(), now=now)
+        market_index = _load_market_prices(
+            market_repo,
+            market=REVENUE_LEDGER_MARKET,
+            day=now.date(),
+        )
+        match = match_market_revenue(
+            samples=build_day_power_samples(
+                power_samples=power_samples,
+                start=start,
+                end=end,
+                carry_forward_seconds=max_interval_seconds,
+            ),
+            market_index=market_index,
+            energy_unit=energy_unit,
+            max_interval_seconds=max_interval_seconds,
+        )
+        for hour_dt, revenue in match.hourly_revenue.items():
+            period = periods.setdefault(
+                _truncate_to_granularity(hour_dt, granularity),
+                [0.0, 0.0, 0],
+            )
+            period[0] += match.hourly_export_energy.get(hour_dt, 0.0)
+            period[1] += revenue
+            period[2] += match.hourly_matched_intervals.get(hour_dt, 0)
+        if match.matched_intervals:
+            currency = currency or str(market_index.entries[0].currency)
+
+    return ProviderRevenueRangeOut(
+        market=REVENUE_LEDGER_MARKET,
+        currency=currency,
+        energy_unit=energy_unit,
+        granularity=granularity,
+        date_start=date_from,
+        date_end=date_to,
+        total_export_energy=round(sum(period[0] for period in periods.values()), 5),
+        total_revenue=round(sum(period[1] for period in periods.values()), 6),
+        periods=[
+            RevenuePeriodOut(
+                period_start=period_start,
+                export_energy=round(export_energy, 5),
+                revenue=round(revenue, 6),
+                matched_intervals=matched_intervals,
+            )
+            for period_start, (export_energy, revenue, matched_intervals) in sorted(
+                periods.items()
+            )
+        ],
+        pending_days=len(pending_days),
     )
 
 
-def _build_metric_series(
+def _enqueue_rollup_backfill(*, provider_id: int, days: list[date_type]) -> None:
+    # Imported here so the API does not load the worker's task modules.
+    try:
+        from app.tasks.rollup_tasks import backfill_energy_rollups_task
+
+        backfill_energy_rollups_task.delay(
+            provider_id=provider_id,
+            first_day=days[0].isoformat(),
+            last_day=days[-1].isoformat(),
+        )
+    except Exception:
+        logger.exception(
+            "Energy rollup backfill could not be queued",
+            extra={"provider_id": provider_id},
+        )
+
+
+def _enqueue_ledger_backfill(*, provider_id: int, days: list[date_type]) -> None:
+    try:
+        from app.tasks.rollup_tasks import backfill_revenue_ledger_task
+
+        backfill_revenue_ledger_task.delay(
+            provider_id=provider_id,
+            first_day=days[0].isoformat(),
+            last_day=days[-1].isoformat(),
+        )
+    except Exception:
+        logger.exception(
+            "Revenue ledger backfill could not be queued",
+            extra={"provider_id": provider_id},
+        )
+
+
+def _truncate_to_granularity(
+    ts: datetime,
+    granularity: EnergyRangeGranularity,
+) -> datetime:
+    if granularity == EnergyRangeGranularity.HOUR:
+        return _floor_hour(ts)
+    if granularity == EnergyRangeGranularity.DAY:
+        return ts.replace(hour=0, minute=0, second=0, microsecond=0)
+    return ts.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def _get_or_compute_hourly_rollups(
+    *,
+    power_samples: PowerSampleLoader,
+    rollup_repo: EnergyRollupRepository,
+    start: datetime,
+    end: datetime,
+    closed_until: datetime,
+    max_interval_seconds: float | None = None,
+) -> list[ProviderEnergyHourlyRollup]:
+    """Stored rollups of the closed hours, or ones computed in memory.
+
+    Missing hours are not written back; the rollup tasks store them.
+    """
+    rollups = rollup_repo.list_for_window(
+        provider_id=power_samples.provider_id,
+        date_start=start,
+        date_end=closed_until,
+    )
+    expected_hours = int((closed_until - start) / timedelta(hours=1))
+    if len(rollups) == expected_hours and all(
+        rollup.sample_hold_seconds == max_interval_seconds for rollup in rollups
+    ):
+        return rollups
+
+    return compute_hourly_rollups(
+        power_samples=power_samples,
+        start=start,
+        end=end,
+        closed_until=closed_until,
+        max_interval_seconds=max_interval_seconds,
+    )
+
+
+def _integrate_open_hour(
+    *,
+    power_samples: PowerSampleLoader,
+    day_start: datetime,
+    hour_start: datetime,
+    end: datetime,
+    max_interval_seconds: float | None = None,
+) -> dict[datetime, float]:
+    raw_samples = power_samples.series(start=hour_start, end=end)
+    window_start = hour_start
+
+    # The last sample of the closed hours is kept at its own timestamp, so
+    # sample-hold capping matches integrating the whole day in one pass.
+    previous_sample = power_samples.get_last_before(before=hour_start)
+    if previous_sample is not None:
+        previous_ts = previous_sample[0]
+        if previous_ts >= day_start:
+            window_start = previous_ts
+            hour_samples = raw_samples
+            raw_samples = PowerSeries.from_pairs([previous_sample])
+            raw_samples.extend(hour_samples)
+
+    samples = build_window_samples(
+        raw_samples=raw_samples,
+        previous_sample=None,
+        start=window_start,
+        end=end,
+        carry_forward_seconds=max_interval_seconds,
+    )
+    hourly_energy = integrate_hourly(
+        samples,
+        max_interval_seconds=max_interval_seconds,
+    )
+    return {
+        hour_dt: energy
+        for hour_dt, energy in hourly_energy.items()
+        if hour_dt >= hour_start
+    }
+
+
+def _build_metric_series(
+    *,
+    repo: MeasurementRepository,
+    provider_id: int,
+    definition,
+    start: datetime,
+    end: datetime,
+    max_points: int | None = None,
+    since: datetime | None = None,
+) -> ProviderMetricSeriesOut:
+    raw_samples = _list_metric_samples(
+        repo=repo,
+        provider_id=provider_id,
+        definition=definition,
+        start=start,
+        end=end,
+        since=since,
+    )
+    return _build_metric_series_from_samples(
+        definition=definition,
+        raw_samples=raw_samples,
+        start=start,
+        max_points=max_points,
+        since=since,
+    )
+
+
+def _list_metric_samples(
+    *,
+    repo: MeasurementRepository,
+    provider_id: int,
+    definition,
+    start: datetime,
+    end: datetime,
+    since: datetime | None = None,
+):
+    date_start = start
+    if since is not None:
+        if definition.aggregation_mode == TelemetryAggregationMode.HOURLY_INTEGRAL:
+            # The open hour is integrated again, with the preceding hour as
+            # lead-in so the interval crossing into it is accounted the same
+            # way as in the full-day series.
+            date_start = max(start, _floor_hour(since) - timedelta(hours=1))
+        else:
+            date_start = since
+    return repo.list_metric_samples(
+        provider_id=provider_id,
+        metric_key=definition.metric_key,
+        date_start=date_start,
+        date_end=end,
+    )
+
+
+def _build_metric_series_batch(
+    *,
+    repo: MeasurementRepository,
+    provider_id: int,
+    definitions: list[ProviderTelemetryMetricDefinition],
+    start: datetime,
+    end: datetime,
+    samples_by_key: dict[str, list] | None = None,
+) -> list[ProviderMetricSeriesOut]:
+    if samples_by_key is None:
+        samples_by_key = repo.list_metric_samples_for_keys(
+            provider_id=provider_id,
+            metric_keys=[definition.metric_key for definition in definitions],
+            date_start=start,
+            date_end=end,
+        )
+    return [
+        _build_metric_series_from_samples(
+            definition=definition,
+            raw_samples=samples_by_key.get(definition.metric_key, []),
+            start=start,
+        )
+        for definition in definitions
+    ]
+
+
+def _build_metric_series_from_samples(
     *,
-    repo: MeasurementRepository,
-    provider_id: int,
     definition,
+    raw_samples,
     start: datetime,
-    end: datetime,
+    max_points: int | None = None,
+    since: datetime | None = None,
 ) -> ProviderMetricSeriesOut:
-    raw_samples = repo.list_metric_samples(
-        provider_id=provider_id,
-        metric_key=definition.metric_key,
-        date_start=start,
-        date_end=end,
-    )
-
     entries: list[ProviderMetricPoint] = []
     hours: list[ProviderMetricHourlyPoint] = []
     output_unit = definition.unit
 
     if definition.aggregation_mode == TelemetryAggregationMode.RAW:
+        points = [
+            (_to_utc_aware(sample.measured_at), float(sample.value))
+            for sample in raw_samples
+        ]
+        if since is not None:
+            points = [point for point in points if point[0] > since]
         entries = [
             ProviderMetricPoint(
-                timestamp=_to_utc_aware(sample.measured_at),
-                value=round(float(sample.value), 5),
+                timestamp=ts,
+                value=round(value, 5),
             )
-            for sample in raw_samples
+            for ts, value in downsample_lttb(points, max_points)
         ]
     elif definition.aggregation_mode == TelemetryAggregationMode.HOURLY_INTEGRAL:
-        hourly_energy = EnergyCalculationService.integrate_hourly(
+        hourly_energy = integrate_hourly(
             [
                 PowerSample(
                     ts=_to_utc_aware(sample.measured_at),
@@ -523,6 +1949,8 @@ def _build_metric_series(
             ]
         )
         output_unit = _energy_unit_from_unit(definition.unit)
+        if since is not None:
+            hourly_energy = _hours_from(hourly_energy, since)
         hours = [
             ProviderMetricHourlyPoint(
                 hour=hour_dt,
@@ -545,6 +1973,59 @@ def _build_metric_series(
     )
 
 
+def _build_columnar_metric_series(
+    *,
+    definition,
+    raw_samples,
+    start: datetime,
+    max_points: int | None = None,
+    since: datetime | None = None,
+) -> dict:
+    entries = _empty_columns()
+    hours = _empty_columns()
+    output_unit = definition.unit
+
+    if definition.aggregation_mode == TelemetryAggregationMode.RAW:
+        points = [
+            (_to_utc_aware(sample.measured_at), float(sample.value))
+            for sample in raw_samples
+        ]
+        if since is not None:
+            points = [point for point in points if point[0] > since]
+        for ts, value in downsample_lttb(points, max_points):
+            entries["timestamps"].append(_epoch_ms(ts))
+            entries["values"].append(round(value, 5))
+    elif definition.aggregation_mode == TelemetryAggregationMode.HOURLY_INTEGRAL:
+        hourly_energy = integrate_hourly(
+            [
+                PowerSample(
+                    ts=_to_utc_aware(sample.measured_at),
+                    value=float(sample.value),
+                )
+                for sample in raw_samples
+            ]
+        )
+        output_unit = _energy_unit_from_unit(definition.unit)
+        if since is not None:
+            hourly_energy = _hours_from(hourly_energy, since)
+        for hour_dt, energy in sorted(hourly_energy.items()):
+            hours["timestamps"].append(_epoch_ms(hour_dt))
+            hours["values"].append(round(energy, 5))
+
+    return {
+        "metric_key": definition.metric_key,
+        "label": definition.label,
+        "unit": output_unit,
+        "source_unit": definition.unit,
+        "chart_type": _enum_value(definition.chart_type),
+        "aggregation_mode": _enum_value(definition.aggregation_mode),
+        "capability_tag": _enum_value(definition.capability_tag),
+        "date": start.date().isoformat(),
+        "entries": entries,
+        "hours": hours,
+    }
+
+
 def _list_metric_definitions_for_provider(
     *,
     provider,
@@ -632,34 +2113,16 @@ def _resolve_measured_unit_from_day(day: DayEnergyOut) -> str | None:
     return None
 
 
-def _build_day_power_samples(
+def _load_market_prices(
+    repo: MarketEnergyPriceRepository,
     *,
-    repo: MeasurementRepository,
-    provider_id: int,
-    start: datetime,
-    end: datetime,
-    carry_forward_seconds: float | None = None,
-) -> list[PowerSample]:
-    previous_sample = repo.get_last_power_sample_before(
-        provider_id=provider_id,
-        before=start,
-    )
-    if previous_sample is not None:
-        previous_ts, _ = previous_sample
-        if _to_utc_aware(previous_ts).date() != start.date():
-            previous_sample = None
-    raw_samples = repo.list_power_samples(
-        provider_id=provider_id,
-        date_start=start,
-        date_end=end,
-    )
-    return _build_window_samples(
-        raw_samples=raw_samples,
-        previous_sample=previous_sample,
-        start=start,
-        end=end,
-        carry_forward_seconds=carry_forward_seconds,
-    )
+    market: str,
+    day: date_type,
+) -> MarketPriceIndex:
+    store = get_market_price_store()
+    if store is None:
+        return load_market_prices(repo, market=market, day=day)
+    return store.get_day(repo, market=market, day=day)
 
 
 def _build_market_price_context(
@@ -667,35 +2130,35 @@ def _build_market_price_context(
     repo: MarketEnergyPriceRepository,
     market: str,
     label: str,
-    start: datetime,
-    end: datetime,
+    history: MarketPriceIndex,
     reference_ts: datetime,
     energy_unit: str | None,
 ) -> ProviderMarketPriceOut | None:
-    active_entry = repo.get_active_at(market=market, timestamp=reference_ts)
+    active_entry = history.entry_at(reference_ts)
+    if active_entry is None:
+        active_entry = repo.get_active_at(market=market, timestamp=reference_ts)
     if active_entry is None:
         active_entry = repo.get_latest_before(market=market, timestamp=reference_ts)
     if active_entry is None:
         return None
 
-    history_entries = repo.list_between(
-        market=market,
-        date_start=start,
-        date_end=end + timedelta(microseconds=1),
-    )
-    history = [
+    history_points = [
         MarketEnergyPricePointOut(
-            interval_start=_to_utc_aware(entry.interval_start),
-            interval_end=_to_utc_aware(entry.interval_end),
+            interval_start=interval_start,
+            interval_end=interval_end,
             price=round(float(entry.price_value), 6),
             currency=entry.currency,
             unit=entry.price_unit,
         )
-        for entry in history_entries
+        for interval_start, interval_end, entry in zip(
+            history.starts,
+            history.ends,
+            history.entries,
+        )
     ]
 
     price = round(float(active_entry.price_value), 6)
-    price_per_energy_unit = _convert_market_price_to_energy_unit(
+    price_per_energy_unit = convert_market_price_to_energy_unit(
         price=price,
         price_unit=active_entry.price_unit,
         energy_unit=energy_unit,
@@ -716,231 +2179,317 @@ def _build_market_price_context(
         ),
         price_per_energy_unit=price_per_energy_unit,
         energy_unit=energy_unit,
-        history=history,
+        history=history_points,
     )
 
 
 def _build_matched_revenue_summary(
     *,
-    samples: list[PowerSample],
-    market_entries: list[object],
+    samples: PowerSeries | list[PowerSample],
+    market_index: MarketPriceIndex,
     energy_unit: str | None,
     hourly_points: list[HourlyEnergyPoint] | None = None,
     max_interval_seconds: float | None = None,
 ) -> ProviderMatchedRevenueOut | None:
-    if not samples or len(samples) < 2 or not market_entries:
-        return None
-
-    total_export_energy = 0.0
-    total_revenue = 0.0
-    matched_intervals = 0
-    hourly_revenue: dict[datetime, float] = defaultdict(float)
-    hourly_export_energy: dict[datetime, float] = defaultdict(float)
-
-    sorted_entries = sorted(
-        market_entries,
-        key=lambda entry: _to_utc_aware(entry.interval_start),
-    )
-
-    for interval_start, interval_end, power in _iter_effective_power_intervals(
+    match = match_market_revenue(
         samples=samples,
+        market_index=market_index,
+        energy_unit=energy_unit,
         max_interval_seconds=max_interval_seconds,
-    ):
-        cursor = interval_start
-        while cursor < interval_end:
-            market_entry = _find_market_entry_for_timestamp(
-                market_entries=sorted_entries,
-                timestamp=cursor,
-            )
-            if market_entry is None:
-                break
-
-            market_end = _to_utc_aware(market_entry.interval_end)
-            hour_end = cursor.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
-            segment_end = min(interval_end, market_end, hour_end)
-            dt_hours = (segment_end - cursor).total_seconds() / 3600.0
-            if dt_hours <= 0:
-                break
-
-            energy = power * dt_hours
-            export_energy = max(0.0, energy)
-            price_per_energy_unit = _convert_market_price_to_energy_unit(
-                price=float(market_entry.price_value),
-                price_unit=market_entry.price_unit,
-                energy_unit=energy_unit,
-            )
-
-            if export_energy > 0 and price_per_energy_unit is not None:
-                hour_bucket = cursor.replace(minute=0, second=0, microsecond=0)
-                total_export_energy += export_energy
-                total_revenue += export_energy * price_per_energy_unit
-                matched_intervals += 1
-                hourly_export_energy[hour_bucket] += export_energy
-                hourly_revenue[hour_bucket] += export_energy * price_per_energy_unit
+    )
+    if match.matched_intervals == 0:
+        return None
 
-            cursor = segment_end
+    first_entry = market_index.entries[0]
+    return _summarize_revenue_match(
+        match,
+        market=str(first_entry.market),
+        currency=str(first_entry.currency),
+        energy_unit=energy_unit,
+        hourly_points=hourly_points,
+    )
 
-    if matched_intervals == 0:
-        return None
 
+def _summarize_revenue_match(
+    match: RevenueMatch,
+    *,
+    market: str,
+    currency: str,
+    energy_unit: str | None,
+    hourly_points: list[HourlyEnergyPoint] | None = None,
+) -> ProviderMatchedRevenueOut:
     if hourly_points is not None:
         for point in hourly_points:
             hour_dt = _to_utc_aware(point.hour)
-            point.revenue = round(hourly_revenue.get(hour_dt, 0.0), 6)
+            point.revenue = round(match.hourly_revenue.get(hour_dt, 0.0), 6)
 
-    first_entry = sorted_entries[0]
     return ProviderMatchedRevenueOut(
-        market=str(first_entry.market),
+        market=market,
         label="RCE dopasowane do interwału próbki",
-        currency=str(first_entry.currency),
+        currency=currency,
         energy_unit=energy_unit,
-        total_export_energy=round(total_export_energy, 5),
-        total_revenue=round(total_revenue, 6),
-        matched_intervals=matched_intervals,
+        total_export_energy=round(match.total_export_energy, 5),
+        total_revenue=round(match.total_revenue, 6),
+        matched_intervals=match.matched_intervals,
         hours=[
             HourlyRevenuePoint(
                 hour=hour_dt,
                 revenue=round(revenue, 6),
-                export_energy=round(hourly_export_energy.get(hour_dt, 0.0), 5),
+                export_energy=round(match.hourly_export_energy.get(hour_dt, 0.0), 5),
             )
-            for hour_dt, revenue in sorted(hourly_revenue.items())
+            for hour_dt, revenue in sorted(match.hourly_revenue.items())
         ],
     )
 
 
-def _find_market_entry_for_timestamp(
-    *,
-    market_entries: list[object],
-    timestamp: datetime,
-):
-    for entry in market_entries:
-        interval_start = _to_utc_aware(entry.interval_start)
-        interval_end = _to_utc_aware(entry.interval_end)
-        if interval_start <= timestamp < interval_end:
-            return entry
-    return None
-
-
-def _resolve_day_window(
+def _build_day_revenue(
     *,
-    selected_date: date_type | None,
-    now: datetime,
-) -> tuple[datetime, datetime]:
-    day = selected_date or now.date()
-    start = datetime.combine(day, datetime.min.time(), tzinfo=timezone.utc)
+    ledger_rows: list[ProviderRevenueHourlyLedger] | None,
+    power_samples: PowerSampleLoader,
+    market_index: MarketPriceIndex | None,
+    start: datetime,
+    end: datetime,
+    energy_unit: str | None,
+    hourly_points: list[HourlyEnergyPoint] | None = None,
+    max_interval_seconds: float | None = None,
+) -> ProviderMatchedRevenueOut | None:
+    """Matched revenue of one day.
+
+    ``ledger_rows`` are the complete stored ledger hours of a closed day, if
+    any, and replace matching altogether.
+    """
+    if ledger_rows is not None:
+        match = revenue_match_from_ledger(ledger_rows)
+        if match.matched_intervals == 0:
+            return None
+        first_row = next(row for row in ledger_rows if row.matched_intervals)
+        return _summarize_revenue_match(
+            match,
+            market=first_row.market,
+            currency=first_row.currency,
+            energy_unit=energy_unit,
+            hourly_points=hourly_points,
+        )
 
-    if day == now.date():
-        return start, now
+    match = match_market_revenue(
+        samples=build_day_power_samples(
+            power_samples=power_samples,
+            start=start,
+            end=end,
+            carry_forward_seconds=max_interval_seconds,
+        ),
+        market_index=market_index,
+        energy_unit=energy_unit,
+        max_interval_seconds=max_interval_seconds,
+    )
+    if match.matched_intervals == 0:
+        return None
 
-    end = start + timedelta(days=1) - timedelta(microseconds=1)
-    return start, end
+    first_entry = market_index.entries[0]
+    return _summarize_revenue_match(
+        match,
+        market=str(first_entry.market),
+        currency=str(first_entry.currency),
+        energy_unit=energy_unit,
+        hourly_points=hourly_points,
+    )
 
 
-def _to_utc_aware(ts: datetime) -> datetime:
-    if ts.tzinfo is None:
-        return ts.replace(tzinfo=timezone.utc)
-    return ts.astimezone(timezone.utc)
+def _energy_validator(
+    *,
+    provider,
+    repo: MeasurementRepository,
+    start: datetime,
+    end: datetime,
+    max_interval_seconds: float | None = None,
+) -> tuple:
+    """Everything energy integrated over ``[start, end]`` depends on.
+
+    A window still open at ``end`` keeps changing while its last sample is
+    carried forward, so the validator includes the instant carrying stops:
+    ``end`` itself until the sample-hold runs out, after which the window
+    stays stable until a new sample arrives.
+    """
+    version = repo.get_power_version(
+        provider_id=provider.id,
+        date_start=start,
+        date_end=end,
+    )
+    return (
+        provider.id,
+        provider.updated_at,
+        start,
+        _carry_until(version, end=end, max_interval_seconds=max_interval_seconds),
+        max_interval_seconds,
+        *version,
+    )
 
 
-def _resolve_hour_window(*, now: datetime) -> tuple[datetime, datetime]:
-    start = now.replace(minute=0, second=0, microsecond=0)
-    return start, now
+def _carry_until(
+    version: SeriesVersion,
+    *,
+    end: datetime,
+    max_interval_seconds: float | None = None,
+) -> datetime | None:
+    if version.last_measured_at is None:
+        return None
+    if max_interval_seconds is None or max_interval_seconds <= 0:
+        return end
+    return min(
+        end,
+        _to_utc_aware(version.last_measured_at)
+        + timedelta(seconds=max_interval_seconds),
+    )
 
 
-def _build_window_samples(
+def _is_settled(
     *,
-    raw_samples: list[tuple[datetime, float]],
-    previous_sample: tuple[datetime, float] | None,
-    start: datetime,
     end: datetime,
-    carry_forward_seconds: float | None = None,
-) -> list[PowerSample]:
-    points: list[PowerSample] = []
-
-    if previous_sample:
-        previous_ts, previous_value = previous_sample
-        previous_ts_utc = _to_utc_aware(previous_ts)
-        if _is_sample_fresh_for_boundary(
-            sample_ts=previous_ts_utc,
-            boundary_ts=start,
-            carry_forward_seconds=carry_forward_seconds,
-        ):
-            points.append(PowerSample(ts=start, value=float(previous_value)))
-
-    for ts, value in raw_samples:
-        ts_utc = _to_utc_aware(ts)
-        if ts_utc < start or ts_utc > end:
-            continue
-        points.append(PowerSample(ts=ts_utc, value=float(value)))
+    now: datetime,
+    max_interval_seconds: float | None = None,
+) -> bool:
+    """Whether a window ending at ``end`` is over for caching purposes.
 
-    if not points:
-        return []
+    Collectors deliver the last samples of a window up to one sample hold
+    late, so a past day is only cached once that much time has passed.
+    """
+    return now >= end + timedelta(seconds=max_interval_seconds or 0)
 
-    points.sort(key=lambda sample: sample.ts)
 
-    deduped: list[PowerSample] = []
-    for sample in points:
-        if deduped and deduped[-1].ts == sample.ts:
-            deduped[-1] = sample
-        else:
-            deduped.append(sample)
-
-    if deduped[-1].ts < end:
-        carry_until = end
-        if carry_forward_seconds is not None and carry_forward_seconds > 0:
-            carry_until = min(
-                end,
-                deduped[-1].ts + timedelta(seconds=carry_forward_seconds),
+def _telemetry_etag(
+    *,
+    db: Session,
+    provider,
+    start: datetime,
+    end: datetime,
+    max_interval_seconds: float | None,
+    sections: frozenset[ResponseSection],
+) -> str:
+    repo = MeasurementRepository(db)
+    parts: list = [
+        *_energy_validator(
+            provider=provider,
+            repo=repo,
+            start=start,
+            end=end,
+            max_interval_seconds=max_interval_seconds,
+        ),
+        sorted(section.value for section in sections),
+    ]
+    if ResponseSection.METRICS in sections:
+        parts.extend(
+            repo.get_metric_version(
+                provider_id=provider.id, date_start=start, date_end=end
             )
-        if carry_until > deduped[-1].ts:
-            deduped.append(PowerSample(ts=carry_until, value=deduped[-1].value))
-
-    return deduped
+        )
+    if sections & {ResponseSection.PRICES, ResponseSection.REVENUE}:
+        # Prices of the previous day count as well: the latest price before
+        # the window can be the one in effect at its start.
+        parts.extend(
+            MarketEnergyPriceRepository(db).get_version(
+                markets=list(_TelemetryMarketData.LABELS),
+                date_start=start - timedelta(days=1),
+                date_end=start + timedelta(days=1),
+                started_before=end,
+            )
+        )
+    return build_etag("telemetry", *parts)
 
 
-def _integrate_window_energy(
-    samples: list[PowerSample],
+def _resolve_sections(
+    include: list[str] | None,
     *,
-    max_interval_seconds: float | None = None,
-) -> float:
-    intervals = EnergyCalculationService.integrate_intervals(
-        samples,
-        max_interval_seconds=max_interval_seconds,
-    )
-    return float(sum(interval.energy for interval in intervals))
+    allowed: frozenset[ResponseSection],
+) -> frozenset[ResponseSection]:
+    """Sections named by ``include``, repeated or comma-separated; all by default."""
+    if not include:
+        return allowed
+    names = {
+        name.strip() for value in include for name in value.split(",") if name.strip()
+    }
+    unknown = sorted(names - {section.value for section in allowed})
+    if unknown:
+        raise HTTPException(
+            status_code=422,
+            detail=(
+                f"Unknown include section(s): {', '.join(unknown)}; expected "
+                f"{', '.join(sorted(section.value for section in allowed))}"
+            ),
+        )
+    return frozenset(ResponseSection(name) for name in names)
+
+
+def _day_exclude(sections: frozenset[ResponseSection]) -> set[str]:
+    """Day fields left out of a response limited to ``sections``."""
+    excluded = set()
+    if ResponseSection.HOURS not in sections:
+        excluded.add("hours")
+    if ResponseSection.TOTALS not in sections:
+        excluded.update({"total_energy", "import_energy", "export_energy"})
+    if ResponseSection.ENTRIES not in sections:
+        excluded.add("entries")
+    return excluded
+
+
+def _telemetry_sections_response(
+    response: ProviderTelemetryResponse,
+    sections: frozenset[ResponseSection],
+) -> ProviderTelemetryResponse | ModelJSONResponse:
+    if sections == TELEMETRY_SECTIONS:
+        return response
+    exclude: dict = {}
+    day_exclude = _day_exclude(sections)
+    if day_exclude:
+        exclude["day"] = day_exclude
+    if ResponseSection.METRICS not in sections:
+        exclude["metrics"] = True
+    if ResponseSection.PRICES not in sections:
+        exclude["settlement_price"] = True
+        exclude["forecast_price"] = True
+    if ResponseSection.REVENUE not in sections:
+        exclude["matched_revenue"] = True
+    return ModelJSONResponse(response, exclude=exclude)
+
+
+def _resolve_since(since: datetime | None, *, start: datetime) -> datetime | None:
+    """Normalize a ``since`` cursor; one before the day means the full day."""
+    if since is None:
+        return None
+    since = _to_utc_aware(since)
+    if since < start:
+        return None
+    return since
+
+
+def _hours_from(
+    hourly_values: dict[datetime, float],
+    since: datetime,
+) -> dict[datetime, float]:
+    """Keep the hour containing ``since`` and every later one."""
+    since_hour = _floor_hour(since)
+    return {
+        hour_dt: value
+        for hour_dt, value in hourly_values.items()
+        if hour_dt >= since_hour
+    }
 
 
-def _iter_effective_power_intervals(
-    *,
-    samples: list[PowerSample],
-    max_interval_seconds: float | None = None,
-):
-    for left, right in zip(samples, samples[1:]):
-        interval_end = right.ts
-        if max_interval_seconds is not None and max_interval_seconds > 0:
-            capped_end = left.ts + timedelta(seconds=max_interval_seconds)
-            if capped_end < interval_end:
-                interval_end = capped_end
-        if interval_end <= left.ts:
-            continue
-        yield left.ts, interval_end, left.value
+def _to_utc_aware(ts: datetime) -> datetime:
+    if ts.tzinfo is None:
+        return ts.replace(tzinfo=timezone.utc)
+    return ts.astimezone(timezone.utc)
 
 
-def _resolve_sample_hold_seconds(expected_interval_sec: int | None) -> float | None:
-    if expected_interval_sec is None or expected_interval_sec <= 0:
-        return None
-    return float(min(max(expected_interval_sec * 5, 300), 900))
+def _resolve_hour_window(*, now: datetime) -> tuple[datetime, datetime]:
+    return _floor_hour(now), now
 
 
-def _is_sample_fresh_for_boundary(
-    *,
-    sample_ts: datetime,
-    boundary_ts: datetime,
-    carry_forward_seconds: float | None,
-) -> bool:
-    if carry_forward_seconds is None or carry_forward_seconds <= 0:
-        return True
-    return (boundary_ts - sample_ts).total_seconds() <= carry_forward_seconds
+def _floor_hour(ts: datetime) -> datetime:
+    return ts.replace(minute=0, second=0, microsecond=0)
+
+
+def _floor_day(ts: datetime) -> datetime:
+    return ts.replace(hour=0, minute=0, second=0, microsecond=0)
 
 
 def _list_devices_for_power_provider(
@@ -961,26 +2510,136 @@ def _list_devices_for_power_provider(
     )
 
 
-def _calculate_device_on_seconds(
+def _advance_current_hour_samples(
     *,
-    device: Device,
+    pool: CurrentHourPool,
+    repo: MeasurementRepository,
+    provider_id: int,
+    end: datetime,
+) -> None:
+    if pool.sample_cursor is not None:
+        version = repo.get_power_version(
+            provider_id=provider_id,
+            date_start=pool.hour_start,
+            date_end=pool.sample_cursor,
+            non_null=True,
+        )
+        if (
+            version.row_count != pool.sample_count
+            or version.last_measured_at is None
+            or _to_utc_aware(version.last_measured_at) != pool.sample_cursor
+        ):
+            pool.reset_samples()
+
+    if not pool.samples_started:
+        previous_sample = repo.get_last_power_sample_before(
+            provider_id=provider_id,
+            before=pool.hour_start,
+        )
+        carried_value = None
+        if previous_sample is not None and is_sample_fresh_for_boundary(
+            sample_ts=_to_utc_aware(previous_sample[0]),
+            boundary_ts=pool.hour_start,
+            carry_forward_seconds=pool.sample_hold_seconds,
+        ):
+            carried_value = previous_sample[1]
+        pool.carry_in(carried_value)
+
+    pool.add_samples(
+        repo.list_power_samples(
+            provider_id=provider_id,
+            date_start=pool.sample_cursor or pool.hour_start,
+            date_end=end,
+        )
+    )
+
+
+def _advance_current_hour_state_events(
+    *,
+    pool: CurrentHourPool,
     event_repo: DeviceEventRepository,
+    device_ids: list[int],
+    end: datetime,
+) -> None:
+    if pool.event_cursor is not None:
+        version = event_repo.get_state_version(
+            device_ids=list(pool.previous_state_events),
+            date_start=pool.hour_start,
+            date_end=pool.event_cursor,
+        )
+        if (
+            version.row_count != pool.state_event_count
+            or version.last_measured_at is None
+            or _to_utc_aware(version.last_measured_at) != pool.event_cursor
+        ):
+            pool.reset_state_events()
+
+    known_device_ids = [
+        device_id for device_id in device_ids if device_id in pool.previous_state_events
+    ]
+    new_device_ids = [
+        device_id
+        for device_id in device_ids
+        if device_id not in pool.previous_state_events
+    ]
+
+    # Known devices only need events since the cursor; it has to be read
+    # before events of newly seen devices move it forward.
+    if known_device_ids:
+        pool.add_state_events(
+            event_repo.list_states_for_devices(
+                device_ids=known_device_ids,
+                date_start=pool.event_cursor or pool.hour_start,
+                date_end=end,
+            )
+        )
+
+    if new_device_ids:
+        previous_state_events = event_repo.get_last_states_for_devices_before(
+            device_ids=new_device_ids,
+            before=pool.hour_start,
+        )
+        pool.set_previous_state_events(new_device_ids, previous_state_events)
+        pool.add_state_events(
+            event_repo.list_states_for_devices(
+                device_ids=new_device_ids,
+                date_start=pool.hour_start,
+                date_end=end,
+            )
+        )
+
+
+def _calculate_devices_on_seconds(
+    *,
+    devices: list[Device],
+    previous_state_events: dict[int, object | None],
+    hour_state_events: dict[int, list],
     start: datetime,
     end: datetime,
-) -> float:
+) -> dict[int, float]:
     if end <= start:
-        return 0.0
+        return {device.id: 0.0 for device in devices}
+
+    return {
+        device.id: _calculate_device_on_seconds(
+            device=device,
+            previous_state_event=previous_state_events.get(device.id),
+            hour_state_events=hour_state_events.get(device.id, []),
+            start=start,
+            end=end,
+        )
+        for device in devices
+    }
 
-    previous_state_event = event_repo.get_last_state_for_device_before(
-        device_id=device.id,
-        before=start,
-    )
-    hour_state_events = event_repo.list_state_for_device(
-        device_id=device.id,
-        date_start=start,
-        date_end=end,
-    )
 
+def _calculate_device_on_seconds(
+    *,
+    device: Device,
+    previous_state_event,
+    hour_state_events: list,
+    start: datetime,
+    end: datetime,
+) -> float:
     current_state = _resolve_state_from_event(previous_state_event)
     if current_state is None:
         current_state = _resolve_state_from_device_snapshot(device=device, start=start)
@@ -1100,30 +2759,6 @@ def _convert_kwh_to_energy_unit(*, value_kwh: float, energy_unit: str) -> float:
     return value_kwh
 
 
-def _convert_market_price_to_energy_unit(
-    *,
-    price: float,
-    price_unit: str | None,
-    energy_unit: str | None,
-) -> float | None:
-    if not price_unit or not energy_unit:
-        return None
-
-    normalized_price_unit = price_unit.strip().lower()
-    normalized_energy_unit = energy_unit.strip().lower()
-
-    if normalized_price_unit == "mwh":
-        if normalized_energy_unit == "kwh":
-            return round(price / 1000.0, 6)
-        if normalized_energy_unit == "wh":
-            return round(price / 1_000_000.0, 9)
-
-    if normalized_price_unit == normalized_energy_unit:
-        return round(price, 6)
-
-    return None
-
-
 def _empty_day(day_key: str) -> DayEnergyOut:
     return DayEnergyOut(
         date=day_key,
@@ -1142,12 +2777,28 @@ def _empty_power_day(day_key: str) -> DayPowerOut:
     )
 
 
-def _energy_unit_from_power(unit: PowerUnit | None) -> str | None:
-    if unit == PowerUnit.KILOWATT:
-        return "kWh"
-    if unit == PowerUnit.WATT:
-        return "Wh"
-    return None
+def _empty_columns() -> dict[str, list]:
+    return {"timestamps": [], "values": []}
+
+
+def _empty_columnar_day(day_key: str) -> dict:
+    return {
+        "date": day_key,
+        "total_energy": 0.0,
+        "import_energy": 0.0,
+        "export_energy": 0.0,
+        "measured_unit": None,
+        "entries": _empty_columns(),
+        "hours": _empty_columns(),
+    }
+
+
+def _epoch_ms(ts: datetime) -> int:
+    return (ts - _EPOCH) // timedelta(milliseconds=1)
+
+
+def _enum_value(value):
+    return value.value if isinstance(value, Enum) else value
 
 
 def _energy_unit_from_unit(unit: str | None) -> str | None:
@@ -1,4 +1,5 @@
 from celery import Celery
+from celery.schedules import crontab
 
 from smart_common.core.config import settings
 
@@ -14,6 +15,27 @@ celery_app.conf.update(
     result_serializer="json",
     timezone="Europe/Warsaw",
     enable_utc=True,
+    beat_schedule={
+        "maintain-measurement-partitions": {
+            "task": "app.tasks.partition_tasks.maintain_measurement_partitions_task",
+            "schedule": crontab(hour=3, minute=15),
+        },
+        "compact-provider-telemetry": {
+            "task": "app.tasks.compaction_tasks.compact_provider_telemetry_task",
+            "schedule": crontab(hour=3, minute=45),
+        },
+        "materialize-energy-rollups": {
+            "task": "app.tasks.rollup_tasks.materialize_energy_rollups_task",
+            "schedule": crontab(minute=5),
+        },
+        "materialize-revenue-ledger": {
+            "task": "app.tasks.rollup_tasks.materialize_revenue_ledger_task",
+            "schedule": crontab(minute=20),
+        },
+    },
 )
 
+import app.tasks.compaction_tasks  # noqa
 import app.tasks.email_tasks  # noqa
+import app.tasks.partition_tasks  # noqa
+import app.tasks.rollup_tasks  # noqa
@@ -4,6 +4,9 @@ setup_logging()
 
 import logging
 import os
+from contextlib import asynccontextmanager
+
+import nats
 from fastapi import FastAPI, Request
 from fastapi.encoders import jsonable_encoder
 from fastapi.exceptions import RequestValidationError
@@ -24,6 +27,13 @@ from app.api.routes.devices import device_router
 from app.api.routes.device_events import device_events_router
 from app.api.routes.provider_measurements import provider_measurements_router
 from app.api.routes.schedulers import scheduler_router
+from app.services.measurement_hooks import register_measurement_hooks
+from app.tasks.db import db_session
+from app.services.telemetry_stream import (
+    close_telemetry_stream,
+    connect_telemetry_stream,
+    get_telemetry_stream_hub,
+)
 
 from smart_common.core.config import settings
 
@@ -49,16 +59,44 @@ def _init_sentry() -> None:
     logger.info("Sentry enabled for ENV=%s", settings.ENV)
 
 
+async def _connect_nats():
+    nats_url = os.getenv("NATS_URL")
+    if not nats_url:
+        logger.info("NATS disabled (NATS_URL is not set)")
+        return None
+
+    try:
+        return await nats.connect(nats_url)
+    except Exception:
+        logger.exception("Cannot connect to NATS at %s", nats_url)
+        return None
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    app.state.nats = await _connect_nats()
+    hub = get_telemetry_stream_hub()
+    await connect_telemetry_stream(hub, app.state.nats, open_session=db_session)
+    try:
+        yield
+    finally:
+        await close_telemetry_stream(hub)
+        if app.state.nats is not None:
+            await app.state.nats.drain()
+
+
 # ------------------------------------------------------------------
 # FASTAPI APP
 # ------------------------------------------------------------------
 
 _init_sentry()
+register_measurement_hooks()
 
 app = FastAPI(
     title="Smart Energy Backend",
     description="Backend system for Smart Energy with NATS and Huawei integration",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # ------------------------------------------------------------------
@@ -95,6 +133,7 @@ app.include_router(device_router, prefix="/api")
 app.include_router(device_events_router, prefix="/api")
 app.include_router(provider_measurements_router, prefix="/api")
 app.include_router(scheduler_router, prefix="/api")
+
 # ------------------------------------------------------------------
 # HEALTHCHECK
 # ------------------------------------------------------------------
@@ -106,9 +145,9 @@ def health_check():
 
     # zabezpieczenie: health nie może wywalać 500
     try:
-        nats = getattr(app.state, "nats", None)
-        if nats and getattr(nats, "client", None):
-            nats_connected = bool(nats.client.nc)
+        nc = getattr(app.state, "nats", None)
+        if nc is not None:
+            nats_connected = bool(nc.is_connected)
     except Exception:
         logger.warning("Healthcheck: failed to determine NATS connection")
 
@@ -0,0 +1,42 @@
+from datetime import datetime
+
+from sqlalchemy import DateTime, Float, Integer, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base
+
+
+class ProviderEnergyHourlyRollup(Base):
+    """Integrated energy of one closed UTC hour of a POWER provider.
+
+    ``energy`` is ``None`` when the hour had no integrable interval, so the
+    hour is known to be empty without going back to raw samples.
+    """
+
+    __tablename__ = "provider_energy_hourly_rollups"
+
+    provider_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    hour_start: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        primary_key=True,
+    )
+    sample_hold_seconds: Mapped[float | None] = mapped_column(Float, nullable=True)
+    energy: Mapped[float | None] = mapped_column(Float, nullable=True)
+    import_energy: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    export_energy: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    sample_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    first_sample_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True),
+        nullable=True,
+    )
+    first_sample_value: Mapped[float | None] = mapped_column(Float, nullable=True)
+    last_sample_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True),
+        nullable=True,
+    )
+    last_sample_value: Mapped[float | None] = mapped_column(Float, nullable=True)
+    computed_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False,
+        server_default=func.now(),
+    )
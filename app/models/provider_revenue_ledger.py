@@ -0,0 +1,34 @@
+from datetime import datetime
+
+from sqlalchemy import DateTime, Float, Integer, String, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base
+
+
+class ProviderRevenueHourlyLedger(Base):
+    """Exported energy of one closed UTC hour priced against one market.
+
+    Every hour of a materialized day has a row, so an hour without priced
+    export (``matched_intervals == 0``) is known to have earned nothing.
+    """
+
+    __tablename__ = "provider_revenue_hourly_ledger"
+
+    provider_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    market: Mapped[str] = mapped_column(String(32), primary_key=True)
+    hour_start: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        primary_key=True,
+    )
+    sample_hold_seconds: Mapped[float | None] = mapped_column(Float, nullable=True)
+    export_energy: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    revenue: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    matched_intervals: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    currency: Mapped[str | None] = mapped_column(String(8), nullable=True)
+    energy_unit: Mapped[str | None] = mapped_column(String(8), nullable=True)
+    computed_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False,
+        server_default=func.now(),
+    )
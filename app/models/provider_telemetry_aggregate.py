@@ -0,0 +1,40 @@
+from datetime import datetime
+
+from sqlalchemy import DateTime, Float, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base
+
+# ``series_key`` of the provider's power measurements; metric samples use
+# their metric key, which never starts with ``@``.
+POWER_SERIES_KEY = "@power"
+
+
+class ProviderTelemetryAggregate(Base):
+    """Compacted raw telemetry of one provider series over one time bucket.
+
+    Rows replace raw measurements and metric samples older than the
+    compaction age. ``energy`` is the integrated energy of the bucket and is
+    only kept for the power series.
+    """
+
+    __tablename__ = "provider_telemetry_aggregates"
+
+    provider_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    series_key: Mapped[str] = mapped_column(String(128), primary_key=True)
+    bucket_start: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        primary_key=True,
+    )
+    bucket_seconds: Mapped[int] = mapped_column(Integer, nullable=False)
+    sample_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    min_value: Mapped[float] = mapped_column(Float, nullable=False)
+    max_value: Mapped[float] = mapped_column(Float, nullable=False)
+    avg_value: Mapped[float] = mapped_column(Float, nullable=False)
+    last_value: Mapped[float] = mapped_column(Float, nullable=False)
+    last_sample_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False,
+    )
+    unit: Mapped[str | None] = mapped_column(String(32), nullable=True)
+    energy: Mapped[float | None] = mapped_column(Float, nullable=True)
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from datetime import datetime
+
+from sqlalchemy import func
+
+from app.repositories.measurement_repository import SeriesVersion
+from smart_common.enums.device_event import DeviceEventType
+from smart_common.models.device_event import DeviceEvent
+from smart_common.repositories.device_event import (
+    DeviceEventRepository as BaseDeviceEventRepository,
+)
+
+
+class DeviceEventRepository(BaseDeviceEventRepository):
+    """smart_common device event repository extended with set-based reads."""
+
+    def get_last_states_for_devices_before(
+        self,
+        *,
+        device_ids: list[int],
+        before: datetime,
+    ) -> dict[int, DeviceEvent]:
+        """Latest STATE event before ``before`` for each device that has one."""
+        if not device_ids:
+            return {}
+
+        events = (
+            self.db.query(DeviceEvent)
+            .filter(
+                DeviceEvent.device_id.in_(device_ids),
+                DeviceEvent.event_type == DeviceEventType.STATE,
+                DeviceEvent.created_at < before,
+            )
+            .distinct(DeviceEvent.device_id)
+            .order_by(DeviceEvent.device_id, DeviceEvent.created_at.desc())
+            .all()
+        )
+        return {event.device_id: event for event in events}
+
+    def list_states_for_devices(
+        self,
+        *,
+        device_ids: list[int],
+        date_start: datetime,
+        date_end: datetime,
+    ) -> dict[int, list[DeviceEvent]]:
+        """STATE events inside the window, grouped by device in time order."""
+        grouped: dict[int, list[DeviceEvent]] = defaultdict(list)
+        if not device_ids:
+            return grouped
+
+        events = (
+            self.db.query(DeviceEvent)
+            .filter(
+                DeviceEvent.device_id.in_(device_ids),
+                DeviceEvent.event_type == DeviceEventType.STATE,
+                DeviceEvent.created_at >= date_start,
+                DeviceEvent.created_at <= date_end,
+            )
+            .order_by(DeviceEvent.device_id, DeviceEvent.created_at.asc())
+            .all()
+        )
+        for event in events:
+            grouped[event.device_id].append(event)
+        return grouped
+
+    def get_state_version(
+        self,
+        *,
+        device_ids: list[int],
+        date_start: datetime,
+        date_end: datetime,
+    ) -> SeriesVersion:
+        """Count and newest ``created_at`` of the STATE events of a window."""
+        if not device_ids:
+            return SeriesVersion(row_count=0, last_measured_at=None)
+
+        row_count, last_created_at = (
+            self.db.query(func.count(DeviceEvent.id), func.max(DeviceEvent.created_at))
+            .filter(
+                DeviceEvent.device_id.in_(device_ids),
+                DeviceEvent.event_type == DeviceEventType.STATE,
+                DeviceEvent.created_at >= date_start,
+                DeviceEvent.created_at <= date_end,
+            )
+            .one()
+        )
+        return SeriesVersion(row_count=row_count, last_measured_at=last_created_at)
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+from datetime import date, datetime
+
+from sqlalchemy import Date, cast, func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.models.provider_energy_rollup import ProviderEnergyHourlyRollup
+
+_ROLLUP_VALUE_COLUMNS = (
+    "sample_hold_seconds",
+    "energy",
+    "import_energy",
+    "export_energy",
+    "sample_count",
+    "first_sample_at",
+    "first_sample_value",
+    "last_sample_at",
+    "last_sample_value",
+)
+
+
+class EnergyRollupRepository:
+    model = ProviderEnergyHourlyRollup
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def list_for_window(
+        self,
+        *,
+        provider_id: int,
+        date_start: datetime,
+        date_end: datetime,
+    ) -> list[ProviderEnergyHourlyRollup]:
+        return (
+            self.db.query(self.model)
+            .filter(
+                self.model.provider_id == provider_id,
+                self.model.hour_start >= date_start,
+                self.model.hour_start < date_end,
+            )
+            .order_by(self.model.hour_start.asc())
+            .all()
+        )
+
+    def count_hours_by_day(
+        self,
+        *,
+        provider_id: int,
+        date_start: datetime,
+        date_end: datetime,
+        sample_hold_seconds: float | None,
+    ) -> dict[date, int]:
+        day = func.date_trunc("day", func.timezone("UTC", self.model.hour_start))
+        if sample_hold_seconds is None:
+            hold_filter = self.model.sample_hold_seconds.is_(None)
+        else:
+            hold_filter = self.model.sample_hold_seconds == sample_hold_seconds
+
+        rows = (
+            self.db.query(day.label("day"), func.count().label("hours"))
+            .filter(
+                self.model.provider_id == provider_id,
+                self.model.hour_start >= date_start,
+                self.model.hour_start < date_end,
+                hold_filter,
+            )
+            .group_by(day)
+            .all()
+        )
+        return {row.day.date(): row.hours for row in rows}
+
+    def aggregate_energy(
+        self,
+        *,
+        provider_id: int,
+        date_start: datetime,
+        date_end: datetime,
+        granularity: str,
+        exclude_days: list[date] | None = None,
+    ) -> list:
+        """Sum hourly rollups into ``granularity`` periods (UTC, ordered).
+
+        Hours of ``exclude_days`` are left out, for days the caller computes
+        itself.
+        """
+        hour_start = func.timezone("UTC", self.model.hour_start)
+        period = func.date_trunc(granularity, hour_start).label("period_start")
+        query = self.db.query(
+            period,
+            func.sum(self.model.energy).label("energy"),
+            func.sum(self.model.import_energy).label("import_energy"),
+            func.sum(self.model.export_energy).label("export_energy"),
+        ).filter(
+            self.model.provider_id == provider_id,
+            self.model.hour_start >= date_start,
+            self.model.hour_start < date_end,
+            self.model.energy.isnot(None),
+        )
+        if exclude_days:
+            query = query.filter(cast(hour_start, Date).notin_(exclude_days))
+        return query.group_by(period).order_by(period).all()
+
+    def upsert_hours(
+        self,
+        *,
+        provider_id: int,
+        rows: list[ProviderEnergyHourlyRollup],
+    ) -> None:
+        """Insert or replace hourly rollups; the caller commits.
+
+        Only the rollup tasks write here; reads compute missing hours in
+        memory instead.
+        """
+        if not rows:
+            return
+
+        values = [
+            {
+                "provider_id": provider_id,
+                "hour_start": row.hour_start,
+                **{column: getattr(row, column) for column in _ROLLUP_VALUE_COLUMNS},
+            }
+            for row in rows
+        ]
+        statement = insert(self.model).values(values)
+        statement = statement.on_conflict_do_update(
+            index_elements=[self.model.provider_id, self.model.hour_start],
+            set_={
+                **{
+                    column: getattr(statement.excluded, column)
+                    for column in _ROLLUP_VALUE_COLUMNS
+                },
+                "computed_at": func.now(),
+            },
+        )
+        self.db.execute(statement)
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import NamedTuple
+
+from sqlalchemy import column, func, select, table
+
+from smart_common.repositories.market_energy_price import (
+    MarketEnergyPriceRepository as BaseMarketEnergyPriceRepository,
+)
+
+# Only the columns read by the API; the table itself belongs to smart_common.
+market_energy_prices = table(
+    "market_energy_prices",
+    column("market"),
+    column("interval_start"),
+    column("source_updated_at"),
+)
+
+
+class MarketPriceVersion(NamedTuple):
+    """Price intervals of a window, the ones started and the newest source update."""
+
+    interval_count: int
+    started_count: int
+    last_source_updated_at: datetime | None
+
+
+class MarketEnergyPriceRepository(BaseMarketEnergyPriceRepository):
+    """smart_common market price repository extended with API read paths."""
+
+    def get_version(
+        self,
+        *,
+        markets: list[str],
+        date_start: datetime,
+        date_end: datetime,
+        started_before: datetime,
+    ) -> MarketPriceVersion:
+        """Validator of the prices of ``markets`` in ``[date_start, date_end)``.
+
+        Published, republished and removed intervals change the counts or
+        the newest ``source_updated_at``; ``started_count`` also moves when
+        ``started_before`` enters a new interval, which changes the active
+        price.
+        """
+        prices = market_energy_prices.c
+        row = self.db.execute(
+            select(
+                func.count(),
+                func.count().filter(prices.interval_start <= started_before),
+                func.max(prices.source_updated_at),
+            ).where(
+                prices.market.in_(markets),
+                prices.interval_start >= date_start,
+                prices.interval_start < date_end,
+            )
+        ).one()
+        return MarketPriceVersion(
+            interval_count=row[0],
+            started_count=row[1],
+            last_source_updated_at=row[2],
+        )
@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+# Tables partitioned by month on ``measured_at`` (see migration 8d3f1a6b2c94).
+PARTITIONED_TABLES = ("provider_measurements", "provider_metric_samples")
+
+
+@dataclass(frozen=True)
+class MonthPartition:
+    table: str
+    name: str
+    month: date
+
+    @property
+    def next_month(self) -> date:
+        return add_months(self.month, 1)
+
+
+class MeasurementPartitionRepository:
+    """Creates, lists and retires the monthly partitions of raw telemetry.
+
+    Partitions are named ``<table>_yYYYYmMM`` and cover one UTC month, so a
+    month of history is removed by detaching or dropping one table instead
+    of deleting its rows.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def list_partitions(self, table: str) -> list[MonthPartition]:
+        partitions = []
+        for name in self._child_tables(table):
+            month = parse_partition_month(table, name)
+            if month is not None:
+                partitions.append(MonthPartition(table=table, name=name, month=month))
+        return sorted(partitions, key=lambda partition: partition.month)
+
+    def ensure_partitions(
+        self,
+        table: str,
+        *,
+        first_month: date,
+        last_month: date,
+    ) -> list[str]:
+        """Create the missing month partitions in ``[first_month, last_month]``.
+
+        Postgres refuses ``PARTITION OF`` while the default partition holds
+        rows of the new range, so when there is a default partition the month
+        is built as a plain table, those rows are moved into it and it is
+        attached afterwards.
+        """
+        children = self._child_tables(table)
+        default = default_partition_name(table)
+        existing = {
+            month
+            for month in (parse_partition_month(table, name) for name in children)
+            if month is not None
+        }
+        created = []
+        month = month_start(first_month)
+        while month <= last_month:
+            if month not in existing:
+                name = partition_name(table, month)
+                lower = f"'{month.isoformat()} 00:00:00+00'"
+                upper = f"'{add_months(month, 1).isoformat()} 00:00:00+00'"
+                if default in children:
+                    self._move_default_rows(table, name, lower=lower, upper=upper)
+                else:
+                    self.db.execute(
+                        text(
+                            f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {table} "
+                            f"FOR VALUES FROM ({lower}) TO ({upper})"
+                        )
+                    )
+                created.append(name)
+            month = add_months(month, 1)
+        return created
+
+    def detach_partitions_before(
+        self,
+        table: str,
+        *,
+        before: date,
+        drop: bool = False,
+    ) -> list[str]:
+        """Detach (and optionally drop) partitions ending on or before ``before``."""
+        retired = []
+        for partition in self.list_partitions(table):
+            if partition.next_month > before:
+                break
+            self.db.execute(
+                text(f"ALTER TABLE {table} DETACH PARTITION {partition.name}")
+            )
+            if drop:
+                self.db.execute(text(f"DROP TABLE {partition.name}"))
+            retired.append(partition.name)
+        return retired
+
+    def _child_tables(self, table: str) -> list[str]:
+        _ensure_partitioned_table(table)
+        return list(
+            self.db.execute(
+                text(
+                    "SELECT child.relname FROM pg_inherits "
+                    "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+                    "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+                    "WHERE parent.relname = :table"
+                ),
+                {"table": table},
+            ).scalars()
+        )
+
+    def _move_default_rows(
+        self,
+        table: str,
+        name: str,
+        *,
+        lower: str,
+        upper: str,
+    ) -> None:
+        default = default_partition_name(table)
+        self.db.execute(
+            text(
+                f"CREATE TABLE IF NOT EXISTS {name} "
+                f"(LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+            )
+        )
+        self.db.execute(
+            text(
+                f"WITH moved AS (DELETE FROM {default} "
+                f"WHERE measured_at >= {lower} AND measured_at < {upper} "
+                f"RETURNING *) INSERT INTO {name} SELECT * FROM moved"
+            )
+        )
+        self.db.execute(
+            text(
+                f"ALTER TABLE {table} ATTACH PARTITION {name} "
+                f"FOR VALUES FROM ({lower}) TO ({upper})"
+            )
+        )
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_y{month.year:04d}m{month.month:02d}"
+
+
+def default_partition_name(table: str) -> str:
+    return f"{table}_default"
+
+
+def parse_partition_month(table: str, name: str) -> date | None:
+    prefix = f"{table}_y"
+    suffix = name[len(prefix) :]
+    if not name.startswith(prefix) or len(suffix) != 7 or suffix[4] != "m":
+        return None
+    year, month = suffix[:4], suffix[5:]
+    if not (year.isdigit() and month.isdigit()) or not 1 <= int(month) <= 12:
+        return None
+    return date(int(year), int(month), 1)
+
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _ensure_partitioned_table(table: str) -> None:
+    # Table names are interpolated into DDL, so only known tables pass.
+    if table not in PARTITIONED_TABLES:
+        raise ValueError(f"{table} is not a partitioned telemetry table")
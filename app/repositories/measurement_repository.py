@@ -0,0 +1,588 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import NamedTuple
+
+from sqlalchemy import Float, and_, bindparam, cast, column, func, select, table, true
+from sqlalchemy.dialects.postgresql import ARRAY, aggregate_order_by, array_agg
+from sqlalchemy.types import DateTime
+
+from app.models.provider_telemetry_aggregate import (
+    POWER_SERIES_KEY,
+    ProviderTelemetryAggregate,
+)
+from app.repositories.telemetry_aggregate import (
+    MIN_COMPACTION_AGE,
+    TelemetryAggregateRepository,
+)
+from smart_common.repositories.measurement_repository import (
+    MeasurementRepository as BaseMeasurementRepository,
+)
+
+# Only the columns read by the API; the tables themselves belong to smart_common.
+provider_measurements = table(
+    "provider_measurements",
+    column("id"),
+    column("provider_id"),
+    column("measured_at"),
+    column("measured_value"),
+    column("measured_unit"),
+    column("metadata_payload"),
+    column("extra_data"),
+)
+provider_metric_samples = table(
+    "provider_metric_samples",
+    column("provider_id"),
+    column("provider_measurement_id"),
+    column("metric_key"),
+    column("measured_at"),
+    column("value"),
+    column("unit"),
+)
+
+
+class CompactedMetricSample(NamedTuple):
+    """A metric aggregate bucket read back in the shape of a raw sample."""
+
+    metric_key: str
+    measured_at: datetime
+    value: float
+    unit: str | None
+
+
+class SeriesVersion(NamedTuple):
+    """Row count and newest timestamp of a series window, a response validator."""
+
+    row_count: int
+    last_measured_at: datetime | None
+
+
+class HourlyPowerStats(NamedTuple):
+    """Integrated energy and raw sample statistics of one UTC hour."""
+
+    hour_start: datetime
+    energy: float | None
+    sample_count: int
+    first_sample_at: datetime | None
+    first_sample_value: float | None
+    last_sample_at: datetime | None
+    last_sample_value: float | None
+
+
+class MeasurementRepository(BaseMeasurementRepository):
+    """smart_common measurement repository extended with API read paths.
+
+    Power and metric reads span both storage tiers: raw rows and, for
+    windows older than ``MIN_COMPACTION_AGE``, the bucket aggregates that
+    replaced compacted raw rows. A bucket is read back as one sample at its
+    start, so builders integrate and chart it like any other sample.
+    """
+
+    def list_power_samples(
+        self,
+        *,
+        provider_id: int,
+        date_start: datetime,
+        date_end: datetime,
+    ) -> list[tuple[datetime, float]]:
+        samples = list(
+            super().list_power_samples(
+                provider_id=provider_id,
+                date_start=date_start,
+                date_end=date_end,
+            )
+        )
+        aggregates = self._list_aggregates(
+            provider_id=provider_id,
+            series_keys=[POWER_SERIES_KEY],
+            date_start=date_start,
+            date_end=date_end,
+        )
+        if not aggregates:
+            return samples
+
+        samples += [(row.bucket_start, _bucket_power(row)) for row in aggregates]
+        samples.sort(key=lambda sample: _to_utc_aware(sample[0]))
+        return samples
+
+    def get_last_power_sample_before(
+        self,
+        *,
+        provider_id: int,
+        before: datetime,
+    ):
+        previous = super().get_last_power_sample_before(
+            provider_id=provider_id,
+            before=before,
+        )
+        # Aggregates only cover compacted windows, so a raw sample newer than
+        # the compaction horizon is always the latest one.
+        if previous is not None and _to_utc_aware(previous[0]) >= _compaction_horizon():
+            return previous
+
+        aggregate = TelemetryAggregateRepository(self.db).get_last_before(
+            provider_id=provider_id,
+            series_key=POWER_SERIES_KEY,
+            before=before,
+        )
+        if aggregate is None:
+            return previous
+        if previous is not None and _to_utc_aware(previous[0]) >= _to_utc_aware(
+            aggregate.last_sample_at
+        ):
+            return previous
+        return aggregate.last_sample_at, aggregate.last_value
+
+    def list_metric_samples(
+        self,
+        *,
+        provider_id: int,
+        metric_key: str,
+        date_start: datetime,
+        date_end: datetime,
+    ) -> list:
+        samples = list(
+            super().list_metric_samples(
+                provider_id=provider_id,
+                metric_key=metric_key,
+                date_start=date_start,
+                date_end=date_end,
+            )
+        )
+        aggregates = self._list_aggregates(
+            provider_id=provider_id,
+            series_keys=[metric_key],
+            date_start=date_start,
+            date_end=date_end,
+        )
+        if not aggregates:
+            return samples
+
+        samples += [_compacted_metric_sample(row) for row in aggregates]
+        samples.sort(key=lambda sample: _to_utc_aware(sample.measured_at))
+        return samples
+
+    def list_metric_samples_for_keys(
+        self,
+        *,
+        provider_id: int,
+        metric_keys: list[str],
+        date_start: datetime,
+        date_end: datetime,
+    ) -> dict[str, list]:
+        """Samples of every key in one query, grouped by key in time order."""
+        grouped: dict[str, list] = defaultdict(list)
+        if not metric_keys:
+            return grouped
+
+        samples = provider_metric_samples.c
+        rows = self.db.execute(
+            select(
+                samples.metric_key,
+                samples.measured_at,
+                samples.value,
+                samples.unit,
+            )
+            .where(
+                samples.provider_id == provider_id,
+                samples.metric_key.in_(metric_keys),
+                samples.measured_at >= date_start,
+                samples.measured_at <= date_end,
+            )
+            .order_by(samples.metric_key, samples.measured_at)
+        )
+        for row in rows:
+            grouped[row.metric_key].append(row)
+
+        aggregates = self._list_aggregates(
+            provider_id=provider_id,
+            series_keys=metric_keys,
+            date_start=date_start,
+            date_end=date_end,
+        )
+        if aggregates:
+            for row in aggregates:
+                grouped[row.series_key].append(_compacted_metric_sample(row))
+            for key_samples in grouped.values():
+                key_samples.sort(key=lambda sample: _to_utc_aware(sample.measured_at))
+        return grouped
+
+    def list_power_samples_for_providers(
+        self,
+        *,
+        provider_ids: list[int],
+        date_start: datetime,
+        date_end: datetime,
+    ) -> dict[int, list[tuple[datetime, float]]]:
+        """Power samples of several providers in one query, grouped by provider."""
+        grouped: dict[int, list[tuple[datetime, float]]] = defaultdict(list)
+        if not provider_ids:
+            return grouped
+
+        measurements = provider_measurements.c
+        rows = self.db.execute(
+            select(
+                measurements.provider_id,
+                measurements.measured_at,
+                measurements.measured_value,
+            )
+            .where(
+                measurements.provider_id.in_(provider_ids),
+                measurements.measured_at >= date_start,
+                measurements.measured_at <= date_end,
+                measurements.measured_value.isnot(None),
+            )
+            .order_by(measurements.provider_id, measurements.measured_at)
+        )
+        for provider_id, measured_at, measured_value in rows:
+            grouped[provider_id].append((measured_at, float(measured_value)))
+
+        if _to_utc_aware(date_start) < _compaction_horizon():
+            aggregates = TelemetryAggregateRepository(self.db).list_for_providers(
+                provider_ids=provider_ids,
+                series_keys=[POWER_SERIES_KEY],
+                date_start=date_start,
+                date_end=date_end,
+            )
+            for row in aggregates:
+                grouped[row.provider_id].append((row.bucket_start, _bucket_power(row)))
+            if aggregates:
+                for samples in grouped.values():
+                    samples.sort(key=lambda sample: _to_utc_aware(sample[0]))
+        return grouped
+
+    def list_metric_samples_for_providers(
+        self,
+        *,
+        metric_keys_by_provider: dict[int, list[str]],
+        date_start: datetime,
+        date_end: datetime,
+    ) -> dict[int, dict[str, list]]:
+        """Metric samples of several providers in one query, by provider and key."""
+        grouped: dict[int, dict[str, list]] = defaultdict(lambda: defaultdict(list))
+        provider_ids = [
+            provider_id for provider_id, keys in metric_keys_by_provider.items() if keys
+        ]
+        if not provider_ids:
+            return grouped
+        metric_keys = sorted(
+            {key for keys in metric_keys_by_provider.values() for key in keys}
+        )
+
+        samples = provider_metric_samples.c
+        rows = self.db.execute(
+            select(
+                samples.provider_id,
+                samples.metric_key,
+                samples.measured_at,
+                samples.value,
+                samples.unit,
+            )
+            .where(
+                samples.provider_id.in_(provider_ids),
+                samples.metric_key.in_(metric_keys),
+                samples.measured_at >= date_start,
+                samples.measured_at <= date_end,
+            )
+            .order_by(samples.provider_id, samples.metric_key, samples.measured_at)
+        )
+        for row in rows:
+            if row.metric_key in metric_keys_by_provider[row.provider_id]:
+                grouped[row.provider_id][row.metric_key].append(row)
+
+        if _to_utc_aware(date_start) < _compaction_horizon():
+            aggregates = TelemetryAggregateRepository(self.db).list_for_providers(
+                provider_ids=provider_ids,
+                series_keys=metric_keys,
+                date_start=date_start,
+                date_end=date_end,
+            )
+            for row in aggregates:
+                if row.series_key in metric_keys_by_provider[row.provider_id]:
+                    grouped[row.provider_id][row.series_key].append(
+                        _compacted_metric_sample(row)
+                    )
+            if aggregates:
+                for samples_by_key in grouped.values():
+                    for key_samples in samples_by_key.values():
+                        key_samples.sort(
+                            key=lambda sample: _to_utc_aware(sample.measured_at)
+                        )
+        return grouped
+
+    def get_power_version(
+        self,
+        *,
+        provider_id: int,
+        date_start: datetime,
+        date_end: datetime,
+        non_null: bool = False,
+    ) -> SeriesVersion:
+        """Count and newest ``measured_at`` of the raw measurements of a window.
+
+        Any insert, late write or delete inside the window changes one of
+        them, so together they validate a response built from the window
+        without reading its rows. ``non_null`` counts only the rows with a
+        value, the ones ``list_power_samples`` returns.
+        """
+        measurements = provider_measurements.c
+        query = select(func.count(), func.max(measurements.measured_at)).where(
+            measurements.provider_id == provider_id,
+            measurements.measured_at >= date_start,
+            measurements.measured_at <= date_end,
+        )
+        if non_null:
+            query = query.where(measurements.measured_value.isnot(None))
+        row = self.db.execute(query).one()
+        return SeriesVersion(row_count=row[0], last_measured_at=row[1])
+
+    def get_metric_version(
+        self,
+        *,
+        provider_id: int,
+        date_start: datetime,
+        date_end: datetime,
+        metric_keys: list[str] | None = None,
+    ) -> SeriesVersion:
+        """``get_power_version`` for metric samples, of all keys by default."""
+        samples = provider_metric_samples.c
+        query = select(func.count(), func.max(samples.measured_at)).where(
+            samples.provider_id == provider_id,
+            samples.measured_at >= date_start,
+            samples.measured_at <= date_end,
+        )
+        if metric_keys is not None:
+            query = query.where(samples.metric_key.in_(metric_keys))
+        row = self.db.execute(query).one()
+        return SeriesVersion(row_count=row[0], last_measured_at=row[1])
+
+    def iter_measurements(
+        self,
+        *,
+        provider_id: int,
+        date_start: datetime,
+        date_end: datetime,
+        batch_size: int = 1000,
+    ):
+        """Raw measurements of ``[date_start, date_end)`` in time order, streamed.
+
+        ``yield_per`` reads the rows through a server-side cursor
+        ``batch_size`` at a time instead of loading the whole result, so
+        ranges of months cost the memory of one batch. Only raw rows are
+        returned; windows already compacted exist as aggregates alone.
+        """
+        measurements = provider_measurements.c
+        result = self.db.execute(
+            select(
+                measurements.id,
+                measurements.measured_at,
+                measurements.measured_value,
+                measurements.measured_unit,
+                measurements.metadata_payload,
+                measurements.extra_data,
+            )
+            .where(
+                measurements.provider_id == provider_id,
+                measurements.measured_at >= date_start,
+                measurements.measured_at < date_end,
+            )
+            .order_by(measurements.measured_at, measurements.id)
+            .execution_options(yield_per=batch_size)
+        )
+        try:
+            yield from result
+        finally:
+            result.close()
+
+    def integrate_hourly_power(
+        self,
+        *,
+        provider_id: int,
+        date_start: datetime,
+        date_end: datetime,
+        max_interval_seconds: float | None = None,
+    ) -> list[HourlyPowerStats] | None:
+        """Hourly energy of ``[date_start, date_end]`` integrated in Postgres.
+
+        Mirrors integrating the window's samples in Python: samples of one
+        timestamp keep the last row, every sample holds its value until the
+        next one (``LEAD``), for at most ``max_interval_seconds``, the last
+        one until ``date_end``, and intervals are split at UTC hours. Only
+        one row per hour with samples or energy leaves the database; hours
+        without non-zero intervals have no energy, like ``integrate_hourly``.
+
+        Returns ``None`` when the window may reach compacted data, which
+        only exists as aggregates; callers integrate in Python then.
+        """
+        if _to_utc_aware(date_start) < _compaction_horizon():
+            return None
+
+        measurements = provider_measurements.c
+        in_window = and_(
+            measurements.provider_id == provider_id,
+            measurements.measured_at >= date_start,
+            measurements.measured_at <= date_end,
+            measurements.measured_value.isnot(None),
+        )
+        samples = (
+            select(
+                measurements.measured_at.label("ts"),
+                cast(measurements.measured_value, Float).label("value"),
+            )
+            .distinct(measurements.measured_at)
+            .where(in_window)
+            .order_by(measurements.measured_at, measurements.id.desc())
+            .cte("samples")
+        )
+
+        window_end = bindparam("window_end", date_end, type_=DateTime(timezone=True))
+        interval_end = func.lead(samples.c.ts, 1, window_end).over(
+            order_by=samples.c.ts
+        )
+        if max_interval_seconds is not None and max_interval_seconds > 0:
+            interval_end = func.least(
+                interval_end,
+                samples.c.ts + timedelta(seconds=max_interval_seconds),
+            )
+        intervals = select(
+            samples.c.ts.label("start"),
+            interval_end.label("end"),
+            samples.c.value,
+        ).cte("intervals")
+
+        hours = (
+            func.generate_series(
+                func.date_trunc("hour", intervals.c.start, "UTC"),
+                intervals.c.end - timedelta(microseconds=1),
+                timedelta(hours=1),
+            )
+            .table_valued("hour_start")
+            .render_derived()
+            .lateral("hours")
+        )
+        segment_seconds = cast(
+            func.extract(
+                "epoch",
+                func.least(intervals.c.end, hours.c.hour_start + timedelta(hours=1))
+                - func.greatest(intervals.c.start, hours.c.hour_start),
+            ),
+            Float,
+        )
+        energy = (
+            select(
+                hours.c.hour_start,
+                func.sum(intervals.c.value * (segment_seconds / 3600.0)).label(
+                    "energy"
+                ),
+            )
+            .select_from(intervals.join(hours, true()))
+            .where(intervals.c.end > intervals.c.start, intervals.c.value != 0)
+            .group_by(hours.c.hour_start)
+            .cte("energy")
+        )
+
+        sample_hour = func.date_trunc("hour", measurements.measured_at, "UTC")
+        sample_stats = (
+            select(
+                sample_hour.label("hour_start"),
+                func.count().label("sample_count"),
+                func.min(measurements.measured_at).label("first_sample_at"),
+                array_agg(
+                    aggregate_order_by(
+                        cast(measurements.measured_value, Float),
+                        measurements.measured_at,
+                    ),
+                    type_=ARRAY(Float),
+                )[1].label("first_sample_value"),
+                func.max(measurements.measured_at).label("last_sample_at"),
+                array_agg(
+                    aggregate_order_by(
+                        cast(measurements.measured_value, Float),
+                        measurements.measured_at.desc(),
+                    ),
+                    type_=ARRAY(Float),
+                )[1].label("last_sample_value"),
+            )
+            .where(in_window)
+            .group_by(sample_hour)
+            .cte("sample_stats")
+        )
+
+        hour_start = func.coalesce(sample_stats.c.hour_start, energy.c.hour_start)
+        rows = self.db.execute(
+            select(
+                hour_start.label("hour_start"),
+                energy.c.energy,
+                func.coalesce(sample_stats.c.sample_count, 0).label("sample_count"),
+                sample_stats.c.first_sample_at,
+                sample_stats.c.first_sample_value,
+                sample_stats.c.last_sample_at,
+                sample_stats.c.last_sample_value,
+            )
+            .select_from(
+                sample_stats.join(
+                    energy,
+                    sample_stats.c.hour_start == energy.c.hour_start,
+                    full=True,
+                )
+            )
+            .order_by(hour_start)
+        )
+        return [
+            HourlyPowerStats(
+                hour_start=_to_utc_aware(row.hour_start),
+                energy=row.energy,
+                sample_count=row.sample_count,
+                first_sample_at=row.first_sample_at,
+                first_sample_value=row.first_sample_value,
+                last_sample_at=row.last_sample_at,
+                last_sample_value=row.last_sample_value,
+            )
+            for row in rows
+        ]
+
+    def _list_aggregates(
+        self,
+        *,
+        provider_id: int,
+        series_keys: list[str],
+        date_start: datetime,
+        date_end: datetime,
+    ) -> list[ProviderTelemetryAggregate]:
+        # Recent windows (every live poll among them) are never compacted.
+        if _to_utc_aware(date_start) >= _compaction_horizon():
+            return []
+        return TelemetryAggregateRepository(self.db).list_for_window(
+            provider_id=provider_id,
+            series_keys=series_keys,
+            date_start=date_start,
+            date_end=date_end,
+        )
+
+
+def _bucket_power(row: ProviderTelemetryAggregate) -> float:
+    # The time-weighted mean power of a bucket held over the bucket gives
+    # back its integrated energy exactly; the sample mean does not.
+    if row.energy is not None and row.bucket_seconds > 0:
+        return row.energy * 3600.0 / row.bucket_seconds
+    return row.avg_value
+
+
+def _compacted_metric_sample(row: ProviderTelemetryAggregate) -> CompactedMetricSample:
+    return CompactedMetricSample(
+        metric_key=row.series_key,
+        measured_at=row.bucket_start,
+        value=row.avg_value,
+        unit=row.unit,
+    )
+
+
+def _compaction_horizon() -> datetime:
+    return datetime.now(timezone.utc) - MIN_COMPACTION_AGE
+
+
+def _to_utc_aware(ts: datetime) -> datetime:
+    if ts.tzinfo is None:
+        return ts.replace(tzinfo=timezone.utc)
+    return ts.astimezone(timezone.utc)
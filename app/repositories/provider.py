@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+from uuid import UUID
+
+from smart_common.repositories.provider import (
+    ProviderRepository as BaseProviderRepository,
+)
+
+
+class ProviderRepository(BaseProviderRepository):
+    """smart_common provider repository extended with API read paths."""
+
+    def list_for_user_by_uuids(
+        self, *, provider_uuids: list[UUID], user_id: int
+    ) -> list:
+        """Providers of ``user_id`` among ``provider_uuids``, in one query."""
+        if not provider_uuids:
+            return []
+        return (
+            self.db.query(self.model)
+            .filter(
+                self.model.user_id == user_id,
+                self.model.uuid.in_(provider_uuids),
+            )
+            .all()
+        )
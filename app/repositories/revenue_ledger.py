@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+from datetime import date, datetime
+
+from sqlalchemy import Date, cast, func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.models.provider_revenue_ledger import ProviderRevenueHourlyLedger
+
+_LEDGER_VALUE_COLUMNS = (
+    "sample_hold_seconds",
+    "export_energy",
+    "revenue",
+    "matched_intervals",
+    "currency",
+    "energy_unit",
+)
+
+
+class RevenueLedgerRepository:
+    model = ProviderRevenueHourlyLedger
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def list_for_window(
+        self,
+        *,
+        provider_id: int,
+        market: str,
+        date_start: datetime,
+        date_end: datetime,
+    ) -> list[ProviderRevenueHourlyLedger]:
+        return (
+            self.db.query(self.model)
+            .filter(
+                self.model.provider_id == provider_id,
+                self.model.market == market,
+                self.model.hour_start >= date_start,
+                self.model.hour_start < date_end,
+            )
+            .order_by(self.model.hour_start.asc())
+            .all()
+        )
+
+    def count_hours_by_day(
+        self,
+        *,
+        provider_id: int,
+        market: str,
+        date_start: datetime,
+        date_end: datetime,
+        sample_hold_seconds: float | None,
+        energy_unit: str | None,
+    ) -> dict[date, int]:
+        day = func.date_trunc("day", func.timezone("UTC", self.model.hour_start))
+        rows = (
+            self.db.query(day.label("day"), func.count().label("hours"))
+            .filter(
+                self.model.provider_id == provider_id,
+                self.model.market == market,
+                self.model.hour_start >= date_start,
+                self.model.hour_start < date_end,
+                _equals(self.model.sample_hold_seconds, sample_hold_seconds),
+                _equals(self.model.energy_unit, energy_unit),
+            )
+            .group_by(day)
+            .all()
+        )
+        return {row.day.date(): row.hours for row in rows}
+
+    def aggregate_revenue(
+        self,
+        *,
+        provider_id: int,
+        market: str,
+        date_start: datetime,
+        date_end: datetime,
+        granularity: str,
+        exclude_days: list[date] | None = None,
+    ) -> list:
+        """Sum ledger hours into ``granularity`` periods (UTC, ordered).
+
+        Hours of ``exclude_days`` are left out, for days the caller matches
+        itself.
+        """
+        hour_start = func.timezone("UTC", self.model.hour_start)
+        period = func.date_trunc(granularity, hour_start).label("period_start")
+        query = self.db.query(
+            period,
+            func.sum(self.model.export_energy).label("export_energy"),
+            func.sum(self.model.revenue).label("revenue"),
+            func.sum(self.model.matched_intervals).label("matched_intervals"),
+            func.max(self.model.currency).label("currency"),
+        ).filter(
+            self.model.provider_id == provider_id,
+            self.model.market == market,
+            self.model.hour_start >= date_start,
+            self.model.hour_start < date_end,
+            self.model.matched_intervals > 0,
+        )
+        if exclude_days:
+            query = query.filter(cast(hour_start, Date).notin_(exclude_days))
+        return query.group_by(period).order_by(period).all()
+
+    def upsert_hours(
+        self,
+        *,
+        provider_id: int,
+        rows: list[ProviderRevenueHourlyLedger],
+    ) -> None:
+        """Insert or replace ledger hours; the caller commits.
+
+        Only the rollup tasks write here; reads match missing days in memory
+        instead.
+        """
+        if not rows:
+            return
+
+        values = [
+            {
+                "provider_id": provider_id,
+                "market": row.market,
+                "hour_start": row.hour_start,
+                **{column: getattr(row, column) for column in _LEDGER_VALUE_COLUMNS},
+            }
+            for row in rows
+        ]
+        statement = insert(self.model).values(values)
+        statement = statement.on_conflict_do_update(
+            index_elements=[
+                self.model.provider_id,
+                self.model.market,
+                self.model.hour_start,
+            ],
+            set_={
+                **{
+                    column: getattr(statement.excluded, column)
+                    for column in _LEDGER_VALUE_COLUMNS
+                },
+                "computed_at": func.now(),
+            },
+        )
+        self.db.execute(statement)
+
+
+def _equals(column, value):
+    return column.is_(None) if value is None else column == value
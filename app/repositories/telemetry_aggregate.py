@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import case, func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.models.provider_telemetry_aggregate import ProviderTelemetryAggregate
+
+# Telemetry younger than this is never compacted, so reads of recent days
+# (and every live poll) only ever touch raw rows.
+MIN_COMPACTION_AGE = timedelta(days=2)
+
+
+class TelemetryAggregateRepository:
+    model = ProviderTelemetryAggregate
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def list_for_window(
+        self,
+        *,
+        provider_id: int,
+        series_keys: list[str],
+        date_start: datetime,
+        date_end: datetime,
+    ) -> list[ProviderTelemetryAggregate]:
+        if not series_keys:
+            return []
+        return (
+            self.db.query(self.model)
+            .filter(
+                self.model.provider_id == provider_id,
+                self.model.series_key.in_(series_keys),
+                self.model.bucket_start >= date_start,
+                self.model.bucket_start <= date_end,
+            )
+            .order_by(self.model.series_key, self.model.bucket_start)
+            .all()
+        )
+
+    def list_for_providers(
+        self,
+        *,
+        provider_ids: list[int],
+        series_keys: list[str],
+        date_start: datetime,
+        date_end: datetime,
+    ) -> list[ProviderTelemetryAggregate]:
+        if not provider_ids or not series_keys:
+            return []
+        return (
+            self.db.query(self.model)
+            .filter(
+                self.model.provider_id.in_(provider_ids),
+                self.model.series_key.in_(series_keys),
+                self.model.bucket_start >= date_start,
+                self.model.bucket_start <= date_end,
+            )
+            .order_by(
+                self.model.provider_id, self.model.series_key, self.model.bucket_start
+            )
+            .all()
+        )
+
+    def get_last_before(
+        self,
+        *,
+        provider_id: int,
+        series_key: str,
+        before: datetime,
+    ) -> ProviderTelemetryAggregate | None:
+        return (
+            self.db.query(self.model)
+            .filter(
+                self.model.provider_id == provider_id,
+                self.model.series_key == series_key,
+                self.model.bucket_start < before,
+            )
+            .order_by(self.model.bucket_start.desc())
+            .first()
+        )
+
+    def merge_buckets(self, *, rows: list[dict]) -> None:
+        """Insert buckets, folding them into existing ones of the same key.
+
+        A bucket compacted again (raw rows that arrived late for an already
+        compacted window) is combined with the stored one instead of
+        replacing it. The caller commits together with the raw delete.
+        """
+        if not rows:
+            return
+
+        statement = insert(self.model).values(rows)
+        stored = self.model.__table__.c
+        new = statement.excluded
+        total = stored.sample_count + new.sample_count
+        newer = new.last_sample_at >= stored.last_sample_at
+        statement = statement.on_conflict_do_update(
+            index_elements=[
+                self.model.provider_id,
+                self.model.series_key,
+                self.model.bucket_start,
+            ],
+            set_={
+                "sample_count": total,
+                "min_value": func.least(stored.min_value, new.min_value),
+                "max_value": func.greatest(stored.max_value, new.max_value),
+                "avg_value": (
+                    stored.avg_value * stored.sample_count
+                    + new.avg_value * new.sample_count
+                )
+                / total,
+                "last_value": case((newer, new.last_value), else_=stored.last_value),
+                "last_sample_at": func.greatest(
+                    stored.last_sample_at,
+                    new.last_sample_at,
+                ),
+                "energy": func.coalesce(stored.energy, 0.0)
+                + func.coalesce(new.energy, 0.0),
+            },
+        )
+        self.db.execute(statement)
@@ -0,0 +1,56 @@
+from enum import Enum
+
+from pydantic import BaseModel
+
+from smart_common.enums.provider_telemetry import (
+    ProviderTelemetryCapability,
+    TelemetryAggregationMode,
+    TelemetryChartType,
+)
+
+
+class SeriesFormat(str, Enum):
+    OBJECTS = "objects"
+    COLUMNAR = "columnar"
+
+
+class ColumnarSeriesOut(BaseModel):
+    """Parallel arrays: epoch milliseconds (UTC) and the value at each of them."""
+
+    timestamps: list[int]
+    values: list[float | None]
+
+
+class ColumnarPowerSeriesOut(BaseModel):
+    unit: str | None
+    days: dict[str, ColumnarSeriesOut]
+
+
+class ColumnarEnergyDayOut(BaseModel):
+    """``entries`` holds raw measured values, ``hours`` the energy per hour."""
+
+    date: str
+    total_energy: float
+    import_energy: float
+    export_energy: float
+    measured_unit: str | None
+    entries: ColumnarSeriesOut
+    hours: ColumnarSeriesOut
+
+
+class ColumnarEnergySeriesOut(BaseModel):
+    unit: str | None
+    days: dict[str, ColumnarEnergyDayOut]
+
+
+class ColumnarMetricSeriesOut(BaseModel):
+    metric_key: str
+    label: str
+    unit: str | None
+    source_unit: str | None
+    chart_type: TelemetryChartType
+    aggregation_mode: TelemetryAggregationMode
+    capability_tag: ProviderTelemetryCapability | None
+    date: str
+    entries: ColumnarSeriesOut
+    hours: ColumnarSeriesOut
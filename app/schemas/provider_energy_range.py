@@ -0,0 +1,28 @@
+from datetime import date
+from enum import Enum
+
+from smart_common.schemas.provider_measurement_schemas import ProviderEnergySeriesOut
+
+
+class EnergyRangeGranularity(str, Enum):
+    HOUR = "hour"
+    DAY = "day"
+    MONTH = "month"
+
+
+class ProviderEnergyRangeOut(ProviderEnergySeriesOut):
+    """Energy series over an arbitrary date range.
+
+    ``days`` is keyed by period: ``YYYY-MM-DD`` for hour and day granularity
+    (hour granularity also fills ``hours``), ``YYYY-MM`` for month granularity.
+    ``pending_days`` counts missing days past the per-request limit; they are
+    built in the background and their energy is missing until then.
+    """
+
+    granularity: EnergyRangeGranularity
+    date_start: date
+    date_end: date
+    total_energy: float
+    import_energy: float
+    export_energy: float
+    pending_days: int = 0
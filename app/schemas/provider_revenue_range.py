@@ -0,0 +1,33 @@
+from datetime import date, datetime
+
+from pydantic import BaseModel
+
+from app.schemas.provider_energy_range import EnergyRangeGranularity
+
+
+class RevenuePeriodOut(BaseModel):
+    period_start: datetime
+    export_energy: float
+    revenue: float
+    matched_intervals: int
+
+
+class ProviderRevenueRangeOut(BaseModel):
+    """Matched market revenue over a date range, summed per UTC period.
+
+    Only periods with priced export are listed; ``currency`` is ``None`` when
+    the range has none. ``pending_days`` counts closed days missing from the
+    ledger past the per-request limit; they are matched in the background and
+    left out until then.
+    """
+
+    market: str
+    currency: str | None
+    energy_unit: str | None
+    granularity: EnergyRangeGranularity
+    date_start: date
+    date_end: date
+    total_export_energy: float
+    total_revenue: float
+    periods: list[RevenuePeriodOut]
+    pending_days: int = 0
@@ -0,0 +1,10 @@
+from pydantic import BaseModel
+
+from smart_common.schemas.provider_schema import ProviderTelemetryResponse
+
+
+class ProviderTelemetryBatchOut(BaseModel):
+    """Telemetry of several providers for one day, keyed by provider UUID."""
+
+    date: str
+    providers: dict[str, ProviderTelemetryResponse]
@@ -0,0 +1,18 @@
+from enum import Enum
+
+
+class ResponseSection(str, Enum):
+    """Sections of an energy or telemetry response selectable with ``include=``."""
+
+    HOURS = "hours"
+    TOTALS = "totals"
+    ENTRIES = "entries"
+    METRICS = "metrics"
+    PRICES = "prices"
+    REVENUE = "revenue"
+
+
+ENERGY_SECTIONS = frozenset(
+    {ResponseSection.HOURS, ResponseSection.TOTALS, ResponseSection.ENTRIES}
+)
+TELEMETRY_SECTIONS = frozenset(ResponseSection)
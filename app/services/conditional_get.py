@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import hashlib
+
+import orjson
+from fastapi.responses import Response
+
+# Clients may keep a copy but must revalidate it before every use.
+CACHE_CONTROL = "private, no-cache"
+
+
+def build_etag(*parts) -> str:
+    """Weak ETag over the validator ``parts`` of a response.
+
+    Parts are whatever determines the body: request parameters, row counts,
+    newest timestamps. Datetimes, dates and enums are encoded by orjson and
+    anything else by ``str``, so sets must be passed sorted.
+    """
+    digest = hashlib.blake2b(
+        orjson.dumps(parts, default=str),
+        digest_size=16,
+    ).hexdigest()
+    return f'W/"{digest}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Weak comparison of ``etag`` with an ``If-None-Match`` header."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return _opaque_tag(etag) in {
+        _opaque_tag(candidate) for candidate in if_none_match.split(",")
+    }
+
+
+def not_modified(etag: str) -> Response:
+    return Response(
+        status_code=304,
+        headers={"ETag": etag, "Cache-Control": CACHE_CONTROL},
+    )
+
+
+def tag_response(result, response: Response | None, etag: str | None):
+    """Attach ``etag`` to the returned response, or to the injected one."""
+    if etag is None:
+        return result
+    target = result if isinstance(result, Response) else response
+    if target is not None:
+        target.headers["ETag"] = etag
+        target.headers["Cache-Control"] = CACHE_CONTROL
+    return result
+
+
+def _opaque_tag(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
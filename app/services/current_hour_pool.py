@@ -0,0 +1,254 @@
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+from smart_common.services.energy_calculation_service import (
+    EnergyCalculationService,
+    PowerSample,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_AGE_SECONDS = 300
+
+
+@dataclass(frozen=True, slots=True)
+class DeviceStateSnapshot:
+    """The fields of a device STATE event that on-time calculation reads.
+
+    Pools outlive the session that loaded the events, so they keep these
+    copies instead of ORM instances.
+    """
+
+    id: int | None
+    device_id: int | None
+    created_at: datetime
+    pin_state: bool | None
+    device_state: str | None
+
+    @classmethod
+    def from_event(cls, event) -> DeviceStateSnapshot:
+        return cls(
+            id=getattr(event, "id", None),
+            device_id=getattr(event, "device_id", None),
+            created_at=_to_utc_aware(event.created_at),
+            pin_state=getattr(event, "pin_state", None),
+            device_state=getattr(event, "device_state", None),
+        )
+
+
+class CurrentHourPool:
+    """Running energy state of one provider's current hour.
+
+    Power samples are integrated as they are read, so a poll only pays for
+    the samples that arrived since the previous one. Energy of consecutive
+    sample pairs is computed by ``EnergyCalculationService`` exactly like a
+    full-window integration; only the open tail after the last sample is
+    evaluated per read. Device STATE events of the hour are kept per device
+    together with the state each device entered the hour with, as
+    ``DeviceStateSnapshot`` copies.
+
+    ``sample_count`` and ``state_event_count`` are the rows read up to the
+    cursors; a source count that differs from them means a write or delete
+    landed behind a cursor and that part of the pool has to be reset.
+
+    Callers hold ``lock`` while advancing or reading the pool.
+    """
+
+    def __init__(self, *, hour_start: datetime, sample_hold_seconds: float | None):
+        self.hour_start = hour_start
+        self.sample_hold_seconds = sample_hold_seconds
+        self.created_at = time.monotonic()
+        self.lock = threading.Lock()
+        self.reset_samples()
+        self.reset_state_events()
+
+    def reset_samples(self) -> None:
+        self.samples_started = False
+        self.closed_energy = 0.0
+        self.last_sample: PowerSample | None = None
+        self.sample_cursor: datetime | None = None
+        self.sample_count = 0
+        self._cursor_sample_count = 0
+
+    def reset_state_events(self) -> None:
+        self.previous_state_events: dict[int, DeviceStateSnapshot | None] = {}
+        self.state_events: dict[int, list[DeviceStateSnapshot]] = {}
+        self.event_cursor: datetime | None = None
+        self._seen_event_ids: set = set()
+
+    @property
+    def state_event_count(self) -> int:
+        return sum(len(events) for events in self.state_events.values())
+
+    def carry_in(self, value: float | None) -> None:
+        """Start the hour, optionally holding a fresh pre-hour sample value."""
+        if value is not None:
+            self.last_sample = PowerSample(ts=self.hour_start, value=float(value))
+        self.samples_started = True
+
+    def add_samples(self, raw_samples) -> None:
+        normalized = sorted(
+            (_to_utc_aware(ts), float(value)) for ts, value in raw_samples
+        )
+        # Reads start at the cursor, so the rows at the cursor come again.
+        self.sample_count -= self._cursor_sample_count
+        self._cursor_sample_count = 0
+        for ts, value in normalized:
+            if ts < self.hour_start:
+                continue
+            if self.sample_cursor is not None and ts < self.sample_cursor:
+                continue
+
+            sample = PowerSample(ts=ts, value=value)
+            # A later sample with the same timestamp replaces the earlier
+            # one, including the value carried in at the hour start.
+            if self.last_sample is not None and self.last_sample.ts < ts:
+                self.closed_energy += self._integrate(self.last_sample, sample)
+            self.last_sample = sample
+            if ts != self.sample_cursor:
+                self._cursor_sample_count = 0
+            self._cursor_sample_count += 1
+            self.sample_count += 1
+            self.sample_cursor = ts
+
+    def energy_until(self, end: datetime) -> float:
+        if self.last_sample is None or self.last_sample.ts >= end:
+            return self.closed_energy
+        return self.closed_energy + self._integrate(
+            self.last_sample,
+            PowerSample(ts=end, value=self.last_sample.value),
+        )
+
+    @property
+    def current_power(self) -> float | None:
+        return self.last_sample.value if self.last_sample is not None else None
+
+    def set_previous_state_events(
+        self,
+        device_ids: list[int],
+        events_by_device: dict[int, object],
+    ) -> None:
+        """Record the state each device entered the hour with, if it had one."""
+        for device_id in device_ids:
+            event = events_by_device.get(device_id)
+            self.previous_state_events[device_id] = (
+                DeviceStateSnapshot.from_event(event) if event is not None else None
+            )
+
+    def add_state_events(self, events_by_device: dict[int, list]) -> None:
+        for device_id, events in events_by_device.items():
+            device_events = self.state_events.setdefault(device_id, [])
+            for event in events:
+                event_id = getattr(event, "id", None)
+                if event_id is not None:
+                    if event_id in self._seen_event_ids:
+                        continue
+                    self._seen_event_ids.add(event_id)
+                snapshot = DeviceStateSnapshot.from_event(event)
+                device_events.append(snapshot)
+                if self.event_cursor is None or snapshot.created_at > self.event_cursor:
+                    self.event_cursor = snapshot.created_at
+
+    def _integrate(self, left: PowerSample, right: PowerSample) -> float:
+        return float(
+            sum(
+                interval.energy
+                for interval in EnergyCalculationService.integrate_intervals(
+                    [left, right],
+                    max_interval_seconds=self.sample_hold_seconds,
+                )
+            )
+        )
+
+
+class CurrentHourPoolStore:
+    """Process-wide current-hour pools, one per POWER provider.
+
+    A pool is replaced when the hour or the provider's sample hold changes.
+    Readers check the pool against the source counts on every poll, which
+    catches writes behind the cursors from any process; writes committed
+    through this process also discard the affected pools at once. The state
+    carried into the hour is not checked, so pools are still rebuilt after
+    ``max_age_seconds``.
+    """
+
+    def __init__(self, *, max_age_seconds: float = DEFAULT_MAX_AGE_SECONDS):
+        self.max_age_seconds = max_age_seconds
+        self._pools: dict[int, CurrentHourPool] = {}
+        self._lock = threading.Lock()
+
+    def get(
+        self,
+        *,
+        provider_id: int,
+        hour_start: datetime,
+        sample_hold_seconds: float | None,
+    ) -> CurrentHourPool:
+        with self._lock:
+            pool = self._pools.get(provider_id)
+            if (
+                pool is None
+                or pool.hour_start != hour_start
+                or pool.sample_hold_seconds != sample_hold_seconds
+                or time.monotonic() - pool.created_at > self.max_age_seconds
+            ):
+                if pool is not None and pool.hour_start != hour_start:
+                    self._drop_hours_before(hour_start)
+                pool = CurrentHourPool(
+                    hour_start=hour_start,
+                    sample_hold_seconds=sample_hold_seconds,
+                )
+                self._pools[provider_id] = pool
+            return pool
+
+    def discard(self, *, provider_id: int) -> None:
+        with self._lock:
+            self._pools.pop(provider_id, None)
+
+    def discard_all(self) -> None:
+        with self._lock:
+            self._pools.clear()
+
+    def _drop_hours_before(self, hour_start: datetime) -> None:
+        for provider_id, pool in list(self._pools.items()):
+            if pool.hour_start < hour_start:
+                del self._pools[provider_id]
+
+
+_store: CurrentHourPoolStore | None = None
+_store_lock = threading.Lock()
+
+
+def get_current_hour_pool_store() -> CurrentHourPoolStore | None:
+    """Return the process-wide pool store, or ``None`` when it is disabled.
+
+    ``CURRENT_HOUR_POOL_MAX_AGE_SECONDS`` bounds how long a pool is advanced
+    incrementally before it is rebuilt (``0`` disables the store).
+    """
+    global _store
+    if _store is not None:
+        return _store
+
+    max_age_seconds = float(
+        os.getenv("CURRENT_HOUR_POOL_MAX_AGE_SECONDS", DEFAULT_MAX_AGE_SECONDS)
+    )
+    if max_age_seconds <= 0:
+        return None
+
+    with _store_lock:
+        if _store is None:
+            _store = CurrentHourPoolStore(max_age_seconds=max_age_seconds)
+            logger.info("Current-hour pool store enabled max_age=%ss", max_age_seconds)
+    return _store
+
+
+def _to_utc_aware(ts: datetime) -> datetime:
+    if ts.tzinfo is None:
+        return ts.replace(tzinfo=timezone.utc)
+    return ts.astimezone(timezone.utc)
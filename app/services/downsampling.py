@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+MIN_DOWNSAMPLE_POINTS = 3
+
+
+def downsample_lttb(
+    points: list[tuple[datetime, float]],
+    max_points: int | None,
+) -> list[tuple[datetime, float]]:
+    """Reduce time-ordered ``(ts, value)`` points with Largest-Triangle-Three-Buckets.
+
+    The first and last points are always kept; every bucket in between keeps
+    the point forming the largest triangle with the point kept before it and
+    the average of the next bucket, which preserves peaks and the overall
+    shape of the curve far better than taking every n-th point.
+    """
+    if max_points is None or len(points) <= max_points:
+        return points
+    if max_points < MIN_DOWNSAMPLE_POINTS:
+        raise ValueError(f"max_points must be at least {MIN_DOWNSAMPLE_POINTS}")
+
+    xs = [ts.timestamp() for ts, _ in points]
+    ys = [value for _, value in points]
+    bucket_size = (len(points) - 2) / (max_points - 2)
+
+    sampled = [points[0]]
+    anchor = 0
+    for bucket in range(max_points - 2):
+        bucket_start = int(bucket * bucket_size) + 1
+        bucket_end = int((bucket + 1) * bucket_size) + 1
+
+        next_start = bucket_end
+        next_end = min(int((bucket + 2) * bucket_size) + 1, len(points))
+        next_count = next_end - next_start
+        avg_x = sum(xs[next_start:next_end]) / next_count
+        avg_y = sum(ys[next_start:next_end]) / next_count
+
+        anchor_x = xs[anchor]
+        anchor_y = ys[anchor]
+        selected = bucket_start
+        max_area = -1.0
+        for index in range(bucket_start, bucket_end):
+            area = abs(
+                (anchor_x - avg_x) * (ys[index] - anchor_y)
+                - (anchor_x - xs[index]) * (avg_y - anchor_y)
+            )
+            if area > max_area:
+                max_area = area
+                selected = index
+
+        sampled.append(points[selected])
+        anchor = selected
+
+    sampled.append(points[-1])
+    return sampled
@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta, timezone
+
+from app.services import energy_engine
+from app.services.energy_engine import vectorized_engine_enabled
+from app.services.power_sample_loader import PowerSampleLoader
+from app.services.power_series import PowerSeries
+from smart_common.enums.unit import PowerUnit
+from smart_common.services.energy_calculation_service import (
+    EnergyCalculationService,
+    PowerSample,
+)
+
+
+def resolve_day_window(
+    *,
+    selected_date: date | None,
+    now: datetime,
+) -> tuple[datetime, datetime]:
+    day = selected_date or now.date()
+    start = datetime.combine(day, datetime.min.time(), tzinfo=timezone.utc)
+
+    if day == now.date():
+        return start, now
+
+    end = start + timedelta(days=1) - timedelta(microseconds=1)
+    return start, end
+
+
+def resolve_closed_until(*, start: datetime, end: datetime) -> datetime:
+    day_end = start + timedelta(days=1)
+    if end >= day_end - timedelta(microseconds=1):
+        return day_end
+    return _floor_hour(end)
+
+
+def build_day_power_samples(
+    *,
+    power_samples: PowerSampleLoader,
+    start: datetime,
+    end: datetime,
+    carry_forward_seconds: float | None = None,
+) -> PowerSeries:
+    key = (start, end, carry_forward_seconds)
+    cached = power_samples.window_samples.get(key)
+    if cached is not None:
+        return cached
+
+    # Only a sample of the same UTC day is carried into the window, so a
+    # window opening at midnight never needs the lookup.
+    previous_sample = None
+    if start != _floor_day(start):
+        previous_sample = power_samples.get_last_before(before=start)
+        if previous_sample is not None and previous_sample[0].date() != start.date():
+            previous_sample = None
+    samples = build_window_samples(
+        raw_samples=power_samples.series(start=start, end=end),
+        previous_sample=previous_sample,
+        start=start,
+        end=end,
+        carry_forward_seconds=carry_forward_seconds,
+    )
+    power_samples.window_samples[key] = samples
+    return samples
+
+
+def build_window_samples(
+    *,
+    raw_samples: PowerSeries | list[tuple[datetime, float]],
+    previous_sample: tuple[datetime, float] | None,
+    start: datetime,
+    end: datetime,
+    carry_forward_seconds: float | None = None,
+) -> PowerSeries:
+    points = PowerSeries()
+
+    if previous_sample:
+        previous_ts, previous_value = previous_sample
+        previous_ts_utc = _to_utc_aware(previous_ts)
+        if is_sample_fresh_for_boundary(
+            sample_ts=previous_ts_utc,
+            boundary_ts=start,
+            carry_forward_seconds=carry_forward_seconds,
+        ):
+            points.append(start, float(previous_value))
+
+    if isinstance(raw_samples, PowerSeries):
+        points.extend(raw_samples.window(start, end))
+    else:
+        for ts, value in raw_samples:
+            ts_utc = _to_utc_aware(ts)
+            if ts_utc < start or ts_utc > end:
+                continue
+            points.append(ts_utc, float(value))
+
+    # Later samples of one timestamp win, the carried-in value included.
+    points.sort()
+    points.dedup()
+    points.carry_forward(end, hold_seconds=carry_forward_seconds)
+    return points
+
+
+def integrate_hourly(
+    samples: PowerSeries | list[PowerSample],
+    *,
+    max_interval_seconds: float | None = None,
+) -> dict[datetime, float]:
+    if vectorized_engine_enabled():
+        return energy_engine.integrate_hourly(
+            samples,
+            max_interval_seconds=max_interval_seconds,
+        )
+    return EnergyCalculationService.integrate_hourly(
+        _as_power_samples(samples),
+        max_interval_seconds=max_interval_seconds,
+    )
+
+
+def integrate_window_energy(
+    samples: PowerSeries | list[PowerSample],
+    *,
+    max_interval_seconds: float | None = None,
+) -> float:
+    intervals = EnergyCalculationService.integrate_intervals(
+        _as_power_samples(samples),
+        max_interval_seconds=max_interval_seconds,
+    )
+    return float(sum(interval.energy for interval in intervals))
+
+
+def iter_effective_power_intervals(
+    *,
+    samples: PowerSeries | list[PowerSample],
+    max_interval_seconds: float | None = None,
+):
+    for left, right in zip(samples, samples[1:]):
+        interval_end = right.ts
+        if max_interval_seconds is not None and max_interval_seconds > 0:
+            capped_end = left.ts + timedelta(seconds=max_interval_seconds)
+            if capped_end < interval_end:
+                interval_end = capped_end
+        if interval_end <= left.ts:
+            continue
+        yield left.ts, interval_end, left.value
+
+
+def is_sample_fresh_for_boundary(
+    *,
+    sample_ts: datetime,
+    boundary_ts: datetime,
+    carry_forward_seconds: float | None,
+) -> bool:
+    if carry_forward_seconds is None or carry_forward_seconds <= 0:
+        return True
+    return (boundary_ts - sample_ts).total_seconds() <= carry_forward_seconds
+
+
+def energy_unit_from_power(unit: PowerUnit | None) -> str | None:
+    if unit == PowerUnit.KILOWATT:
+        return "kWh"
+    if unit == PowerUnit.WATT:
+        return "Wh"
+    return None
+
+
+def _as_power_samples(samples: PowerSeries | list[PowerSample]) -> list[PowerSample]:
+    # EnergyCalculationService is written against lists of PowerSample.
+    if isinstance(samples, PowerSeries):
+        return samples.to_samples()
+    return samples
+
+
+def _to_utc_aware(ts: datetime) -> datetime:
+    if ts.tzinfo is None:
+        return ts.replace(tzinfo=timezone.utc)
+    return ts.astimezone(timezone.utc)
+
+
+def _floor_hour(ts: datetime) -> datetime:
+    return ts.replace(minute=0, second=0, microsecond=0)
+
+
+def _floor_day(ts: datetime) -> datetime:
+    return ts.replace(hour=0, minute=0, second=0, microsecond=0)
@@ -0,0 +1,243 @@
+from __future__ import annotations
+
+import os
+from datetime import date, datetime, timedelta, timezone
+
+from app.models.provider_energy_rollup import ProviderEnergyHourlyRollup
+from app.repositories.energy_rollup import EnergyRollupRepository
+from app.repositories.measurement_repository import HourlyPowerStats
+from app.services.energy_integration import (
+    build_day_power_samples,
+    integrate_hourly,
+    resolve_closed_until,
+    resolve_day_window,
+)
+from app.services.power_sample_loader import PowerSampleLoader
+
+DEFAULT_MAX_COLD_ROLLUP_DAYS = 31
+
+
+def sql_integration_enabled() -> bool:
+    """Whether ``ENERGY_INTEGRATION_PUSHDOWN`` lets Postgres integrate rollup hours."""
+    return os.getenv("ENERGY_INTEGRATION_PUSHDOWN", "false").strip().lower() in {
+        "1",
+        "true",
+        "yes",
+    }
+
+
+def max_cold_rollup_days() -> int | None:
+    """``ENERGY_RANGE_MAX_COLD_DAYS``: missing days one range request computes.
+
+    Applies to rollup days of ``/energy/range`` and ledger days of
+    ``/revenue/range``; ``0`` lets a request compute every missing day itself.
+    """
+    limit = int(os.getenv("ENERGY_RANGE_MAX_COLD_DAYS", DEFAULT_MAX_COLD_ROLLUP_DAYS))
+    return limit if limit > 0 else None
+
+
+def list_missing_rollup_days(
+    *,
+    rollup_repo: EnergyRollupRepository,
+    provider_id: int,
+    first_day: date,
+    last_day: date,
+    now: datetime,
+    max_interval_seconds: float | None = None,
+) -> list[date]:
+    """Days of ``first_day``..``last_day`` whose closed hours are not all stored."""
+    range_start = datetime.combine(first_day, datetime.min.time(), tzinfo=timezone.utc)
+    range_end = datetime.combine(last_day, datetime.min.time(), tzinfo=timezone.utc)
+    stored_hours = rollup_repo.count_hours_by_day(
+        provider_id=provider_id,
+        date_start=range_start,
+        date_end=range_end + timedelta(days=1),
+        sample_hold_seconds=max_interval_seconds,
+    )
+
+    missing_days: list[date] = []
+    day = first_day
+    while day <= last_day:
+        start, end = resolve_day_window(selected_date=day, now=now)
+        expected_hours = int(
+            (resolve_closed_until(start=start, end=end) - start) / timedelta(hours=1)
+        )
+        if expected_hours > 0 and stored_hours.get(day, 0) != expected_hours:
+            missing_days.append(day)
+        day += timedelta(days=1)
+    return missing_days
+
+
+def compute_day_rollups(
+    *,
+    power_samples: PowerSampleLoader,
+    day: date,
+    now: datetime,
+    max_interval_seconds: float | None = None,
+) -> list[ProviderEnergyHourlyRollup]:
+    """Rollups of the closed hours of ``day``, built without storing them."""
+    start, end = resolve_day_window(selected_date=day, now=now)
+    closed_until = resolve_closed_until(start=start, end=end)
+    return compute_hourly_rollups(
+        power_samples=power_samples,
+        start=start,
+        end=min(end, closed_until),
+        closed_until=closed_until,
+        max_interval_seconds=max_interval_seconds,
+    )
+
+
+def materialize_day_rollups(
+    *,
+    power_samples: PowerSampleLoader,
+    rollup_repo: EnergyRollupRepository,
+    day: date,
+    now: datetime,
+    max_interval_seconds: float | None = None,
+) -> bool:
+    """Build and upsert the closed hours of ``day``; the caller commits.
+
+    The day's measurement version is read before the samples and again
+    before the upsert. A write landing in between may already have fired the
+    rollup trigger, so nothing is stored and ``False`` is returned; the next
+    run builds the day from the new samples.
+    """
+    start, end = resolve_day_window(selected_date=day, now=now)
+    version_end = min(end, resolve_closed_until(start=start, end=end))
+    version = power_samples.repo.get_power_version(
+        provider_id=power_samples.provider_id,
+        date_start=start,
+        date_end=version_end,
+        non_null=True,
+    )
+    rollups = compute_day_rollups(
+        power_samples=power_samples,
+        day=day,
+        now=now,
+        max_interval_seconds=max_interval_seconds,
+    )
+    if version != power_samples.repo.get_power_version(
+        provider_id=power_samples.provider_id,
+        date_start=start,
+        date_end=version_end,
+        non_null=True,
+    ):
+        return False
+
+    rollup_repo.upsert_hours(provider_id=power_samples.provider_id, rows=rollups)
+    return True
+
+
+def compute_hourly_rollups(
+    *,
+    power_samples: PowerSampleLoader,
+    start: datetime,
+    end: datetime,
+    closed_until: datetime,
+    max_interval_seconds: float | None = None,
+) -> list[ProviderEnergyHourlyRollup]:
+    # Samples already in memory are integrated here; otherwise Postgres can
+    # integrate a day window and send back one row per hour instead of
+    # every sample. Only windows opening at midnight qualify, since no
+    # earlier sample is carried into those.
+    if (
+        sql_integration_enabled()
+        and start == _floor_day(start)
+        and not power_samples.covers(start=start, end=end)
+    ):
+        hourly_stats = power_samples.repo.integrate_hourly_power(
+            provider_id=power_samples.provider_id,
+            date_start=start,
+            date_end=end,
+            max_interval_seconds=max_interval_seconds,
+        )
+        if hourly_stats is not None:
+            return _build_hourly_rollups_from_stats(
+                provider_id=power_samples.provider_id,
+                hourly_stats=hourly_stats,
+                start=start,
+                closed_until=closed_until,
+                max_interval_seconds=max_interval_seconds,
+            )
+
+    samples = build_day_power_samples(
+        power_samples=power_samples,
+        start=start,
+        end=end,
+        carry_forward_seconds=max_interval_seconds,
+    )
+    hourly_energy = integrate_hourly(
+        samples,
+        max_interval_seconds=max_interval_seconds,
+    )
+
+    raw_samples = power_samples.series(start=start, end=end)
+    rollups: list[ProviderEnergyHourlyRollup] = []
+    hour_start = start
+    while hour_start < closed_until:
+        energy = hourly_energy.get(hour_start)
+        first, stop = raw_samples.bounds(
+            hour_start,
+            min(hour_start + timedelta(hours=1), closed_until),
+        )
+        has_samples = stop > first
+        rollups.append(
+            ProviderEnergyHourlyRollup(
+                provider_id=power_samples.provider_id,
+                hour_start=hour_start,
+                sample_hold_seconds=max_interval_seconds,
+                energy=energy,
+                import_energy=max(0.0, -energy) if energy is not None else 0.0,
+                export_energy=max(0.0, energy) if energy is not None else 0.0,
+                sample_count=stop - first,
+                first_sample_at=raw_samples[first].ts if has_samples else None,
+                first_sample_value=raw_samples.values[first] if has_samples else None,
+                last_sample_at=raw_samples[stop - 1].ts if has_samples else None,
+                last_sample_value=raw_samples.values[stop - 1] if has_samples else None,
+            )
+        )
+        hour_start += timedelta(hours=1)
+
+    return rollups
+
+
+def _build_hourly_rollups_from_stats(
+    *,
+    provider_id: int,
+    hourly_stats: list[HourlyPowerStats],
+    start: datetime,
+    closed_until: datetime,
+    max_interval_seconds: float | None = None,
+) -> list[ProviderEnergyHourlyRollup]:
+    stats_by_hour = {stats.hour_start: stats for stats in hourly_stats}
+    rollups: list[ProviderEnergyHourlyRollup] = []
+    hour_start = start
+    while hour_start < closed_until:
+        stats = stats_by_hour.get(hour_start)
+        energy = stats.energy if stats is not None else None
+        rollups.append(
+            ProviderEnergyHourlyRollup(
+                provider_id=provider_id,
+                hour_start=hour_start,
+                sample_hold_seconds=max_interval_seconds,
+                energy=energy,
+                import_energy=max(0.0, -energy) if energy is not None else 0.0,
+                export_energy=max(0.0, energy) if energy is not None else 0.0,
+                sample_count=stats.sample_count if stats is not None else 0,
+                first_sample_at=stats.first_sample_at if stats is not None else None,
+                first_sample_value=(
+                    stats.first_sample_value if stats is not None else None
+                ),
+                last_sample_at=stats.last_sample_at if stats is not None else None,
+                last_sample_value=(
+                    stats.last_sample_value if stats is not None else None
+                ),
+            )
+        )
+        hour_start += timedelta(hours=1)
+
+    return rollups
+
+
+def _floor_day(ts: datetime) -> datetime:
+    return ts.replace(hour=0, minute=0, second=0, microsecond=0)
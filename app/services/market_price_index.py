@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+from bisect import bisect_right
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Any
+
+
+@dataclass(frozen=True, slots=True)
+class MarketPriceSnapshot:
+    """Immutable copy of one ``MarketEnergyPrice`` row.
+
+    Indexes shared across requests hold these instead of ORM instances,
+    which belong to the session that loaded them and are expired or
+    detached once it commits or closes.
+    """
+
+    market: Any
+    interval_start: datetime
+    interval_end: datetime
+    price_value: Decimal | float
+    price_unit: Any
+    currency: Any
+    source_updated_at: datetime | None
+
+    @classmethod
+    def from_entry(cls, entry) -> "MarketPriceSnapshot":
+        return cls(
+            market=entry.market,
+            interval_start=entry.interval_start,
+            interval_end=entry.interval_end,
+            price_value=entry.price_value,
+            price_unit=entry.price_unit,
+            currency=entry.currency,
+            source_updated_at=entry.source_updated_at,
+        )
+
+
+class MarketPriceIndex:
+    """Market price intervals sorted by start, searchable by timestamp.
+
+    Interval bounds are normalized to aware UTC once, so lookups are a
+    bisection over ``starts`` instead of a scan that re-normalizes every
+    entry. Entries sharing a start keep their original order and the first
+    one wins, like a linear scan over the sorted list would.
+    """
+
+    __slots__ = ("entries", "starts", "ends")
+
+    def __init__(self, entries) -> None:
+        normalized = sorted(
+            (
+                (
+                    _to_utc_aware(entry.interval_start),
+                    _to_utc_aware(entry.interval_end),
+                    entry,
+                )
+                for entry in entries
+            ),
+            key=lambda item: item[0],
+        )
+        self.starts: list[datetime] = [item[0] for item in normalized]
+        self.ends: list[datetime] = [item[1] for item in normalized]
+        self.entries: list = [item[2] for item in normalized]
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __bool__(self) -> bool:
+        return bool(self.entries)
+
+    def find(self, timestamp: datetime) -> int | None:
+        """Position of the interval containing ``timestamp`` or ``None``."""
+        position = bisect_right(self.starts, timestamp) - 1
+        if position < 0:
+            return None
+
+        while position > 0 and self.starts[position - 1] == self.starts[position]:
+            position -= 1
+
+        if timestamp < self.ends[position]:
+            return position
+        return None
+
+    def entry_at(self, timestamp: datetime):
+        position = self.find(timestamp)
+        return self.entries[position] if position is not None else None
+
+
+def _to_utc_aware(ts: datetime) -> datetime:
+    if ts.tzinfo is None:
+        return ts.replace(tzinfo=timezone.utc)
+    return ts.astimezone(timezone.utc)
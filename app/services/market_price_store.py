@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime, time as dt_time, timedelta, timezone
+
+from app.repositories.market_energy_price import (
+    MarketEnergyPriceRepository,
+    MarketPriceVersion,
+)
+from app.services.market_price_index import MarketPriceIndex, MarketPriceSnapshot
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CURRENT_TTL_SECONDS = 300
+DEFAULT_PAST_TTL_SECONDS = 6 * 3600
+DEFAULT_MAX_DAYS = 256
+
+
+def load_market_prices(
+    repo: MarketEnergyPriceRepository,
+    *,
+    market: str,
+    day: date,
+) -> MarketPriceIndex:
+    """Index of the prices of one UTC day, as snapshots safe to share."""
+    day_start = datetime.combine(day, dt_time.min, tzinfo=timezone.utc)
+    return MarketPriceIndex(
+        MarketPriceSnapshot.from_entry(entry)
+        for entry in repo.list_between(
+            market=market,
+            date_start=day_start,
+            date_end=day_start + timedelta(days=1),
+        )
+    )
+
+
+class MarketPriceStore:
+    """Process-wide store of market price days shared by every request.
+
+    Market prices are the same for all users, so the series of each
+    (market, day) is loaded and indexed once and reused until its TTL runs
+    out or a price write for that day is committed through this process.
+    Today and future days expire quickly because prices and forecasts for
+    them are still being published.
+
+    Writers in other processes do not invalidate the store, so every hit is
+    checked against the day's price version (interval count and newest
+    ``source_updated_at``) and reloaded when it moved. The version is read
+    before loading, so a stored day is never older than its version.
+    """
+
+    def __init__(
+        self,
+        *,
+        current_ttl_seconds: float = DEFAULT_CURRENT_TTL_SECONDS,
+        past_ttl_seconds: float = DEFAULT_PAST_TTL_SECONDS,
+        max_days: int = DEFAULT_MAX_DAYS,
+    ):
+        self.current_ttl_seconds = current_ttl_seconds
+        self.past_ttl_seconds = past_ttl_seconds
+        self.max_days = max_days
+        self._days: OrderedDict[
+            tuple[str, date], tuple[float, int, MarketPriceVersion, MarketPriceIndex]
+        ] = OrderedDict()
+        self._generations: dict[date, int] = {}
+        self._lock = threading.Lock()
+
+    def get_day(
+        self,
+        repo: MarketEnergyPriceRepository,
+        *,
+        market: str,
+        day: date,
+    ) -> MarketPriceIndex:
+        key = (market, day)
+        day_start = datetime.combine(day, dt_time.min, tzinfo=timezone.utc)
+        day_end = day_start + timedelta(days=1)
+        version = repo.get_version(
+            markets=[market],
+            date_start=day_start,
+            date_end=day_end,
+            started_before=day_end,
+        )
+        with self._lock:
+            generation = self._generations.get(day, 0)
+            item = self._days.get(key)
+            if item is not None:
+                expires_at, item_generation, item_version, prices = item
+                if (
+                    item_generation == generation
+                    and item_version == version
+                    and expires_at > time.monotonic()
+                ):
+                    self._days.move_to_end(key)
+                    return prices
+                del self._days[key]
+
+        prices = load_market_prices(repo, market=market, day=day)
+
+        ttl_seconds = (
+            self.past_ttl_seconds
+            if day < datetime.now(timezone.utc).date()
+            else self.current_ttl_seconds
+        )
+        with self._lock:
+            # A write committed while loading bumped the generation; the
+            # loaded day is still returned but not shared with other requests.
+            if self._generations.get(day, 0) == generation:
+                self._days[key] = (
+                    time.monotonic() + ttl_seconds,
+                    generation,
+                    version,
+                    prices,
+                )
+                while len(self._days) > self.max_days:
+                    self._days.popitem(last=False)
+        return prices
+
+    def invalidate_day(self, *, day: date) -> None:
+        with self._lock:
+            self._generations[day] = self._generations.get(day, 0) + 1
+
+
+_store: MarketPriceStore | None = None
+_store_lock = threading.Lock()
+
+
+def get_market_price_store() -> MarketPriceStore | None:
+    """Return the process-wide store, or ``None`` when it is disabled.
+
+    ``MARKET_PRICE_STORE_TTL_SECONDS`` sets the lifetime of today's and
+    future days (``0`` disables the store); past days live for
+    ``MARKET_PRICE_STORE_PAST_TTL_SECONDS``.
+    """
+    global _store
+    if _store is not None:
+        return _store
+
+    current_ttl_seconds = float(
+        os.getenv("MARKET_PRICE_STORE_TTL_SECONDS", DEFAULT_CURRENT_TTL_SECONDS)
+    )
+    if current_ttl_seconds <= 0:
+        return None
+
+    with _store_lock:
+        if _store is None:
+            _store = MarketPriceStore(
+                current_ttl_seconds=current_ttl_seconds,
+                past_ttl_seconds=float(
+                    os.getenv(
+                        "MARKET_PRICE_STORE_PAST_TTL_SECONDS", DEFAULT_PAST_TTL_SECONDS
+                    )
+                ),
+            )
+            logger.info("Market price store enabled ttl=%ss", current_ttl_seconds)
+    return _store
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import csv
+import io
+from collections.abc import Iterable, Iterator
+from datetime import datetime, timezone
+
+import orjson
+
+from app.schemas.measurement_export import ExportFormat
+
+EXPORT_COLUMNS = (
+    "id",
+    "measured_at",
+    "measured_value",
+    "measured_unit",
+    "metadata_payload",
+    "extra_data",
+)
+# Rows encoded per chunk handed to the response; bounds memory and keeps
+# the number of socket writes low.
+EXPORT_CHUNK_ROWS = 500
+
+EXPORT_MEDIA_TYPES = {
+    ExportFormat.NDJSON: "application/x-ndjson",
+    ExportFormat.CSV: "text/csv",
+}
+
+
+def iter_export_chunks(rows: Iterable, export_format: ExportFormat) -> Iterator[bytes]:
+    """Encode measurement rows as NDJSON lines or CSV, ``EXPORT_CHUNK_ROWS`` at a time.
+
+    ``rows`` is consumed lazily, so a server-side cursor behind it is read
+    batch by batch and memory stays flat however long the range is.
+    """
+    encode = _encode_csv if export_format == ExportFormat.CSV else _encode_ndjson
+    if export_format == ExportFormat.CSV:
+        yield _csv_line(EXPORT_COLUMNS)
+
+    chunk: list = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= EXPORT_CHUNK_ROWS:
+            yield encode(chunk)
+            chunk = []
+    if chunk:
+        yield encode(chunk)
+
+
+def _encode_ndjson(rows: list) -> bytes:
+    return b"".join(
+        orjson.dumps(
+            {
+                "id": row.id,
+                "measured_at": _to_utc_aware(row.measured_at),
+                "measured_value": _to_float(row.measured_value),
+                "measured_unit": row.measured_unit,
+                "metadata_payload": row.metadata_payload or {},
+                "extra_data": row.extra_data or {},
+            }
+        )
+        + b"\n"
+        for row in rows
+    )
+
+
+def _encode_csv(rows: list) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    for row in rows:
+        measured_value = _to_float(row.measured_value)
+        writer.writerow(
+            (
+                row.id,
+                _to_utc_aware(row.measured_at).isoformat(),
+                "" if measured_value is None else measured_value,
+                row.measured_unit or "",
+                orjson.dumps(row.metadata_payload or {}).decode(),
+                orjson.dumps(row.extra_data or {}).decode(),
+            )
+        )
+    return buffer.getvalue().encode()
+
+
+def _csv_line(values) -> bytes:
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="\n").writerow(values)
+    return buffer.getvalue().encode()
+
+
+def _to_float(value) -> float | None:
+    return float(value) if value is not None else None
+
+
+def _to_utc_aware(ts: datetime) -> datetime:
+    if ts.tzinfo is None:
+        return ts.replace(tzinfo=timezone.utc)
+    return ts.astimezone(timezone.utc)
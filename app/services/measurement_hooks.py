@@ -0,0 +1,217 @@
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta, timezone
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.services.current_hour_pool import get_current_hour_pool_store
+from app.services.market_price_store import get_market_price_store
+from app.services.telemetry_cache import get_telemetry_cache
+from app.services.telemetry_stream import (
+    device_state_subject,
+    get_telemetry_stream_hub,
+    measurement_subject,
+    metric_subject,
+)
+from smart_common.enums.device_event import DeviceEventType
+
+MEASUREMENTS_TABLE = "provider_measurements"
+MARKET_PRICES_TABLE = "market_energy_prices"
+DEVICE_EVENTS_TABLE = "device_events"
+METRIC_SAMPLES_TABLE = "provider_metric_samples"
+PENDING_INVALIDATIONS_KEY = "telemetry_pending_invalidations"
+PENDING_STREAM_EVENTS_KEY = "telemetry_pending_stream_events"
+
+_registered = False
+
+
+def register_measurement_hooks() -> None:
+    """Attach write hooks to every ORM session of the process (idempotent).
+
+    Measurements and market prices are persisted by smart_common
+    repositories, so derived data owned by the API is kept in sync from
+    session listeners instead of from the repositories themselves.
+    """
+    global _registered
+    if _registered:
+        return
+    event.listen(Session, "after_flush", _after_flush)
+    event.listen(Session, "after_commit", _after_commit)
+    event.listen(Session, "after_rollback", _after_rollback)
+    _registered = True
+
+
+def _after_flush(session: Session, flush_context) -> None:
+    stream_events = _collect_stream_events(session.new)
+    if stream_events:
+        session.info.setdefault(PENDING_STREAM_EVENTS_KEY, []).extend(stream_events)
+
+    touched_hours = _collect_touched_hours(session.new)
+    market_days = _collect_market_days([*session.new, *session.dirty])
+    device_events_written = any(
+        getattr(obj, "__tablename__", None) == DEVICE_EVENTS_TABLE
+        for obj in session.new
+    )
+    if not touched_hours and not market_days and not device_events_written:
+        return
+
+    # Energy rollups and the revenue ledger are invalidated by database
+    # triggers, which also see rows written outside this process. Cached
+    # responses are dropped only once the write is visible to readers,
+    # otherwise a concurrent request could cache the pre-commit state again.
+    pending = session.info.setdefault(PENDING_INVALIDATIONS_KEY, set())
+    pending.update(("provider", key) for key in touched_hours)
+    pending.update(("market", day) for day in market_days)
+    if device_events_written:
+        pending.add(("device_events", None))
+
+
+def _after_commit(session: Session) -> None:
+    stream_events = session.info.pop(PENDING_STREAM_EVENTS_KEY, None)
+    if stream_events:
+        hub = get_telemetry_stream_hub()
+        for subject, payload in stream_events:
+            hub.publish_threadsafe(subject, payload)
+
+    pending = session.info.pop(PENDING_INVALIDATIONS_KEY, None)
+    if not pending:
+        return
+
+    today = datetime.now(timezone.utc).date()
+
+    store = get_market_price_store()
+    if store is not None:
+        for kind, key in pending:
+            if kind == "market":
+                store.invalidate_day(day=key)
+
+    # Pools only read forward from their cursors, so any write of today may
+    # have landed behind one; the next poll rebuilds the affected pools.
+    pool_store = get_current_hour_pool_store()
+    if pool_store is not None:
+        for kind, key in pending:
+            if kind == "provider" and key[1] == today:
+                pool_store.discard(provider_id=key[0])
+            elif kind == "device_events":
+                pool_store.discard_all()
+
+    cache = get_telemetry_cache()
+    if cache is None:
+        return
+
+    for kind, key in pending:
+        if kind == "provider":
+            provider_id, day = key
+            if day < today:
+                cache.invalidate_day(provider_id=provider_id, day=day)
+        elif kind == "market" and key < today:
+            cache.invalidate_market_day(day=key)
+
+
+def _after_rollback(session: Session) -> None:
+    session.info.pop(PENDING_INVALIDATIONS_KEY, None)
+    session.info.pop(PENDING_STREAM_EVENTS_KEY, None)
+
+
+def _collect_touched_hours(objects) -> dict[tuple[int, date], datetime]:
+    """Earliest written hour per (provider, UTC day) among new measurements."""
+    touched: dict[tuple[int, date], datetime] = {}
+    for obj in objects:
+        if getattr(obj, "__tablename__", None) != MEASUREMENTS_TABLE:
+            continue
+
+        provider_id = getattr(obj, "provider_id", None)
+        measured_at = getattr(obj, "measured_at", None)
+        if provider_id is None or measured_at is None:
+            continue
+
+        hour_start = _floor_hour(_to_utc_aware(measured_at))
+        key = (provider_id, hour_start.date())
+        current = touched.get(key)
+        if current is None or hour_start < current:
+            touched[key] = hour_start
+
+    return touched
+
+
+def _collect_stream_events(objects) -> list[tuple[str, dict]]:
+    """Live-stream messages for new measurements, metric samples and STATE events."""
+    events: list[tuple[str, dict]] = []
+    for obj in objects:
+        tablename = getattr(obj, "__tablename__", None)
+        if tablename == MEASUREMENTS_TABLE:
+            value = getattr(obj, "measured_value", None)
+            events.append(
+                (
+                    measurement_subject(obj.provider_id),
+                    {
+                        "provider_id": obj.provider_id,
+                        "measured_at": _isoformat(obj.measured_at),
+                        "measured_value": float(value) if value is not None else None,
+                        "measured_unit": getattr(obj, "measured_unit", None),
+                    },
+                )
+            )
+        elif tablename == METRIC_SAMPLES_TABLE:
+            value = getattr(obj, "value", None)
+            events.append(
+                (
+                    metric_subject(obj.provider_id),
+                    {
+                        "provider_id": obj.provider_id,
+                        "metric_key": obj.metric_key,
+                        "measured_at": _isoformat(obj.measured_at),
+                        "value": float(value) if value is not None else None,
+                        "unit": getattr(obj, "unit", None),
+                    },
+                )
+            )
+        elif (
+            tablename == DEVICE_EVENTS_TABLE
+            and getattr(obj, "event_type", None) == DeviceEventType.STATE
+        ):
+            events.append(
+                (
+                    device_state_subject(obj.device_id),
+                    {
+                        "device_id": obj.device_id,
+                        "created_at": _isoformat(obj.created_at),
+                        "pin_state": getattr(obj, "pin_state", None),
+                        "device_state": getattr(obj, "device_state", None),
+                    },
+                )
+            )
+    return events
+
+
+def _collect_market_days(objects) -> set[date]:
+    days: set[date] = set()
+    for obj in objects:
+        if getattr(obj, "__tablename__", None) != MARKET_PRICES_TABLE:
+            continue
+
+        interval_start = getattr(obj, "interval_start", None)
+        interval_end = getattr(obj, "interval_end", None)
+        if interval_start is None:
+            continue
+
+        days.add(_to_utc_aware(interval_start).date())
+        if interval_end is not None:
+            days.add((_to_utc_aware(interval_end) - timedelta(microseconds=1)).date())
+
+    return days
+
+
+def _floor_hour(ts: datetime) -> datetime:
+    return ts.replace(minute=0, second=0, microsecond=0)
+
+
+def _isoformat(ts: datetime | None) -> str | None:
+    return _to_utc_aware(ts).isoformat() if ts is not None else None
+
+
+def _to_utc_aware(ts: datetime) -> datetime:
+    if ts.tzinfo is None:
+        return ts.replace(tzinfo=timezone.utc)
+    return ts.astimezone(timezone.utc)
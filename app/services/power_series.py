@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from smart_common.services.energy_calculation_service import PowerSample
+
+US_PER_SECOND = 1_000_000
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+class PowerSeries:
+    """Power samples stored as two contiguous columns.
+
+    Timestamps are int64 epoch microseconds (``array('q')``) and values
+    float64 (``array('d')``), 16 bytes per sample instead of a
+    ``PowerSample`` with its own aware ``datetime``. Sort, dedup and
+    carry-forward work in place; ``PowerSample`` objects are only created
+    while iterating, for code written against lists of samples. Slicing
+    returns a new series, so ``zip(series, series[1:])`` walks consecutive
+    pairs like it does over a list.
+    """
+
+    __slots__ = ("timestamps", "values")
+
+    def __init__(self, timestamps: array | None = None, values: array | None = None):
+        self.timestamps = timestamps if timestamps is not None else array("q")
+        self.values = values if values is not None else array("d")
+
+    @classmethod
+    def from_pairs(cls, pairs) -> PowerSeries:
+        """Series of aware ``(ts, value)`` pairs, kept in the given order."""
+        series = cls()
+        for ts, value in pairs:
+            series.append(ts, value)
+        return series
+
+    def append(self, ts: datetime, value: float) -> None:
+        self.timestamps.append(epoch_us(ts))
+        self.values.append(float(value))
+
+    def extend(self, other: PowerSeries) -> None:
+        self.timestamps.extend(other.timestamps)
+        self.values.extend(other.values)
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def __bool__(self) -> bool:
+        return bool(self.timestamps)
+
+    def __iter__(self):
+        for ts, value in zip(self.timestamps, self.values):
+            yield PowerSample(ts=from_epoch_us(ts), value=value)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return PowerSeries(self.timestamps[index], self.values[index])
+        return PowerSample(
+            ts=from_epoch_us(self.timestamps[index]), value=self.values[index]
+        )
+
+    def pairs(self):
+        """``(ts, value)`` tuples in series order."""
+        for ts, value in zip(self.timestamps, self.values):
+            yield from_epoch_us(ts), value
+
+    def to_samples(self) -> list[PowerSample]:
+        return list(self)
+
+    def arrays(self) -> tuple[np.ndarray, np.ndarray]:
+        """Zero-copy NumPy views of the timestamp and value columns."""
+        return (
+            np.frombuffer(self.timestamps, dtype=np.int64),
+            np.frombuffer(self.values, dtype=np.float64),
+        )
+
+    def window(self, start: datetime, end: datetime) -> PowerSeries:
+        """Samples with ``start <= ts <= end`` of a sorted series."""
+        return self[
+            bisect_left(self.timestamps, epoch_us(start)) : bisect_right(
+                self.timestamps, epoch_us(end)
+            )
+        ]
+
+    def bounds(self, start: datetime, end: datetime) -> tuple[int, int]:
+        """Index range of the samples with ``start <= ts < end`` of a sorted series."""
+        return (
+            bisect_left(self.timestamps, epoch_us(start)),
+            bisect_left(self.timestamps, epoch_us(end)),
+        )
+
+    def index_before(self, ts: datetime) -> int:
+        """Position of the last sample strictly before ``ts``, or -1."""
+        return bisect_left(self.timestamps, epoch_us(ts)) - 1
+
+    def sort(self) -> None:
+        """Stable in-place sort by timestamp."""
+        timestamps, values = self.arrays()
+        if len(timestamps) < 2 or bool(np.all(timestamps[1:] >= timestamps[:-1])):
+            return
+        order = np.argsort(timestamps, kind="stable")
+        self._replace(timestamps[order], values[order])
+
+    def dedup(self) -> None:
+        """Keep the last sample of every timestamp of a sorted series."""
+        timestamps, values = self.arrays()
+        if len(timestamps) < 2:
+            return
+        keep = np.append(timestamps[1:] != timestamps[:-1], True)
+        if bool(keep.all()):
+            return
+        self._replace(timestamps[keep], values[keep])
+
+    def carry_forward(
+        self, end: datetime, *, hold_seconds: float | None = None
+    ) -> None:
+        """Repeat the last value up to ``end``, for at most ``hold_seconds``."""
+        if not self.timestamps:
+            return
+        last_ts = self.timestamps[-1]
+        carry_until = epoch_us(end)
+        if hold_seconds is not None and hold_seconds > 0:
+            carry_until = min(carry_until, last_ts + _seconds_to_us(hold_seconds))
+        if carry_until > last_ts:
+            self.timestamps.append(carry_until)
+            self.values.append(self.values[-1])
+
+    def _replace(self, timestamps: np.ndarray, values: np.ndarray) -> None:
+        # New arrays are built before the old ones are dropped, since the
+        # NumPy views passed in still point into the old buffers.
+        new_timestamps = array("q", timestamps.tobytes())
+        new_values = array("d", values.tobytes())
+        self.timestamps = new_timestamps
+        self.values = new_values
+
+
+def epoch_us(ts: datetime) -> int:
+    delta = ts - _EPOCH
+    return (delta.days * 86400 + delta.seconds) * US_PER_SECOND + delta.microseconds
+
+
+def from_epoch_us(value: int) -> datetime:
+    return _EPOCH + timedelta(microseconds=int(value))
+
+
+def _seconds_to_us(seconds: float) -> int:
+    # Rounded like ``timedelta(seconds=...)`` so capping matches datetime math.
+    return timedelta(seconds=seconds) // timedelta(microseconds=1)
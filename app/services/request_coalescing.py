@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from collections.abc import Callable, Hashable
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+
+class _Flight:
+    __slots__ = ("done", "result", "error", "followers")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+        self.followers = 0
+
+
+class RequestCoalescer:
+    """Per-process single-flight for identical concurrent computations.
+
+    Sync routes run in threadpool workers, so several requests for the same
+    dashboard arriving together would each build the same response. The
+    first caller of a key computes it; callers arriving while it runs wait
+    for that result (or exception) instead of starting their own. Nothing
+    is kept once the computation finishes, so this is not a cache: a
+    request arriving afterwards computes again.
+
+    Shared results must be treated as read-only by every caller.
+    """
+
+    def __init__(self):
+        self._flights: dict[Hashable, _Flight] = {}
+        self._lock = threading.Lock()
+
+    def run(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                flight.followers += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = compute()
+        except BaseException as exc:
+            flight.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+            if flight.followers:
+                logger.debug(
+                    "Coalesced %s concurrent requests key=%s",
+                    flight.followers,
+                    key,
+                )
+        return flight.result
+
+
+_coalescer: RequestCoalescer | None = None
+_coalescer_lock = threading.Lock()
+
+
+def get_request_coalescer() -> RequestCoalescer | None:
+    """Return the process-wide coalescer, or ``None`` when it is disabled.
+
+    ``REQUEST_COALESCING`` turns it off with ``false``.
+    """
+    global _coalescer
+    if _coalescer is not None:
+        return _coalescer
+
+    if os.getenv("REQUEST_COALESCING", "true").strip().lower() not in {
+        "1",
+        "true",
+        "yes",
+    }:
+        return None
+
+    with _coalescer_lock:
+        if _coalescer is None:
+            _coalescer = RequestCoalescer()
+    return _coalescer
@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta, timezone
+
+from app.models.provider_revenue_ledger import ProviderRevenueHourlyLedger
+from app.repositories.market_energy_price import MarketEnergyPriceRepository
+from app.repositories.revenue_ledger import RevenueLedgerRepository
+from app.services.energy_engine import RevenueMatch
+from app.services.energy_integration import build_day_power_samples
+from app.services.market_price_index import MarketPriceIndex
+from app.services.market_price_store import load_market_prices
+from app.services.power_sample_loader import PowerSampleLoader
+from app.services.revenue_matching import match_market_revenue
+
+REVENUE_LEDGER_MARKET = "RCE"
+
+
+def list_revenue_ledger_day(
+    ledger_repo: RevenueLedgerRepository,
+    *,
+    provider_id: int,
+    day_start: datetime,
+    energy_unit: str | None,
+    max_interval_seconds: float | None = None,
+) -> list[ProviderRevenueHourlyLedger] | None:
+    """Stored ledger hours of a closed day, or ``None`` unless all are current."""
+    rows = ledger_repo.list_for_window(
+        provider_id=provider_id,
+        market=REVENUE_LEDGER_MARKET,
+        date_start=day_start,
+        date_end=day_start + timedelta(days=1),
+    )
+    if len(rows) == 24 and all(
+        row.sample_hold_seconds == max_interval_seconds
+        and row.energy_unit == energy_unit
+        for row in rows
+    ):
+        return rows
+    return None
+
+
+def list_missing_ledger_days(
+    *,
+    ledger_repo: RevenueLedgerRepository,
+    provider_id: int,
+    first_day: date,
+    last_day: date,
+    energy_unit: str | None,
+    max_interval_seconds: float | None = None,
+) -> list[date]:
+    """Closed days of ``first_day``..``last_day`` without 24 current ledger hours."""
+    range_start = datetime.combine(first_day, datetime.min.time(), tzinfo=timezone.utc)
+    range_end = datetime.combine(last_day, datetime.min.time(), tzinfo=timezone.utc)
+    stored_hours = ledger_repo.count_hours_by_day(
+        provider_id=provider_id,
+        market=REVENUE_LEDGER_MARKET,
+        date_start=range_start,
+        date_end=range_end + timedelta(days=1),
+        sample_hold_seconds=max_interval_seconds,
+        energy_unit=energy_unit,
+    )
+
+    missing_days: list[date] = []
+    day = first_day
+    while day <= last_day:
+        if stored_hours.get(day, 0) != 24:
+            missing_days.append(day)
+        day += timedelta(days=1)
+    return missing_days
+
+
+def compute_ledger_day(
+    *,
+    power_samples: PowerSampleLoader,
+    market_index: MarketPriceIndex,
+    day: date,
+    energy_unit: str | None,
+    max_interval_seconds: float | None = None,
+) -> list[ProviderRevenueHourlyLedger]:
+    """Ledger hours of the closed ``day``, matched without storing them."""
+    start = datetime.combine(day, datetime.min.time(), tzinfo=timezone.utc)
+    match = match_market_revenue(
+        samples=build_day_power_samples(
+            power_samples=power_samples,
+            start=start,
+            end=start + timedelta(days=1) - timedelta(microseconds=1),
+            carry_forward_seconds=max_interval_seconds,
+        ),
+        market_index=market_index,
+        energy_unit=energy_unit,
+        max_interval_seconds=max_interval_seconds,
+    )
+    return build_revenue_ledger_rows(
+        match,
+        market_index=market_index,
+        day_start=start,
+        energy_unit=energy_unit,
+        max_interval_seconds=max_interval_seconds,
+    )
+
+
+def materialize_ledger_day(
+    *,
+    power_samples: PowerSampleLoader,
+    market_repo: MarketEnergyPriceRepository,
+    ledger_repo: RevenueLedgerRepository,
+    day: date,
+    energy_unit: str | None,
+    max_interval_seconds: float | None = None,
+) -> bool:
+    """Match and upsert the ledger hours of the closed ``day``; the caller commits.
+
+    Prices are read from the database, not the per-process price store, so
+    a correction committed by another process is never matched against a
+    stale copy. The day's measurement and price versions are read before
+    matching and again before the upsert; when either moved nothing is
+    stored and ``False`` is returned, leaving the day to the next run.
+    """
+    version = _ledger_day_version(power_samples, market_repo, day=day)
+    rows = compute_ledger_day(
+        power_samples=power_samples,
+        market_index=load_market_prices(
+            market_repo,
+            market=REVENUE_LEDGER_MARKET,
+            day=day,
+        ),
+        day=day,
+        energy_unit=energy_unit,
+        max_interval_seconds=max_interval_seconds,
+    )
+    if version != _ledger_day_version(power_samples, market_repo, day=day):
+        return False
+
+    ledger_repo.upsert_hours(provider_id=power_samples.provider_id, rows=rows)
+    return True
+
+
+def build_revenue_ledger_rows(
+    match: RevenueMatch,
+    *,
+    market_index: MarketPriceIndex,
+    day_start: datetime,
+    energy_unit: str | None,
+    max_interval_seconds: float | None = None,
+) -> list[ProviderRevenueHourlyLedger]:
+    # Every hour gets a row, so a day without priced export is still
+    # recognizable as materialized.
+    currency = str(market_index.entries[0].currency) if market_index else None
+    rows = []
+    for offset in range(24):
+        hour_dt = day_start + timedelta(hours=offset)
+        rows.append(
+            ProviderRevenueHourlyLedger(
+                market=REVENUE_LEDGER_MARKET,
+                hour_start=hour_dt,
+                sample_hold_seconds=max_interval_seconds,
+                export_energy=match.hourly_export_energy.get(hour_dt, 0.0),
+                revenue=match.hourly_revenue.get(hour_dt, 0.0),
+                matched_intervals=match.hourly_matched_intervals.get(hour_dt, 0),
+                currency=currency,
+                energy_unit=energy_unit,
+            )
+        )
+    return rows
+
+
+def revenue_match_from_ledger(rows: list[ProviderRevenueHourlyLedger]) -> RevenueMatch:
+    match = RevenueMatch()
+    for row in rows:
+        if not row.matched_intervals:
+            continue
+        hour_dt = _to_utc_aware(row.hour_start)
+        match.total_export_energy += row.export_energy
+        match.total_revenue += row.revenue
+        match.matched_intervals += row.matched_intervals
+        match.hourly_export_energy[hour_dt] = row.export_energy
+        match.hourly_revenue[hour_dt] = row.revenue
+        match.hourly_matched_intervals[hour_dt] = row.matched_intervals
+    return match
+
+
+def _ledger_day_version(
+    power_samples: PowerSampleLoader,
+    market_repo: MarketEnergyPriceRepository,
+    *,
+    day: date,
+) -> tuple:
+    start = datetime.combine(day, datetime.min.time(), tzinfo=timezone.utc)
+    end = start + timedelta(days=1)
+    return (
+        power_samples.repo.get_power_version(
+            provider_id=power_samples.provider_id,
+            date_start=start,
+            date_end=end - timedelta(microseconds=1),
+            non_null=True,
+        ),
+        market_repo.get_version(
+            markets=[REVENUE_LEDGER_MARKET],
+            date_start=start,
+            date_end=end,
+            started_before=end,
+        ),
+    )
+
+
+def _to_utc_aware(ts: datetime) -> datetime:
+    if ts.tzinfo is None:
+        return ts.replace(tzinfo=timezone.utc)
+    return ts.astimezone(timezone.utc)
@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from app.services import energy_engine
+from app.services.energy_engine import RevenueMatch, vectorized_engine_enabled
+from app.services.energy_integration import iter_effective_power_intervals
+from app.services.market_price_index import MarketPriceIndex
+from app.services.power_series import PowerSeries
+from smart_common.services.energy_calculation_service import PowerSample
+
+
+def convert_market_price_to_energy_unit(
+    *,
+    price: float,
+    price_unit: str | None,
+    energy_unit: str | None,
+) -> float | None:
+    if not price_unit or not energy_unit:
+        return None
+
+    normalized_price_unit = price_unit.strip().lower()
+    normalized_energy_unit = energy_unit.strip().lower()
+
+    if normalized_price_unit == "mwh":
+        if normalized_energy_unit == "kwh":
+            return round(price / 1000.0, 6)
+        if normalized_energy_unit == "wh":
+            return round(price / 1_000_000.0, 9)
+
+    if normalized_price_unit == normalized_energy_unit:
+        return round(price, 6)
+
+    return None
+
+
+def match_market_revenue(
+    *,
+    samples: PowerSeries | list[PowerSample],
+    market_index: MarketPriceIndex,
+    energy_unit: str | None,
+    max_interval_seconds: float | None = None,
+) -> RevenueMatch:
+    if not samples or len(samples) < 2 or not market_index:
+        return RevenueMatch()
+
+    prices_per_energy_unit = [
+        convert_market_price_to_energy_unit(
+            price=float(entry.price_value),
+            price_unit=entry.price_unit,
+            energy_unit=energy_unit,
+        )
+        for entry in market_index.entries
+    ]
+    if vectorized_engine_enabled():
+        return energy_engine.match_revenue(
+            samples,
+            market_starts=market_index.starts,
+            market_ends=market_index.ends,
+            prices=prices_per_energy_unit,
+            max_interval_seconds=max_interval_seconds,
+        )
+    return match_revenue(
+        samples=samples,
+        market_index=market_index,
+        prices_per_energy_unit=prices_per_energy_unit,
+        max_interval_seconds=max_interval_seconds,
+    )
+
+
+def match_revenue(
+    *,
+    samples: PowerSeries | list[PowerSample],
+    market_index: MarketPriceIndex,
+    prices_per_energy_unit: list[float | None],
+    max_interval_seconds: float | None = None,
+) -> RevenueMatch:
+    total_export_energy = 0.0
+    total_revenue = 0.0
+    matched_intervals = 0
+    hourly_revenue: dict[datetime, float] = defaultdict(float)
+    hourly_export_energy: dict[datetime, float] = defaultdict(float)
+    hourly_matched_intervals: dict[datetime, int] = defaultdict(int)
+    for interval_start, interval_end, power in iter_effective_power_intervals(
+        samples=samples,
+        max_interval_seconds=max_interval_seconds,
+    ):
+        cursor = interval_start
+        position = market_index.find(cursor)
+        while cursor < interval_end:
+            if position is None:
+                break
+
+            market_end = market_index.ends[position]
+            hour_end = cursor.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+            segment_end = min(interval_end, market_end, hour_end)
+            dt_hours = (segment_end - cursor).total_seconds() / 3600.0
+            if dt_hours <= 0:
+                break
+
+            energy = power * dt_hours
+            export_energy = max(0.0, energy)
+            price_per_energy_unit = prices_per_energy_unit[position]
+
+            if export_energy > 0 and price_per_energy_unit is not None:
+                hour_bucket = cursor.replace(minute=0, second=0, microsecond=0)
+                total_export_energy += export_energy
+                total_revenue += export_energy * price_per_energy_unit
+                matched_intervals += 1
+                hourly_export_energy[hour_bucket] += export_energy
+                hourly_revenue[hour_bucket] += export_energy * price_per_energy_unit
+                hourly_matched_intervals[hour_bucket] += 1
+
+            cursor = segment_end
+            if cursor >= market_end:
+                position = market_index.find(cursor)
+
+    return RevenueMatch(
+        total_export_energy=total_export_energy,
+        total_revenue=total_revenue,
+        matched_intervals=matched_intervals,
+        hourly_export_energy=dict(hourly_export_energy),
+        hourly_revenue=dict(hourly_revenue),
+        hourly_matched_intervals=dict(hourly_matched_intervals),
+    )
@@ -0,0 +1,8 @@
+from __future__ import annotations
+
+
+def resolve_sample_hold_seconds(expected_interval_sec: int | None) -> float | None:
+    """How long a power sample is held before the series counts as a gap."""
+    if expected_interval_sec is None or expected_interval_sec <= 0:
+        return None
+    return float(min(max(expected_interval_sec * 5, 300), 900))
@@ -0,0 +1,351 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import date, datetime
+
+import redis
+
+from smart_common.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+DEFAULT_MEMORY_MAX_ENTRIES = 1024
+DEFAULT_RETRY_AFTER_SECONDS = 30.0
+REDIS_DB = 2
+KEY_PREFIX = "telemetry"
+
+
+class TelemetryCacheLookup:
+    __slots__ = ("payload", "generations")
+
+    def __init__(self, payload: str | None, generations: list[int]):
+        self.payload = payload
+        self.generations = generations
+
+
+class TelemetryCache:
+    """Cache of serialized telemetry responses for days that are already over.
+
+    Entries are grouped per (provider, day) so one write invalidates every
+    sample-hold variant at once. Every entry also remembers the generation of
+    its (provider, day) and of the day's market prices seen *before* it was
+    computed; writes bump those generations, so a response computed while a
+    write was landing is never served afterwards.
+
+    Generations only see writes of this process. Writers elsewhere are
+    caught by ``source_version``, a validator of the stored data read
+    before the response is built, which an entry must match to be served.
+    After a backend error the cache is bypassed for ``retry_after_seconds``,
+    so an unreachable Redis costs one timeout per window, not per request.
+    """
+
+    def __init__(
+        self,
+        backend: "_CacheBackend",
+        *,
+        retry_after_seconds: float = DEFAULT_RETRY_AFTER_SECONDS,
+    ):
+        self.backend = backend
+        self.retry_after_seconds = retry_after_seconds
+        self._unavailable_until = 0.0
+
+    def get(
+        self,
+        *,
+        provider_id: int,
+        day: date,
+        sample_hold_seconds: float | None,
+        provider_updated_at: datetime | None,
+        source_version: str | None = None,
+    ) -> TelemetryCacheLookup:
+        if not self._available():
+            return TelemetryCacheLookup(None, [])
+        try:
+            raw_entry, generations = self.backend.get(
+                _entry_key(provider_id, day),
+                _hold_field(sample_hold_seconds),
+                _generation_keys(provider_id, day),
+            )
+        except redis.RedisError:
+            self._trip("Telemetry cache read failed")
+            return TelemetryCacheLookup(None, [])
+
+        if raw_entry is None:
+            return TelemetryCacheLookup(None, generations)
+
+        entry = json.loads(raw_entry)
+        if (
+            entry.get("generations") != generations
+            or entry.get("provider_updated_at") != _isoformat(provider_updated_at)
+            or entry.get("source_version") != source_version
+        ):
+            return TelemetryCacheLookup(None, generations)
+        return TelemetryCacheLookup(entry["payload"], generations)
+
+    def set(
+        self,
+        *,
+        lookup: TelemetryCacheLookup,
+        provider_id: int,
+        day: date,
+        sample_hold_seconds: float | None,
+        provider_updated_at: datetime | None,
+        payload: str,
+        source_version: str | None = None,
+    ) -> None:
+        if not lookup.generations or not self._available():
+            return
+
+        try:
+            self.backend.set(
+                _entry_key(provider_id, day),
+                _hold_field(sample_hold_seconds),
+                json.dumps(
+                    {
+                        "generations": lookup.generations,
+                        "provider_updated_at": _isoformat(provider_updated_at),
+                        "source_version": source_version,
+                        "payload": payload,
+                    }
+                ),
+            )
+        except redis.RedisError:
+            self._trip("Telemetry cache write failed")
+
+    def invalidate_day(self, *, provider_id: int, day: date) -> None:
+        # Skipped while the backend is down; entries written before are
+        # still rejected by their source version.
+        if not self._available():
+            return
+        try:
+            self.backend.incr(_provider_generation_key(provider_id, day))
+            self.backend.delete(_entry_key(provider_id, day))
+        except redis.RedisError:
+            self._trip(
+                "Telemetry cache invalidation failed",
+                extra={"provider_id": provider_id, "day": day.isoformat()},
+            )
+
+    def invalidate_market_day(self, *, day: date) -> None:
+        if not self._available():
+            return
+        try:
+            self.backend.incr(_market_generation_key(day))
+        except redis.RedisError:
+            self._trip(
+                "Telemetry cache market invalidation failed",
+                extra={"day": day.isoformat()},
+            )
+
+    def _available(self) -> bool:
+        return time.monotonic() >= self._unavailable_until
+
+    def _trip(self, message: str, *, extra: dict | None = None) -> None:
+        self._unavailable_until = time.monotonic() + self.retry_after_seconds
+        logger.warning(
+            "%s; bypassing the cache for %ss",
+            message,
+            self.retry_after_seconds,
+            extra=extra,
+            exc_info=True,
+        )
+
+
+class _CacheBackend(ABC):
+    @abstractmethod
+    def get(
+        self,
+        key: str,
+        field: str,
+        generation_keys: list[str],
+    ) -> tuple[str | None, list[int]]:
+        """The ``field`` of entry ``key`` and the values of ``generation_keys``."""
+
+    @abstractmethod
+    def set(self, key: str, field: str, value: str) -> None:
+        """Store ``field`` of entry ``key`` and restart its TTL."""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Drop entry ``key`` with all of its fields."""
+
+    @abstractmethod
+    def incr(self, key: str) -> None:
+        """Bump generation ``key``."""
+
+
+class MemoryCacheBackend(_CacheBackend):
+    def __init__(
+        self,
+        *,
+        max_entries: int = DEFAULT_MEMORY_MAX_ENTRIES,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple[float, dict[str, str]]] = OrderedDict()
+        self._generations: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get(
+        self,
+        key: str,
+        field: str,
+        generation_keys: list[str],
+    ) -> tuple[str | None, list[int]]:
+        with self._lock:
+            generations = [self._generations.get(item, 0) for item in generation_keys]
+            item = self._entries.get(key)
+            if item is None:
+                return None, generations
+
+            expires_at, fields = item
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None, generations
+
+            self._entries.move_to_end(key)
+            return fields.get(field), generations
+
+    def set(self, key: str, field: str, value: str) -> None:
+        with self._lock:
+            _, fields = self._entries.pop(key, (0.0, {}))
+            fields[field] = value
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, fields)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def incr(self, key: str) -> None:
+        with self._lock:
+            self._generations[key] = self._generations.get(key, 0) + 1
+
+
+class RedisCacheBackend(_CacheBackend):
+    def __init__(
+        self, client: redis.Redis, *, ttl_seconds: float = DEFAULT_TTL_SECONDS
+    ):
+        self.client = client
+        self.ttl_seconds = int(ttl_seconds)
+
+    def get(
+        self,
+        key: str,
+        field: str,
+        generation_keys: list[str],
+    ) -> tuple[str | None, list[int]]:
+        pipeline = self.client.pipeline(transaction=False)
+        pipeline.hget(key, field)
+        for generation_key in generation_keys:
+            pipeline.get(generation_key)
+        raw_entry, *generations = pipeline.execute()
+        if isinstance(raw_entry, bytes):
+            raw_entry = raw_entry.decode()
+        return raw_entry, [int(generation or 0) for generation in generations]
+
+    def set(self, key: str, field: str, value: str) -> None:
+        pipeline = self.client.pipeline(transaction=False)
+        pipeline.hset(key, field, value)
+        pipeline.expire(key, self.ttl_seconds)
+        pipeline.execute()
+
+    def delete(self, key: str) -> None:
+        self.client.delete(key)
+
+    def incr(self, key: str) -> None:
+        # Generations must outlive the entries they guard.
+        pipeline = self.client.pipeline(transaction=False)
+        pipeline.incr(key)
+        pipeline.expire(key, self.ttl_seconds * 2)
+        pipeline.execute()
+
+
+_cache: TelemetryCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_telemetry_cache() -> TelemetryCache | None:
+    """Return the process-wide cache, or ``None`` when caching is disabled.
+
+    ``TELEMETRY_CACHE_BACKEND`` selects ``redis`` (default, shared by all
+    workers), ``memory`` (per-process LRU) or ``off``.
+    ``TELEMETRY_CACHE_RETRY_SECONDS`` is how long a failing backend is
+    bypassed before it is tried again.
+    """
+    global _cache
+    if _cache is not None:
+        return _cache
+
+    backend_name = os.getenv("TELEMETRY_CACHE_BACKEND", "redis").strip().lower()
+    if backend_name == "off":
+        return None
+
+    ttl_seconds = float(os.getenv("TELEMETRY_CACHE_TTL_SECONDS", DEFAULT_TTL_SECONDS))
+    with _cache_lock:
+        if _cache is None:
+            if backend_name == "memory":
+                backend: _CacheBackend = MemoryCacheBackend(
+                    max_entries=int(
+                        os.getenv(
+                            "TELEMETRY_CACHE_MAX_ENTRIES",
+                            DEFAULT_MEMORY_MAX_ENTRIES,
+                        )
+                    ),
+                    ttl_seconds=ttl_seconds,
+                )
+            else:
+                backend = RedisCacheBackend(
+                    redis.Redis(
+                        host=settings.REDIS_HOST,
+                        port=6379,
+                        db=REDIS_DB,
+                        socket_timeout=0.5,
+                        socket_connect_timeout=0.5,
+                    ),
+                    ttl_seconds=ttl_seconds,
+                )
+            _cache = TelemetryCache(
+                backend,
+                retry_after_seconds=float(
+                    os.getenv(
+                        "TELEMETRY_CACHE_RETRY_SECONDS",
+                        DEFAULT_RETRY_AFTER_SECONDS,
+                    )
+                ),
+            )
+            logger.info("Telemetry cache enabled backend=%s", backend_name)
+    return _cache
+
+
+def _entry_key(provider_id: int, day: date) -> str:
+    return f"{KEY_PREFIX}:{provider_id}:{day.isoformat()}"
+
+
+def _generation_keys(provider_id: int, day: date) -> list[str]:
+    return [_provider_generation_key(provider_id, day), _market_generation_key(day)]
+
+
+def _provider_generation_key(provider_id: int, day: date) -> str:
+    return f"{KEY_PREFIX}:generation:{provider_id}:{day.isoformat()}"
+
+
+def _market_generation_key(day: date) -> str:
+    return f"{KEY_PREFIX}:market-generation:{day.isoformat()}"
+
+
+def _hold_field(sample_hold_seconds: float | None) -> str:
+    return "none" if sample_hold_seconds is None else repr(float(sample_hold_seconds))
+
+
+def _isoformat(value: datetime | None) -> str | None:
+    return value.isoformat() if value is not None else None
@@ -0,0 +1,370 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import and_, column, delete, func, or_, select, table
+from sqlalchemy.orm import Session
+
+from app.models.provider_telemetry_aggregate import POWER_SERIES_KEY
+from app.repositories.measurement_repository import (
+    MeasurementRepository,
+    provider_measurements,
+    provider_metric_samples,
+)
+from app.repositories.telemetry_aggregate import (
+    MIN_COMPACTION_AGE,
+    TelemetryAggregateRepository,
+)
+from app.services.sample_hold import resolve_sample_hold_seconds
+from smart_common.services.energy_calculation_service import (
+    EnergyCalculationService,
+    PowerSample,
+)
+
+SUPPORTED_BUCKET_SECONDS = (60, 300)
+
+providers = table(
+    "providers",
+    column("id"),
+    column("default_expected_interval_sec"),
+)
+
+
+@dataclass
+class TelemetryBucket:
+    bucket_start: datetime
+    sample_count: int
+    min_value: float
+    max_value: float
+    avg_value: float
+    last_value: float
+    last_sample_at: datetime
+    unit: str | None
+    energy: float | None = None
+
+
+def build_buckets(
+    samples: list[tuple[datetime, float, str | None]],
+    *,
+    bucket_seconds: int,
+) -> list[TelemetryBucket]:
+    """Group time-ordered ``(ts, value, unit)`` samples into fixed UTC buckets."""
+    grouped: dict[datetime, list[tuple[datetime, float, str | None]]] = defaultdict(
+        list
+    )
+    for sample in samples:
+        grouped[bucket_start_of(sample[0], bucket_seconds)].append(sample)
+
+    buckets = []
+    for bucket_start in sorted(grouped):
+        members = grouped[bucket_start]
+        values = [value for _, value, _ in members]
+        last_ts, last_value, last_unit = members[-1]
+        buckets.append(
+            TelemetryBucket(
+                bucket_start=bucket_start,
+                sample_count=len(members),
+                min_value=min(values),
+                max_value=max(values),
+                avg_value=sum(values) / len(values),
+                last_value=last_value,
+                last_sample_at=last_ts,
+                unit=last_unit,
+            )
+        )
+    return buckets
+
+
+def integrate_bucket_energy(
+    samples: list[PowerSample],
+    *,
+    bucket_seconds: int,
+    window_end: datetime,
+    sample_hold_seconds: float | None,
+) -> dict[datetime, float]:
+    """Energy of every bucket, with intervals split at bucket boundaries.
+
+    ``samples`` may start with the last sample before the window, so the
+    interval carried into the window is counted; intervals are cut at
+    ``window_end``, which the next window picks up the same way.
+    """
+    bounded = [sample for sample in samples if sample.ts < window_end]
+    if bounded:
+        bounded.append(PowerSample(ts=window_end, value=bounded[-1].value))
+
+    energy: dict[datetime, float] = defaultdict(float)
+    step = timedelta(seconds=bucket_seconds)
+    for interval in EnergyCalculationService.integrate_intervals(
+        bounded,
+        max_interval_seconds=sample_hold_seconds,
+    ):
+        duration = (interval.end - interval.start).total_seconds()
+        if duration <= 0:
+            continue
+        rate = interval.energy / duration
+        cursor = interval.start
+        while cursor < interval.end:
+            bucket_start = bucket_start_of(cursor, bucket_seconds)
+            segment_end = min(interval.end, bucket_start + step)
+            energy[bucket_start] += rate * (segment_end - cursor).total_seconds()
+            cursor = segment_end
+    return dict(energy)
+
+
+def bucket_start_of(ts: datetime, bucket_seconds: int) -> datetime:
+    epoch_seconds = int(ts.timestamp())
+    return datetime.fromtimestamp(
+        epoch_seconds - epoch_seconds % bucket_seconds,
+        tz=timezone.utc,
+    )
+
+
+class TelemetryCompactionService:
+    """Replaces raw telemetry of one provider window with bucket aggregates.
+
+    Power measurements become ``@power`` buckets carrying the integrated
+    energy of the bucket, metric samples become one series per metric key.
+    Aggregates are written and the raw rows deleted in the caller's
+    transaction, so a window is either fully compacted or left untouched.
+    Metric samples are deleted before the measurements they reference.
+    """
+
+    def __init__(self, db: Session, *, bucket_seconds: int):
+        if bucket_seconds not in SUPPORTED_BUCKET_SECONDS:
+            raise ValueError(
+                f"bucket_seconds must be one of {SUPPORTED_BUCKET_SECONDS}"
+            )
+        self.db = db
+        self.bucket_seconds = bucket_seconds
+        self.aggregate_repo = TelemetryAggregateRepository(db)
+
+    def list_pending_windows(self, *, before: datetime) -> dict[int, datetime]:
+        """Earliest raw sample older than ``before`` per provider."""
+        pending: dict[int, datetime] = {}
+        for source in (provider_measurements, provider_metric_samples):
+            rows = self.db.execute(
+                select(source.c.provider_id, func.min(source.c.measured_at))
+                .where(source.c.measured_at < before)
+                .group_by(source.c.provider_id)
+            )
+            for provider_id, first_at in rows:
+                first_at = _to_utc_aware(first_at)
+                if provider_id not in pending or first_at < pending[provider_id]:
+                    pending[provider_id] = first_at
+        return pending
+
+    def compact_window(
+        self,
+        *,
+        provider_id: int,
+        window_start: datetime,
+        window_end: datetime,
+    ) -> int:
+        """Compact ``[window_start, window_end)``; returns the buckets written."""
+        if window_end > datetime.now(timezone.utc) - MIN_COMPACTION_AGE:
+            raise ValueError(
+                "Refusing to compact telemetry younger than the minimum age"
+            )
+
+        rows = self._power_rows(
+            provider_id=provider_id,
+            window_start=window_start,
+            window_end=window_end,
+        )
+        rows += self._metric_rows(
+            provider_id=provider_id,
+            window_start=window_start,
+            window_end=window_end,
+        )
+        self.aggregate_repo.merge_buckets(rows=rows)
+
+        # Metric samples reference their measurement, so they go first.
+        self.db.execute(
+            delete(provider_metric_samples).where(
+                _metric_samples_in_window(
+                    provider_id=provider_id,
+                    window_start=window_start,
+                    window_end=window_end,
+                )
+            )
+        )
+        self.db.execute(
+            delete(provider_measurements).where(
+                _measurements_in_window(
+                    provider_id=provider_id,
+                    window_start=window_start,
+                    window_end=window_end,
+                )
+            )
+        )
+        return len(rows)
+
+    def _power_rows(
+        self,
+        *,
+        provider_id: int,
+        window_start: datetime,
+        window_end: datetime,
+    ) -> list[dict]:
+        measurements = provider_measurements.c
+        samples = [
+            (_to_utc_aware(ts), float(value), unit)
+            for ts, value, unit in self.db.execute(
+                select(
+                    measurements.measured_at,
+                    measurements.measured_value,
+                    measurements.measured_unit,
+                )
+                .where(
+                    measurements.provider_id == provider_id,
+                    measurements.measured_at >= window_start,
+                    measurements.measured_at < window_end,
+                    measurements.measured_value.isnot(None),
+                )
+                .order_by(measurements.measured_at)
+            )
+        ]
+        if not samples:
+            return []
+
+        power_samples = [PowerSample(ts=ts, value=value) for ts, value, _ in samples]
+        previous = MeasurementRepository(self.db).get_last_power_sample_before(
+            provider_id=provider_id,
+            before=window_start,
+        )
+        if previous is not None:
+            power_samples.insert(
+                0,
+                PowerSample(ts=_to_utc_aware(previous[0]), value=float(previous[1])),
+            )
+
+        energy = integrate_bucket_energy(
+            power_samples,
+            bucket_seconds=self.bucket_seconds,
+            window_end=window_end,
+            sample_hold_seconds=self._sample_hold_seconds(provider_id),
+        )
+        buckets = build_buckets(samples, bucket_seconds=self.bucket_seconds)
+        for bucket in buckets:
+            bucket.energy = energy.get(bucket.bucket_start, 0.0)
+        return self._to_rows(provider_id, POWER_SERIES_KEY, buckets)
+
+    def _metric_rows(
+        self,
+        *,
+        provider_id: int,
+        window_start: datetime,
+        window_end: datetime,
+    ) -> list[dict]:
+        metric_samples = provider_metric_samples.c
+        samples_by_key: dict[str, list] = defaultdict(list)
+        for metric_key, ts, value, unit in self.db.execute(
+            select(
+                metric_samples.metric_key,
+                metric_samples.measured_at,
+                metric_samples.value,
+                metric_samples.unit,
+            )
+            .where(
+                _metric_samples_in_window(
+                    provider_id=provider_id,
+                    window_start=window_start,
+                    window_end=window_end,
+                ),
+                metric_samples.value.isnot(None),
+            )
+            .order_by(metric_samples.metric_key, metric_samples.measured_at)
+        ):
+            samples_by_key[metric_key].append((_to_utc_aware(ts), float(value), unit))
+
+        rows = []
+        for metric_key, samples in samples_by_key.items():
+            rows += self._to_rows(
+                provider_id,
+                metric_key,
+                build_buckets(samples, bucket_seconds=self.bucket_seconds),
+            )
+        return rows
+
+    def _sample_hold_seconds(self, provider_id: int) -> float | None:
+        expected_interval_sec = self.db.execute(
+            select(providers.c.default_expected_interval_sec).where(
+                providers.c.id == provider_id
+            )
+        ).scalar()
+        return resolve_sample_hold_seconds(expected_interval_sec)
+
+    def _to_rows(
+        self,
+        provider_id: int,
+        series_key: str,
+        buckets: list[TelemetryBucket],
+    ) -> list[dict]:
+        return [
+            {
+                "provider_id": provider_id,
+                "series_key": series_key,
+                "bucket_start": bucket.bucket_start,
+                "bucket_seconds": self.bucket_seconds,
+                "sample_count": bucket.sample_count,
+                "min_value": bucket.min_value,
+                "max_value": bucket.max_value,
+                "avg_value": bucket.avg_value,
+                "last_value": bucket.last_value,
+                "last_sample_at": bucket.last_sample_at,
+                "unit": bucket.unit,
+                "energy": bucket.energy,
+            }
+            for bucket in buckets
+        ]
+
+
+def _measurements_in_window(
+    *,
+    provider_id: int,
+    window_start: datetime,
+    window_end: datetime,
+):
+    measurements = provider_measurements.c
+    return and_(
+        measurements.provider_id == provider_id,
+        measurements.measured_at >= window_start,
+        measurements.measured_at < window_end,
+    )
+
+
+def _metric_samples_in_window(
+    *,
+    provider_id: int,
+    window_start: datetime,
+    window_end: datetime,
+):
+    # A sample normally shares its measurement's timestamp; one that does
+    # not is still compacted with it, or the measurement could not be deleted.
+    samples = provider_metric_samples.c
+    return and_(
+        samples.provider_id == provider_id,
+        or_(
+            and_(
+                samples.measured_at >= window_start,
+                samples.measured_at < window_end,
+            ),
+            samples.provider_measurement_id.in_(
+                select(provider_measurements.c.id).where(
+                    _measurements_in_window(
+                        provider_id=provider_id,
+                        window_start=window_start,
+                        window_end=window_end,
+                    )
+                )
+            ),
+        ),
+    )
+
+
+def _to_utc_aware(ts: datetime) -> datetime:
+    if ts.tzinfo is None:
+        return ts.replace(tzinfo=timezone.utc)
+    return ts.astimezone(timezone.utc)
@@ -0,0 +1,440 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+import os
+import threading
+from collections.abc import AsyncIterator, Callable, Iterable
+from contextlib import AbstractContextManager
+from datetime import datetime, time as dt_time, timedelta, timezone
+
+import orjson
+from sqlalchemy.orm import Session
+
+from app.repositories.measurement_repository import MeasurementRepository, SeriesVersion
+
+logger = logging.getLogger(__name__)
+
+SUBJECT_PREFIX = "telemetry"
+DEFAULT_QUEUE_SIZE = 512
+DEFAULT_HEARTBEAT_SECONDS = 15.0
+DEFAULT_POLL_SECONDS = 5.0
+
+# Subject segment of the stream key -> event kind sent to clients.
+_SUBJECT_KINDS = {
+    ("provider", "measurement"): "measurement",
+    ("provider", "metric"): "metric",
+    ("provider", "resync"): "resync",
+    ("device", "state"): "device_state",
+}
+
+StreamKey = tuple[str, int]
+
+
+def measurement_subject(provider_id: int) -> str:
+    return f"{SUBJECT_PREFIX}.provider.{provider_id}.measurement"
+
+
+def metric_subject(provider_id: int) -> str:
+    return f"{SUBJECT_PREFIX}.provider.{provider_id}.metric"
+
+
+def resync_subject(provider_id: int) -> str:
+    return f"{SUBJECT_PREFIX}.provider.{provider_id}.resync"
+
+
+def device_state_subject(device_id: int) -> str:
+    return f"{SUBJECT_PREFIX}.device.{device_id}.state"
+
+
+class TelemetrySubscription:
+    """Bounded event queue of one connected client.
+
+    A client that falls ``queue_size`` events behind loses the queued events
+    and receives a single ``resync`` event instead, after which it reloads
+    its series once rather than stalling the fan-out for everybody else.
+    """
+
+    def __init__(self, keys: Iterable[StreamKey], *, queue_size: int):
+        self.keys = frozenset(keys)
+        self._queue: asyncio.Queue[tuple[str, dict]] = asyncio.Queue(maxsize=queue_size)
+
+    def put(self, kind: str, payload: dict) -> None:
+        try:
+            self._queue.put_nowait((kind, payload))
+        except asyncio.QueueFull:
+            while not self._queue.empty():
+                self._queue.get_nowait()
+            self._queue.put_nowait(("resync", {}))
+
+    async def get(self, *, timeout: float) -> tuple[str, dict] | None:
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class TelemetryStreamHub:
+    """Fans out live telemetry from NATS and the database to all clients.
+
+    The hub subscribes to ``telemetry.>`` once per process, on the
+    application's NATS connection, and hands every message to the clients
+    whose stream keys match its subject.
+
+    Publishers send one JSON object per row after its transaction commits:
+    ``measurement_subject`` with ``provider_id``, ``measured_at`` (ISO 8601),
+    ``measured_value`` and ``measured_unit``; ``metric_subject`` with
+    ``provider_id``, ``metric_key``, ``measured_at``, ``value`` and ``unit``;
+    ``device_state_subject`` for STATE events with ``device_id``,
+    ``created_at``, ``pin_state`` and ``device_state``. Rows committed through
+    this process are published by the session hooks with
+    ``publish_threadsafe``.
+
+    Measurements are ingested by other processes that do not publish, so a
+    ``TelemetryStreamPoller`` reads them from the database as well. A
+    measurement is handed to a client once, whichever source sees it first.
+    """
+
+    def __init__(self, *, queue_size: int = DEFAULT_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscribers: dict[StreamKey, set[TelemetrySubscription]] = {}
+        self._streamed_until: dict[StreamKey, datetime] = {}
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._nc = None
+        self._nats_subscription = None
+        self._poller: TelemetryStreamPoller | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._nats_subscription is not None or self._poller is not None
+
+    async def start(self, nc) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._nc = nc
+        self._nats_subscription = await nc.subscribe(
+            f"{SUBJECT_PREFIX}.>",
+            cb=self._on_message,
+        )
+        logger.info("Telemetry stream subscribed to %s.>", SUBJECT_PREFIX)
+
+    def start_polling(
+        self,
+        open_session: Callable[[], AbstractContextManager[Session]],
+        *,
+        interval_seconds: float,
+    ) -> None:
+        self._poller = TelemetryStreamPoller(
+            self,
+            open_session,
+            interval_seconds=interval_seconds,
+        )
+        self._poller.start()
+        logger.info("Telemetry stream polls measurements every %s s", interval_seconds)
+
+    async def stop(self) -> None:
+        """Unsubscribe; the connection itself belongs to the application."""
+        poller, self._poller = self._poller, None
+        if poller is not None:
+            await poller.stop()
+        subscription, self._nats_subscription = self._nats_subscription, None
+        if subscription is not None:
+            await subscription.unsubscribe()
+        self._nc = None
+        self._loop = None
+
+    def subscribed_ids(self, scope: str) -> list[int]:
+        return [key_id for key_scope, key_id in self._subscribers if key_scope == scope]
+
+    def subscribe(self, keys: Iterable[StreamKey]) -> TelemetrySubscription:
+        subscription = TelemetrySubscription(keys, queue_size=self.queue_size)
+        for key in subscription.keys:
+            self._subscribers.setdefault(key, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: TelemetrySubscription) -> None:
+        for key in subscription.keys:
+            subscribers = self._subscribers.get(key)
+            if subscribers is None:
+                continue
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[key]
+                self._streamed_until.pop(key, None)
+
+    def dispatch(self, subject: str, payload: dict) -> None:
+        parsed = _parse_subject(subject)
+        if parsed is None:
+            return
+        key, kind = parsed
+        subscribers = self._subscribers.get(key)
+        if not subscribers:
+            return
+        if kind == "measurement" and not self._is_new_measurement(key, payload):
+            return
+        for subscription in tuple(subscribers):
+            subscription.put(kind, payload)
+
+    def _is_new_measurement(self, key: StreamKey, payload: dict) -> bool:
+        # NATS and the poller both see rows committed through this process.
+        try:
+            measured_at = datetime.fromisoformat(payload["measured_at"])
+        except (KeyError, TypeError, ValueError):
+            return True
+        streamed_until = self._streamed_until.get(key)
+        if streamed_until is not None and measured_at <= streamed_until:
+            return False
+        self._streamed_until[key] = measured_at
+        return True
+
+    def publish_threadsafe(self, subject: str, payload: dict) -> None:
+        """Publish from any thread; a no-op while the hub is not running."""
+        loop, nc = self._loop, self._nc
+        if loop is None or nc is None or loop.is_closed():
+            return
+        future = asyncio.run_coroutine_threadsafe(
+            nc.publish(subject, orjson.dumps(payload)),
+            loop,
+        )
+        future.add_done_callback(_log_publish_failure)
+
+    async def _on_message(self, msg) -> None:
+        try:
+            payload = orjson.loads(msg.data)
+        except orjson.JSONDecodeError:
+            logger.warning("Dropping malformed telemetry message on %s", msg.subject)
+            return
+        self.dispatch(msg.subject, payload)
+
+
+class TelemetryStreamPoller:
+    """Reads new measurements of the providers that have connected clients.
+
+    Every ``interval_seconds`` the ``get_power_version`` of today is compared
+    with the previous poll, per provider; only a changed version costs a
+    read, of the rows after the newest one already seen. When the version
+    moved by more rows than were read (a late write or a delete behind that
+    point), the provider's clients get ``resync`` instead.
+    """
+
+    def __init__(
+        self,
+        hub: TelemetryStreamHub,
+        open_session: Callable[[], AbstractContextManager[Session]],
+        *,
+        interval_seconds: float,
+    ):
+        self.hub = hub
+        self.open_session = open_session
+        self.interval_seconds = interval_seconds
+        # provider_id -> (start of the version window, version at last poll)
+        self._versions: dict[int, tuple[datetime, SeriesVersion]] = {}
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is None:
+            return
+        task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
+
+    def poll(
+        self,
+        db: Session,
+        provider_ids: Iterable[int],
+        now: datetime,
+    ) -> list[tuple[str, dict]]:
+        """Stream messages of the rows committed since the previous poll."""
+        repo = MeasurementRepository(db)
+        day_start = datetime.combine(now.date(), dt_time.min, tzinfo=timezone.utc)
+        provider_ids = set(provider_ids)
+        events: list[tuple[str, dict]] = []
+
+        for provider_id in provider_ids:
+            previous = self._versions.get(provider_id)
+            window_start = previous[0] if previous is not None else day_start
+            version = repo.get_power_version(
+                provider_id=provider_id,
+                date_start=window_start,
+                date_end=now,
+            )
+            if previous is not None and version != previous[1]:
+                events.extend(
+                    _new_measurement_events(
+                        repo,
+                        provider_id=provider_id,
+                        window_start=window_start,
+                        previous=previous[1],
+                        version=version,
+                        now=now,
+                    )
+                )
+            if window_start != day_start:
+                version = repo.get_power_version(
+                    provider_id=provider_id,
+                    date_start=day_start,
+                    date_end=now,
+                )
+            self._versions[provider_id] = (day_start, version)
+
+        for provider_id in set(self._versions) - provider_ids:
+            del self._versions[provider_id]
+        return events
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            provider_ids = self.hub.subscribed_ids("provider")
+            if not provider_ids and not self._versions:
+                continue
+            try:
+                events = await asyncio.to_thread(self._poll_once, provider_ids)
+            except Exception:
+                logger.exception("Telemetry stream poll failed")
+                continue
+            for subject, payload in events:
+                self.hub.dispatch(subject, payload)
+
+    def _poll_once(self, provider_ids: list[int]) -> list[tuple[str, dict]]:
+        with self.open_session() as db:
+            return self.poll(db, provider_ids, datetime.now(timezone.utc))
+
+
+def _new_measurement_events(
+    repo: MeasurementRepository,
+    *,
+    provider_id: int,
+    window_start: datetime,
+    previous: SeriesVersion,
+    version: SeriesVersion,
+    now: datetime,
+) -> list[tuple[str, dict]]:
+    seen_until = previous.last_measured_at
+    rows = [
+        row
+        for row in repo.iter_measurements(
+            provider_id=provider_id,
+            date_start=seen_until or window_start,
+            date_end=now + timedelta(microseconds=1),
+        )
+        if seen_until is None or row.measured_at > seen_until
+    ]
+    if version.row_count - previous.row_count != len(rows):
+        return [(resync_subject(provider_id), {})]
+
+    return [
+        (
+            measurement_subject(provider_id),
+            {
+                "provider_id": provider_id,
+                "measured_at": row.measured_at.astimezone(timezone.utc).isoformat(),
+                "measured_value": (
+                    float(row.measured_value)
+                    if row.measured_value is not None
+                    else None
+                ),
+                "measured_unit": row.measured_unit,
+            },
+        )
+        for row in rows
+    ]
+
+
+async def stream_events(
+    hub: TelemetryStreamHub,
+    keys: Iterable[StreamKey],
+    *,
+    heartbeat_seconds: float = DEFAULT_HEARTBEAT_SECONDS,
+) -> AsyncIterator[str]:
+    """Server-Sent Events for ``keys`` until the client disconnects."""
+    subscription = hub.subscribe(keys)
+    try:
+        yield "retry: 5000\n\n"
+        while True:
+            item = await subscription.get(timeout=heartbeat_seconds)
+            if item is None:
+                yield ": keepalive\n\n"
+                continue
+            kind, payload = item
+            yield f"event: {kind}\ndata: {orjson.dumps(payload).decode()}\n\n"
+    finally:
+        hub.unsubscribe(subscription)
+
+
+async def connect_telemetry_stream(
+    hub: TelemetryStreamHub,
+    nc,
+    *,
+    open_session: Callable[[], AbstractContextManager[Session]] | None = None,
+) -> None:
+    """Start the hub on the application's NATS connection and the database.
+
+    The hub shares ``nc`` (``app.state.nats``) rather than opening its own
+    connection and skips NATS when there is none. ``open_session`` enables
+    the measurement poller; ``TELEMETRY_STREAM_POLL_SECONDS`` sets its
+    interval and 0 disables it.
+    """
+    if nc is None:
+        logger.info("Telemetry stream NATS subscription disabled (no connection)")
+    else:
+        try:
+            await hub.start(nc)
+        except Exception:
+            logger.exception("Telemetry stream cannot subscribe to NATS")
+
+    interval_seconds = float(
+        os.getenv("TELEMETRY_STREAM_POLL_SECONDS", DEFAULT_POLL_SECONDS)
+    )
+    if open_session is not None and interval_seconds > 0:
+        hub.start_polling(open_session, interval_seconds=interval_seconds)
+
+
+async def close_telemetry_stream(hub: TelemetryStreamHub) -> None:
+    await hub.stop()
+
+
+_hub: TelemetryStreamHub | None = None
+_hub_lock = threading.Lock()
+
+
+def get_telemetry_stream_hub() -> TelemetryStreamHub:
+    """Return the process-wide hub.
+
+    ``TELEMETRY_STREAM_QUEUE_SIZE`` bounds how many events a slow client may
+    fall behind before it is told to resync.
+    """
+    global _hub
+    if _hub is not None:
+        return _hub
+
+    with _hub_lock:
+        if _hub is None:
+            _hub = TelemetryStreamHub(
+                queue_size=int(
+                    os.getenv("TELEMETRY_STREAM_QUEUE_SIZE", DEFAULT_QUEUE_SIZE)
+                )
+            )
+    return _hub
+
+
+def _parse_subject(subject: str) -> tuple[StreamKey, str] | None:
+    parts = subject.split(".")
+    if len(parts) != 4 or parts[0] != SUBJECT_PREFIX:
+        return None
+    _, scope, raw_id, suffix = parts
+    kind = _SUBJECT_KINDS.get((scope, suffix))
+    if kind is None or not raw_id.isdigit():
+        return None
+    return (scope, int(raw_id)), kind
+
+
+def _log_publish_failure(future) -> None:
+    if not future.cancelled() and future.exception() is not None:
+        logger.warning(
+            "Telemetry stream publish failed: %s",
+            future.exception(),
+        )
@@ -0,0 +1,72 @@
+import logging
+import os
+from datetime import datetime, time, timedelta, timezone
+
+from app.celery_app import celery_app
+from app.repositories.telemetry_aggregate import MIN_COMPACTION_AGE
+from app.services.telemetry_compaction import TelemetryCompactionService
+from app.tasks.db import db_session
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKET_SECONDS = 300
+
+
+@celery_app.task
+def compact_provider_telemetry_task() -> dict[str, int]:
+    """Collapse raw telemetry older than the compaction age into buckets.
+
+    ``TELEMETRY_COMPACTION_AGE_DAYS`` whole UTC days are kept raw (0
+    disables compaction, and anything below ``MIN_COMPACTION_AGE`` is
+    raised to it); older days are compacted into
+    ``TELEMETRY_COMPACTION_BUCKET_SECONDS`` buckets, one provider day per
+    transaction, so an interrupted run resumes where it stopped.
+    """
+    age_days = int(os.getenv("TELEMETRY_COMPACTION_AGE_DAYS", "0"))
+    if age_days <= 0:
+        return {"days": 0, "buckets": 0}
+
+    bucket_seconds = int(
+        os.getenv("TELEMETRY_COMPACTION_BUCKET_SECONDS", DEFAULT_BUCKET_SECONDS)
+    )
+    age = max(timedelta(days=age_days), MIN_COMPACTION_AGE)
+    cutoff = datetime.combine(
+        (datetime.now(timezone.utc) - age).date(),
+        time.min,
+        tzinfo=timezone.utc,
+    )
+    result = {"days": 0, "buckets": 0}
+
+    with db_session() as db:
+        service = TelemetryCompactionService(db, bucket_seconds=bucket_seconds)
+        pending = service.list_pending_windows(before=cutoff)
+        for provider_id, first_at in sorted(pending.items()):
+            day_start = datetime.combine(first_at.date(), time.min, tzinfo=timezone.utc)
+            while day_start < cutoff:
+                day_end = day_start + timedelta(days=1)
+                try:
+                    result["buckets"] += service.compact_window(
+                        provider_id=provider_id,
+                        window_start=day_start,
+                        window_end=day_end,
+                    )
+                    db.commit()
+                except Exception:
+                    db.rollback()
+                    logger.exception(
+                        "Telemetry compaction failed",
+                        extra={
+                            "provider_id": provider_id,
+                            "day": day_start.date().isoformat(),
+                        },
+                    )
+                    break
+                result["days"] += 1
+                day_start = day_end
+
+    logger.info(
+        "Provider telemetry compacted days=%s buckets=%s",
+        result["days"],
+        result["buckets"],
+    )
+    return result
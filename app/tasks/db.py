@@ -0,0 +1,14 @@
+from contextlib import contextmanager
+
+from smart_common.core.db import get_db
+
+
+@contextmanager
+def db_session():
+    """A ``get_db`` session for a task, closed when the block exits."""
+    sessions = get_db()
+    db = next(sessions)
+    try:
+        yield db
+    finally:
+        sessions.close()
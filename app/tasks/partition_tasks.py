@@ -0,0 +1,60 @@
+import logging
+import os
+from datetime import datetime, timezone
+
+from app.celery_app import celery_app
+from app.repositories.measurement_partitions import (
+    PARTITIONED_TABLES,
+    MeasurementPartitionRepository,
+    add_months,
+    month_start,
+)
+from app.tasks.db import db_session
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MONTHS_AHEAD = 3
+
+
+@celery_app.task
+def maintain_measurement_partitions_task() -> dict[str, list[str]]:
+    """Create upcoming month partitions and retire expired ones.
+
+    ``MEASUREMENT_PARTITION_MONTHS_AHEAD`` months are kept ready ahead of
+    the current one. With ``MEASUREMENT_PARTITION_RETENTION_MONTHS`` set,
+    partitions older than that many months are detached, and dropped as
+    well when ``MEASUREMENT_PARTITION_DROP_DETACHED`` is true.
+    """
+    months_ahead = int(
+        os.getenv("MEASUREMENT_PARTITION_MONTHS_AHEAD", DEFAULT_MONTHS_AHEAD)
+    )
+    retention_months = int(os.getenv("MEASUREMENT_PARTITION_RETENTION_MONTHS", "0"))
+    drop_detached = os.getenv(
+        "MEASUREMENT_PARTITION_DROP_DETACHED", "false"
+    ).lower() in {"1", "true", "yes"}
+
+    current_month = month_start(datetime.now(timezone.utc).date())
+    result: dict[str, list[str]] = {"created": [], "retired": []}
+
+    with db_session() as db:
+        repo = MeasurementPartitionRepository(db)
+        for table in PARTITIONED_TABLES:
+            result["created"] += repo.ensure_partitions(
+                table,
+                first_month=current_month,
+                last_month=add_months(current_month, months_ahead),
+            )
+            if retention_months > 0:
+                result["retired"] += repo.detach_partitions_before(
+                    table,
+                    before=add_months(current_month, -retention_months),
+                    drop=drop_detached,
+                )
+        db.commit()
+
+    logger.info(
+        "Measurement partitions maintained created=%s retired=%s",
+        result["created"],
+        result["retired"],
+    )
+    return result
@@ -0,0 +1,292 @@
+import logging
+import os
+from datetime import date, datetime, timedelta, timezone
+
+from sqlalchemy import select
+
+from app.celery_app import celery_app
+from app.repositories.energy_rollup import EnergyRollupRepository
+from app.repositories.market_energy_price import MarketEnergyPriceRepository
+from app.repositories.measurement_repository import (
+    MeasurementRepository,
+    provider_measurements,
+)
+from app.repositories.provider import ProviderRepository
+from app.repositories.revenue_ledger import RevenueLedgerRepository
+from app.services.energy_integration import energy_unit_from_power
+from app.services.energy_rollup_service import (
+    list_missing_rollup_days,
+    materialize_day_rollups,
+)
+from app.services.power_sample_loader import PowerSampleLoader
+from app.services.revenue_ledger_service import (
+    list_missing_ledger_days,
+    materialize_ledger_day,
+)
+from app.services.sample_hold import resolve_sample_hold_seconds
+from app.tasks.db import db_session
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LOOKBACK_DAYS = 2
+
+
+@celery_app.task
+def materialize_energy_rollups_task() -> dict[str, int]:
+    """Store the hourly energy rollups of recently closed hours.
+
+    API reads compute missing rollups in memory without storing them, so
+    this task is what persists them. Every provider with measurements in
+    the last ``ENERGY_ROLLUP_LOOKBACK_DAYS`` UTC days gets the missing
+    closed hours of those days written, one day per transaction. Hours
+    dropped by the measurement trigger after a late write are rebuilt the
+    same way.
+    """
+    now = datetime.now(timezone.utc)
+    first_day = _first_lookback_day(now)
+    result = {"days": 0, "changed": 0, "failed": 0}
+
+    with db_session() as db:
+        for provider in _providers_measured_since(db, first_day):
+            _materialize_missing_rollups(
+                db,
+                provider=provider,
+                first_day=first_day,
+                last_day=now.date(),
+                now=now,
+                result=result,
+            )
+
+    logger.info(
+        "Energy rollups materialized days=%s changed=%s failed=%s",
+        result["days"],
+        result["changed"],
+        result["failed"],
+    )
+    return result
+
+
+@celery_app.task
+def backfill_energy_rollups_task(
+    provider_id: int,
+    first_day: str,
+    last_day: str,
+) -> dict[str, int]:
+    """Store the rollups an energy range request found missing.
+
+    ``/energy/range`` computes missing closed days in memory and queues them
+    here. Each day is built and committed in its own transaction; days
+    stored meanwhile are skipped.
+    """
+    now = datetime.now(timezone.utc)
+    result = {"days": 0, "changed": 0, "failed": 0}
+
+    with db_session() as db:
+        provider = db.get(ProviderRepository(db).model, provider_id)
+        if provider is None:
+            return result
+
+        _materialize_missing_rollups(
+            db,
+            provider=provider,
+            first_day=date.fromisoformat(first_day),
+            last_day=min(date.fromisoformat(last_day), now.date()),
+            now=now,
+            result=result,
+        )
+
+    logger.info(
+        "Energy rollups backfilled provider_id=%s days=%s changed=%s failed=%s",
+        provider_id,
+        result["days"],
+        result["changed"],
+        result["failed"],
+    )
+    return result
+
+
+@celery_app.task
+def materialize_revenue_ledger_task() -> dict[str, int]:
+    """Store the revenue ledger of recently closed days.
+
+    Works like ``materialize_energy_rollups_task`` for whole closed UTC days
+    of the lookback window, so ledger hours dropped by a late measurement or
+    a repriced market interval are matched again here instead of in a GET.
+    """
+    now = datetime.now(timezone.utc)
+    first_day = _first_lookback_day(now)
+    result = {"days": 0, "changed": 0, "failed": 0}
+
+    with db_session() as db:
+        for provider in _providers_measured_since(db, first_day):
+            _materialize_missing_ledger(
+                db,
+                provider=provider,
+                first_day=first_day,
+                last_day=now.date() - timedelta(days=1),
+                result=result,
+            )
+
+    logger.info(
+        "Revenue ledger materialized days=%s changed=%s failed=%s",
+        result["days"],
+        result["changed"],
+        result["failed"],
+    )
+    return result
+
+
+@celery_app.task
+def backfill_revenue_ledger_task(
+    provider_id: int,
+    first_day: str,
+    last_day: str,
+) -> dict[str, int]:
+    """Store the ledger days a revenue range request found missing.
+
+    ``/revenue/range`` matches missing closed days in memory and queues them
+    here. Each day is matched and committed in its own transaction; days
+    stored meanwhile are skipped.
+    """
+    now = datetime.now(timezone.utc)
+    result = {"days": 0, "changed": 0, "failed": 0}
+
+    with db_session() as db:
+        provider = db.get(ProviderRepository(db).model, provider_id)
+        if provider is None:
+            return result
+
+        _materialize_missing_ledger(
+            db,
+            provider=provider,
+            first_day=date.fromisoformat(first_day),
+            last_day=min(
+                date.fromisoformat(last_day),
+                now.date() - timedelta(days=1),
+            ),
+            result=result,
+        )
+
+    logger.info(
+        "Revenue ledger backfilled provider_id=%s days=%s changed=%s failed=%s",
+        provider_id,
+        result["days"],
+        result["changed"],
+        result["failed"],
+    )
+    return result
+
+
+def _materialize_missing_rollups(
+    db,
+    *,
+    provider,
+    first_day: date,
+    last_day: date,
+    now: datetime,
+    result: dict[str, int],
+) -> None:
+    max_interval_seconds = resolve_sample_hold_seconds(
+        provider.default_expected_interval_sec
+    )
+    rollup_repo = EnergyRollupRepository(db)
+    missing_days = list_missing_rollup_days(
+        rollup_repo=rollup_repo,
+        provider_id=provider.id,
+        first_day=first_day,
+        last_day=last_day,
+        now=now,
+        max_interval_seconds=max_interval_seconds,
+    )
+    for day in missing_days:
+        try:
+            stored = materialize_day_rollups(
+                power_samples=PowerSampleLoader(
+                    MeasurementRepository(db),
+                    provider_id=provider.id,
+                ),
+                rollup_repo=rollup_repo,
+                day=day,
+                now=now,
+                max_interval_seconds=max_interval_seconds,
+            )
+            db.commit()
+        except Exception:
+            db.rollback()
+            logger.exception(
+                "Energy rollup materialization failed",
+                extra={"provider_id": provider.id, "day": day.isoformat()},
+            )
+            result["failed"] += 1
+            continue
+        # A day whose samples changed while it was built is left to the
+        # next run.
+        result["days" if stored else "changed"] += 1
+
+
+def _materialize_missing_ledger(
+    db,
+    *,
+    provider,
+    first_day: date,
+    last_day: date,
+    result: dict[str, int],
+) -> None:
+    max_interval_seconds = resolve_sample_hold_seconds(
+        provider.default_expected_interval_sec
+    )
+    energy_unit = energy_unit_from_power(provider.unit)
+    ledger_repo = RevenueLedgerRepository(db)
+    missing_days = list_missing_ledger_days(
+        ledger_repo=ledger_repo,
+        provider_id=provider.id,
+        first_day=first_day,
+        last_day=last_day,
+        energy_unit=energy_unit,
+        max_interval_seconds=max_interval_seconds,
+    )
+    for day in missing_days:
+        try:
+            stored = materialize_ledger_day(
+                power_samples=PowerSampleLoader(
+                    MeasurementRepository(db),
+                    provider_id=provider.id,
+                ),
+                market_repo=MarketEnergyPriceRepository(db),
+                ledger_repo=ledger_repo,
+                day=day,
+                energy_unit=energy_unit,
+                max_interval_seconds=max_interval_seconds,
+            )
+            db.commit()
+        except Exception:
+            db.rollback()
+            logger.exception(
+                "Revenue ledger materialization failed",
+                extra={"provider_id": provider.id, "day": day.isoformat()},
+            )
+            result["failed"] += 1
+            continue
+        result["days" if stored else "changed"] += 1
+
+
+def _first_lookback_day(now: datetime) -> date:
+    lookback_days = int(os.getenv("ENERGY_ROLLUP_LOOKBACK_DAYS", DEFAULT_LOOKBACK_DAYS))
+    return now.date() - timedelta(days=max(lookback_days, 1))
+
+
+def _providers_measured_since(db, first_day: date) -> list:
+    since = datetime.combine(first_day, datetime.min.time(), tzinfo=timezone.utc)
+    model = ProviderRepository(db).model
+    return (
+        db.query(model)
+        .filter(
+            model.id.in_(
+                select(provider_measurements.c.provider_id)
+                .where(provider_measurements.c.measured_at >= since)
+                .distinct()
+            )
+        )
+        .order_by(model.id)
+        .all()
+    )
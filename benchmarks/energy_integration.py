@@ -0,0 +1,127 @@
+"""CPU cost of integrating one day of 1 s power samples, row-wise vs vectorized.
+
+Run from the repository root::
+
+    python -m benchmarks.energy_integration [--seconds 86400] [--repeat 5]
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import numpy as np
+
+from app.api.routes.provider_measurements import (
+    _convert_market_price_to_energy_unit,
+    _match_revenue,
+)
+from app.services import energy_engine
+from app.services.market_price_index import MarketPriceIndex
+from smart_common.services.energy_calculation_service import (
+    EnergyCalculationService,
+    PowerSample,
+)
+
+DAY_START = datetime(2026, 3, 10, tzinfo=timezone.utc)
+SAMPLE_HOLD_SECONDS = 300.0
+
+
+def _build_samples(seconds: int) -> list[PowerSample]:
+    rng = random.Random(7)
+    return [
+        PowerSample(
+            ts=DAY_START + timedelta(seconds=index),
+            value=rng.uniform(-2000.0, 6000.0),
+        )
+        for index in range(seconds)
+    ]
+
+
+def _build_market_index() -> MarketPriceIndex:
+    return MarketPriceIndex(
+        SimpleNamespace(
+            market="RCE",
+            currency="PLN",
+            price_unit="MWh",
+            price_value=350.0 + quarter,
+            interval_start=DAY_START + timedelta(minutes=15 * quarter),
+            interval_end=DAY_START + timedelta(minutes=15 * (quarter + 1)),
+        )
+        for quarter in range(96)
+    )
+
+
+def _best_of(repeat: int, run) -> tuple[float, object]:
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        started = time.process_time()
+        result = run()
+        best = min(best, time.process_time() - started)
+    return best, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=int, default=86_400)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    samples = _build_samples(args.seconds)
+    market_index = _build_market_index()
+    prices = [
+        _convert_market_price_to_energy_unit(
+            price=float(entry.price_value),
+            price_unit=entry.price_unit,
+            energy_unit="Wh",
+        )
+        for entry in market_index.entries
+    ]
+    timestamps, values = energy_engine.sample_arrays(samples)
+    market_starts = np.array([energy_engine.epoch_us(ts) for ts in market_index.starts])
+    market_ends = np.array([energy_engine.epoch_us(ts) for ts in market_index.ends])
+    price_array = np.array(prices, dtype=np.float64)
+
+    rows = {
+        "hourly energy, row-wise": lambda: EnergyCalculationService.integrate_hourly(
+            samples, max_interval_seconds=SAMPLE_HOLD_SECONDS
+        ),
+        "hourly energy, numpy": lambda: energy_engine.integrate_hourly_arrays(
+            timestamps, values, max_interval_seconds=SAMPLE_HOLD_SECONDS
+        ),
+        "revenue, row-wise": lambda: _match_revenue(
+            samples=samples,
+            market_index=market_index,
+            prices_per_energy_unit=prices,
+            max_interval_seconds=SAMPLE_HOLD_SECONDS,
+        ),
+        "revenue, numpy": lambda: energy_engine.match_revenue_arrays(
+            timestamps,
+            values,
+            market_starts=market_starts,
+            market_ends=market_ends,
+            prices=price_array,
+            max_interval_seconds=SAMPLE_HOLD_SECONDS,
+        ),
+        "PowerSample -> arrays": lambda: energy_engine.sample_arrays(samples),
+    }
+    timings = {}
+    results = {}
+    for label, run in rows.items():
+        timings[label], results[label] = _best_of(args.repeat, run)
+
+    assert results["revenue, numpy"] == results["revenue, row-wise"], "revenue differs"
+    print(f"samples:                  {args.seconds}")
+    for label, seconds in timings.items():
+        print(f"{label + ':':<26}{seconds * 1000:8.2f} ms CPU")
+    for kind in ("hourly energy", "revenue"):
+        speedup = timings[f"{kind}, row-wise"] / timings[f"{kind}, numpy"]
+        print(f"{kind} speed-up:{' ' * (11 - len(kind))}{speedup:8.1f} x")
+
+
+if __name__ == "__main__":
+    main()
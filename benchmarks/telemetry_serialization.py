@@ -0,0 +1,87 @@
+"""CPU cost of serving one 10k-entry telemetry day, default route vs SerializeOnceRoute.
+
+Run from the repository root::
+
+    python -m benchmarks.telemetry_serialization [--entries 10000] [--requests 50]
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from datetime import datetime, timedelta, timezone
+
+from fastapi import APIRouter, FastAPI
+from fastapi.routing import APIRoute
+from fastapi.testclient import TestClient
+
+from app.api.responses import SerializeOnceRoute
+from smart_common.schemas.provider_measurement_schemas import (
+    DayPowerOut,
+    PowerEntryPoint,
+    ProviderPowerSeriesOut,
+)
+
+
+def _build_day(entries: int) -> ProviderPowerSeriesOut:
+    start = datetime(2026, 3, 10, tzinfo=timezone.utc)
+    return ProviderPowerSeriesOut(
+        unit="kW",
+        days={
+            "2026-03-10": DayPowerOut(
+                date="2026-03-10",
+                entries=[
+                    PowerEntryPoint(
+                        timestamp=start + timedelta(seconds=8 * index),
+                        power=round(3.2 + (index % 97) / 13, 5),
+                    )
+                    for index in range(entries)
+                ],
+            )
+        },
+    )
+
+
+def _build_client(route_class: type[APIRoute], entries: int) -> TestClient:
+    router = APIRouter(route_class=route_class)
+
+    @router.get("/power", response_model=ProviderPowerSeriesOut)
+    def power():
+        # Endpoints build their response model per request.
+        return _build_day(entries)
+
+    app = FastAPI()
+    app.include_router(router)
+    return TestClient(app)
+
+
+def _cpu_seconds_per_request(client: TestClient, requests: int) -> tuple[float, bytes]:
+    body = client.get("/power").content
+    started = time.process_time()
+    for _ in range(requests):
+        client.get("/power")
+    return (time.process_time() - started) / requests, body
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=10_000)
+    parser.add_argument("--requests", type=int, default=50)
+    args = parser.parse_args()
+
+    default_cpu, default_body = _cpu_seconds_per_request(
+        _build_client(APIRoute, args.entries), args.requests
+    )
+    fast_cpu, fast_body = _cpu_seconds_per_request(
+        _build_client(SerializeOnceRoute, args.entries), args.requests
+    )
+
+    assert fast_body == default_body, "serialized bodies differ"
+    print(f"entries per day:     {args.entries}")
+    print(f"default route:       {default_cpu * 1000:8.2f} ms CPU/request")
+    print(f"SerializeOnceRoute:  {fast_cpu * 1000:8.2f} ms CPU/request")
+    print(f"reduction:           {(1 - fast_cpu / default_cpu) * 100:8.1f} %")
+
+
+if __name__ == "__main__":
+    main()
@@ -110,3 +110,104 @@ class FakePublisher:
             pass
 
         return ack
+
+
+class InMemoryEnergyRollupRepo:
+    """Hourly energy rollups keyed by ``(provider_id, hour_start)``.
+
+    Patched in for ``EnergyRollupRepository`` the rows live in a class-level
+    dict; reset ``rows`` per test. A repo handed to a builder directly can
+    get ``rows`` of its own instead.
+    """
+
+    rows: Dict[tuple, Any] = {}
+
+    def __init__(self, db=None, *, rows: Optional[List[Any]] = None):
+        self.db = db
+        self.upserts = 0
+        self.materialized_days: List[Any] = []
+        if rows is not None:
+            self.rows = {(row.provider_id, row.hour_start): row for row in rows}
+
+    def list_for_window(self, *, provider_id, date_start, date_end):
+        return [
+            row
+            for (row_provider_id, hour_start), row in sorted(self.rows.items())
+            if row_provider_id == provider_id and date_start <= hour_start < date_end
+        ]
+
+    def count_hours_by_day(
+        self, *, provider_id, date_start, date_end, sample_hold_seconds
+    ):
+        counts: Dict[Any, int] = {}
+        for (row_provider_id, hour_start), row in self.rows.items():
+            if (
+                row_provider_id == provider_id
+                and date_start <= hour_start < date_end
+                and row.sample_hold_seconds == sample_hold_seconds
+            ):
+                counts[hour_start.date()] = counts.get(hour_start.date(), 0) + 1
+        return counts
+
+    def aggregate_energy(
+        self, *, provider_id, date_start, date_end, granularity, exclude_days=None
+    ):
+        periods: Dict[Any, List[float]] = {}
+        for row in self.list_for_window(
+            provider_id=provider_id,
+            date_start=date_start,
+            date_end=date_end,
+        ):
+            if row.energy is None or row.hour_start.date() in (exclude_days or ()):
+                continue
+            period_start = row.hour_start.replace(tzinfo=None)
+            if granularity != "hour":
+                period_start = period_start.replace(hour=0)
+            if granularity == "month":
+                period_start = period_start.replace(day=1)
+            period = periods.setdefault(period_start, [0.0, 0.0, 0.0])
+            period[0] += row.energy
+            period[1] += row.import_energy
+            period[2] += row.export_energy
+        return [
+            SimpleNamespace(
+                period_start=period_start,
+                energy=energy,
+                import_energy=import_energy,
+                export_energy=export_energy,
+            )
+            for period_start, (energy, import_energy, export_energy) in sorted(
+                periods.items()
+            )
+        ]
+
+    def upsert_hours(self, *, provider_id, rows):
+        self.upserts += 1
+        if rows:
+            self.materialized_days.append(rows[0].hour_start.date())
+        for row in rows:
+            self.rows[(provider_id, row.hour_start)] = row
+
+
+class InMemoryRevenueLedgerRepo:
+    """Revenue ledger kept in a class-level dict; reset ``rows`` per test."""
+
+    rows: Dict[tuple, Any] = {}
+
+    def __init__(self, db):
+        self.db = db
+
+    def list_for_window(self, *, provider_id, market, date_start, date_end):
+        return [
+            row
+            for (row_provider_id, row_market, hour_start), row in sorted(
+                self.rows.items()
+            )
+            if row_provider_id == provider_id
+            and row_market == market
+            and date_start <= hour_start < date_end
+        ]
+
+    def upsert_hours(self, *, provider_id, rows):
+        for row in rows:
+            self.rows[(provider_id, row.market, row.hour_start)] = row
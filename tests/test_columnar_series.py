@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import json
+from datetime import date, datetime, timedelta, timezone
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+from fastapi import Response
+
+from app.api.routes import provider_measurements as routes
+from app.repositories.measurement_repository import SeriesVersion
+from app.schemas.columnar_series import SeriesFormat
+from smart_common.enums.provider_telemetry import (
+    ProviderTelemetryCapability,
+    TelemetryAggregationMode,
+    TelemetryChartType,
+)
+from smart_common.enums.unit import PowerUnit
+from smart_common.providers.enums import ProviderKind
+
+from tests.mocks import InMemoryEnergyRollupRepo
+
+DAY = date(2026, 3, 10)
+DAY_START = datetime(2026, 3, 10, tzinfo=timezone.utc)
+POWER_SAMPLES = [
+    (DAY_START + timedelta(hours=9, minutes=5 * index), float(index % 4))
+    for index in range(30)
+]
+
+
+@pytest.fixture
+def provider(monkeypatch):
+    InMemoryEnergyRollupRepo.rows = {}
+    provider = SimpleNamespace(
+        id=5,
+        uuid=uuid4(),
+        user_id=2,
+        kind=ProviderKind.POWER,
+        unit=PowerUnit.KILOWATT,
+        default_expected_interval_sec=300,
+        updated_at=DAY_START,
+    )
+
+    class FakeProviderRepo:
+        def __init__(self, db):
+            self.db = db
+
+        def get_for_user_by_uuid(self, *, provider_uuid, user_id):
+            return provider if provider_uuid == provider.uuid else None
+
+    class FakeMeasurementRepo:
+        def __init__(self, db):
+            self.db = db
+
+        def list_power_samples(self, *, provider_id, date_start, date_end):
+            return [
+                (ts, value)
+                for ts, value in POWER_SAMPLES
+                if date_start <= ts <= date_end
+            ]
+
+        def get_last_power_sample_before(self, *, provider_id, before):
+            return None
+
+        def get_power_version(self, *, provider_id, date_start, date_end):
+            return SeriesVersion(len(POWER_SAMPLES), POWER_SAMPLES[-1][0])
+
+        def get_metric_version(
+            self, *, provider_id, date_start, date_end, metric_keys=None
+        ):
+            return SeriesVersion(len(POWER_SAMPLES), POWER_SAMPLES[-1][0])
+
+        def list_measurements(self, *, provider_id, date_start, date_end):
+            return [
+                SimpleNamespace(
+                    id=index,
+                    measured_at=ts,
+                    measured_value=value,
+                    measured_unit="kW",
+                    metadata_payload={},
+                    extra_data={},
+                )
+                for index, (ts, value) in enumerate(POWER_SAMPLES)
+            ]
+
+        def get_metric_definition(self, *, provider_id, metric_key):
+            return SimpleNamespace(
+                metric_key="battery_soc",
+                label="Battery SOC",
+                unit="%",
+                chart_type=TelemetryChartType.LINE,
+                aggregation_mode=TelemetryAggregationMode.RAW,
+                capability_tag=ProviderTelemetryCapability.ENERGY_STORAGE,
+            )
+
+        def list_metric_samples(self, *, provider_id, metric_key, date_start, date_end):
+            return [
+                SimpleNamespace(measured_at=ts, value=value)
+                for ts, value in POWER_SAMPLES
+            ]
+
+    monkeypatch.setattr(routes, "ProviderRepository", FakeProviderRepo)
+    monkeypatch.setattr(routes, "MeasurementRepository", FakeMeasurementRepo)
+    monkeypatch.setattr(routes, "EnergyRollupRepository", InMemoryEnergyRollupRepo)
+    monkeypatch.setattr(routes, "get_telemetry_cache", lambda: None)
+    return provider
+
+
+def _call(route, provider, **kwargs):
+    return route(
+        provider_uuid=provider.uuid,
+        response=Response(),
+        selected_date=DAY,
+        db=object(),
+        current_user=SimpleNamespace(id=provider.user_id),
+        **kwargs,
+    )
+
+
+def _epoch_ms(ts: datetime) -> int:
+    return int(ts.timestamp() * 1000)
+
+
+def test_columnar_power_matches_object_entries(provider):
+    objects = _call(routes.list_provider_power, provider, max_points=10)
+    response = _call(
+        routes.list_provider_power,
+        provider,
+        max_points=10,
+        series_format=SeriesFormat.COLUMNAR,
+    )
+    payload = json.loads(response.body)
+
+    assert payload["unit"] == "kW"
+    columns = payload["days"]["2026-03-10"]
+    entries = objects.days["2026-03-10"].entries
+    assert columns["timestamps"] == [_epoch_ms(entry.timestamp) for entry in entries]
+    assert columns["values"] == [entry.power for entry in entries]
+
+
+def test_columnar_energy_matches_object_days(provider):
+    objects = _call(routes.list_provider_energy, provider)
+    InMemoryEnergyRollupRepo.rows = {}
+    response = _call(
+        routes.list_provider_energy,
+        provider,
+        series_format=SeriesFormat.COLUMNAR,
+    )
+    payload = json.loads(response.body)
+
+    day = objects.days["2026-03-10"]
+    columns = payload["days"]["2026-03-10"]
+    assert payload["unit"] == objects.unit
+    assert columns["total_energy"] == day.total_energy
+    assert columns["import_energy"] == day.import_energy
+    assert columns["export_energy"] == day.export_energy
+    assert columns["measured_unit"] == "kW"
+    assert columns["hours"]["timestamps"] == [
+        _epoch_ms(point.hour) for point in day.hours
+    ]
+    assert columns["hours"]["values"] == [point.energy for point in day.hours]
+    assert columns["entries"]["timestamps"] == [
+        _epoch_ms(entry.measured_at) for entry in day.entries
+    ]
+    assert columns["entries"]["values"] == [
+        entry.measured_value for entry in day.entries
+    ]
+
+
+def test_columnar_metric_series_keeps_header(provider):
+    response = _call(
+        routes.get_provider_metric_series,
+        provider,
+        metric_key="battery_soc",
+        series_format=SeriesFormat.COLUMNAR,
+    )
+    payload = json.loads(response.body)
+
+    assert payload["metric_key"] == "battery_soc"
+    assert payload["unit"] == "%"
+    assert payload["chart_type"] == TelemetryChartType.LINE.value
+    assert payload["aggregation_mode"] == TelemetryAggregationMode.RAW.value
+    assert payload["entries"]["timestamps"][0] == _epoch_ms(POWER_SAMPLES[0][0])
+    assert payload["entries"]["values"] == [value for _, value in POWER_SAMPLES]
+    assert payload["hours"] == {"timestamps": [], "values": []}
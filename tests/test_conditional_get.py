@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.routes import provider_measurements as routes
+from app.repositories.measurement_repository import SeriesVersion
+from app.services.conditional_get import build_etag, etag_matches
+from smart_common.core.db import get_db
+from smart_common.core.dependencies import get_current_user
+from smart_common.enums.unit import PowerUnit
+from smart_common.providers.enums import ProviderKind
+
+
+@pytest.fixture
+def conditional_env(monkeypatch):
+    provider = SimpleNamespace(
+        id=41,
+        uuid=uuid4(),
+        kind=ProviderKind.POWER,
+        unit=PowerUnit.WATT,
+        default_expected_interval_sec=None,
+        updated_at=datetime(2026, 3, 10, tzinfo=timezone.utc),
+        user_id=8,
+    )
+    samples = [
+        (datetime(2026, 3, 10, 10, 0, tzinfo=timezone.utc), 100.0),
+        (datetime(2026, 3, 10, 11, 0, tzinfo=timezone.utc), 0.0),
+    ]
+    calls = Counter()
+
+    class FakeProviderRepo:
+        def __init__(self, db):
+            self.db = db
+
+        def get_for_user_by_uuid(self, *, provider_uuid, user_id):
+            return provider if provider_uuid == provider.uuid else None
+
+    class FakeMeasurementRepo:
+        def __init__(self, db):
+            self.db = db
+
+        def get_power_version(self, *, provider_id, date_start, date_end):
+            calls["power_version"] += 1
+            return SeriesVersion(len(samples), max(ts for ts, _ in samples))
+
+        def list_power_samples(self, *, provider_id, date_start, date_end):
+            calls["power_samples"] += 1
+            return list(samples)
+
+    app = FastAPI()
+    app.include_router(routes.provider_measurements_router)
+    app.dependency_overrides[get_db] = lambda: object()
+    app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(id=8)
+    monkeypatch.setattr(routes, "ProviderRepository", FakeProviderRepo)
+    monkeypatch.setattr(routes, "MeasurementRepository", FakeMeasurementRepo)
+    return SimpleNamespace(
+        client=TestClient(app),
+        url=f"/provider-measurements/provider/{provider.uuid}/power?date=2026-03-10",
+        samples=samples,
+        calls=calls,
+    )
+
+
+def test_unchanged_series_answers_not_modified_without_building(conditional_env):
+    first = conditional_env.client.get(conditional_env.url)
+    etag = first.headers["etag"]
+
+    second = conditional_env.client.get(
+        conditional_env.url, headers={"If-None-Match": etag}
+    )
+
+    assert first.status_code == 200
+    assert first.headers["cache-control"] == "private, no-cache"
+    assert second.status_code == 304
+    assert second.content == b""
+    assert second.headers["etag"] == etag
+    assert conditional_env.calls["power_samples"] == 1
+
+
+def test_new_sample_or_other_parameters_change_the_etag(conditional_env):
+    etag = conditional_env.client.get(conditional_env.url).headers["etag"]
+
+    downsampled = conditional_env.client.get(
+        f"{conditional_env.url}&format=columnar",
+        headers={"If-None-Match": etag},
+    )
+    conditional_env.samples.append(
+        (datetime(2026, 3, 10, 12, 0, tzinfo=timezone.utc), 50.0)
+    )
+    changed = conditional_env.client.get(
+        conditional_env.url, headers={"If-None-Match": etag}
+    )
+
+    assert downsampled.status_code == 200
+    assert downsampled.headers["etag"] != etag
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+    assert len(changed.json()["days"]["2026-03-10"]["entries"]) == 3
+
+
+def test_open_window_validator_settles_once_sample_hold_runs_out():
+    now = datetime(2026, 3, 10, 12, 0, tzinfo=timezone.utc)
+    fresh = SeriesVersion(3, now - timedelta(minutes=2))
+    stale = SeriesVersion(3, now - timedelta(minutes=20))
+
+    assert routes._carry_until(fresh, end=now, max_interval_seconds=300.0) == now
+    assert routes._carry_until(stale, end=now, max_interval_seconds=300.0) == (
+        now - timedelta(minutes=15)
+    )
+    assert routes._carry_until(stale, end=now, max_interval_seconds=None) == now
+    assert routes._carry_until(SeriesVersion(0, None), end=now) is None
+
+
+def test_if_none_match_uses_weak_comparison_and_lists():
+    etag = build_etag("power", 41, datetime(2026, 3, 10, tzinfo=timezone.utc))
+
+    assert etag.startswith('W/"')
+    assert etag_matches(f'"other", {etag.removeprefix("W/")}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches('W/"other"', etag)
+    assert not etag_matches(None, etag)
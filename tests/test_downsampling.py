@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from app.api.routes import provider_measurements as routes
+from app.services.downsampling import downsample_lttb
+from smart_common.enums.provider_telemetry import TelemetryAggregationMode
+
+
+def _series(count: int, *, spike_at: int | None = None):
+    start = datetime(2026, 3, 10, tzinfo=timezone.utc)
+    return [
+        (
+            start + timedelta(seconds=5 * index),
+            5000.0 if index == spike_at else float(index % 7),
+        )
+        for index in range(count)
+    ]
+
+
+def test_lttb_keeps_endpoints_and_peaks_within_budget():
+    points = _series(10_000, spike_at=4321)
+
+    sampled = downsample_lttb(points, 500)
+
+    assert len(sampled) == 500
+    assert sampled[0] == points[0]
+    assert sampled[-1] == points[-1]
+    assert points[4321] in sampled
+    assert [ts for ts, _ in sampled] == sorted(ts for ts, _ in sampled)
+
+
+def test_lttb_returns_short_series_unchanged():
+    points = _series(20)
+
+    assert downsample_lttb(points, 500) is points
+    assert downsample_lttb(points, None) is points
+
+
+def test_raw_metric_series_is_downsampled_before_building_points():
+    definition = routes._build_synthetic_metric_definition("battery_soc")
+    assert definition.aggregation_mode == TelemetryAggregationMode.RAW
+    raw_samples = [
+        SimpleNamespace(measured_at=ts, value=value) for ts, value in _series(2_000)
+    ]
+
+    series = routes._build_metric_series_from_samples(
+        definition=definition,
+        raw_samples=raw_samples,
+        start=datetime(2026, 3, 10, tzinfo=timezone.utc),
+        max_points=100,
+    )
+
+    assert len(series.entries) == 100
+    assert series.entries[0].timestamp == raw_samples[0].measured_at
+    assert series.entries[-1].timestamp == raw_samples[-1].measured_at
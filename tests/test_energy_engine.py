@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import random
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from app.api.routes.provider_measurements import _build_matched_revenue_summary
+from app.services import energy_engine
+from app.services.market_price_index import MarketPriceIndex
+from app.services.revenue_matching import match_revenue
+from smart_common.services.energy_calculation_service import (
+    EnergyCalculationService,
+    PowerSample,
+)
+
+DAY_START = datetime(2026, 3, 10, tzinfo=timezone.utc)
+
+
+def _random_samples(seed: int, count: int = 600) -> list[PowerSample]:
+    rng = random.Random(seed)
+    samples = []
+    ts = DAY_START + timedelta(seconds=rng.randint(0, 600))
+    for _ in range(count):
+        # Mostly regular polling with occasional gaps longer than the hold.
+        step = (
+            rng.choice([1, 5, 10, 30, 60])
+            if rng.random() > 0.03
+            else rng.randint(600, 5400)
+        )
+        ts += timedelta(seconds=step, microseconds=rng.randint(0, 999_999))
+        value = rng.choice([0.0, rng.uniform(-3000.0, 6000.0)])
+        samples.append(PowerSample(ts=ts, value=value))
+    return samples
+
+
+def _market_index() -> MarketPriceIndex:
+    entries = []
+    for quarter in range(24 * 4):
+        if quarter in (30, 31, 70):
+            continue  # uncovered quarters stop pricing like a missing RCE row
+        interval_start = DAY_START + timedelta(minutes=15 * quarter)
+        entries.append(
+            SimpleNamespace(
+                market="RCE",
+                currency="PLN",
+                price_unit="MWh",
+                price_value=400.0 + quarter * 3.5,
+                interval_start=interval_start,
+                interval_end=interval_start + timedelta(minutes=15),
+            )
+        )
+    return MarketPriceIndex(entries)
+
+
+@pytest.mark.parametrize("max_interval_seconds", [None, 300.0, 450.5])
+def test_vectorized_hourly_energy_matches_energy_calculation_service(
+    max_interval_seconds,
+):
+    for seed in range(5):
+        samples = _random_samples(seed)
+
+        expected = EnergyCalculationService.integrate_hourly(
+            samples,
+            max_interval_seconds=max_interval_seconds,
+        )
+        actual = energy_engine.integrate_hourly(
+            samples,
+            max_interval_seconds=max_interval_seconds,
+        )
+
+        assert actual.keys() == expected.keys()
+        for hour_dt, energy in expected.items():
+            assert actual[hour_dt] == pytest.approx(energy, rel=1e-12, abs=1e-12)
+
+
+@pytest.mark.parametrize("max_interval_seconds", [None, 300.0])
+def test_vectorized_revenue_is_identical_to_row_wise_matching(max_interval_seconds):
+    market_index = _market_index()
+    prices = [float(entry.price_value) / 1000.0 for entry in market_index.entries]
+    prices[5] = None
+
+    for seed in range(5):
+        samples = _random_samples(seed)
+
+        expected = match_revenue(
+            samples=samples,
+            market_index=market_index,
+            prices_per_energy_unit=prices,
+            max_interval_seconds=max_interval_seconds,
+        )
+        actual = energy_engine.match_revenue(
+            samples,
+            market_starts=market_index.starts,
+            market_ends=market_index.ends,
+            prices=prices,
+            max_interval_seconds=max_interval_seconds,
+        )
+
+        assert actual == expected
+
+
+def test_revenue_summary_is_unchanged_by_the_engine_switch(monkeypatch):
+    samples = _random_samples(11)
+    market_index = _market_index()
+
+    def summary():
+        return _build_matched_revenue_summary(
+            samples=samples,
+            market_index=market_index,
+            energy_unit="kWh",
+            max_interval_seconds=300.0,
+        ).model_dump()
+
+    monkeypatch.setenv("ENERGY_INTEGRATION_ENGINE", "python")
+    row_wise = summary()
+    monkeypatch.setenv("ENERGY_INTEGRATION_ENGINE", "numpy")
+
+    assert summary() == row_wise
+
+
+def test_vectorized_engine_handles_degenerate_windows():
+    single = [PowerSample(ts=DAY_START, value=100.0)]
+    idle = [
+        PowerSample(ts=DAY_START, value=0.0),
+        PowerSample(ts=DAY_START + timedelta(hours=2), value=0.0),
+    ]
+
+    assert energy_engine.integrate_hourly(single) == {}
+    assert energy_engine.integrate_hourly(idle) == {}
+    assert (
+        energy_engine.match_revenue(
+            idle,
+            market_starts=[DAY_START],
+            market_ends=[DAY_START + timedelta(hours=1)],
+            prices=[1.0],
+        )
+        == energy_engine.RevenueMatch()
+    )
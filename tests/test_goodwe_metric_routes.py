@@ -4,7 +4,11 @@ from datetime import date, datetime, timezone
 from types import SimpleNamespace
 from uuid import uuid4
 
+from fastapi import Response
+
 from app.api.routes import provider_measurements as routes
+from app.repositories.market_energy_price import MarketPriceVersion
+from app.repositories.measurement_repository import SeriesVersion
 from smart_common.enums.provider_telemetry import (
     ProviderTelemetryCapability,
     TelemetryAggregationMode,
@@ -18,10 +22,17 @@ from smart_common.providers.enums import (
     ProviderVendor,
 )
 
+from tests.mocks import InMemoryEnergyRollupRepo, InMemoryRevenueLedgerRepo
+
 
 def test_metric_series_returns_raw_entries_for_battery_soc(monkeypatch):
     provider_uuid = uuid4()
-    provider = SimpleNamespace(id=7, uuid=provider_uuid, user_id=3)
+    provider = SimpleNamespace(
+        id=7,
+        uuid=provider_uuid,
+        user_id=3,
+        updated_at=datetime(2026, 3, 10, tzinfo=timezone.utc),
+    )
     current_user = SimpleNamespace(id=3)
 
     class FakeProviderRepo:
@@ -36,6 +47,14 @@ def test_metric_series_returns_raw_entries_for_battery_soc(monkeypatch):
         def __init__(self, db):
             self.db = db
 
+        def get_power_version(self, *, provider_id, date_start, date_end):
+            return SeriesVersion(0, None)
+
+        def get_metric_version(
+            self, *, provider_id, date_start, date_end, metric_keys=None
+        ):
+            return SeriesVersion(0, None)
+
         def get_metric_definition(self, *, provider_id, metric_key):
             assert provider_id == provider.id
             assert metric_key == "battery_soc"
@@ -68,6 +87,7 @@ def test_metric_series_returns_raw_entries_for_battery_soc(monkeypatch):
     result = routes.get_provider_metric_series(
         provider_uuid=provider_uuid,
         metric_key="battery_soc",
+        response=Response(),
         selected_date=date(2026, 3, 10),
         db=object(),
         current_user=current_user,
@@ -89,7 +109,12 @@ def test_metric_series_returns_raw_entries_for_battery_soc(monkeypatch):
 
 def test_metric_series_returns_hourly_energy_for_grid_power(monkeypatch):
     provider_uuid = uuid4()
-    provider = SimpleNamespace(id=8, uuid=provider_uuid, user_id=4)
+    provider = SimpleNamespace(
+        id=8,
+        uuid=provider_uuid,
+        user_id=4,
+        updated_at=datetime(2026, 3, 10, tzinfo=timezone.utc),
+    )
     current_user = SimpleNamespace(id=4)
 
     class FakeProviderRepo:
@@ -104,6 +129,14 @@ def test_metric_series_returns_hourly_energy_for_grid_power(monkeypatch):
         def __init__(self, db):
             self.db = db
 
+        def get_power_version(self, *, provider_id, date_start, date_end):
+            return SeriesVersion(0, None)
+
+        def get_metric_version(
+            self, *, provider_id, date_start, date_end, metric_keys=None
+        ):
+            return SeriesVersion(0, None)
+
         def get_metric_definition(self, *, provider_id, metric_key):
             assert provider_id == provider.id
             assert metric_key == "grid_power"
@@ -140,6 +173,7 @@ def test_metric_series_returns_hourly_energy_for_grid_power(monkeypatch):
     result = routes.get_provider_metric_series(
         provider_uuid=provider_uuid,
         metric_key="grid_power",
+        response=Response(),
         selected_date=date(2026, 3, 10),
         db=object(),
         current_user=current_user,
@@ -197,6 +231,14 @@ def test_provider_telemetry_returns_day_and_synthetic_metrics(monkeypatch):
         def __init__(self, db):
             self.db = db
 
+        def get_power_version(self, *, provider_id, date_start, date_end):
+            return SeriesVersion(0, None)
+
+        def get_metric_version(
+            self, *, provider_id, date_start, date_end, metric_keys=None
+        ):
+            return SeriesVersion(0, None)
+
         def list_power_samples(self, *, provider_id, date_start, date_end):
             assert provider_id == provider.id
             return [
@@ -217,6 +259,19 @@ def test_provider_telemetry_returns_day_and_synthetic_metrics(monkeypatch):
                 )
             ]
 
+        def list_metric_samples_for_keys(
+            self, *, provider_id, metric_keys, date_start, date_end
+        ):
+            return {
+                metric_key: self.list_metric_samples(
+                    provider_id=provider_id,
+                    metric_key=metric_key,
+                    date_start=date_start,
+                    date_end=date_end,
+                )
+                for metric_key in metric_keys
+            }
+
         def list_metric_definitions(self, *, provider_id):
             assert provider_id == provider.id
             return []
@@ -264,6 +319,9 @@ def test_provider_telemetry_returns_day_and_synthetic_metrics(monkeypatch):
         def __init__(self, db):
             self.db = db
 
+        def get_version(self, *, markets, date_start, date_end, started_before):
+            return MarketPriceVersion(0, 0, None)
+
         def get_active_at(self, *, market, timestamp):
             return None
 
@@ -302,6 +360,7 @@ def test_provider_telemetry_returns_day_and_synthetic_metrics(monkeypatch):
                         price_value=400.0,
                         currency="PLN",
                         price_unit="MWh",
+                        source_updated_at=None,
                     ),
                     SimpleNamespace(
                         market="RCE",
@@ -310,6 +369,7 @@ def test_provider_telemetry_returns_day_and_synthetic_metrics(monkeypatch):
                         price_value=450.0,
                         currency="PLN",
                         price_unit="MWh",
+                        source_updated_at=None,
                     ),
                 ]
 
@@ -322,6 +382,7 @@ def test_provider_telemetry_returns_day_and_synthetic_metrics(monkeypatch):
                         price_value=410.0,
                         currency="PLN",
                         price_unit="MWh",
+                        source_updated_at=None,
                     ),
                     SimpleNamespace(
                         market="RCE_FCST",
@@ -330,6 +391,7 @@ def test_provider_telemetry_returns_day_and_synthetic_metrics(monkeypatch):
                         price_value=520.0,
                         currency="PLN",
                         price_unit="MWh",
+                        source_updated_at=None,
                     ),
                 ]
 
@@ -338,9 +400,16 @@ def test_provider_telemetry_returns_day_and_synthetic_metrics(monkeypatch):
     monkeypatch.setattr(routes, "ProviderRepository", FakeProviderRepo)
     monkeypatch.setattr(routes, "MeasurementRepository", FakeMeasurementRepo)
     monkeypatch.setattr(routes, "MarketEnergyPriceRepository", FakeMarketPriceRepo)
+    InMemoryEnergyRollupRepo.rows = {}
+    monkeypatch.setattr(routes, "EnergyRollupRepository", InMemoryEnergyRollupRepo)
+    InMemoryRevenueLedgerRepo.rows = {}
+    monkeypatch.setattr(routes, "RevenueLedgerRepository", InMemoryRevenueLedgerRepo)
+    monkeypatch.setattr(routes, "get_telemetry_cache", lambda: None)
+    monkeypatch.setattr(routes, "get_market_price_store", lambda: None)
 
     result = routes.get_provider_telemetry(
         provider_uuid=provider_uuid,
+        response=Response(),
         selected_date=date(2026, 3, 10),
         db=object(),
         current_user=current_user,
@@ -418,6 +487,14 @@ def test_provider_telemetry_splits_energy_across_hour_boundaries(monkeypatch):
         def __init__(self, db):
             self.db = db
 
+        def get_power_version(self, *, provider_id, date_start, date_end):
+            return SeriesVersion(0, None)
+
+        def get_metric_version(
+            self, *, provider_id, date_start, date_end, metric_keys=None
+        ):
+            return SeriesVersion(0, None)
+
         def list_power_samples(self, *, provider_id, date_start, date_end):
             assert provider_id == provider.id
             return [
@@ -429,6 +506,19 @@ def test_provider_telemetry_splits_energy_across_hour_boundaries(monkeypatch):
             assert provider_id == provider.id
             return []
 
+        def list_metric_samples_for_keys(
+            self, *, provider_id, metric_keys, date_start, date_end
+        ):
+            return {
+                metric_key: self.list_metric_samples(
+                    provider_id=provider_id,
+                    metric_key=metric_key,
+                    date_start=date_start,
+                    date_end=date_end,
+                )
+                for metric_key in metric_keys
+            }
+
         def list_metric_definitions(self, *, provider_id):
             assert provider_id == provider.id
             return []
@@ -447,6 +537,9 @@ def test_provider_telemetry_splits_energy_across_hour_boundaries(monkeypatch):
         def __init__(self, db):
             self.db = db
 
+        def get_version(self, *, markets, date_start, date_end, started_before):
+            return MarketPriceVersion(0, 0, None)
+
         def get_active_at(self, *, market, timestamp):
             return None
 
@@ -464,6 +557,7 @@ def test_provider_telemetry_splits_energy_across_hour_boundaries(monkeypatch):
                     price_value=500.0,
                     currency="PLN",
                     price_unit="MWh",
+                    source_updated_at=None,
                 ),
                 SimpleNamespace(
                     market="RCE",
@@ -472,15 +566,23 @@ def test_provider_telemetry_splits_energy_across_hour_boundaries(monkeypatch):
                     price_value=200.0,
                     currency="PLN",
                     price_unit="MWh",
+                    source_updated_at=None,
                 ),
             ]
 
     monkeypatch.setattr(routes, "ProviderRepository", FakeProviderRepo)
     monkeypatch.setattr(routes, "MeasurementRepository", FakeMeasurementRepo)
     monkeypatch.setattr(routes, "MarketEnergyPriceRepository", FakeMarketPriceRepo)
+    InMemoryEnergyRollupRepo.rows = {}
+    monkeypatch.setattr(routes, "EnergyRollupRepository", InMemoryEnergyRollupRepo)
+    InMemoryRevenueLedgerRepo.rows = {}
+    monkeypatch.setattr(routes, "RevenueLedgerRepository", InMemoryRevenueLedgerRepo)
+    monkeypatch.setattr(routes, "get_telemetry_cache", lambda: None)
+    monkeypatch.setattr(routes, "get_market_price_store", lambda: None)
 
     result = routes.get_provider_telemetry(
         provider_uuid=provider_uuid,
+        response=Response(),
         selected_date=date(2026, 3, 10),
         db=object(),
         current_user=current_user,
@@ -539,6 +641,14 @@ def test_provider_telemetry_does_not_carry_stale_value_across_night(monkeypatch)
         def __init__(self, db):
             self.db = db
 
+        def get_power_version(self, *, provider_id, date_start, date_end):
+            return SeriesVersion(0, None)
+
+        def get_metric_version(
+            self, *, provider_id, date_start, date_end, metric_keys=None
+        ):
+            return SeriesVersion(0, None)
+
         def list_power_samples(self, *, provider_id, date_start, date_end):
             assert provider_id == provider.id
             return [
@@ -549,6 +659,19 @@ def test_provider_telemetry_does_not_carry_stale_value_across_night(monkeypatch)
         def list_measurements(self, *, provider_id, date_start, date_end):
             return []
 
+        def list_metric_samples_for_keys(
+            self, *, provider_id, metric_keys, date_start, date_end
+        ):
+            return {
+                metric_key: self.list_metric_samples(
+                    provider_id=provider_id,
+                    metric_key=metric_key,
+                    date_start=date_start,
+                    date_end=date_end,
+                )
+                for metric_key in metric_keys
+            }
+
         def list_metric_definitions(self, *, provider_id):
             return []
 
@@ -566,6 +689,9 @@ def test_provider_telemetry_does_not_carry_stale_value_across_night(monkeypatch)
         def __init__(self, db):
             self.db = db
 
+        def get_version(self, *, markets, date_start, date_end, started_before):
+            return MarketPriceVersion(0, 0, None)
+
         def get_active_at(self, *, market, timestamp):
             return None
 
@@ -578,9 +704,16 @@ def test_provider_telemetry_does_not_carry_stale_value_across_night(monkeypatch)
     monkeypatch.setattr(routes, "ProviderRepository", FakeProviderRepo)
     monkeypatch.setattr(routes, "MeasurementRepository", FakeMeasurementRepo)
     monkeypatch.setattr(routes, "MarketEnergyPriceRepository", FakeMarketPriceRepo)
+    InMemoryEnergyRollupRepo.rows = {}
+    monkeypatch.setattr(routes, "EnergyRollupRepository", InMemoryEnergyRollupRepo)
+    InMemoryRevenueLedgerRepo.rows = {}
+    monkeypatch.setattr(routes, "RevenueLedgerRepository", InMemoryRevenueLedgerRepo)
+    monkeypatch.setattr(routes, "get_telemetry_cache", lambda: None)
+    monkeypatch.setattr(routes, "get_market_price_store", lambda: None)
 
     result = routes.get_provider_telemetry(
         provider_uuid=provider_uuid,
+        response=Response(),
         selected_date=date(2026, 3, 13),
         db=object(),
         current_user=current_user,
@@ -589,3 +722,51 @@ def test_provider_telemetry_does_not_carry_stale_value_across_night(monkeypatch)
     assert [(point.hour.hour, point.energy) for point in result.day.hours] == [
         (6, 0.45),
     ]
+
+
+def test_metric_series_batch_loads_all_definitions_in_one_query():
+    calls = []
+
+    class FakeMeasurementRepo:
+        def list_metric_samples_for_keys(
+            self, *, provider_id, metric_keys, date_start, date_end
+        ):
+            calls.append(list(metric_keys))
+            return {
+                "battery_soc": [
+                    SimpleNamespace(
+                        measured_at=datetime(2026, 3, 10, 10, 15, tzinfo=timezone.utc),
+                        value=55.0,
+                    ),
+                ],
+                "grid_power": [
+                    SimpleNamespace(
+                        measured_at=datetime(2026, 3, 10, 10, 0, tzinfo=timezone.utc),
+                        value=100.0,
+                    ),
+                    SimpleNamespace(
+                        measured_at=datetime(2026, 3, 10, 11, 0, tzinfo=timezone.utc),
+                        value=0.0,
+                    ),
+                ],
+            }
+
+    definitions = [
+        routes._build_synthetic_metric_definition("battery_soc"),
+        routes._build_synthetic_metric_definition("grid_power"),
+    ]
+
+    metrics = routes._build_metric_series_batch(
+        repo=FakeMeasurementRepo(),
+        provider_id=7,
+        definitions=definitions,
+        start=datetime(2026, 3, 10, tzinfo=timezone.utc),
+        end=datetime(2026, 3, 10, 23, 59, tzinfo=timezone.utc),
+    )
+
+    assert calls == [["battery_soc", "grid_power"]]
+    assert [metric.metric_key for metric in metrics] == ["battery_soc", "grid_power"]
+    assert [entry.value for entry in metrics[0].entries] == [55.0]
+    assert [(point.hour.hour, point.value) for point in metrics[1].hours] == [
+        (10, 100.0)
+    ]
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from app.api.routes import provider_measurements as routes
+from app.services.market_price_index import MarketPriceIndex
+from smart_common.services.energy_calculation_service import PowerSample
+
+
+def _entry(start: datetime, minutes: int, price: float, *, label: str | None = None):
+    return SimpleNamespace(
+        market="RCE",
+        interval_start=start,
+        interval_end=start + timedelta(minutes=minutes),
+        price_value=price,
+        price_unit="MWh",
+        currency="PLN",
+        label=label,
+    )
+
+
+def test_index_finds_containing_interval_and_skips_gaps():
+    base = datetime(2026, 3, 10, 10, tzinfo=timezone.utc)
+    index = MarketPriceIndex(
+        [
+            _entry(base + timedelta(minutes=30), 15, 300.0),
+            _entry(base, 15, 100.0),
+            # Naive timestamps from older rows are treated as UTC.
+            _entry((base + timedelta(minutes=15)).replace(tzinfo=None), 15, 200.0),
+        ]
+    )
+
+    assert [entry.price_value for entry in index.entries] == [100.0, 200.0, 300.0]
+    assert index.entry_at(base).price_value == 100.0
+    assert index.entry_at(base + timedelta(minutes=14, seconds=59)).price_value == 100.0
+    assert index.entry_at(base + timedelta(minutes=15)).price_value == 200.0
+    assert index.find(base + timedelta(minutes=45)) is None
+    assert index.find(base - timedelta(seconds=1)) is None
+
+
+def test_index_prefers_first_entry_among_equal_starts():
+    base = datetime(2026, 3, 10, 10, tzinfo=timezone.utc)
+    index = MarketPriceIndex(
+        [
+            _entry(base, 60, 100.0, label="hourly"),
+            _entry(base, 15, 90.0, label="quarter"),
+        ]
+    )
+
+    assert index.entry_at(base + timedelta(minutes=5)).label == "hourly"
+    assert not MarketPriceIndex([])
+
+
+def test_matched_revenue_uses_price_of_each_covered_interval():
+    base = datetime(2026, 3, 10, 10, tzinfo=timezone.utc)
+    index = MarketPriceIndex(
+        [
+            _entry(base + timedelta(minutes=15), 15, 2000.0),
+            _entry(base, 15, 1000.0),
+        ]
+    )
+    samples = [
+        PowerSample(ts=base + timedelta(minutes=5), value=4.0),
+        PowerSample(ts=base + timedelta(minutes=25), value=0.0),
+    ]
+
+    summary = routes._build_matched_revenue_summary(
+        samples=samples,
+        market_index=index,
+        energy_unit="kWh",
+    )
+
+    # 10 min at 4 kW in the first quarter, 10 min in the second one.
+    assert summary.matched_intervals == 2
+    assert summary.total_export_energy == round(4.0 * 20 / 60, 5)
+    assert summary.total_revenue == round(4.0 * 10 / 60 * 1.0 + 4.0 * 10 / 60 * 2.0, 6)
@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+from dataclasses import FrozenInstanceError
+from datetime import date, datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from app.repositories.market_energy_price import MarketPriceVersion
+from app.services.market_price_store import MarketPriceStore
+
+
+class CountingMarketPriceRepo:
+    def __init__(self, on_load=None):
+        self.queries: list[tuple[str, datetime, datetime]] = []
+        self.on_load = on_load
+        self.version = MarketPriceVersion(1, 1, None)
+
+    def get_version(self, *, markets, date_start, date_end, started_before):
+        return self.version
+
+    def list_between(self, *, market, date_start, date_end):
+        self.queries.append((market, date_start, date_end))
+        if self.on_load is not None:
+            self.on_load()
+        return [
+            SimpleNamespace(
+                market=market,
+                interval_start=datetime(2026, 3, 10, 10, 0, tzinfo=timezone.utc),
+                interval_end=datetime(2026, 3, 10, 10, 15, tzinfo=timezone.utc),
+                price_value=400.0,
+                currency="PLN",
+                price_unit="MWh",
+                source_updated_at=None,
+            )
+        ]
+
+
+def test_market_day_is_loaded_once_and_shared_between_requests():
+    store = MarketPriceStore()
+    repo = CountingMarketPriceRepo()
+
+    first = store.get_day(repo, market="RCE", day=date(2026, 3, 10))
+    second = store.get_day(
+        CountingMarketPriceRepo(), market="RCE", day=date(2026, 3, 10)
+    )
+    store.get_day(repo, market="RCE_FCST", day=date(2026, 3, 10))
+
+    assert second is first
+    assert repo.queries == [
+        (
+            "RCE",
+            datetime(2026, 3, 10, tzinfo=timezone.utc),
+            datetime(2026, 3, 11, tzinfo=timezone.utc),
+        ),
+        (
+            "RCE_FCST",
+            datetime(2026, 3, 10, tzinfo=timezone.utc),
+            datetime(2026, 3, 11, tzinfo=timezone.utc),
+        ),
+    ]
+
+
+def test_price_write_reloads_only_the_written_day():
+    store = MarketPriceStore()
+    repo = CountingMarketPriceRepo()
+    store.get_day(repo, market="RCE", day=date(2026, 3, 10))
+    store.get_day(repo, market="RCE", day=date(2026, 3, 11))
+
+    store.invalidate_day(day=date(2026, 3, 10))
+    store.get_day(repo, market="RCE", day=date(2026, 3, 10))
+    store.get_day(repo, market="RCE", day=date(2026, 3, 11))
+
+    assert len(repo.queries) == 3
+
+
+def test_day_loaded_while_a_write_lands_is_not_shared():
+    store = MarketPriceStore()
+    repo = CountingMarketPriceRepo(
+        on_load=lambda: store.invalidate_day(day=date(2026, 3, 10)),
+    )
+
+    store.get_day(repo, market="RCE", day=date(2026, 3, 10))
+    repo.on_load = None
+    store.get_day(repo, market="RCE", day=date(2026, 3, 10))
+
+    assert len(repo.queries) == 2
+
+
+def test_day_written_by_another_process_is_reloaded():
+    store = MarketPriceStore()
+    repo = CountingMarketPriceRepo()
+    store.get_day(repo, market="RCE", day=date(2026, 3, 10))
+
+    # A price import committed elsewhere never reaches invalidate_day.
+    repo.version = MarketPriceVersion(
+        1, 1, datetime(2026, 3, 10, 12, 0, tzinfo=timezone.utc)
+    )
+    store.get_day(repo, market="RCE", day=date(2026, 3, 10))
+    store.get_day(repo, market="RCE", day=date(2026, 3, 10))
+
+    assert len(repo.queries) == 2
+
+
+def test_expired_day_is_reloaded():
+    store = MarketPriceStore(current_ttl_seconds=0, past_ttl_seconds=0)
+    repo = CountingMarketPriceRepo()
+
+    store.get_day(repo, market="RCE", day=date(2026, 3, 10))
+    store.get_day(repo, market="RCE", day=date(2026, 3, 10))
+
+    assert len(repo.queries) == 2
+
+
+def test_shared_days_hold_snapshots_not_the_loaded_rows():
+    store = MarketPriceStore()
+    loaded = []
+
+    class RowsRepo(CountingMarketPriceRepo):
+        def list_between(self, *, market, date_start, date_end):
+            rows = super().list_between(
+                market=market, date_start=date_start, date_end=date_end
+            )
+            loaded.extend(rows)
+            return rows
+
+    prices = store.get_day(RowsRepo(), market="RCE", day=date(2026, 3, 10))
+    # What a commit in the loading session does to its ORM instances.
+    loaded[0].price_value = None
+
+    entry = prices.entries[0]
+    assert entry is not loaded[0]
+    assert entry.price_value == 400.0
+    with pytest.raises(FrozenInstanceError):
+        entry.price_value = 0.0
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import asyncio
+import csv
+import io
+from datetime import date, datetime, timezone
+from types import SimpleNamespace
+from uuid import uuid4
+
+import orjson
+import pytest
+from fastapi import HTTPException
+
+from app.api.routes import provider_measurements as routes
+from app.schemas.measurement_export import ExportFormat
+from app.services import measurement_export
+
+
+def _row(row_id: int, minute: int, value: float | None):
+    return SimpleNamespace(
+        id=row_id,
+        measured_at=datetime(2026, 3, 10, 12, minute),
+        measured_value=value,
+        measured_unit="W",
+        metadata_payload={"source": "poll"} if row_id == 1 else None,
+        extra_data=None,
+    )
+
+
+@pytest.fixture
+def export_env(monkeypatch):
+    provider = SimpleNamespace(id=41, uuid=uuid4(), user_id=8)
+    state = SimpleNamespace(consumed=0, windows=[])
+
+    class FakeProviderRepo:
+        def __init__(self, db):
+            self.db = db
+
+        def get_for_user_by_uuid(self, *, provider_uuid, user_id):
+            return provider if provider_uuid == provider.uuid else None
+
+    class FakeMeasurementRepo:
+        def __init__(self, db):
+            self.db = db
+
+        def iter_measurements(self, *, provider_id, date_start, date_end):
+            state.windows.append((date_start, date_end))
+            for row in (_row(1, 0, 120.0), _row(2, 5, None), _row(3, 10, 80.5)):
+                state.consumed += 1
+                yield row
+
+    monkeypatch.setattr(routes, "ProviderRepository", FakeProviderRepo)
+    monkeypatch.setattr(routes, "MeasurementRepository", FakeMeasurementRepo)
+    return SimpleNamespace(provider=provider, state=state)
+
+
+def _export(env, export_format, date_from=date(2026, 3, 10), date_to=date(2026, 3, 10)):
+    return routes.export_provider_measurements(
+        provider_uuid=env.provider.uuid,
+        date_from=date_from,
+        date_to=date_to,
+        export_format=export_format,
+        db=object(),
+        current_user=SimpleNamespace(id=env.provider.user_id),
+    )
+
+
+def _body(response) -> bytes:
+    async def collect():
+        return b"".join([chunk async for chunk in response.body_iterator])
+
+    return asyncio.run(collect())
+
+
+def test_ndjson_export_streams_rows_lazily(export_env):
+    response = _export(export_env, ExportFormat.NDJSON, date_to=date(2026, 3, 11))
+
+    assert export_env.state.consumed == 0
+    lines = [orjson.loads(line) for line in _body(response).splitlines()]
+
+    assert response.media_type == "application/x-ndjson"
+    assert export_env.state.windows == [
+        (
+            datetime(2026, 3, 10, tzinfo=timezone.utc),
+            datetime(2026, 3, 12, tzinfo=timezone.utc),
+        )
+    ]
+    assert [line["measured_value"] for line in lines] == [120.0, None, 80.5]
+    assert lines[0]["measured_at"] == "2026-03-10T12:00:00+00:00"
+    assert lines[0]["metadata_payload"] == {"source": "poll"}
+
+
+def test_csv_export_writes_header_and_rows(export_env):
+    response = _export(export_env, ExportFormat.CSV)
+
+    rows = list(csv.reader(io.StringIO(_body(response).decode())))
+
+    assert "attachment" in response.headers["content-disposition"]
+    assert rows[0] == list(measurement_export.EXPORT_COLUMNS)
+    assert rows[1][:4] == ["1", "2026-03-10T12:00:00+00:00", "120.0", "W"]
+    assert rows[2][2] == ""
+    assert len(rows) == 4
+
+
+def test_export_chunks_bound_rows_held_in_memory(monkeypatch):
+    monkeypatch.setattr(measurement_export, "EXPORT_CHUNK_ROWS", 2)
+    rows = (_row(index, index, float(index)) for index in range(5))
+
+    chunks = list(measurement_export.iter_export_chunks(rows, ExportFormat.NDJSON))
+
+    assert [chunk.count(b"\n") for chunk in chunks] == [2, 2, 1]
+
+
+def test_export_rejects_reversed_range(export_env):
+    with pytest.raises(HTTPException) as exc:
+        _export(export_env, ExportFormat.CSV, date_from=date(2026, 3, 11))
+
+    assert exc.value.status_code == 422
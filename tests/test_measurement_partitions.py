@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+from datetime import date
+
+import pytest
+
+from app.repositories.measurement_partitions import (
+    MeasurementPartitionRepository,
+    add_months,
+    parse_partition_month,
+    partition_name,
+)
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def scalars(self):
+        return iter(self.rows)
+
+
+class FakeSession:
+    def __init__(self, partitions):
+        self.partitions = partitions
+        self.statements: list[str] = []
+
+    def execute(self, statement, params=None):
+        sql = str(statement)
+        if sql.startswith("SELECT child.relname"):
+            return FakeResult(self.partitions)
+        self.statements.append(sql)
+        return FakeResult([])
+
+
+def test_partition_names_round_trip():
+    name = partition_name("provider_measurements", date(2026, 3, 1))
+
+    assert name == "provider_measurements_y2026m03"
+    assert parse_partition_month("provider_measurements", name) == date(2026, 3, 1)
+    assert (
+        parse_partition_month("provider_measurements", "provider_measurements_default")
+        is None
+    )
+    assert parse_partition_month("provider_metric_samples", name) is None
+    assert add_months(date(2026, 11, 1), 3) == date(2027, 2, 1)
+    assert add_months(date(2026, 1, 1), -1) == date(2025, 12, 1)
+
+
+def test_ensure_partitions_creates_only_missing_months():
+    db = FakeSession(["provider_measurements_y2026m10"])
+
+    created = MeasurementPartitionRepository(db).ensure_partitions(
+        "provider_measurements",
+        first_month=date(2026, 10, 1),
+        last_month=date(2026, 12, 1),
+    )
+
+    assert created == [
+        "provider_measurements_y2026m11",
+        "provider_measurements_y2026m12",
+    ]
+    assert db.statements[0] == (
+        "CREATE TABLE IF NOT EXISTS provider_measurements_y2026m11 "
+        "PARTITION OF provider_measurements "
+        "FOR VALUES FROM ('2026-11-01 00:00:00+00') TO ('2026-12-01 00:00:00+00')"
+    )
+
+
+def test_ensure_partitions_moves_default_partition_rows_before_attaching():
+    db = FakeSession(
+        [
+            "provider_measurements_default",
+            "provider_measurements_y2026m10",
+        ]
+    )
+
+    created = MeasurementPartitionRepository(db).ensure_partitions(
+        "provider_measurements",
+        first_month=date(2026, 11, 1),
+        last_month=date(2026, 11, 1),
+    )
+
+    assert created == ["provider_measurements_y2026m11"]
+    assert db.statements == [
+        "CREATE TABLE IF NOT EXISTS provider_measurements_y2026m11 "
+        "(LIKE provider_measurements INCLUDING DEFAULTS INCLUDING CONSTRAINTS)",
+        "WITH moved AS (DELETE FROM provider_measurements_default "
+        "WHERE measured_at >= '2026-11-01 00:00:00+00' "
+        "AND measured_at < '2026-12-01 00:00:00+00' "
+        "RETURNING *) INSERT INTO provider_measurements_y2026m11 SELECT * FROM moved",
+        "ALTER TABLE provider_measurements ATTACH PARTITION "
+        "provider_measurements_y2026m11 "
+        "FOR VALUES FROM ('2026-11-01 00:00:00+00') TO ('2026-12-01 00:00:00+00')",
+    ]
+
+
+def test_detach_partitions_before_retires_whole_months_only():
+    db = FakeSession(
+        [
+            "provider_metric_samples_y2026m03",
+            "provider_metric_samples_y2026m01",
+            "provider_metric_samples_y2026m02",
+            "provider_metric_samples_default",
+        ]
+    )
+
+    retired = MeasurementPartitionRepository(db).detach_partitions_before(
+        "provider_metric_samples",
+        before=date(2026, 3, 1),
+        drop=True,
+    )
+
+    assert retired == [
+        "provider_metric_samples_y2026m01",
+        "provider_metric_samples_y2026m02",
+    ]
+    assert db.statements == [
+        "ALTER TABLE provider_metric_samples DETACH PARTITION provider_metric_samples_y2026m01",
+        "DROP TABLE provider_metric_samples_y2026m01",
+        "ALTER TABLE provider_metric_samples DETACH PARTITION provider_metric_samples_y2026m02",
+        "DROP TABLE provider_metric_samples_y2026m02",
+    ]
+
+
+def test_unknown_tables_are_rejected():
+    with pytest.raises(ValueError):
+        MeasurementPartitionRepository(FakeSession([])).list_partitions("users")
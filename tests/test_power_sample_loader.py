@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from app.api.routes import provider_measurements as routes
+from app.services.energy_integration import build_day_power_samples
+from app.services.power_sample_loader import PowerSampleLoader
+from smart_common.enums.unit import PowerUnit
+
+
+class CountingMeasurementRepo:
+    def __init__(self, samples):
+        self.samples = samples
+        self.power_queries: list[tuple[datetime, datetime]] = []
+        self.previous_queries: list[datetime] = []
+
+    def list_power_samples(self, *, provider_id, date_start, date_end):
+        self.power_queries.append((date_start, date_end))
+        return [
+            (ts, value) for ts, value in self.samples if date_start <= ts <= date_end
+        ]
+
+    def get_last_power_sample_before(self, *, provider_id, before):
+        self.previous_queries.append(before)
+        previous = [(ts, value) for ts, value in self.samples if ts < before]
+        return previous[-1] if previous else None
+
+    def list_measurements(self, *, provider_id, date_start, date_end):
+        return []
+
+
+class EmptyRollupRepo:
+    def list_for_window(self, *, provider_id, date_start, date_end):
+        return []
+
+    def upsert_hours(self, *, provider_id, rows):
+        return None
+
+
+def test_preloaded_window_serves_sub_windows_and_previous_samples():
+    day_start = datetime(2026, 3, 10, tzinfo=timezone.utc)
+    repo = CountingMeasurementRepo(
+        [
+            (datetime(2026, 3, 9, 23, 50, tzinfo=timezone.utc), 50.0),
+            (datetime(2026, 3, 10, 10, 30, tzinfo=timezone.utc), 120.0),
+            (datetime(2026, 3, 10, 11, 30, tzinfo=timezone.utc), 80.0),
+        ]
+    )
+    loader = PowerSampleLoader(repo, provider_id=1)
+    loader.preload(start=day_start, end=day_start + timedelta(hours=12))
+
+    assert loader.list_samples(
+        start=day_start + timedelta(hours=11),
+        end=day_start + timedelta(hours=12),
+    ) == [(datetime(2026, 3, 10, 11, 30, tzinfo=timezone.utc), 80.0)]
+    assert loader.get_last_before(before=day_start + timedelta(hours=11)) == (
+        datetime(2026, 3, 10, 10, 30, tzinfo=timezone.utc),
+        120.0,
+    )
+    assert repo.previous_queries == []
+
+    # Nothing earlier in the window: the lookup falls back to the repository
+    # once, at the window start.
+    assert loader.get_last_before(before=day_start + timedelta(hours=1))[1] == 50.0
+    assert loader.get_last_before(before=day_start + timedelta(hours=2))[1] == 50.0
+    assert repo.previous_queries == [day_start]
+    assert repo.power_queries == [(day_start, day_start + timedelta(hours=12))]
+
+
+def test_energy_series_and_revenue_samples_share_one_day_query():
+    day_start = datetime(2026, 3, 10, tzinfo=timezone.utc)
+    now = datetime(2026, 3, 10, 11, 20, tzinfo=timezone.utc)
+    repo = CountingMeasurementRepo(
+        [
+            (datetime(2026, 3, 10, 10, 50, tzinfo=timezone.utc), 600.0),
+            (datetime(2026, 3, 10, 11, 15, tzinfo=timezone.utc), 300.0),
+        ]
+    )
+    loader = PowerSampleLoader(repo, provider_id=21)
+    loader.preload(start=day_start, end=now)
+
+    series = routes._build_provider_energy_series(
+        provider=SimpleNamespace(id=21, unit=PowerUnit.WATT),
+        repo=repo,
+        rollup_repo=EmptyRollupRepo(),
+        start=day_start,
+        end=now,
+        max_interval_seconds=900.0,
+        power_samples=loader,
+    )
+    samples = build_day_power_samples(
+        power_samples=loader,
+        start=day_start,
+        end=now,
+        carry_forward_seconds=900.0,
+    )
+
+    assert [
+        (point.hour.hour, point.energy) for point in series.days["2026-03-10"].hours
+    ] == [
+        (10, 100.0),
+        (11, 75.0),
+    ]
+    assert [sample.value for sample in samples] == [600.0, 300.0, 300.0]
+    assert repo.power_queries == [(day_start, now)]
+    assert repo.previous_queries == []
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+
+from app.services.energy_integration import build_window_samples, integrate_hourly
+from app.services.power_series import PowerSeries
+from smart_common.services.energy_calculation_service import PowerSample
+
+
+def _ts(minute: int, second: int = 0) -> datetime:
+    return datetime(2026, 3, 10, 12, minute, second, tzinfo=timezone.utc)
+
+
+def test_power_series_sorts_dedups_and_carries_forward_in_place():
+    series = PowerSeries.from_pairs(
+        [
+            (_ts(10), 300.0),
+            (_ts(3), 600.0),
+            (_ts(10), 350.0),
+            (_ts(41), 100.0),
+        ]
+    )
+    timestamps = series.timestamps
+
+    series.sort()
+    series.dedup()
+    series.carry_forward(_ts(59), hold_seconds=900.0)
+
+    assert list(series.pairs()) == [
+        (_ts(3), 600.0),
+        (_ts(10), 350.0),
+        (_ts(41), 100.0),
+        (_ts(56), 100.0),
+    ]
+    assert series.timestamps.itemsize == 8 and timestamps is not series.timestamps
+
+
+def test_power_series_windows_slices_and_iterates_as_samples():
+    series = PowerSeries.from_pairs(
+        [(_ts(minute), float(minute)) for minute in range(0, 60, 5)]
+    )
+
+    window = series.window(_ts(10), _ts(20))
+    first, stop = series.bounds(_ts(10), _ts(20))
+
+    assert [sample.value for sample in window] == [10.0, 15.0, 20.0]
+    assert (first, stop) == (2, 4)
+    assert series.index_before(_ts(10)) == 1
+    assert series[2] == PowerSample(ts=_ts(10), value=10.0)
+    assert [(left.value, right.value) for left, right in zip(window, window[1:])] == [
+        (10.0, 15.0),
+        (15.0, 20.0),
+    ]
+
+
+def test_window_samples_from_series_match_window_samples_from_pairs():
+    previous_sample = (_ts(0) - timedelta(minutes=2), 400.0)
+    pairs = [
+        (_ts(0), 500.0),
+        (_ts(3), 600.0),
+        (_ts(10), 300.0),
+        (_ts(10), 350.0),
+        (_ts(41), 100.0),
+        (_ts(58), 80.0),
+    ]
+
+    from_pairs = build_window_samples(
+        raw_samples=pairs,
+        previous_sample=previous_sample,
+        start=_ts(0),
+        end=_ts(50),
+        carry_forward_seconds=300.0,
+    )
+    from_series = build_window_samples(
+        raw_samples=PowerSeries.from_pairs(pairs),
+        previous_sample=previous_sample,
+        start=_ts(0),
+        end=_ts(50),
+        carry_forward_seconds=300.0,
+    )
+
+    expected = [
+        (_ts(0), 500.0),
+        (_ts(3), 600.0),
+        (_ts(10), 350.0),
+        (_ts(41), 100.0),
+        (_ts(46), 100.0),
+    ]
+    assert list(from_pairs.pairs()) == expected
+    assert list(from_series.pairs()) == expected
+    assert integrate_hourly(
+        from_series, max_interval_seconds=300.0
+    ) == integrate_hourly(
+        from_series.to_samples(),
+        max_interval_seconds=300.0,
+    )
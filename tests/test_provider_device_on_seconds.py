@@ -0,0 +1,297 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from app.api.routes import provider_measurements as routes
+from app.repositories.measurement_repository import SeriesVersion
+from app.services.current_hour_pool import CurrentHourPool, DeviceStateSnapshot
+from app.services.energy_integration import (
+    build_window_samples,
+    integrate_window_energy,
+)
+
+
+class FakeDeviceEventRepo:
+    def __init__(self, previous, events):
+        self.previous = previous
+        self.events = events
+        self.calls: list[tuple[str, tuple[int, ...]]] = []
+
+    def get_last_states_for_devices_before(self, *, device_ids, before):
+        self.calls.append(("previous", tuple(device_ids)))
+        return {
+            device_id: self.previous[device_id]
+            for device_id in device_ids
+            if device_id in self.previous
+        }
+
+    def list_states_for_devices(self, *, device_ids, date_start, date_end):
+        self.calls.append(("window", tuple(device_ids)))
+        return {
+            device_id: [
+                event
+                for event in self.events[device_id]
+                if date_start <= event.created_at <= date_end
+            ]
+            for device_id in device_ids
+            if device_id in self.events
+        }
+
+    def get_state_version(self, *, device_ids, date_start, date_end):
+        created = [
+            event.created_at
+            for device_id in device_ids
+            for event in self.events.get(device_id, [])
+            if date_start <= event.created_at <= date_end
+        ]
+        return SeriesVersion(
+            row_count=len(created),
+            last_measured_at=max(created, default=None),
+        )
+
+
+def _power_version(samples, date_start, date_end, non_null=False):
+    measured = [
+        ts
+        for ts, value in samples
+        if date_start <= ts <= date_end and not (non_null and value is None)
+    ]
+    return SeriesVersion(
+        row_count=len(measured),
+        last_measured_at=max(measured, default=None),
+    )
+
+
+def _device(device_id, *, manual_state=None, last_state_change_at=None):
+    return SimpleNamespace(
+        id=device_id,
+        rated_power=1.0,
+        manual_state=manual_state,
+        last_state_change_at=last_state_change_at,
+    )
+
+
+def _state(event_id, minute, pin_state):
+    return SimpleNamespace(
+        id=event_id,
+        created_at=datetime(2026, 3, 10, 12, minute, tzinfo=timezone.utc),
+        pin_state=pin_state,
+        device_state=None,
+    )
+
+
+def _on_seconds(pool, devices, end):
+    return routes._calculate_devices_on_seconds(
+        devices=devices,
+        previous_state_events=pool.previous_state_events,
+        hour_state_events=pool.state_events,
+        start=pool.hour_start,
+        end=end,
+    )
+
+
+def test_on_seconds_of_all_devices_come_from_two_queries_and_then_deltas():
+    start = datetime(2026, 3, 10, 12, 0, tzinfo=timezone.utc)
+    end = datetime(2026, 3, 10, 12, 30, tzinfo=timezone.utc)
+    event_repo = FakeDeviceEventRepo(
+        previous={
+            1: SimpleNamespace(
+                id=1, created_at=start, pin_state=True, device_state=None
+            ),
+        },
+        events={
+            1: [_state(11, 10, False)],
+            2: [_state(21, 5, True), _state(22, 20, False)],
+        },
+    )
+    devices = [
+        _device(1),
+        _device(2),
+        # No events at all: falls back to the device snapshot.
+        _device(3, manual_state=True),
+        _device(4),
+    ]
+    pool = CurrentHourPool(hour_start=start, sample_hold_seconds=None)
+
+    routes._advance_current_hour_state_events(
+        pool=pool,
+        event_repo=event_repo,
+        device_ids=[device.id for device in devices],
+        end=end,
+    )
+
+    assert event_repo.calls == [("previous", (1, 2, 3, 4)), ("window", (1, 2, 3, 4))]
+    assert _on_seconds(pool, devices, end) == {1: 600.0, 2: 900.0, 3: 1800.0, 4: 0.0}
+
+    # The next poll reads only events from the cursor on and does not count
+    # the event at the cursor twice.
+    later = datetime(2026, 3, 10, 12, 40, tzinfo=timezone.utc)
+    event_repo.events[1].append(_state(12, 35, True))
+    event_repo.calls.clear()
+    routes._advance_current_hour_state_events(
+        pool=pool,
+        event_repo=event_repo,
+        device_ids=[device.id for device in devices],
+        end=later,
+    )
+
+    assert event_repo.calls == [("window", (1, 2, 3, 4))]
+    assert [event.id for event in pool.state_events[2]] == [21, 22]
+    assert _on_seconds(pool, devices, later) == {1: 900.0, 2: 900.0, 3: 2400.0, 4: 0.0}
+
+
+def test_current_hour_pool_matches_full_window_integration():
+    start = datetime(2026, 3, 10, 12, 0, tzinfo=timezone.utc)
+    previous_sample = (datetime(2026, 3, 10, 11, 58, tzinfo=timezone.utc), 400.0)
+    raw_samples = [
+        (datetime(2026, 3, 10, 12, 3, tzinfo=timezone.utc), 600.0),
+        (datetime(2026, 3, 10, 12, 10, tzinfo=timezone.utc), 300.0),
+        (datetime(2026, 3, 10, 12, 10, tzinfo=timezone.utc), 350.0),
+        (datetime(2026, 3, 10, 12, 41, tzinfo=timezone.utc), 100.0),
+    ]
+
+    class FakeMeasurementRepo:
+        def __init__(self):
+            self.queries = []
+
+        def get_last_power_sample_before(self, *, provider_id, before):
+            return previous_sample
+
+        def list_power_samples(self, *, provider_id, date_start, date_end):
+            self.queries.append((date_start, date_end))
+            return [
+                (ts, value) for ts, value in raw_samples if date_start <= ts <= date_end
+            ]
+
+        def get_power_version(
+            self, *, provider_id, date_start, date_end, non_null=False
+        ):
+            return _power_version(raw_samples, date_start, date_end, non_null)
+
+    repo = FakeMeasurementRepo()
+    pool = CurrentHourPool(hour_start=start, sample_hold_seconds=900.0)
+    for minute in (5, 12, 30, 50):
+        end = datetime(2026, 3, 10, 12, minute, tzinfo=timezone.utc)
+        routes._advance_current_hour_samples(
+            pool=pool, repo=repo, provider_id=1, end=end
+        )
+
+        expected = integrate_window_energy(
+            build_window_samples(
+                raw_samples=[sample for sample in raw_samples if sample[0] <= end],
+                previous_sample=previous_sample,
+                start=start,
+                end=end,
+                carry_forward_seconds=900.0,
+            ),
+            max_interval_seconds=900.0,
+        )
+        assert abs(pool.energy_until(end) - expected) < 1e-9
+
+    assert pool.current_power == 100.0
+    assert repo.queries[1][0] == datetime(2026, 3, 10, 12, 3, tzinfo=timezone.utc)
+
+
+def test_current_hour_pool_keeps_snapshots_and_resets_on_writes_behind_its_cursors():
+    start = datetime(2026, 3, 10, 12, 0, tzinfo=timezone.utc)
+    samples = [
+        (datetime(2026, 3, 10, 12, 0, tzinfo=timezone.utc), 1000.0),
+        (datetime(2026, 3, 10, 12, 30, tzinfo=timezone.utc), 1000.0),
+    ]
+
+    class FakeMeasurementRepo:
+        def get_last_power_sample_before(self, *, provider_id, before):
+            return None
+
+        def list_power_samples(self, *, provider_id, date_start, date_end):
+            return [
+                (ts, value) for ts, value in samples if date_start <= ts <= date_end
+            ]
+
+        def get_power_version(
+            self, *, provider_id, date_start, date_end, non_null=False
+        ):
+            return _power_version(samples, date_start, date_end, non_null)
+
+    event_repo = FakeDeviceEventRepo(previous={}, events={1: [_state(11, 10, True)]})
+    pool = CurrentHourPool(hour_start=start, sample_hold_seconds=None)
+    end = datetime(2026, 3, 10, 12, 40, tzinfo=timezone.utc)
+
+    def advance(end):
+        routes._advance_current_hour_samples(
+            pool=pool,
+            repo=FakeMeasurementRepo(),
+            provider_id=1,
+            end=end,
+        )
+        routes._advance_current_hour_state_events(
+            pool=pool,
+            event_repo=event_repo,
+            device_ids=[1],
+            end=end,
+        )
+
+    advance(end)
+    stored = pool.state_events[1][0]
+    assert isinstance(stored, DeviceStateSnapshot)
+    assert stored is not event_repo.events[1][0]
+    with pytest.raises(AttributeError):
+        stored.pin_state = False
+    assert pool.energy_until(end) == pytest.approx(1000.0 * 40 / 60)
+    assert _on_seconds(pool, [_device(1)], end) == {1: 1800.0}
+
+    # Another process writes a sample and an event behind both cursors.
+    samples.insert(1, (datetime(2026, 3, 10, 12, 15, tzinfo=timezone.utc), 0.0))
+    event_repo.events[1].append(_state(12, 20, False))
+    event_repo.events[1].sort(key=lambda event: event.created_at)
+    later = datetime(2026, 3, 10, 12, 45, tzinfo=timezone.utc)
+    advance(later)
+
+    assert pool.energy_until(later) == pytest.approx(1000.0 * 30 / 60)
+    assert _on_seconds(pool, [_device(1)], later) == {1: 600.0}
+
+
+def test_current_hour_pool_stays_incremental_with_null_power_rows():
+    start = datetime(2026, 3, 10, 12, 0, tzinfo=timezone.utc)
+    samples = [
+        (datetime(2026, 3, 10, 12, 5, tzinfo=timezone.utc), 600.0),
+        # An adapter that returned no power reading.
+        (datetime(2026, 3, 10, 12, 10, tzinfo=timezone.utc), None),
+        (datetime(2026, 3, 10, 12, 20, tzinfo=timezone.utc), 300.0),
+    ]
+
+    class FakeMeasurementRepo:
+        def __init__(self):
+            self.queries = []
+
+        def get_last_power_sample_before(self, *, provider_id, before):
+            return None
+
+        def list_power_samples(self, *, provider_id, date_start, date_end):
+            self.queries.append(date_start)
+            return [
+                (ts, value)
+                for ts, value in samples
+                if date_start <= ts <= date_end and value is not None
+            ]
+
+        def get_power_version(
+            self, *, provider_id, date_start, date_end, non_null=False
+        ):
+            return _power_version(samples, date_start, date_end, non_null)
+
+    repo = FakeMeasurementRepo()
+    pool = CurrentHourPool(hour_start=start, sample_hold_seconds=None)
+    for minute in (30, 40):
+        routes._advance_current_hour_samples(
+            pool=pool,
+            repo=repo,
+            provider_id=1,
+            end=datetime(2026, 3, 10, 12, minute, tzinfo=timezone.utc),
+        )
+
+    assert repo.queries == [start, datetime(2026, 3, 10, 12, 20, tzinfo=timezone.utc)]
+    assert pool.sample_count == 2
@@ -0,0 +1,235 @@
+from __future__ import annotations
+
+from datetime import date, datetime, timezone
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+from fastapi import Response
+
+from app.api.routes import provider_measurements as routes
+from app.repositories.measurement_repository import SeriesVersion
+from app.schemas.provider_energy_range import EnergyRangeGranularity
+from app.services.energy_rollup_service import (
+    list_missing_rollup_days,
+    materialize_day_rollups,
+)
+from app.services.power_sample_loader import PowerSampleLoader
+from smart_common.enums.unit import PowerUnit
+
+from tests.mocks import InMemoryEnergyRollupRepo
+
+
+class FakeMeasurementRepo:
+    def __init__(self, samples):
+        self.samples = samples
+
+    def list_power_samples(self, *, provider_id, date_start, date_end):
+        return [
+            (ts, value) for ts, value in self.samples if date_start <= ts <= date_end
+        ]
+
+    def get_last_power_sample_before(self, *, provider_id, before):
+        previous = [(ts, value) for ts, value in self.samples if ts < before]
+        return previous[-1] if previous else None
+
+    def get_power_version(self, *, provider_id, date_start, date_end, non_null=False):
+        window = [ts for ts, _ in self.samples if date_start <= ts <= date_end]
+        return SeriesVersion(len(window), max(window, default=None))
+
+
+def _samples():
+    samples = []
+    for day in (1, 2, 15):
+        samples.append((datetime(2026, 3, day, 10, 0, tzinfo=timezone.utc), 100.0))
+        samples.append((datetime(2026, 3, day, 12, 0, tzinfo=timezone.utc), 0.0))
+    samples.append((datetime(2026, 4, 2, 9, 0, tzinfo=timezone.utc), -50.0))
+    samples.append((datetime(2026, 4, 2, 10, 0, tzinfo=timezone.utc), 0.0))
+    return samples
+
+
+def _provider():
+    return SimpleNamespace(id=31, unit=PowerUnit.WATT)
+
+
+@pytest.fixture
+def queued(monkeypatch):
+    queued = []
+    monkeypatch.setattr(
+        routes,
+        "_enqueue_rollup_backfill",
+        lambda *, provider_id, days: queued.append((provider_id, days[0], days[-1])),
+    )
+    return queued
+
+
+def _run_backfill(rollup_repo, *, first_day, last_day, now):
+    repo = FakeMeasurementRepo(_samples())
+    for day in list_missing_rollup_days(
+        rollup_repo=rollup_repo,
+        provider_id=31,
+        first_day=first_day,
+        last_day=last_day,
+        now=now,
+    ):
+        materialize_day_rollups(
+            power_samples=PowerSampleLoader(repo, provider_id=31),
+            rollup_repo=rollup_repo,
+            day=day,
+            now=now,
+        )
+
+
+def _build(rollup_repo, *, date_from, date_to, granularity, now):
+    return routes._build_provider_energy_range(
+        provider=_provider(),
+        repo=FakeMeasurementRepo(_samples()),
+        rollup_repo=rollup_repo,
+        date_from=date_from,
+        date_to=date_to,
+        granularity=granularity,
+        now=now,
+    )
+
+
+def test_range_by_month_computes_missing_days_and_queues_them(queued):
+    rollup_repo = InMemoryEnergyRollupRepo(rows=[])
+    now = datetime(2026, 10, 17, 12, tzinfo=timezone.utc)
+
+    def build():
+        return _build(
+            rollup_repo,
+            date_from=date(2026, 3, 1),
+            date_to=date(2026, 4, 30),
+            granularity=EnergyRangeGranularity.MONTH,
+            now=now,
+        )
+
+    cold = build()
+
+    assert rollup_repo.upserts == 0
+    assert queued == [(31, date(2026, 3, 1), date(2026, 4, 30))]
+
+    _run_backfill(
+        rollup_repo,
+        first_day=date(2026, 3, 1),
+        last_day=date(2026, 4, 30),
+        now=now,
+    )
+    assert len(rollup_repo.materialized_days) == 61
+    queued.clear()
+    warm = build()
+
+    assert queued == []
+    for result in (cold, warm):
+        assert list(result.days.keys()) == ["2026-03", "2026-04"]
+        assert result.days["2026-03"].total_energy == 600.0
+        assert result.days["2026-04"].import_energy == 50.0
+        assert result.total_energy == 550.0
+        assert result.export_energy == 600.0
+        assert result.pending_days == 0
+
+
+def test_range_computes_at_most_max_cold_days(queued):
+    rollup_repo = InMemoryEnergyRollupRepo(rows=[])
+    now = datetime(2026, 10, 17, 12, tzinfo=timezone.utc)
+
+    def build():
+        return routes._build_provider_energy_range(
+            provider=_provider(),
+            repo=FakeMeasurementRepo(_samples()),
+            rollup_repo=rollup_repo,
+            date_from=date(2026, 3, 1),
+            date_to=date(2026, 4, 30),
+            granularity=EnergyRangeGranularity.MONTH,
+            now=now,
+            max_cold_days=31,
+        )
+
+    result = build()
+
+    assert rollup_repo.upserts == 0
+    assert result.pending_days == 30
+    assert queued == [(31, date(2026, 3, 1), date(2026, 4, 30))]
+    # Days past the cap are left out: April is still missing.
+    assert list(result.days.keys()) == ["2026-03"]
+
+    _run_backfill(
+        rollup_repo,
+        first_day=date(2026, 3, 1),
+        last_day=date(2026, 4, 30),
+        now=now,
+    )
+    queued.clear()
+    result = build()
+
+    assert result.pending_days == 0 and queued == []
+    assert result.days["2026-04"].import_energy == 50.0
+
+
+def test_range_by_hour_includes_open_hour_of_today(queued):
+    rollup_repo = InMemoryEnergyRollupRepo(rows=[])
+    now = datetime(2026, 3, 15, 11, 30, tzinfo=timezone.utc)
+
+    result = _build(
+        rollup_repo,
+        date_from=date(2026, 3, 14),
+        date_to=date(2026, 3, 20),
+        granularity=EnergyRangeGranularity.HOUR,
+        now=now,
+    )
+
+    assert list(result.days.keys()) == ["2026-03-15"]
+    assert [
+        (point.hour.hour, point.energy) for point in result.days["2026-03-15"].hours
+    ] == [
+        (10, 100.0),
+        (11, 50.0),
+    ]
+    assert not any(
+        hour_start >= datetime(2026, 3, 15, 11, tzinfo=timezone.utc)
+        for _, hour_start in rollup_repo.rows
+    )
+
+
+def test_range_rejects_reversed_and_oversized_ranges(monkeypatch):
+    provider_uuid = uuid4()
+    provider = SimpleNamespace(
+        id=31, uuid=provider_uuid, default_expected_interval_sec=None
+    )
+
+    class FakeProviderRepo:
+        def __init__(self, db):
+            self.db = db
+
+        def get_for_user_by_uuid(self, *, provider_uuid, user_id):
+            return provider
+
+    monkeypatch.setattr(routes, "ProviderRepository", FakeProviderRepo)
+
+    for date_from, date_to, granularity in (
+        (date(2026, 3, 2), date(2026, 3, 1), EnergyRangeGranularity.DAY),
+        (date(2026, 1, 1), date(2026, 3, 1), EnergyRangeGranularity.HOUR),
+    ):
+        with pytest.raises(Exception) as exc_info:
+            routes.list_provider_energy_range(
+                provider_uuid=provider_uuid,
+                response=Response(),
+                date_from=date_from,
+                date_to=date_to,
+                granularity=granularity,
+                db=object(),
+                current_user=SimpleNamespace(id=1),
+            )
+        assert exc_info.value.status_code == 422
+
+
+def test_truncate_to_granularity_uses_utc_calendar_periods():
+    ts = datetime(2026, 3, 15, 11, 30, tzinfo=timezone.utc)
+
+    assert routes._truncate_to_granularity(ts, EnergyRangeGranularity.HOUR) == datetime(
+        2026, 3, 15, 11, tzinfo=timezone.utc
+    )
+    assert routes._truncate_to_granularity(
+        ts, EnergyRangeGranularity.MONTH
+    ) == datetime(2026, 3, 1, tzinfo=timezone.utc)
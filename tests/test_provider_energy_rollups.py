@@ -0,0 +1,329 @@
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from sqlalchemy.dialects import postgresql
+
+from app.api.routes import provider_measurements as routes
+from app.models.provider_energy_rollup import ProviderEnergyHourlyRollup
+from app.repositories.measurement_repository import (
+    HourlyPowerStats,
+    MeasurementRepository,
+    SeriesVersion,
+)
+from app.services.energy_rollup_service import materialize_day_rollups
+from app.services.measurement_hooks import _collect_touched_hours
+from app.services.power_sample_loader import PowerSampleLoader
+from smart_common.enums.unit import PowerUnit
+
+from tests.mocks import InMemoryEnergyRollupRepo
+
+
+class FakeMeasurementRepo:
+    def __init__(self, samples):
+        self.samples = samples
+        self.power_queries: list[tuple[datetime, datetime]] = []
+
+    def list_power_samples(self, *, provider_id, date_start, date_end):
+        self.power_queries.append((date_start, date_end))
+        return [
+            (ts, value) for ts, value in self.samples if date_start <= ts <= date_end
+        ]
+
+    def get_last_power_sample_before(self, *, provider_id, before):
+        previous = [(ts, value) for ts, value in self.samples if ts < before]
+        return previous[-1] if previous else None
+
+    def list_measurements(self, *, provider_id, date_start, date_end):
+        return []
+
+    def get_power_version(self, *, provider_id, date_start, date_end, non_null=False):
+        window = [ts for ts, _ in self.samples if date_start <= ts <= date_end]
+        return SeriesVersion(len(window), max(window, default=None))
+
+
+def _provider():
+    return SimpleNamespace(id=21, unit=PowerUnit.WATT)
+
+
+def _materialize(repo, rollup_repo, day_start):
+    return materialize_day_rollups(
+        power_samples=PowerSampleLoader(repo, provider_id=21),
+        rollup_repo=rollup_repo,
+        day=day_start.date(),
+        now=day_start + timedelta(days=2),
+    )
+
+
+def test_past_day_is_computed_on_read_and_served_from_stored_rollups():
+    day_start = datetime(2026, 3, 10, tzinfo=timezone.utc)
+    day_end = day_start + timedelta(days=1) - timedelta(microseconds=1)
+    repo = FakeMeasurementRepo(
+        [
+            (datetime(2026, 3, 10, 10, 30, tzinfo=timezone.utc), 120.0),
+            (datetime(2026, 3, 10, 11, 30, tzinfo=timezone.utc), 0.0),
+        ]
+    )
+    rollup_repo = InMemoryEnergyRollupRepo(rows=[])
+
+    first = routes._build_provider_energy_series(
+        provider=_provider(),
+        repo=repo,
+        rollup_repo=rollup_repo,
+        start=day_start,
+        end=day_end,
+    )
+
+    # A read never writes; the rollup task stores the day.
+    assert rollup_repo.upserts == 0
+    assert _materialize(repo, rollup_repo, day_start) is True
+    assert len(rollup_repo.rows) == 24
+    hour_10 = rollup_repo.rows[(21, datetime(2026, 3, 10, 10, tzinfo=timezone.utc))]
+    assert hour_10.energy == 60.0
+    assert hour_10.export_energy == 60.0
+    assert hour_10.sample_count == 1
+    assert hour_10.last_sample_value == 120.0
+    assert (
+        rollup_repo.rows[(21, datetime(2026, 3, 10, 3, tzinfo=timezone.utc))].energy
+        is None
+    )
+
+    repo.power_queries.clear()
+    second = routes._build_provider_energy_series(
+        provider=_provider(),
+        repo=repo,
+        rollup_repo=rollup_repo,
+        start=day_start,
+        end=day_end,
+    )
+
+    assert repo.power_queries == []
+    assert rollup_repo.upserts == 1
+    for result in (first, second):
+        day = result.days["2026-03-10"]
+        assert [(point.hour.hour, point.energy) for point in day.hours] == [
+            (10, 60.0),
+            (11, 60.0),
+        ]
+        assert day.total_energy == 120.0
+
+
+def test_day_is_not_stored_when_samples_change_while_it_is_built():
+    day_start = datetime(2026, 3, 10, tzinfo=timezone.utc)
+    late_sample = (datetime(2026, 3, 10, 9, 0, tzinfo=timezone.utc), 50.0)
+
+    class LateWriteMeasurementRepo(FakeMeasurementRepo):
+        def list_power_samples(self, *, provider_id, date_start, date_end):
+            samples = super().list_power_samples(
+                provider_id=provider_id,
+                date_start=date_start,
+                date_end=date_end,
+            )
+            # Committed by an ingest right after the samples were read.
+            if late_sample not in self.samples:
+                self.samples.append(late_sample)
+            return samples
+
+    repo = LateWriteMeasurementRepo(
+        [(datetime(2026, 3, 10, 10, 30, tzinfo=timezone.utc), 120.0)]
+    )
+    rollup_repo = InMemoryEnergyRollupRepo(rows=[])
+
+    assert _materialize(repo, rollup_repo, day_start) is False
+    assert rollup_repo.upserts == 0
+
+    assert _materialize(repo, rollup_repo, day_start) is True
+    hour_9 = rollup_repo.rows[(21, datetime(2026, 3, 10, 9, tzinfo=timezone.utc))]
+    assert hour_9.sample_count == 1
+
+
+def test_open_hour_keeps_sample_hold_of_last_closed_sample():
+    day_start = datetime(2026, 3, 10, tzinfo=timezone.utc)
+    now = datetime(2026, 3, 10, 11, 20, tzinfo=timezone.utc)
+    samples = [
+        (datetime(2026, 3, 10, 10, 50, tzinfo=timezone.utc), 600.0),
+        (datetime(2026, 3, 10, 11, 15, tzinfo=timezone.utc), 300.0),
+    ]
+    stored = ProviderEnergyHourlyRollup(
+        provider_id=21,
+        hour_start=datetime(2026, 3, 10, 10, tzinfo=timezone.utc),
+        sample_hold_seconds=900.0,
+        energy=100.0,
+    )
+    empty_hours = [
+        ProviderEnergyHourlyRollup(
+            provider_id=21,
+            hour_start=day_start + timedelta(hours=hour),
+            sample_hold_seconds=900.0,
+            energy=None,
+        )
+        for hour in range(10)
+    ]
+    repo = FakeMeasurementRepo(samples)
+    rollup_repo = InMemoryEnergyRollupRepo(rows=[*empty_hours, stored])
+
+    result = routes._build_provider_energy_series(
+        provider=_provider(),
+        repo=repo,
+        rollup_repo=rollup_repo,
+        start=day_start,
+        end=now,
+        max_interval_seconds=900.0,
+    )
+
+    # 10:50 -> 11:05 is capped by the 15 min hold, so only 5 min of 600 W
+    # reach the open hour, followed by 5 min of 300 W until "now".
+    day = result.days["2026-03-10"]
+    assert [(point.hour.hour, point.energy) for point in day.hours] == [
+        (10, 100.0),
+        (11, 75.0),
+    ]
+    assert repo.power_queries == [(datetime(2026, 3, 10, 11, tzinfo=timezone.utc), now)]
+    assert rollup_repo.upserts == 0
+
+
+def test_measurement_writes_report_earliest_touched_hour_per_provider_day():
+    measurements = [
+        SimpleNamespace(
+            __tablename__="provider_measurements",
+            provider_id=5,
+            measured_at=datetime(2026, 3, 10, 14, 12, tzinfo=timezone.utc),
+        ),
+        SimpleNamespace(
+            __tablename__="provider_measurements",
+            provider_id=5,
+            measured_at=datetime(2026, 3, 10, 9, 59),
+        ),
+        SimpleNamespace(
+            __tablename__="provider_measurements",
+            provider_id=5,
+            measured_at=datetime(2026, 3, 11, 0, 5, tzinfo=timezone.utc),
+        ),
+        SimpleNamespace(
+            __tablename__="provider_metric_samples",
+            provider_id=6,
+            measured_at=datetime(2026, 3, 10, 8, 0, tzinfo=timezone.utc),
+        ),
+    ]
+
+    assert _collect_touched_hours(measurements) == {
+        (5, date(2026, 3, 10)): datetime(2026, 3, 10, 9, tzinfo=timezone.utc),
+        (5, date(2026, 3, 11)): datetime(2026, 3, 11, 0, tzinfo=timezone.utc),
+    }
+
+
+def test_pushdown_builds_rollups_from_hourly_rows(monkeypatch):
+    monkeypatch.setenv("ENERGY_INTEGRATION_PUSHDOWN", "true")
+    day_start = datetime(2026, 3, 10, tzinfo=timezone.utc)
+    day_end = day_start + timedelta(days=1) - timedelta(microseconds=1)
+    hour_10 = datetime(2026, 3, 10, 10, tzinfo=timezone.utc)
+    hour_11 = datetime(2026, 3, 10, 11, tzinfo=timezone.utc)
+
+    class PushdownMeasurementRepo(FakeMeasurementRepo):
+        def integrate_hourly_power(
+            self, *, provider_id, date_start, date_end, max_interval_seconds=None
+        ):
+            return [
+                HourlyPowerStats(
+                    hour_start=hour,
+                    energy=60.0,
+                    sample_count=1,
+                    first_sample_at=hour + timedelta(minutes=30),
+                    first_sample_value=value,
+                    last_sample_at=hour + timedelta(minutes=30),
+                    last_sample_value=value,
+                )
+                for hour, value in ((hour_10, 120.0), (hour_11, 0.0))
+            ]
+
+    repo = PushdownMeasurementRepo([])
+    rollup_repo = InMemoryEnergyRollupRepo(rows=[])
+
+    assert _materialize(repo, rollup_repo, day_start) is True
+    result = routes._build_provider_energy_series(
+        provider=_provider(),
+        repo=repo,
+        rollup_repo=rollup_repo,
+        start=day_start,
+        end=day_end,
+    )
+
+    assert repo.power_queries == []
+    assert len(rollup_repo.rows) == 24
+    assert rollup_repo.rows[(21, hour_10)].last_sample_value == 120.0
+    assert (
+        rollup_repo.rows[(21, datetime(2026, 3, 10, 3, tzinfo=timezone.utc))].energy
+        is None
+    )
+    assert [
+        (point.hour.hour, point.energy) for point in result.days["2026-03-10"].hours
+    ] == [
+        (10, 60.0),
+        (11, 60.0),
+    ]
+
+
+def test_pushdown_falls_back_to_python_for_compacted_windows(monkeypatch):
+    monkeypatch.setenv("ENERGY_INTEGRATION_PUSHDOWN", "true")
+    day_start = datetime(2026, 3, 10, tzinfo=timezone.utc)
+
+    class CompactedMeasurementRepo(FakeMeasurementRepo):
+        def integrate_hourly_power(
+            self, *, provider_id, date_start, date_end, max_interval_seconds=None
+        ):
+            return None
+
+    repo = CompactedMeasurementRepo(
+        [
+            (datetime(2026, 3, 10, 10, 30, tzinfo=timezone.utc), 120.0),
+            (datetime(2026, 3, 10, 11, 30, tzinfo=timezone.utc), 0.0),
+        ]
+    )
+
+    result = routes._build_provider_energy_series(
+        provider=_provider(),
+        repo=repo,
+        rollup_repo=InMemoryEnergyRollupRepo(rows=[]),
+        start=day_start,
+        end=day_start + timedelta(days=1) - timedelta(microseconds=1),
+    )
+
+    assert repo.power_queries
+    assert result.days["2026-03-10"].total_energy == 120.0
+
+
+def test_pushdown_query_integrates_with_lead_and_hour_split():
+    recent = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    statements = []
+
+    class RecordingSession:
+        def execute(self, statement):
+            statements.append(str(statement.compile(dialect=postgresql.dialect())))
+            return []
+
+    repo = MeasurementRepository.__new__(MeasurementRepository)
+    repo.db = RecordingSession()
+
+    assert (
+        repo.integrate_hourly_power(
+            provider_id=21,
+            date_start=recent - timedelta(hours=3),
+            date_end=recent,
+            max_interval_seconds=900.0,
+        )
+        == []
+    )
+    assert (
+        repo.integrate_hourly_power(
+            provider_id=21,
+            date_start=recent - timedelta(days=30),
+            date_end=recent - timedelta(days=29),
+        )
+        is None
+    )
+
+    (sql,) = statements
+    assert "DISTINCT ON (provider_measurements.measured_at)" in sql
+    assert "lead(samples.ts" in sql and "least(" in sql
+    assert "JOIN LATERAL generate_series" in sql
@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta, timezone
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+from fastapi import Response
+
+from app.api.routes import provider_measurements as routes
+from app.repositories.measurement_repository import SeriesVersion
+from smart_common.enums.provider_telemetry import (
+    ProviderTelemetryCapability,
+    TelemetryAggregationMode,
+    TelemetryChartType,
+)
+from smart_common.enums.unit import PowerUnit
+from smart_common.providers.enums import ProviderKind
+
+from tests.mocks import InMemoryEnergyRollupRepo
+
+DAY = date(2026, 3, 10)
+DAY_START = datetime(2026, 3, 10, tzinfo=timezone.utc)
+SINCE = datetime(2026, 3, 10, 10, 20, tzinfo=timezone.utc)
+SAMPLES = [
+    (DAY_START + timedelta(hours=9, minutes=10 * index), float(1 + index % 3))
+    for index in range(12)
+]
+
+
+class FakeMeasurementRepo:
+    queries: list[tuple[str, datetime]] = []
+
+    def __init__(self, db):
+        self.db = db
+
+    def list_power_samples(self, *, provider_id, date_start, date_end):
+        self.queries.append(("power", date_start))
+        return [(ts, value) for ts, value in SAMPLES if date_start <= ts <= date_end]
+
+    def get_last_power_sample_before(self, *, provider_id, before):
+        return None
+
+    def get_power_version(self, *, provider_id, date_start, date_end):
+        return SeriesVersion(len(SAMPLES), SAMPLES[-1][0])
+
+    def get_metric_version(
+        self, *, provider_id, date_start, date_end, metric_keys=None
+    ):
+        return SeriesVersion(len(SAMPLES), SAMPLES[-1][0])
+
+    def list_measurements(self, *, provider_id, date_start, date_end):
+        self.queries.append(("measurements", date_start))
+        return [
+            SimpleNamespace(
+                id=index,
+                measured_at=ts,
+                measured_value=value,
+                measured_unit="kW",
+                metadata_payload={},
+                extra_data={},
+            )
+            for index, (ts, value) in enumerate(SAMPLES)
+            if date_start <= ts <= date_end
+        ]
+
+    def get_metric_definition(self, *, provider_id, metric_key):
+        return SimpleNamespace(
+            metric_key=metric_key,
+            label=metric_key,
+            unit="W",
+            chart_type=TelemetryChartType.LINE,
+            aggregation_mode=(
+                TelemetryAggregationMode.RAW
+                if metric_key == "battery_soc"
+                else TelemetryAggregationMode.HOURLY_INTEGRAL
+            ),
+            capability_tag=ProviderTelemetryCapability.ENERGY_STORAGE,
+        )
+
+    def list_metric_samples(self, *, provider_id, metric_key, date_start, date_end):
+        self.queries.append(("metric", date_start))
+        return [
+            SimpleNamespace(measured_at=ts, value=value)
+            for ts, value in SAMPLES
+            if date_start <= ts <= date_end
+        ]
+
+
+@pytest.fixture
+def provider(monkeypatch):
+    InMemoryEnergyRollupRepo.rows = {}
+    FakeMeasurementRepo.queries = []
+    provider = SimpleNamespace(
+        id=5,
+        uuid=uuid4(),
+        user_id=2,
+        kind=ProviderKind.POWER,
+        unit=PowerUnit.KILOWATT,
+        default_expected_interval_sec=900,
+        updated_at=DAY_START,
+    )
+
+    class FakeProviderRepo:
+        def __init__(self, db):
+            self.db = db
+
+        def get_for_user_by_uuid(self, *, provider_uuid, user_id):
+            return provider if provider_uuid == provider.uuid else None
+
+    monkeypatch.setattr(routes, "ProviderRepository", FakeProviderRepo)
+    monkeypatch.setattr(routes, "MeasurementRepository", FakeMeasurementRepo)
+    monkeypatch.setattr(routes, "EnergyRollupRepository", InMemoryEnergyRollupRepo)
+    monkeypatch.setattr(routes, "get_telemetry_cache", lambda: None)
+    return provider
+
+
+def _call(route, provider, **kwargs):
+    return route(
+        provider_uuid=provider.uuid,
+        response=Response(),
+        selected_date=DAY,
+        db=object(),
+        current_user=SimpleNamespace(id=provider.user_id),
+        **kwargs,
+    )
+
+
+def test_power_since_returns_only_later_entries(provider):
+    result = _call(routes.list_provider_power, provider, since=SINCE)
+
+    entries = result.days["2026-03-10"].entries
+    assert [entry.timestamp for entry in entries] == [
+        ts for ts, _ in SAMPLES if ts > SINCE
+    ]
+    assert FakeMeasurementRepo.queries == [("power", SINCE)]
+
+
+def test_energy_since_keeps_day_totals_and_recomputes_open_hour(provider):
+    full = _call(routes.list_provider_energy, provider).days["2026-03-10"]
+    FakeMeasurementRepo.queries = []
+
+    delta = _call(routes.list_provider_energy, provider, since=SINCE).days["2026-03-10"]
+
+    assert delta.total_energy == full.total_energy
+    assert delta.import_energy == full.import_energy
+    assert delta.export_energy == full.export_energy
+    assert [point.hour for point in delta.hours] == [
+        point.hour for point in full.hours if point.hour >= routes._floor_hour(SINCE)
+    ]
+    assert [entry.measured_at for entry in delta.entries] == [
+        entry.measured_at for entry in full.entries if entry.measured_at > SINCE
+    ]
+    assert ("measurements", SINCE) in FakeMeasurementRepo.queries
+
+
+def test_metric_since_matches_the_tail_of_the_full_series(provider):
+    for metric_key in ("battery_soc", "grid_power"):
+        full = _call(routes.get_provider_metric_series, provider, metric_key=metric_key)
+        delta = _call(
+            routes.get_provider_metric_series,
+            provider,
+            metric_key=metric_key,
+            since=SINCE,
+        )
+
+        assert delta.entries == [
+            entry for entry in full.entries if entry.timestamp > SINCE
+        ]
+        assert delta.hours == [
+            point for point in full.hours if point.hour >= routes._floor_hour(SINCE)
+        ]
+
+
+def test_since_before_the_day_returns_the_full_day(provider):
+    full = _call(routes.list_provider_power, provider)
+    delta = _call(
+        routes.list_provider_power,
+        provider,
+        since=DAY_START - timedelta(hours=1),
+    )
+
+    assert delta == full
@@ -0,0 +1,235 @@
+from __future__ import annotations
+
+from collections import Counter
+from datetime import date, datetime, timezone
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+from fastapi import HTTPException, Response
+
+from app.api.routes import provider_measurements as routes
+from app.repositories.measurement_repository import SeriesVersion
+from app.services.telemetry_cache import MemoryCacheBackend, TelemetryCache
+from smart_common.enums.unit import PowerUnit
+from smart_common.providers.enums import (
+    ProviderKind,
+    ProviderPowerSource,
+    ProviderType,
+    ProviderVendor,
+)
+
+from tests.mocks import InMemoryRevenueLedgerRepo
+
+
+def _provider(provider_id: int, *, has_energy_storage: bool = False):
+    return SimpleNamespace(
+        id=provider_id,
+        uuid=uuid4(),
+        name=f"Roof {provider_id}",
+        provider_type=ProviderType.API,
+        kind=ProviderKind.POWER,
+        vendor=ProviderVendor.GOODWE,
+        external_id=f"station-{provider_id}",
+        unit=PowerUnit.WATT,
+        power_source=ProviderPowerSource.METER,
+        value_min=0.0,
+        value_max=10000.0,
+        default_expected_interval_sec=None,
+        has_power_meter=False,
+        has_energy_storage=has_energy_storage,
+        enabled=True,
+        config={},
+        telemetry_metrics=[],
+        created_at=datetime(2026, 3, 1, tzinfo=timezone.utc),
+        updated_at=datetime(2026, 3, 10, tzinfo=timezone.utc),
+        last_value=None,
+        user_id=8,
+    )
+
+
+def _ts(hour: int) -> datetime:
+    return datetime(2026, 3, 10, hour, 0, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def batch_env(monkeypatch):
+    providers = [_provider(41), _provider(42, has_energy_storage=True)]
+    power = {
+        41: [(_ts(10), 100.0), (_ts(11), 0.0)],
+        42: [(_ts(8), 250.0), (_ts(10), 50.0), (_ts(12), 0.0)],
+    }
+    soc = {42: [SimpleNamespace(measured_at=_ts(9), value=55.0, unit="%")]}
+    calls = Counter()
+    cache = TelemetryCache(MemoryCacheBackend())
+
+    class FakeProviderRepo:
+        def __init__(self, db):
+            self.db = db
+
+        def get_for_user_by_uuid(self, *, provider_uuid, user_id):
+            calls["provider"] += 1
+            return next((p for p in providers if p.uuid == provider_uuid), None)
+
+        def list_for_user_by_uuids(self, *, provider_uuids, user_id):
+            calls["providers"] += 1
+            return [
+                p
+                for p in providers
+                if p.uuid in provider_uuids and p.user_id == user_id
+            ]
+
+    class FakeMeasurementRepo:
+        def __init__(self, db):
+            self.db = db
+
+        def list_power_samples(self, *, provider_id, date_start, date_end):
+            calls["power_samples"] += 1
+            return list(power.get(provider_id, []))
+
+        def list_power_samples_for_providers(
+            self, *, provider_ids, date_start, date_end
+        ):
+            calls["power_samples_for_providers"] += 1
+            return {
+                provider_id: list(power.get(provider_id, []))
+                for provider_id in provider_ids
+            }
+
+        def get_last_power_sample_before(self, *, provider_id, before):
+            return None
+
+        def get_power_version(self, *, provider_id, date_start, date_end):
+            samples = power.get(provider_id, [])
+            return SeriesVersion(len(samples), samples[-1][0] if samples else None)
+
+        def get_metric_version(
+            self, *, provider_id, date_start, date_end, metric_keys=None
+        ):
+            return SeriesVersion(len(soc.get(provider_id, [])), None)
+
+        def list_measurements(self, *, provider_id, date_start, date_end):
+            return []
+
+        def list_metric_definitions(self, *, provider_id):
+            return []
+
+        def list_metric_samples_for_keys(
+            self, *, provider_id, metric_keys, date_start, date_end
+        ):
+            calls["metric_samples"] += 1
+            return (
+                {"battery_soc": list(soc.get(provider_id, []))}
+                if "battery_soc" in metric_keys
+                else {}
+            )
+
+        def list_metric_samples_for_providers(
+            self, *, metric_keys_by_provider, date_start, date_end
+        ):
+            calls["metric_samples_for_providers"] += 1
+            return {
+                provider_id: {"battery_soc": list(soc.get(provider_id, []))}
+                for provider_id, keys in metric_keys_by_provider.items()
+                if "battery_soc" in keys
+            }
+
+    class FakeRollupRepo:
+        def __init__(self, db):
+            self.db = db
+
+        def list_for_window(self, *, provider_id, date_start, date_end):
+            return []
+
+        def upsert_hours(self, *, provider_id, rows):
+            return None
+
+    class FakeMarketPriceRepo:
+        def __init__(self, db):
+            self.db = db
+
+        def get_active_at(self, *, market, timestamp):
+            return None
+
+        def get_latest_before(self, *, market, timestamp):
+            return None
+
+        def list_between(self, *, market, date_start, date_end):
+            calls["market_prices"] += 1
+            return []
+
+        def get_version(self, *, markets, date_start, date_end, started_before):
+            return (0, 0, None)
+
+    monkeypatch.setattr(routes, "ProviderRepository", FakeProviderRepo)
+    monkeypatch.setattr(routes, "MeasurementRepository", FakeMeasurementRepo)
+    monkeypatch.setattr(routes, "EnergyRollupRepository", FakeRollupRepo)
+    monkeypatch.setattr(routes, "MarketEnergyPriceRepository", FakeMarketPriceRepo)
+    InMemoryRevenueLedgerRepo.rows = {}
+    monkeypatch.setattr(routes, "RevenueLedgerRepository", InMemoryRevenueLedgerRepo)
+    monkeypatch.setattr(routes, "get_telemetry_cache", lambda: cache)
+    monkeypatch.setattr(routes, "get_market_price_store", lambda: None)
+    return SimpleNamespace(providers=providers, calls=calls)
+
+
+def _batch(env, provider_uuids, selected_date=date(2026, 3, 10)):
+    return routes.get_providers_telemetry(
+        provider_uuids=provider_uuids,
+        selected_date=selected_date,
+        db=object(),
+        current_user=SimpleNamespace(id=8),
+    )
+
+
+def test_batch_telemetry_matches_single_provider_responses(batch_env, monkeypatch):
+    monkeypatch.setattr(routes, "get_telemetry_cache", lambda: None)
+    uuids = [provider.uuid for provider in batch_env.providers]
+
+    batch = _batch(batch_env, uuids)
+
+    assert batch.date == "2026-03-10"
+    assert list(batch.providers) == [str(uuid) for uuid in uuids]
+    for provider in batch_env.providers:
+        single = routes.get_provider_telemetry(
+            provider_uuid=provider.uuid,
+            response=Response(),
+            selected_date=date(2026, 3, 10),
+            db=object(),
+            current_user=SimpleNamespace(id=8),
+        )
+        assert batch.providers[str(provider.uuid)].model_dump(
+            mode="json"
+        ) == single.model_dump(mode="json")
+
+
+def test_batch_telemetry_loads_shared_data_once(batch_env, monkeypatch):
+    monkeypatch.setattr(routes, "get_telemetry_cache", lambda: None)
+
+    _batch(batch_env, [provider.uuid for provider in batch_env.providers])
+
+    assert batch_env.calls["providers"] == 1
+    assert batch_env.calls["provider"] == 0
+    assert batch_env.calls["power_samples_for_providers"] == 1
+    assert batch_env.calls["power_samples"] == 0
+    assert batch_env.calls["metric_samples_for_providers"] == 1
+    assert batch_env.calls["metric_samples"] == 0
+    assert batch_env.calls["market_prices"] == 2
+
+
+def test_batch_telemetry_serves_past_days_from_cache(batch_env):
+    uuids = [provider.uuid for provider in batch_env.providers]
+    first = _batch(batch_env, uuids)
+    batch_env.calls.clear()
+
+    second = _batch(batch_env, uuids)
+
+    assert batch_env.calls["power_samples_for_providers"] == 0
+    assert second.model_dump(mode="json") == first.model_dump(mode="json")
+
+
+def test_batch_telemetry_rejects_foreign_provider(batch_env):
+    with pytest.raises(HTTPException) as exc:
+        _batch(batch_env, [batch_env.providers[0].uuid, uuid4()])
+
+    assert exc.value.status_code == 404
+    assert batch_env.calls["power_samples_for_providers"] == 0
@@ -0,0 +1,300 @@
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta, timezone
+from types import SimpleNamespace
+from uuid import uuid4
+
+import orjson
+import pytest
+import redis
+from fastapi import Response
+
+from app.api.routes import provider_measurements as routes
+from app.repositories.measurement_repository import SeriesVersion
+from app.services.telemetry_cache import MemoryCacheBackend, TelemetryCache
+from smart_common.enums.unit import PowerUnit
+from smart_common.providers.enums import (
+    ProviderKind,
+    ProviderPowerSource,
+    ProviderType,
+    ProviderVendor,
+)
+
+from tests.mocks import InMemoryRevenueLedgerRepo
+
+
+def _provider():
+    return SimpleNamespace(
+        id=41,
+        uuid=uuid4(),
+        name="Cached roof",
+        provider_type=ProviderType.API,
+        kind=ProviderKind.POWER,
+        vendor=ProviderVendor.GOODWE,
+        external_id="station-41",
+        unit=PowerUnit.WATT,
+        power_source=ProviderPowerSource.METER,
+        value_min=0.0,
+        value_max=10000.0,
+        default_expected_interval_sec=None,
+        has_power_meter=False,
+        has_energy_storage=False,
+        enabled=True,
+        config={},
+        telemetry_metrics=[],
+        created_at=datetime(2026, 3, 1, tzinfo=timezone.utc),
+        updated_at=datetime(2026, 3, 10, tzinfo=timezone.utc),
+        last_value=None,
+        user_id=8,
+    )
+
+
+@pytest.fixture
+def telemetry_env(monkeypatch):
+    provider = _provider()
+    calls = {"power_samples": 0, "power_version": 0}
+    versions = {
+        "power": SeriesVersion(2, datetime(2026, 3, 10, 11, 0, tzinfo=timezone.utc))
+    }
+    cache = TelemetryCache(MemoryCacheBackend())
+
+    class FakeProviderRepo:
+        def __init__(self, db):
+            self.db = db
+
+        def get_for_user_by_uuid(self, *, provider_uuid, user_id):
+            return provider if provider_uuid == provider.uuid else None
+
+    class FakeMeasurementRepo:
+        def __init__(self, db):
+            self.db = db
+
+        def list_power_samples(self, *, provider_id, date_start, date_end):
+            calls["power_samples"] += 1
+            return [
+                (datetime(2026, 3, 10, 10, 0, tzinfo=timezone.utc), 100.0),
+                (datetime(2026, 3, 10, 11, 0, tzinfo=timezone.utc), 0.0),
+            ]
+
+        def get_last_power_sample_before(self, *, provider_id, before):
+            return None
+
+        def get_power_version(self, *, provider_id, date_start, date_end):
+            calls["power_version"] += 1
+            return versions["power"]
+
+        def get_metric_version(
+            self, *, provider_id, date_start, date_end, metric_keys=None
+        ):
+            return SeriesVersion(0, None)
+
+        def list_measurements(self, *, provider_id, date_start, date_end):
+            return []
+
+        def list_metric_definitions(self, *, provider_id):
+            return []
+
+        def list_metric_samples_for_keys(
+            self, *, provider_id, metric_keys, date_start, date_end
+        ):
+            return {}
+
+    class FakeRollupRepo:
+        def __init__(self, db):
+            self.db = db
+
+        def list_for_window(self, *, provider_id, date_start, date_end):
+            return []
+
+        def upsert_hours(self, *, provider_id, rows):
+            return None
+
+    class FakeMarketPriceRepo:
+        def __init__(self, db):
+            self.db = db
+
+        def get_active_at(self, *, market, timestamp):
+            return None
+
+        def get_latest_before(self, *, market, timestamp):
+            return None
+
+        def list_between(self, *, market, date_start, date_end):
+            return []
+
+        def get_version(self, *, markets, date_start, date_end, started_before):
+            return (0, 0, None)
+
+    monkeypatch.setattr(routes, "ProviderRepository", FakeProviderRepo)
+    monkeypatch.setattr(routes, "MeasurementRepository", FakeMeasurementRepo)
+    monkeypatch.setattr(routes, "EnergyRollupRepository", FakeRollupRepo)
+    monkeypatch.setattr(routes, "MarketEnergyPriceRepository", FakeMarketPriceRepo)
+    InMemoryRevenueLedgerRepo.rows = {}
+    monkeypatch.setattr(routes, "RevenueLedgerRepository", InMemoryRevenueLedgerRepo)
+    monkeypatch.setattr(routes, "get_telemetry_cache", lambda: cache)
+    monkeypatch.setattr(routes, "get_market_price_store", lambda: None)
+    return SimpleNamespace(
+        provider=provider, calls=calls, cache=cache, versions=versions
+    )
+
+
+def _request(env, selected_date):
+    return routes.get_provider_telemetry(
+        provider_uuid=env.provider.uuid,
+        response=Response(),
+        selected_date=selected_date,
+        db=object(),
+        current_user=SimpleNamespace(id=env.provider.user_id),
+    )
+
+
+def test_past_day_telemetry_is_served_from_cache(telemetry_env):
+    first = _request(telemetry_env, date(2026, 3, 10))
+    computed_calls = telemetry_env.calls["power_samples"]
+    second = _request(telemetry_env, date(2026, 3, 10))
+
+    assert telemetry_env.calls["power_samples"] == computed_calls
+    # A hit sends the stored JSON without building a model from it.
+    assert second.media_type == "application/json"
+    cached = orjson.loads(second.body)
+    assert cached == first.model_dump(mode="json")
+    assert [hour["energy"] for hour in cached["day"]["hours"]] == [100.0]
+
+
+def test_cache_hit_reads_the_source_versions_once(telemetry_env):
+    _request(telemetry_env, date(2026, 3, 10))
+    reads_before = telemetry_env.calls["power_version"]
+
+    hit = _request(telemetry_env, date(2026, 3, 10))
+
+    # The source version doubles as the ETag of the full response.
+    assert telemetry_env.calls["power_version"] == reads_before + 1
+    assert hit.headers["ETag"]
+    not_modified = routes.get_provider_telemetry(
+        provider_uuid=telemetry_env.provider.uuid,
+        response=Response(),
+        selected_date=date(2026, 3, 10),
+        if_none_match=hit.headers["ETag"],
+        db=object(),
+        current_user=SimpleNamespace(id=telemetry_env.provider.user_id),
+    )
+    assert not_modified.status_code == 304
+    assert telemetry_env.calls["power_version"] == reads_before + 2
+
+
+def test_late_measurement_and_market_writes_invalidate_cached_day(telemetry_env):
+    _request(telemetry_env, date(2026, 3, 10))
+
+    telemetry_env.cache.invalidate_day(
+        provider_id=telemetry_env.provider.id, day=date(2026, 3, 10)
+    )
+    calls_before = telemetry_env.calls["power_samples"]
+    _request(telemetry_env, date(2026, 3, 10))
+    assert telemetry_env.calls["power_samples"] > calls_before
+
+    telemetry_env.cache.invalidate_market_day(day=date(2026, 3, 10))
+    calls_before = telemetry_env.calls["power_samples"]
+    _request(telemetry_env, date(2026, 3, 10))
+    assert telemetry_env.calls["power_samples"] > calls_before
+
+    telemetry_env.cache.invalidate_market_day(day=date(2026, 3, 9))
+    calls_before = telemetry_env.calls["power_samples"]
+    _request(telemetry_env, date(2026, 3, 10))
+    assert telemetry_env.calls["power_samples"] == calls_before
+
+
+def test_today_is_never_cached(telemetry_env):
+    _request(telemetry_env, None)
+    calls_before = telemetry_env.calls["power_samples"]
+    _request(telemetry_env, None)
+
+    assert telemetry_env.calls["power_samples"] > calls_before
+
+
+def test_write_landing_during_computation_is_not_cached():
+    cache = TelemetryCache(MemoryCacheBackend())
+    lookup = cache.get(
+        provider_id=1,
+        day=date(2026, 3, 10),
+        sample_hold_seconds=None,
+        provider_updated_at=None,
+    )
+    assert lookup.payload is None
+
+    cache.invalidate_day(provider_id=1, day=date(2026, 3, 10))
+    cache.set(
+        lookup=lookup,
+        provider_id=1,
+        day=date(2026, 3, 10),
+        sample_hold_seconds=None,
+        provider_updated_at=None,
+        payload="{}",
+    )
+
+    assert (
+        cache.get(
+            provider_id=1,
+            day=date(2026, 3, 10),
+            sample_hold_seconds=None,
+            provider_updated_at=None,
+        ).payload
+        is None
+    )
+
+
+def test_writes_from_other_processes_change_the_source_version(telemetry_env):
+    _request(telemetry_env, date(2026, 3, 10))
+
+    # No local invalidation: only the stored data moved.
+    telemetry_env.versions["power"] = SeriesVersion(
+        3,
+        datetime(2026, 3, 10, 12, 0, tzinfo=timezone.utc),
+    )
+    calls_before = telemetry_env.calls["power_samples"]
+    _request(telemetry_env, date(2026, 3, 10))
+    assert telemetry_env.calls["power_samples"] > calls_before
+
+    calls_before = telemetry_env.calls["power_samples"]
+    _request(telemetry_env, date(2026, 3, 10))
+    assert telemetry_env.calls["power_samples"] == calls_before
+
+
+def test_day_is_cacheable_only_once_the_sample_hold_has_passed():
+    end = datetime(2026, 3, 10, 23, 59, 59, 999999, tzinfo=timezone.utc)
+
+    assert not routes._is_settled(
+        end=end,
+        now=end + timedelta(minutes=5),
+        max_interval_seconds=900.0,
+    )
+    assert routes._is_settled(
+        end=end,
+        now=end + timedelta(minutes=15),
+        max_interval_seconds=900.0,
+    )
+
+
+def test_failing_backend_is_bypassed_until_the_retry_window_ends():
+    class FailingBackend(MemoryCacheBackend):
+        calls = 0
+
+        def get(self, key, field, generation_keys):
+            FailingBackend.calls += 1
+            raise redis.ConnectionError("down")
+
+    cache = TelemetryCache(FailingBackend(), retry_after_seconds=60.0)
+    lookup_args = dict(
+        provider_id=1,
+        day=date(2026, 3, 10),
+        sample_hold_seconds=None,
+        provider_updated_at=None,
+    )
+
+    assert cache.get(**lookup_args).payload is None
+    assert cache.get(**lookup_args).payload is None
+    cache.invalidate_day(provider_id=1, day=date(2026, 3, 10))
+    assert FailingBackend.calls == 1
+
+    cache._unavailable_until = 0.0
+    cache.get(**lookup_args)
+    assert FailingBackend.calls == 2
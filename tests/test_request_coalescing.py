@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.services.request_coalescing import RequestCoalescer
+
+
+def _wait_for_followers(coalescer: RequestCoalescer, key, count: int) -> None:
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        with coalescer._lock:
+            flight = coalescer._flights.get(key)
+            if flight is not None and flight.followers >= count:
+                return
+        time.sleep(0.001)
+    raise AssertionError(f"{count} followers never joined {key}")
+
+
+def test_concurrent_callers_share_one_computation():
+    coalescer = RequestCoalescer()
+    release = threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        release.wait(timeout=5)
+        return {"hours": [1, 2, 3]}
+
+    key = ("telemetry", 41, "2026-03-10")
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        futures = [pool.submit(coalescer.run, key, compute)]
+        _wait_for_followers(coalescer, key, 0)
+        futures += [pool.submit(coalescer.run, key, compute) for _ in range(3)]
+        _wait_for_followers(coalescer, key, 3)
+        release.set()
+        results = [future.result(timeout=5) for future in futures]
+
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    assert coalescer._flights == {}
+
+
+def test_followers_receive_the_leader_exception_and_later_calls_recompute():
+    coalescer = RequestCoalescer()
+    release = threading.Event()
+
+    def failing():
+        release.wait(timeout=5)
+        raise LookupError("provider gone")
+
+    key = ("energy", 41)
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        leader = pool.submit(coalescer.run, key, failing)
+        _wait_for_followers(coalescer, key, 0)
+        follower = pool.submit(coalescer.run, key, lambda: "never")
+        _wait_for_followers(coalescer, key, 1)
+        release.set()
+        for future in (leader, follower):
+            with pytest.raises(LookupError):
+                future.result(timeout=5)
+
+    assert coalescer.run(key, lambda: "fresh") == "fresh"
+
+
+def test_different_keys_do_not_wait_for_each_other():
+    coalescer = RequestCoalescer()
+
+    assert coalescer.run(("energy", 1), lambda: 1) == 1
+    assert coalescer.run(("energy", 2), lambda: 2) == 2
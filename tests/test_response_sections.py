@@ -0,0 +1,239 @@
+from __future__ import annotations
+
+from collections import Counter
+from datetime import date, datetime, timezone
+from types import SimpleNamespace
+from uuid import uuid4
+
+import orjson
+import pytest
+from fastapi import HTTPException, Response
+
+from app.api.responses import ModelJSONResponse
+from app.api.routes import provider_measurements as routes
+from app.repositories.market_energy_price import MarketPriceVersion
+from app.repositories.measurement_repository import SeriesVersion
+from smart_common.enums.unit import PowerUnit
+from smart_common.providers.enums import (
+    ProviderKind,
+    ProviderPowerSource,
+    ProviderType,
+    ProviderVendor,
+)
+
+from tests.mocks import InMemoryRevenueLedgerRepo
+
+
+def _provider():
+    return SimpleNamespace(
+        id=41,
+        uuid=uuid4(),
+        name="Roof",
+        provider_type=ProviderType.API,
+        kind=ProviderKind.POWER,
+        vendor=ProviderVendor.GOODWE,
+        external_id="station-41",
+        unit=PowerUnit.WATT,
+        power_source=ProviderPowerSource.METER,
+        value_min=0.0,
+        value_max=10000.0,
+        default_expected_interval_sec=None,
+        has_power_meter=False,
+        has_energy_storage=True,
+        enabled=True,
+        config={},
+        telemetry_metrics=[],
+        created_at=datetime(2026, 3, 1, tzinfo=timezone.utc),
+        updated_at=datetime(2026, 3, 10, tzinfo=timezone.utc),
+        last_value=None,
+        user_id=8,
+    )
+
+
+@pytest.fixture
+def sections_env(monkeypatch):
+    provider = _provider()
+    calls = Counter()
+
+    class FakeProviderRepo:
+        def __init__(self, db):
+            self.db = db
+
+        def get_for_user_by_uuid(self, *, provider_uuid, user_id):
+            return provider if provider_uuid == provider.uuid else None
+
+    class FakeMeasurementRepo:
+        def __init__(self, db):
+            self.db = db
+
+        def get_power_version(self, *, provider_id, date_start, date_end):
+            return SeriesVersion(0, None)
+
+        def get_metric_version(
+            self, *, provider_id, date_start, date_end, metric_keys=None
+        ):
+            return SeriesVersion(0, None)
+
+        def list_power_samples(self, *, provider_id, date_start, date_end):
+            calls["power_samples"] += 1
+            return [
+                (datetime(2026, 3, 10, 10, 0, tzinfo=timezone.utc), 100.0),
+                (datetime(2026, 3, 10, 11, 0, tzinfo=timezone.utc), 0.0),
+            ]
+
+        def get_last_power_sample_before(self, *, provider_id, before):
+            return None
+
+        def list_measurements(self, *, provider_id, date_start, date_end):
+            calls["measurements"] += 1
+            return [
+                SimpleNamespace(
+                    id=1,
+                    measured_at=datetime(2026, 3, 10, 10, 0, tzinfo=timezone.utc),
+                    measured_value=100.0,
+                    measured_unit="W",
+                    metadata_payload={"heavy": True},
+                    extra_data={},
+                )
+            ]
+
+        def list_metric_definitions(self, *, provider_id):
+            calls["metric_definitions"] += 1
+            return []
+
+        def list_metric_samples_for_keys(
+            self, *, provider_id, metric_keys, date_start, date_end
+        ):
+            calls["metric_samples"] += 1
+            return {}
+
+    class FakeRollupRepo:
+        def __init__(self, db):
+            self.db = db
+
+        def list_for_window(self, *, provider_id, date_start, date_end):
+            calls["rollups"] += 1
+            return []
+
+        def upsert_hours(self, *, provider_id, rows):
+            return None
+
+    class FakeMarketPriceRepo:
+        def __init__(self, db):
+            self.db = db
+
+        def get_version(self, *, markets, date_start, date_end, started_before):
+            return MarketPriceVersion(0, 0, None)
+
+        def get_active_at(self, *, market, timestamp):
+            return None
+
+        def get_latest_before(self, *, market, timestamp):
+            return None
+
+        def list_between(self, *, market, date_start, date_end):
+            calls["market_prices"] += 1
+            return []
+
+    monkeypatch.setattr(routes, "ProviderRepository", FakeProviderRepo)
+    monkeypatch.setattr(routes, "MeasurementRepository", FakeMeasurementRepo)
+    monkeypatch.setattr(routes, "EnergyRollupRepository", FakeRollupRepo)
+    monkeypatch.setattr(routes, "MarketEnergyPriceRepository", FakeMarketPriceRepo)
+    InMemoryRevenueLedgerRepo.rows = {}
+    monkeypatch.setattr(routes, "RevenueLedgerRepository", InMemoryRevenueLedgerRepo)
+    monkeypatch.setattr(routes, "get_telemetry_cache", lambda: None)
+    monkeypatch.setattr(routes, "get_market_price_store", lambda: None)
+    return SimpleNamespace(provider=provider, calls=calls)
+
+
+def _user(env):
+    return SimpleNamespace(id=env.provider.user_id)
+
+
+def test_energy_hours_only_skips_entries_query_and_payload(sections_env):
+    response = routes.list_provider_energy(
+        provider_uuid=sections_env.provider.uuid,
+        response=Response(),
+        selected_date=date(2026, 3, 10),
+        series_format=routes.SeriesFormat.OBJECTS,
+        since=None,
+        include=["hours"],
+        db=object(),
+        current_user=_user(sections_env),
+    )
+
+    assert isinstance(response, ModelJSONResponse)
+    day = orjson.loads(response.body)["days"]["2026-03-10"]
+    assert sections_env.calls["measurements"] == 0
+    assert set(day) == {"date", "hours"}
+    assert [point["energy"] for point in day["hours"]] == [100.0]
+
+
+def test_energy_columnar_entries_only_skips_hourly_energy(sections_env):
+    response = routes.list_provider_energy(
+        provider_uuid=sections_env.provider.uuid,
+        response=Response(),
+        selected_date=date(2026, 3, 10),
+        series_format=routes.SeriesFormat.COLUMNAR,
+        since=None,
+        include=["entries"],
+        db=object(),
+        current_user=_user(sections_env),
+    )
+
+    day = orjson.loads(response.body)["days"]["2026-03-10"]
+    assert sections_env.calls["power_samples"] == 0
+    assert sections_env.calls["rollups"] == 0
+    assert "hours" not in day and "total_energy" not in day
+    assert day["entries"]["values"] == [100.0]
+
+
+def test_telemetry_include_limits_queries_and_sections(sections_env):
+    response = routes.get_provider_telemetry(
+        provider_uuid=sections_env.provider.uuid,
+        response=Response(),
+        selected_date=date(2026, 3, 10),
+        include=["hours,totals"],
+        db=object(),
+        current_user=_user(sections_env),
+    )
+
+    payload = orjson.loads(response.body)
+    assert sections_env.calls["measurements"] == 0
+    assert sections_env.calls["metric_definitions"] == 0
+    assert sections_env.calls["market_prices"] == 0
+    assert "metrics" not in payload and "matched_revenue" not in payload
+    assert "settlement_price" not in payload and "entries" not in payload["day"]
+    assert payload["day"]["total_energy"] == 100.0
+
+
+def test_telemetry_without_include_returns_every_section(sections_env):
+    response = routes.get_provider_telemetry(
+        provider_uuid=sections_env.provider.uuid,
+        response=Response(),
+        selected_date=date(2026, 3, 10),
+        include=None,
+        db=object(),
+        current_user=_user(sections_env),
+    )
+
+    assert isinstance(response, routes.ProviderTelemetryResponse)
+    assert response.day.entries and response.metrics
+    assert sections_env.calls["market_prices"] == 2
+
+
+def test_unknown_or_telemetry_only_section_is_rejected_on_energy(sections_env):
+    with pytest.raises(HTTPException) as exc:
+        routes.list_provider_energy(
+            provider_uuid=sections_env.provider.uuid,
+            response=Response(),
+            selected_date=date(2026, 3, 10),
+            series_format=routes.SeriesFormat.OBJECTS,
+            since=None,
+            include=["hours", "revenue"],
+            db=object(),
+            current_user=_user(sections_env),
+        )
+
+    assert exc.value.status_code == 422
+    assert "revenue" in exc.value.detail
@@ -0,0 +1,443 @@
+from __future__ import annotations
+
+from collections import Counter, defaultdict
+from datetime import date, datetime, timedelta, timezone
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+
+from app.api.routes import provider_measurements as routes
+from app.repositories.market_energy_price import MarketPriceVersion
+from app.repositories.measurement_repository import SeriesVersion
+from app.schemas.provider_energy_range import EnergyRangeGranularity
+from app.schemas.response_sections import ResponseSection
+from app.services.power_sample_loader import PowerSampleLoader
+from app.services.revenue_ledger_service import (
+    list_missing_ledger_days,
+    materialize_ledger_day,
+)
+from smart_common.enums.unit import PowerUnit
+from smart_common.providers.enums import (
+    ProviderKind,
+    ProviderPowerSource,
+    ProviderType,
+    ProviderVendor,
+)
+
+from tests.mocks import InMemoryRevenueLedgerRepo
+
+
+def _provider():
+    return SimpleNamespace(
+        id=31,
+        uuid=uuid4(),
+        name="Roof",
+        provider_type=ProviderType.API,
+        kind=ProviderKind.POWER,
+        vendor=ProviderVendor.GOODWE,
+        external_id="station-31",
+        unit=PowerUnit.WATT,
+        power_source=ProviderPowerSource.METER,
+        value_min=0.0,
+        value_max=10000.0,
+        default_expected_interval_sec=None,
+        has_power_meter=False,
+        has_energy_storage=False,
+        enabled=True,
+        config={},
+        telemetry_metrics=[],
+        created_at=datetime(2026, 3, 1, tzinfo=timezone.utc),
+        updated_at=datetime(2026, 3, 10, tzinfo=timezone.utc),
+        last_value=None,
+        user_id=8,
+    )
+
+
+def _price(start: datetime, price: float, *, market: str = "RCE"):
+    return SimpleNamespace(
+        __tablename__="market_energy_prices",
+        market=market,
+        interval_start=start,
+        interval_end=start + timedelta(hours=1),
+        price_value=price,
+        price_unit="MWh",
+        currency="PLN",
+        source_updated_at=None,
+    )
+
+
+def _day_prices(day: date) -> list:
+    start = datetime.combine(day, datetime.min.time(), tzinfo=timezone.utc)
+    return [_price(start + timedelta(hours=hour), 500.0) for hour in range(24)]
+
+
+def _day_samples(day: date) -> list[tuple[datetime, float]]:
+    # Two hours of 1 kW export a day: 2 kWh, 1 PLN at 500 PLN/MWh.
+    start = datetime.combine(day, datetime.min.time(), tzinfo=timezone.utc)
+    return [
+        (start + timedelta(hours=10), 1000.0),
+        (start + timedelta(hours=12), 0.0),
+    ]
+
+
+class FakeMeasurementRepo:
+    def __init__(self, samples, calls):
+        self.samples = samples
+        self.calls = calls
+
+    def list_power_samples(self, *, provider_id, date_start, date_end):
+        self.calls["power_samples"] += 1
+        return [
+            (ts, value) for ts, value in self.samples if date_start <= ts <= date_end
+        ]
+
+    def get_last_power_sample_before(self, *, provider_id, before):
+        return None
+
+    def get_power_version(self, *, provider_id, date_start, date_end, non_null=False):
+        window = [ts for ts, _ in self.samples if date_start <= ts <= date_end]
+        return SeriesVersion(len(window), max(window, default=None))
+
+
+class FakeMarketPriceRepo:
+    def __init__(self, prices, calls):
+        self.prices = prices
+        self.calls = calls
+
+    def list_between(self, *, market, date_start, date_end):
+        self.calls["market_prices"] += 1
+        return [
+            price
+            for price in self.prices
+            if price.market == market and date_start <= price.interval_start < date_end
+        ]
+
+    def get_version(self, *, markets, date_start, date_end, started_before):
+        window = [
+            price
+            for price in self.prices
+            if price.market in markets and date_start <= price.interval_start < date_end
+        ]
+        return MarketPriceVersion(
+            interval_count=len(window),
+            started_count=sum(
+                1 for price in window if price.interval_start <= started_before
+            ),
+            last_source_updated_at=max(
+                (
+                    price.source_updated_at
+                    for price in window
+                    if price.source_updated_at
+                ),
+                default=None,
+            ),
+        )
+
+
+class FakeLedgerRepo(InMemoryRevenueLedgerRepo):
+    def __init__(self, calls):
+        super().__init__(db=None)
+        self.rows = {}
+        self.calls = calls
+
+    def count_hours_by_day(
+        self,
+        *,
+        provider_id,
+        market,
+        date_start,
+        date_end,
+        sample_hold_seconds,
+        energy_unit,
+    ):
+        counts: dict[date, int] = defaultdict(int)
+        for (_, row_market, hour_start), row in self.rows.items():
+            if (
+                row_market == market
+                and date_start <= hour_start < date_end
+                and row.sample_hold_seconds == sample_hold_seconds
+                and row.energy_unit == energy_unit
+            ):
+                counts[hour_start.date()] += 1
+        return dict(counts)
+
+    def aggregate_revenue(
+        self,
+        *,
+        provider_id,
+        market,
+        date_start,
+        date_end,
+        granularity,
+        exclude_days=None,
+    ):
+        self.calls["aggregate"] += 1
+        periods: dict[datetime, list] = {}
+        for (_, row_market, hour_start), row in sorted(self.rows.items()):
+            if row_market != market or not date_start <= hour_start < date_end:
+                continue
+            if hour_start.date() in (exclude_days or ()):
+                continue
+            if not row.matched_intervals:
+                continue
+            period_start = routes._truncate_to_granularity(
+                hour_start,
+                EnergyRangeGranularity(granularity),
+            ).replace(tzinfo=None)
+            period = periods.setdefault(period_start, [0.0, 0.0, 0, row.currency])
+            period[0] += row.export_energy
+            period[1] += row.revenue
+            period[2] += row.matched_intervals
+        return [
+            SimpleNamespace(
+                period_start=period_start,
+                export_energy=export_energy,
+                revenue=revenue,
+                matched_intervals=matched_intervals,
+                currency=currency,
+            )
+            for period_start, (
+                export_energy,
+                revenue,
+                matched_intervals,
+                currency,
+            ) in sorted(periods.items())
+        ]
+
+    def upsert_hours(self, *, provider_id, rows):
+        self.calls["upsert_days"] += 1
+        super().upsert_hours(provider_id=provider_id, rows=rows)
+
+
+@pytest.fixture
+def queued(monkeypatch):
+    queued = []
+    monkeypatch.setattr(
+        routes,
+        "_enqueue_ledger_backfill",
+        lambda *, provider_id, days: queued.append((provider_id, days[0], days[-1])),
+    )
+    return queued
+
+
+def _build_range(
+    *,
+    samples,
+    prices,
+    ledger_repo,
+    calls,
+    date_from,
+    date_to,
+    granularity,
+    now,
+    max_cold_days=None,
+):
+    return routes._build_provider_revenue_range(
+        provider=_provider(),
+        repo=FakeMeasurementRepo(samples, calls),
+        market_repo=FakeMarketPriceRepo(prices, calls),
+        ledger_repo=ledger_repo,
+        date_from=date_from,
+        date_to=date_to,
+        granularity=granularity,
+        now=now,
+        max_cold_days=max_cold_days,
+    )
+
+
+def _run_backfill(*, samples, prices, ledger_repo, calls, first_day, last_day):
+    for day in list_missing_ledger_days(
+        ledger_repo=ledger_repo,
+        provider_id=31,
+        first_day=first_day,
+        last_day=last_day,
+        energy_unit="Wh",
+    ):
+        materialize_ledger_day(
+            power_samples=PowerSampleLoader(
+                FakeMeasurementRepo(samples, calls),
+                provider_id=31,
+            ),
+            market_repo=FakeMarketPriceRepo(prices, calls),
+            ledger_repo=ledger_repo,
+            day=day,
+            energy_unit="Wh",
+        )
+
+
+def test_revenue_range_sums_ledger_months_and_matches_today_live(monkeypatch, queued):
+    monkeypatch.setattr(routes, "get_market_price_store", lambda: None)
+    calls = Counter()
+    ledger_repo = FakeLedgerRepo(calls)
+    days = [date(2026, 2, 27), date(2026, 3, 2), date(2026, 3, 10)]
+    samples = [sample for day in days for sample in _day_samples(day)]
+    prices = [price for day in days for price in _day_prices(day)]
+    now = datetime(2026, 3, 10, 13, tzinfo=timezone.utc)
+
+    result = _build_range(
+        samples=samples,
+        prices=prices,
+        ledger_repo=ledger_repo,
+        calls=calls,
+        date_from=date(2026, 2, 1),
+        date_to=date(2026, 3, 31),
+        granularity=EnergyRangeGranularity.MONTH,
+        now=now,
+    )
+
+    assert [period.period_start.month for period in result.periods] == [2, 3]
+    assert [period.revenue for period in result.periods] == [1.0, 2.0]
+    assert result.total_export_energy == 6000.0
+    assert result.total_revenue == 3.0
+    assert result.currency == "PLN" and result.energy_unit == "Wh"
+    # Missing closed days are matched in memory and queued, never stored here.
+    assert calls["upsert_days"] == 0
+    assert queued == [(31, date(2026, 2, 1), date(2026, 3, 9))]
+
+    _run_backfill(
+        samples=samples,
+        prices=prices,
+        ledger_repo=ledger_repo,
+        calls=calls,
+        first_day=date(2026, 2, 1),
+        last_day=date(2026, 3, 9),
+    )
+    assert calls["upsert_days"] == (now.date() - date(2026, 2, 1)).days
+    assert not any(key[2].date() == now.date() for key in ledger_repo.rows)
+
+    calls.clear()
+    queued.clear()
+    _build_range(
+        samples=samples,
+        prices=prices,
+        ledger_repo=ledger_repo,
+        calls=calls,
+        date_from=date(2026, 2, 1),
+        date_to=date(2026, 3, 9),
+        granularity=EnergyRangeGranularity.MONTH,
+        now=now,
+    )
+    assert calls["upsert_days"] == 0
+    assert calls["power_samples"] == 0
+    assert calls["aggregate"] == 1
+    assert queued == []
+
+
+def test_revenue_range_matches_at_most_max_cold_days(monkeypatch, queued):
+    monkeypatch.setattr(routes, "get_market_price_store", lambda: None)
+    calls = Counter()
+    days = [date(2026, 2, 27), date(2026, 3, 2)]
+    samples = [sample for day in days for sample in _day_samples(day)]
+    prices = [price for day in days for price in _day_prices(day)]
+
+    result = _build_range(
+        samples=samples,
+        prices=prices,
+        ledger_repo=FakeLedgerRepo(calls),
+        calls=calls,
+        date_from=date(2026, 2, 1),
+        date_to=date(2026, 3, 31),
+        granularity=EnergyRangeGranularity.MONTH,
+        now=datetime(2026, 3, 10, 13, tzinfo=timezone.utc),
+        max_cold_days=28,
+    )
+
+    # February is matched; March is left for the backfill.
+    assert result.pending_days == 9
+    assert [period.revenue for period in result.periods] == [1.0]
+    assert queued == [(31, date(2026, 2, 1), date(2026, 3, 9))]
+
+
+def test_closed_day_telemetry_revenue_is_read_back_from_the_ledger(monkeypatch):
+    monkeypatch.setattr(routes, "get_market_price_store", lambda: None)
+    calls = Counter()
+    ledger_repo = FakeLedgerRepo(calls)
+    day = date(2026, 3, 10)
+    samples = _day_samples(day)
+    prices = _day_prices(day)
+    monkeypatch.setattr(routes, "RevenueLedgerRepository", lambda db: ledger_repo)
+    monkeypatch.setattr(
+        routes,
+        "MeasurementRepository",
+        lambda db: FakeMeasurementRepo(samples, calls),
+    )
+    monkeypatch.setattr(
+        routes,
+        "MarketEnergyPriceRepository",
+        lambda db: FakeMarketPriceRepo(prices, calls),
+    )
+    start = datetime(2026, 3, 10, tzinfo=timezone.utc)
+
+    def build():
+        return routes._build_provider_telemetry(
+            db=object(),
+            provider=_provider(),
+            start=start,
+            end=start + timedelta(days=1) - timedelta(microseconds=1),
+            sections=frozenset({ResponseSection.REVENUE}),
+        ).matched_revenue
+
+    matched = build()
+    assert ledger_repo.rows == {}
+    _run_backfill(
+        samples=samples,
+        prices=prices,
+        ledger_repo=ledger_repo,
+        calls=calls,
+        first_day=day,
+        last_day=day,
+    )
+    assert len(ledger_repo.rows) == 24
+    calls.clear()
+
+    stored = build()
+
+    assert calls["power_samples"] == 0
+    assert calls["market_prices"] == 0
+    assert stored.model_dump() == matched.model_dump()
+    assert stored.total_revenue == 1.0
+    assert [point.hour.hour for point in stored.hours] == [10, 11]
+
+
+def test_ledger_day_is_not_stored_when_prices_change_while_it_is_matched():
+    calls = Counter()
+    day = date(2026, 3, 10)
+    prices = _day_prices(day)
+    ledger_repo = FakeLedgerRepo(calls)
+
+    class RepricingMarketPriceRepo(FakeMarketPriceRepo):
+        def list_between(self, *, market, date_start, date_end):
+            listed = super().list_between(
+                market=market,
+                date_start=date_start,
+                date_end=date_end,
+            )
+            # Another process republishes hour 10 right after the read.
+            if prices[10].source_updated_at is None:
+                prices[10] = _price(prices[10].interval_start, 900.0)
+                prices[10].source_updated_at = datetime(
+                    2026, 3, 11, tzinfo=timezone.utc
+                )
+            return listed
+
+    def materialize():
+        return materialize_ledger_day(
+            power_samples=PowerSampleLoader(
+                FakeMeasurementRepo(_day_samples(day), calls),
+                provider_id=31,
+            ),
+            market_repo=RepricingMarketPriceRepo(prices, calls),
+            ledger_repo=ledger_repo,
+            day=day,
+            energy_unit="Wh",
+        )
+
+    assert materialize() is False
+    assert ledger_repo.rows == {}
+
+    assert materialize() is True
+    hour_10 = ledger_repo.rows[
+        (31, "RCE", datetime(2026, 3, 10, 10, tzinfo=timezone.utc))
+    ]
+    assert hour_10.revenue == 0.9
@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from fastapi import APIRouter, FastAPI
+from fastapi.routing import APIRoute
+from fastapi.testclient import TestClient
+from pydantic import BaseModel, Field
+
+from app.api.responses import SerializeOnceRoute, serialize_once_get
+
+
+class PointOut(BaseModel):
+    measured_at: datetime
+    value: float
+    source: str = Field(serialization_alias="sourceName")
+
+
+class DetailedPointOut(PointOut):
+    secret: str
+
+
+def _point(**overrides):
+    values = {
+        "measured_at": datetime(2026, 3, 10, 9, 15, tzinfo=timezone.utc),
+        "value": 1.25,
+        "source": "inverter",
+    }
+    values.update(overrides)
+    return values
+
+
+def _build_app(route_class: type[APIRoute]) -> FastAPI:
+    router = APIRouter(route_class=route_class)
+
+    @router.get("/point", response_model=PointOut)
+    def point():
+        return PointOut(**_point())
+
+    @router.get("/points", response_model=list[PointOut])
+    def points():
+        return [PointOut(**_point(value=float(index))) for index in range(3)]
+
+    @router.get("/detailed", response_model=PointOut)
+    def detailed():
+        return DetailedPointOut(**_point(secret="hidden"))
+
+    @router.get("/orm", response_model=list[PointOut])
+    def orm():
+        return [SimpleNamespace(**_point(secret="hidden"))]
+
+    app = FastAPI()
+    app.include_router(router)
+    return app
+
+
+def test_serialize_once_route_keeps_bodies_and_openapi():
+    default_app = _build_app(APIRoute)
+    fast_app = _build_app(SerializeOnceRoute)
+    default_client = TestClient(default_app)
+    fast_client = TestClient(fast_app)
+
+    for path in ("/point", "/points", "/detailed", "/orm"):
+        default_response = default_client.get(path)
+        fast_response = fast_client.get(path)
+        assert fast_response.status_code == default_response.status_code == 200
+        assert fast_response.content == default_response.content
+
+    assert "secret" not in fast_client.get("/detailed").text
+    assert fast_client.get("/point").json()["sourceName"] == "inverter"
+    assert fast_app.openapi() == default_app.openapi()
+
+
+def test_serialize_once_route_leaves_route_functions_untouched():
+    router = APIRouter(route_class=SerializeOnceRoute)
+
+    def point() -> PointOut:
+        return PointOut(**_point())
+
+    registered = router.get("/point", response_model=PointOut)(point)
+
+    assert registered is point
+    assert isinstance(point(), PointOut)
+
+
+def test_serialize_once_route_keeps_declared_status_code():
+    router = APIRouter(route_class=SerializeOnceRoute)
+
+    @router.post("/point", response_model=PointOut, status_code=201)
+    def create_point():
+        return PointOut(**_point())
+
+    app = FastAPI()
+    app.include_router(router)
+    response = TestClient(app).post("/point")
+
+    assert response.status_code == 201
+    assert response.json()["sourceName"] == "inverter"
+
+
+def test_serialize_once_get_limits_the_route_class_to_one_route():
+    router = APIRouter()
+
+    @serialize_once_get(router, "/points", response_model=list[PointOut])
+    def points():
+        return [PointOut(**_point())]
+
+    @router.post("/point", response_model=PointOut, status_code=201)
+    def create_point():
+        return PointOut(**_point())
+
+    app = FastAPI()
+    app.include_router(router)
+    route_classes = {
+        route.path: type(route) for route in app.routes if isinstance(route, APIRoute)
+    }
+    client = TestClient(app)
+
+    assert route_classes == {"/points": SerializeOnceRoute, "/point": APIRoute}
+    assert client.get("/points").status_code == 200
+    assert client.post("/point").status_code == 201
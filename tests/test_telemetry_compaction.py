@@ -0,0 +1,251 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+
+import app.repositories.measurement_repository as measurement_repository_module
+from app.models.provider_telemetry_aggregate import POWER_SERIES_KEY
+from app.repositories.measurement_repository import MeasurementRepository
+from app.services.telemetry_compaction import (
+    TelemetryCompactionService,
+    build_buckets,
+    integrate_bucket_energy,
+)
+from smart_common.repositories.measurement_repository import (
+    MeasurementRepository as BaseMeasurementRepository,
+)
+from smart_common.services.energy_calculation_service import PowerSample
+
+
+def _ts(minute: int, second: int = 0) -> datetime:
+    return datetime(2026, 3, 1, 10, 0, tzinfo=timezone.utc) + timedelta(
+        minutes=minute,
+        seconds=second,
+    )
+
+
+def test_build_buckets_aggregates_samples_per_bucket():
+    buckets = build_buckets(
+        [
+            (_ts(0, 10), 100.0, "W"),
+            (_ts(2), 300.0, "W"),
+            (_ts(4, 50), 200.0, "W"),
+            (_ts(5, 10), 50.0, "kW"),
+        ],
+        bucket_seconds=300,
+    )
+
+    assert [bucket.bucket_start for bucket in buckets] == [_ts(0), _ts(5)]
+    first, second = buckets
+    assert first.sample_count == 3
+    assert (first.min_value, first.max_value, first.avg_value) == (100.0, 300.0, 200.0)
+    assert (first.last_value, first.last_sample_at) == (200.0, _ts(4, 50))
+    assert (second.sample_count, second.last_value, second.unit) == (1, 50.0, "kW")
+
+
+def test_bucket_energy_splits_intervals_at_bucket_boundaries():
+    # A lead-in sample before the window carries its power into the window,
+    # and the last sample is held until the window end.
+    energy = integrate_bucket_energy(
+        [
+            PowerSample(ts=_ts(-1), value=600.0),
+            PowerSample(ts=_ts(0, 30), value=1200.0),
+            PowerSample(ts=_ts(1, 30), value=0.0),
+        ],
+        bucket_seconds=60,
+        window_end=_ts(3),
+        sample_hold_seconds=None,
+    )
+
+    assert energy[_ts(-1)] == pytest.approx(600.0 / 60)
+    assert energy[_ts(0)] == pytest.approx(600.0 / 120 + 1200.0 / 120)
+    assert energy[_ts(1)] == pytest.approx(1200.0 / 120)
+    assert energy.get(_ts(2), 0.0) == pytest.approx(0.0)
+    assert sum(energy.values()) == pytest.approx(600.0 * 1.5 / 60 + 1200.0 / 60)
+
+
+def test_bucket_energy_respects_sample_hold():
+    energy = integrate_bucket_energy(
+        [PowerSample(ts=_ts(0), value=3600.0), PowerSample(ts=_ts(30), value=0.0)],
+        bucket_seconds=300,
+        window_end=_ts(60),
+        sample_hold_seconds=300,
+    )
+
+    assert energy[_ts(0)] == pytest.approx(300.0)
+    assert sum(energy.values()) == pytest.approx(300.0)
+
+
+def test_compaction_rejects_unsupported_buckets_and_recent_windows():
+    with pytest.raises(ValueError):
+        TelemetryCompactionService(db=None, bucket_seconds=90)
+
+    service = TelemetryCompactionService(db=None, bucket_seconds=60)
+    now = datetime.now(timezone.utc)
+    with pytest.raises(ValueError):
+        service.compact_window(
+            provider_id=1, window_start=now - timedelta(days=1), window_end=now
+        )
+
+
+class FakeAggregateRepository:
+    calls: list[dict] = []
+
+    def __init__(self, db):
+        self.db = db
+
+    def list_for_window(self, *, provider_id, series_keys, date_start, date_end):
+        self.calls.append({"series_keys": series_keys})
+        rows = [
+            SimpleNamespace(
+                series_key=POWER_SERIES_KEY,
+                bucket_start=_ts(0),
+                bucket_seconds=300,
+                avg_value=150.0,
+                energy=15.0,
+                unit="W",
+            ),
+            SimpleNamespace(
+                series_key="battery_soc",
+                bucket_start=_ts(5),
+                bucket_seconds=300,
+                avg_value=42.0,
+                energy=None,
+                unit="%",
+            ),
+        ]
+        return [row for row in rows if row.series_key in series_keys]
+
+    def get_last_before(self, *, provider_id, series_key, before):
+        return SimpleNamespace(last_sample_at=_ts(4, 50), last_value=90.0)
+
+
+@pytest.fixture
+def tiered_repo(monkeypatch):
+    FakeAggregateRepository.calls = []
+    monkeypatch.setattr(
+        measurement_repository_module,
+        "TelemetryAggregateRepository",
+        FakeAggregateRepository,
+    )
+    monkeypatch.setattr(
+        BaseMeasurementRepository,
+        "list_power_samples",
+        lambda self, *, provider_id, date_start, date_end: [(_ts(10), 500.0)],
+        raising=False,
+    )
+    monkeypatch.setattr(
+        BaseMeasurementRepository,
+        "get_last_power_sample_before",
+        lambda self, *, provider_id, before: None,
+        raising=False,
+    )
+    monkeypatch.setattr(
+        BaseMeasurementRepository,
+        "list_metric_samples",
+        lambda self, *, provider_id, metric_key, date_start, date_end: [
+            SimpleNamespace(measured_at=_ts(7), value=44.0, unit="%")
+        ],
+        raising=False,
+    )
+    return MeasurementRepository(db=None)
+
+
+def test_power_reads_merge_aggregate_buckets_with_raw_samples(tiered_repo):
+    samples = tiered_repo.list_power_samples(
+        provider_id=1,
+        date_start=_ts(0) - timedelta(hours=1),
+        date_end=_ts(60),
+    )
+
+    # A bucket is read back at its start as its time-weighted mean power.
+    assert samples == [(_ts(0), pytest.approx(180.0)), (_ts(10), 500.0)]
+    assert tiered_repo.get_last_power_sample_before(provider_id=1, before=_ts(10)) == (
+        _ts(4, 50),
+        90.0,
+    )
+
+
+def test_metric_reads_merge_aggregate_buckets_with_raw_samples(tiered_repo):
+    samples = tiered_repo.list_metric_samples(
+        provider_id=1,
+        metric_key="battery_soc",
+        date_start=_ts(0),
+        date_end=_ts(60),
+    )
+
+    assert [(sample.measured_at, sample.value) for sample in samples] == [
+        (_ts(5), 42.0),
+        (_ts(7), 44.0),
+    ]
+
+
+def test_recent_windows_skip_the_aggregate_tier(tiered_repo):
+    now = datetime.now(timezone.utc)
+
+    samples = tiered_repo.list_power_samples(
+        provider_id=1,
+        date_start=now - timedelta(hours=1),
+        date_end=now,
+    )
+
+    assert samples == [(_ts(10), 500.0)]
+    assert FakeAggregateRepository.calls == []
+
+
+class LinkedTelemetrySession:
+    """Raw rows of one window, refusing to orphan linked metric samples."""
+
+    def __init__(self):
+        self.measurements = [(_ts(0), 100.0, "W"), (_ts(1), 300.0, "W")]
+        self.metric_samples = [
+            ("battery_soc", _ts(0), 40.0, "%"),
+            ("battery_soc", _ts(1), 41.0, "%"),
+        ]
+        self.executed: list[str] = []
+
+    def execute(self, statement, params=None):
+        kind = statement.__visit_name__
+        if kind == "select":
+            source = statement.get_final_froms()[0].name
+            if source == "provider_measurements":
+                return iter(self.measurements)
+            if source == "provider_metric_samples":
+                return iter(self.metric_samples)
+            return SimpleNamespace(scalar=lambda: None)
+
+        target = statement.table.name
+        self.executed.append(f"{kind} {target}")
+        if kind == "delete" and target == "provider_measurements":
+            if self.metric_samples:
+                raise RuntimeError("violates foreign key constraint")
+            self.measurements = []
+        elif kind == "delete" and target == "provider_metric_samples":
+            self.metric_samples = []
+        return None
+
+
+def test_compaction_deletes_linked_metric_samples_before_measurements(monkeypatch):
+    monkeypatch.setattr(
+        MeasurementRepository,
+        "get_last_power_sample_before",
+        lambda self, *, provider_id, before: None,
+    )
+    db = LinkedTelemetrySession()
+    service = TelemetryCompactionService(db, bucket_seconds=300)
+
+    written = service.compact_window(
+        provider_id=1,
+        window_start=_ts(0),
+        window_end=_ts(0) + timedelta(days=1),
+    )
+
+    assert written == 2
+    assert db.executed == [
+        "insert provider_telemetry_aggregates",
+        "delete provider_metric_samples",
+        "delete provider_measurements",
+    ]
+    assert db.measurements == [] and db.metric_samples == []
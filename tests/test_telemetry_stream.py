@@ -0,0 +1,343 @@
+from __future__ import annotations
+
+import asyncio
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from uuid import uuid4
+
+import orjson
+
+from app.api.routes import provider_measurements as routes
+from app.repositories.measurement_repository import SeriesVersion
+from app.services import measurement_hooks, telemetry_stream
+from app.services.telemetry_stream import (
+    TelemetryStreamHub,
+    TelemetryStreamPoller,
+    close_telemetry_stream,
+    connect_telemetry_stream,
+    device_state_subject,
+    measurement_subject,
+    stream_events,
+)
+from smart_common.enums.device_event import DeviceEventType
+
+
+class FakeNatsSubscription:
+    def __init__(self):
+        self.unsubscribed = False
+
+    async def unsubscribe(self):
+        self.unsubscribed = True
+
+
+class FakeNatsConnection:
+    """Loops published messages back to the subscriber, like a NATS server."""
+
+    def __init__(self):
+        self.subscriptions: list[str] = []
+        self.callback = None
+
+    async def subscribe(self, subject, cb):
+        self.subscriptions.append(subject)
+        self.callback = cb
+        return FakeNatsSubscription()
+
+    async def publish(self, subject, data):
+        await self.callback(SimpleNamespace(subject=subject, data=data))
+
+
+async def _started_hub(**kwargs):
+    hub = TelemetryStreamHub(**kwargs)
+    nc = FakeNatsConnection()
+    await hub.start(nc)
+    return hub, nc
+
+
+def test_one_nats_subscription_fans_out_to_matching_clients():
+    async def scenario():
+        hub, nc = await _started_hub()
+        first = hub.subscribe([("provider", 7), ("device", 3)])
+        second = hub.subscribe([("provider", 7)])
+        other = hub.subscribe([("provider", 8)])
+
+        await nc.publish(measurement_subject(7), orjson.dumps({"measured_value": 1.5}))
+        await nc.publish(device_state_subject(3), orjson.dumps({"pin_state": True}))
+        await nc.publish("telemetry.unknown.7.thing", b"{}")
+
+        assert nc.subscriptions == ["telemetry.>"]
+        assert await first.get(timeout=0.1) == ("measurement", {"measured_value": 1.5})
+        assert await first.get(timeout=0.1) == ("device_state", {"pin_state": True})
+        assert await second.get(timeout=0.1) == ("measurement", {"measured_value": 1.5})
+        assert await second.get(timeout=0.01) is None
+        assert await other.get(timeout=0.01) is None
+
+        hub.unsubscribe(first)
+        await nc.publish(measurement_subject(7), orjson.dumps({"measured_value": 2.0}))
+        assert await first.get(timeout=0.01) is None
+
+    asyncio.run(scenario())
+
+
+def test_slow_client_gets_a_single_resync_event():
+    async def scenario():
+        hub, _ = await _started_hub(queue_size=2)
+        subscription = hub.subscribe([("provider", 7)])
+
+        for value in range(4):
+            hub.dispatch(measurement_subject(7), {"measured_value": value})
+
+        assert await subscription.get(timeout=0.1) == ("resync", {})
+        assert await subscription.get(timeout=0.1) == (
+            "measurement",
+            {"measured_value": 3},
+        )
+
+    asyncio.run(scenario())
+
+
+def test_stream_events_formats_sse_and_unsubscribes_on_close():
+    async def scenario():
+        hub, _ = await _started_hub()
+        stream = stream_events(hub, [("provider", 7)], heartbeat_seconds=0.01)
+
+        assert await stream.__anext__() == "retry: 5000\n\n"
+        assert await stream.__anext__() == ": keepalive\n\n"
+        hub.dispatch(measurement_subject(7), {"measured_value": 1.5})
+        assert await stream.__anext__() == (
+            'event: measurement\ndata: {"measured_value":1.5}\n\n'
+        )
+
+        await stream.aclose()
+        hub.dispatch(measurement_subject(7), {"measured_value": 2.0})
+
+    asyncio.run(scenario())
+
+
+def test_session_hooks_collect_stream_events_for_new_rows():
+    measured_at = datetime(2026, 3, 10, 9, 15, tzinfo=timezone.utc)
+    objects = [
+        SimpleNamespace(
+            __tablename__="provider_measurements",
+            provider_id=7,
+            measured_at=measured_at,
+            measured_value=1.5,
+            measured_unit="kW",
+        ),
+        SimpleNamespace(
+            __tablename__="provider_metric_samples",
+            provider_id=7,
+            metric_key="battery_soc",
+            measured_at=measured_at,
+            value=55,
+            unit="%",
+        ),
+        SimpleNamespace(
+            __tablename__="device_events",
+            event_type=DeviceEventType.STATE,
+            device_id=3,
+            created_at=measured_at,
+            pin_state=True,
+            device_state="ON",
+        ),
+        SimpleNamespace(
+            __tablename__="device_events",
+            event_type="OTHER",
+            device_id=3,
+            created_at=measured_at,
+        ),
+    ]
+
+    events = measurement_hooks._collect_stream_events(objects)
+
+    assert [subject for subject, _ in events] == [
+        "telemetry.provider.7.measurement",
+        "telemetry.provider.7.metric",
+        "telemetry.device.3.state",
+    ]
+    assert events[0][1]["measured_at"] == "2026-03-10T09:15:00+00:00"
+    assert events[1][1]["value"] == 55.0
+
+
+def test_hub_shares_the_application_nats_connection():
+    async def scenario():
+        hub = TelemetryStreamHub()
+        nc = FakeNatsConnection()
+        await connect_telemetry_stream(hub, nc)
+
+        assert hub.running
+        assert nc.subscriptions == ["telemetry.>"]
+
+        # The connection is the application's; closing the stream only
+        # unsubscribes (the fake has no drain or close to call).
+        await close_telemetry_stream(hub)
+        assert not hub.running
+
+        await connect_telemetry_stream(hub, None)
+        assert not hub.running
+
+    asyncio.run(scenario())
+
+
+def test_stream_route_closes_its_session_before_streaming(monkeypatch):
+    sessions = []
+
+    def get_db():
+        session = SimpleNamespace(closed=False)
+        sessions.append(session)
+        try:
+            yield session
+        finally:
+            session.closed = True
+
+    provider = SimpleNamespace(id=7)
+    monkeypatch.setattr(routes, "get_db", get_db)
+    monkeypatch.setattr(routes, "_get_provider_or_404", lambda **kwargs: provider)
+    monkeypatch.setattr(
+        routes,
+        "_list_devices_for_power_provider",
+        lambda **kwargs: [SimpleNamespace(id=3)],
+    )
+    hub = TelemetryStreamHub()
+    hub._nats_subscription = object()
+    monkeypatch.setattr(routes, "get_telemetry_stream_hub", lambda: hub)
+
+    response = routes.stream_provider_telemetry(
+        provider_uuid=uuid4(),
+        current_user=SimpleNamespace(id=8),
+    )
+
+    assert response.media_type == "text/event-stream"
+    assert len(sessions) == 1 and sessions[0].closed
+
+
+class MeasurementTable:
+    """Raw measurement rows of the fake database, shared by every session."""
+
+    def __init__(self):
+        self.rows: list[SimpleNamespace] = []
+
+    def add(self, provider_id, measured_at, value):
+        self.rows.append(
+            SimpleNamespace(
+                provider_id=provider_id,
+                measured_at=measured_at,
+                measured_value=value,
+                measured_unit="kW",
+            )
+        )
+
+    def repository(self, db):
+        table = self
+
+        class Repo:
+            def get_power_version(self, *, provider_id, date_start, date_end):
+                times = [
+                    row.measured_at
+                    for row in table.rows
+                    if row.provider_id == provider_id
+                    and date_start <= row.measured_at <= date_end
+                ]
+                return SeriesVersion(len(times), max(times, default=None))
+
+            def iter_measurements(self, *, provider_id, date_start, date_end):
+                return sorted(
+                    (
+                        row
+                        for row in table.rows
+                        if row.provider_id == provider_id
+                        and date_start <= row.measured_at < date_end
+                    ),
+                    key=lambda row: row.measured_at,
+                )
+
+        return Repo()
+
+
+def test_poller_streams_measurements_written_by_other_processes(monkeypatch):
+    table = MeasurementTable()
+    monkeypatch.setattr(telemetry_stream, "MeasurementRepository", table.repository)
+    hub = TelemetryStreamHub()
+    poller = TelemetryStreamPoller(hub, None, interval_seconds=1)
+    now = datetime(2026, 3, 10, 9, 0, tzinfo=timezone.utc)
+    table.add(7, now - timedelta(minutes=5), 1.0)
+
+    # The first poll only records where the stream starts.
+    assert poller.poll(None, [7], now) == []
+    table.add(7, now + timedelta(seconds=30), 1.5)
+    table.add(7, now + timedelta(seconds=40), None)
+    events = poller.poll(None, [7], now + timedelta(minutes=1))
+    # Nothing was written since the previous poll.
+    assert poller.poll(None, [7], now + timedelta(minutes=2)) == []
+
+    assert events == [
+        (
+            "telemetry.provider.7.measurement",
+            {
+                "provider_id": 7,
+                "measured_at": "2026-03-10T09:00:30+00:00",
+                "measured_value": 1.5,
+                "measured_unit": "kW",
+            },
+        ),
+        (
+            "telemetry.provider.7.measurement",
+            {
+                "provider_id": 7,
+                "measured_at": "2026-03-10T09:00:40+00:00",
+                "measured_value": None,
+                "measured_unit": "kW",
+            },
+        ),
+    ]
+
+
+def test_poller_asks_for_resync_after_a_write_behind_the_stream(monkeypatch):
+    table = MeasurementTable()
+    monkeypatch.setattr(telemetry_stream, "MeasurementRepository", table.repository)
+    poller = TelemetryStreamPoller(TelemetryStreamHub(), None, interval_seconds=1)
+    now = datetime(2026, 3, 10, 9, 0, tzinfo=timezone.utc)
+    table.add(7, now - timedelta(minutes=1), 1.0)
+    poller.poll(None, [7], now)
+
+    table.add(7, now - timedelta(minutes=30), 0.5)
+    table.add(7, now + timedelta(seconds=10), 2.0)
+
+    assert poller.poll(None, [7], now + timedelta(minutes=1)) == [
+        ("telemetry.provider.7.resync", {})
+    ]
+
+
+def test_poller_and_nats_stream_each_measurement_once(monkeypatch):
+    table = MeasurementTable()
+    monkeypatch.setattr(telemetry_stream, "MeasurementRepository", table.repository)
+
+    @contextmanager
+    def open_session():
+        yield None
+
+    async def scenario():
+        hub, nc = await _started_hub()
+        hub.start_polling(open_session, interval_seconds=0.01)
+        subscription = hub.subscribe([("provider", 7)])
+        await asyncio.sleep(0.05)
+
+        measured_at = datetime.now(timezone.utc) - timedelta(seconds=1)
+        table.add(7, measured_at, 1.5)
+        # This process's own write also arrives over NATS.
+        await nc.publish(
+            measurement_subject(7),
+            orjson.dumps({"provider_id": 7, "measured_at": measured_at.isoformat()}),
+        )
+        await asyncio.sleep(0.05)
+
+        assert await subscription.get(timeout=0.1) == (
+            "measurement",
+            {"provider_id": 7, "measured_at": measured_at.isoformat()},
+        )
+        assert await subscription.get(timeout=0.05) is None
+
+        await close_telemetry_stream(hub)
+        assert not hub.running
+
+    asyncio.run(scenario())